@@ -0,0 +1,51 @@
+"""Add delta sync metrics to menu sync jobs and per-side mapping hashes
+
+Revision ID: 009_menu_sync_job_metrics
+Revises: 008_pos_analytics
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_menu_sync_job_metrics'
+down_revision = '008_pos_analytics'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'menu_sync_jobs',
+        sa.Column('sync_metrics', sa.JSON(), nullable=True)
+    )
+
+    # Push and pull each compare against the hash of their own side
+    op.add_column(
+        'pos_menu_mappings',
+        sa.Column('aura_hash', sa.String(64), nullable=True)
+    )
+    op.add_column(
+        'pos_menu_mappings',
+        sa.Column('pos_hash', sa.String(64), nullable=True)
+    )
+    # Until now both directions compared against sync_hash
+    op.execute(
+        "UPDATE pos_menu_mappings SET aura_hash = sync_hash, pos_hash = sync_hash "
+        "WHERE sync_hash IS NOT NULL"
+    )
+
+    # Delta sync loads every mapping of an entity type per integration at once
+    op.create_index(
+        'ix_pos_menu_mappings_integration_type',
+        'pos_menu_mappings',
+        ['pos_integration_id', 'entity_type', 'is_active']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_pos_menu_mappings_integration_type', table_name='pos_menu_mappings')
+    op.drop_column('pos_menu_mappings', 'pos_hash')
+    op.drop_column('pos_menu_mappings', 'aura_hash')
+    op.drop_column('menu_sync_jobs', 'sync_metrics')
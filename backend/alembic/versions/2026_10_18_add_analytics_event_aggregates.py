@@ -0,0 +1,61 @@
+"""Add per-minute realtime event aggregates
+
+Revision ID: add_analytics_event_aggregates
+Revises: add_analytics_rollup_tables
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_analytics_event_aggregates'
+down_revision = 'add_analytics_rollup_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create aggregate and processed-event tables for the event processor"""
+
+    # Per-minute totals by staff member or product, upserted by every worker
+    op.create_table(
+        'analytics_event_aggregates',
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('dimension', sa.String(20), nullable=False),
+        sa.Column('dimension_id', sa.Integer(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('quantity', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('action_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('bucket_start', 'dimension', 'dimension_id'),
+    )
+    op.create_index(
+        'idx_event_aggregates_dimension',
+        'analytics_event_aggregates',
+        ['dimension', 'dimension_id', 'bucket_start'],
+    )
+
+    # Events already folded into the aggregates, so redelivered stream
+    # entries are not counted twice
+    op.create_table(
+        'analytics_processed_events',
+        sa.Column('event_id', sa.String(64), primary_key=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        'idx_processed_events_processed_at',
+        'analytics_processed_events',
+        ['processed_at'],
+    )
+
+
+def downgrade():
+    """Drop realtime event aggregate tables"""
+
+    op.drop_index('idx_processed_events_processed_at', table_name='analytics_processed_events')
+    op.drop_table('analytics_processed_events')
+    op.drop_index('idx_event_aggregates_dimension', table_name='analytics_event_aggregates')
+    op.drop_table('analytics_event_aggregates')
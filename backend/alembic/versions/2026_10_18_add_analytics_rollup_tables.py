@@ -0,0 +1,173 @@
+"""Add incrementally maintained analytics rollup tables
+
+Revision ID: add_analytics_rollup_tables
+Revises: create_materialized_views_2025_01_21
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_analytics_rollup_tables'
+down_revision = 'create_materialized_views_2025_01_21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create rollup tables that replace full materialized view refreshes"""
+
+    # 1. Daily sales rollup (replaces mv_daily_sales_summary)
+    op.create_table(
+        'analytics_rollup_daily_sales',
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=True),
+        sa.Column('total_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unique_customers', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_revenue', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('avg_order_value', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('total_discounts', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('total_tax', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('completed_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cancelled_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lunch_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('dinner_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('active_staff', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('highest_order_value', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('lowest_order_value', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        'idx_rollup_daily_sales_date_restaurant',
+        'analytics_rollup_daily_sales',
+        ['sale_date', 'restaurant_id'],
+    )
+
+    # 2. Product performance rollup (replaces mv_product_performance)
+    op.create_table(
+        'analytics_rollup_product_daily',
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('product_name', sa.String(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('category_name', sa.String(), nullable=True),
+        sa.Column('quantity_sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('order_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unique_customers', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('avg_price', sa.Numeric(12, 2), nullable=False, server_default='0'),
+    )
+    op.create_index(
+        'idx_rollup_product_daily_date_restaurant',
+        'analytics_rollup_product_daily',
+        ['sale_date', 'restaurant_id'],
+    )
+    op.create_index(
+        'idx_rollup_product_daily_product',
+        'analytics_rollup_product_daily',
+        ['product_id', 'sale_date'],
+    )
+
+    # 3. Hourly sales rollup (replaces mv_hourly_sales_patterns). Kept per
+    # calendar day so the 90-day window slides without a rebuild.
+    op.create_table(
+        'analytics_rollup_hourly_sales',
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('hour_of_day', sa.Integer(), nullable=False),
+        sa.Column('day_of_week', sa.Integer(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=True),
+        sa.Column('order_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_revenue', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('unique_customers', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processing_minutes_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('processed_orders', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index(
+        'idx_rollup_hourly_sales_date_restaurant',
+        'analytics_rollup_hourly_sales',
+        ['sale_date', 'restaurant_id'],
+    )
+    op.create_index(
+        'idx_rollup_hourly_sales_pattern',
+        'analytics_rollup_hourly_sales',
+        ['restaurant_id', 'hour_of_day', 'day_of_week'],
+    )
+
+    # 4. POS provider daily rollup (replaces mv_pos_provider_daily_summary)
+    op.create_table(
+        'analytics_rollup_pos_provider_daily',
+        sa.Column('provider_id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('total_transactions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('successful_transactions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed_transactions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_transaction_value', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('avg_uptime', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('avg_sync_time', sa.Float(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('provider_id', 'snapshot_date'),
+    )
+
+    # 5. High-water marks of source rows already folded into the rollups
+    op.create_table(
+        'analytics_rollup_state',
+        sa.Column('rollup_name', sa.String(50), primary_key=True),
+        sa.Column('high_water_mark', sa.DateTime(), nullable=True),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+        sa.Column('last_run_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_run_buckets', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+    # Change detection scans source rows by modification time
+    op.create_index('idx_orders_updated_at', 'orders', ['updated_at'])
+    op.create_index(
+        'idx_pos_analytics_snapshots_updated_at',
+        'pos_analytics_snapshots',
+        ['updated_at'],
+    )
+
+    # The rollups take over the four order/POS views; only customer lifetime
+    # value is still refreshed as a materialized view. The old views are left
+    # in place so a downgrade does not need to rebuild them.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_analytics_materialized_views()
+        RETURNS void AS $$
+        BEGIN
+            REFRESH MATERIALIZED VIEW CONCURRENTLY mv_customer_lifetime_value;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade():
+    """Drop rollup tables and restore the full view refresh function"""
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_analytics_materialized_views()
+        RETURNS void AS $$
+        BEGIN
+            -- Refresh views in dependency order
+            REFRESH MATERIALIZED VIEW CONCURRENTLY mv_daily_sales_summary;
+            REFRESH MATERIALIZED VIEW CONCURRENTLY mv_product_performance;
+            REFRESH MATERIALIZED VIEW CONCURRENTLY mv_hourly_sales_patterns;
+            REFRESH MATERIALIZED VIEW CONCURRENTLY mv_customer_lifetime_value;
+            REFRESH MATERIALIZED VIEW CONCURRENTLY mv_pos_provider_daily_summary;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.drop_index('idx_pos_analytics_snapshots_updated_at', table_name='pos_analytics_snapshots')
+    op.drop_index('idx_orders_updated_at', table_name='orders')
+
+    op.drop_table('analytics_rollup_state')
+    op.drop_table('analytics_rollup_pos_provider_daily')
+    op.drop_index('idx_rollup_hourly_sales_pattern', table_name='analytics_rollup_hourly_sales')
+    op.drop_index('idx_rollup_hourly_sales_date_restaurant', table_name='analytics_rollup_hourly_sales')
+    op.drop_table('analytics_rollup_hourly_sales')
+    op.drop_index('idx_rollup_product_daily_product', table_name='analytics_rollup_product_daily')
+    op.drop_index('idx_rollup_product_daily_date_restaurant', table_name='analytics_rollup_product_daily')
+    op.drop_table('analytics_rollup_product_daily')
+    op.drop_index('idx_rollup_daily_sales_date_restaurant', table_name='analytics_rollup_daily_sales')
+    op.drop_table('analytics_rollup_daily_sales')
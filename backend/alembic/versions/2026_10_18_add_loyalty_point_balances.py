@@ -0,0 +1,77 @@
+"""Add materialized loyalty point balances and expiry buckets
+
+Revision ID: add_loyalty_point_balances
+Revises: add_analytics_event_aggregates
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_loyalty_point_balances'
+down_revision = 'add_analytics_event_aggregates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create balance and expiry bucket tables and backfill them from the ledger"""
+
+    op.create_table(
+        'customer_points_balances',
+        sa.Column('customer_id', sa.Integer(), sa.ForeignKey('customers.id'), primary_key=True),
+        sa.Column('points_balance', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lifetime_earned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lifetime_spent', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lifetime_expired', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        'loyalty_points_expiry_buckets',
+        sa.Column('customer_id', sa.Integer(), sa.ForeignKey('customers.id'), nullable=False),
+        sa.Column('expires_on', sa.Date(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('customer_id', 'expires_on'),
+    )
+    op.create_index(
+        'ix_loyalty_points_expiry_buckets_date',
+        'loyalty_points_expiry_buckets',
+        ['expires_on'],
+    )
+
+    # Balances are also created lazily on first use; backfilling here keeps
+    # the first request for every existing customer cheap
+    op.execute(
+        """
+        INSERT INTO customer_points_balances
+            (customer_id, points_balance, lifetime_earned, lifetime_spent, lifetime_expired)
+        SELECT
+            customer_id,
+            SUM(CASE WHEN is_expired = false THEN points_change ELSE 0 END),
+            SUM(CASE WHEN points_change > 0 THEN points_change ELSE 0 END),
+            SUM(CASE WHEN points_change < 0 THEN -points_change ELSE 0 END),
+            SUM(CASE WHEN is_expired = true THEN points_change ELSE 0 END)
+        FROM loyalty_points_transactions
+        GROUP BY customer_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO loyalty_points_expiry_buckets (customer_id, expires_on, points)
+        SELECT customer_id, CAST(expires_at AS DATE), SUM(points_change)
+        FROM loyalty_points_transactions
+        WHERE expires_at IS NOT NULL AND is_expired = false
+        GROUP BY customer_id, CAST(expires_at AS DATE)
+        """
+    )
+
+
+def downgrade():
+    """Drop loyalty point balance tables"""
+
+    op.drop_index('ix_loyalty_points_expiry_buckets_date', table_name='loyalty_points_expiry_buckets')
+    op.drop_table('loyalty_points_expiry_buckets')
+    op.drop_table('customer_points_balances')
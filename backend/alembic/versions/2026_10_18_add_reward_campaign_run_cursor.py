@@ -0,0 +1,38 @@
+"""Add automated run progress to reward campaigns
+
+Revision ID: add_reward_campaign_run_cursor
+Revises: add_loyalty_point_balances
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_reward_campaign_run_cursor'
+down_revision = 'add_loyalty_point_balances'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add campaign run checkpoint columns and the reward lookup index"""
+
+    op.add_column('reward_campaigns', sa.Column('run_cursor', sa.Integer(), nullable=True))
+    op.add_column('reward_campaigns', sa.Column('last_run_at', sa.DateTime(), nullable=True))
+
+    # Per-customer reward counts for a template during campaign runs
+    op.create_index(
+        'ix_customer_rewards_v2_template_customer',
+        'customer_rewards_v2',
+        ['template_id', 'customer_id'],
+    )
+
+
+def downgrade():
+    """Remove campaign run checkpoint columns and the reward lookup index"""
+
+    op.drop_index('ix_customer_rewards_v2_template_customer', table_name='customer_rewards_v2')
+    op.drop_column('reward_campaigns', 'last_run_at')
+    op.drop_column('reward_campaigns', 'run_cursor')
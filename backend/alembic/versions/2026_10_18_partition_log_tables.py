@@ -0,0 +1,193 @@
+"""Partition append-only log tables by time range
+
+Revision ID: partition_log_tables
+Revises: add_reward_campaign_run_cursor
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'partition_log_tables'
+down_revision = 'add_reward_campaign_run_cursor'
+branch_labels = None
+depends_on = None
+
+
+# Table, partition column and partition interval; kept in step with
+# core.partitioning.PARTITIONED_TABLES
+PARTITIONED_TABLES = [
+    ('audit_logs', 'timestamp', 'month'),
+    ('sync_logs', 'started_at', 'day'),
+    ('notification_channel_stats', 'stat_date', 'day'),
+    ('priority_metrics', 'metric_date', 'day'),
+    ('priority_adjustment_logs', 'adjusted_at', 'day'),
+    ('pricing_rule_metrics', 'date', 'month'),
+]
+
+# Unique keys that must include the partition column, narrowed again on downgrade
+WIDENED_UNIQUE_KEYS = {'audit_logs': ['request_id']}
+
+# Partitions created past the current one; later ones come from the daily
+# ensure_partitions job
+PARTITION_LOOKAHEAD = timedelta(days=35)
+
+
+def _partition_start(value, interval):
+    start = datetime(value.year, value.month, value.day)
+    return start.replace(day=1) if interval == 'month' else start
+
+
+def _next_start(start, interval):
+    if interval == 'day':
+        return start + timedelta(days=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _partition_name(table, start, interval):
+    return f"{table}_p{start.strftime('%Y%m' if interval == 'month' else '%Y%m%d')}"
+
+
+def _columns(definition):
+    """Column names in the trailing column list of an index or constraint."""
+    inner = definition[definition.rindex('(') + 1:definition.rindex(')')]
+    return [name.strip().strip('"') for name in inner.split(',')]
+
+
+def _with_columns(definition, columns):
+    quoted = ', '.join(f'"{name}"' for name in columns)
+    return f"{definition[:definition.rindex('(')]}({quoted})"
+
+
+def _is_partitioned(bind, table):
+    return bool(bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {'table': table}).scalar())
+
+
+def _capture_keys(bind, table):
+    """Unique and foreign key constraints, and the indexes not backing them."""
+    constraints = bind.execute(sa.text(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass) AND contype IN ('u', 'f')"
+    ), {'table': table}).all()
+    indexes = bind.execute(sa.text(
+        "SELECT indexdef FROM pg_indexes "
+        "WHERE tablename = :table AND schemaname = current_schema() "
+        "AND indexname NOT IN ("
+        "  SELECT conname FROM pg_constraint "
+        "  WHERE conrelid = CAST(:table AS regclass))"
+    ), {'table': table}).scalars().all()
+    return constraints, indexes
+
+
+def _rebuild(table, column, interval, partitioned):
+    """
+    Recreate ``table`` as a range partitioned table or back as a plain one.
+
+    Rows are copied into the new table, then keys and indexes captured from
+    the old one are recreated under their original names.
+    """
+    bind = op.get_bind()
+    constraints, indexes = _capture_keys(bind, table)
+    sequence = bind.execute(
+        sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}
+    ).scalar()
+    old_table = f'{table}_unpartitioned' if partitioned else f'{table}_partitioned'
+
+    op.execute(f'ALTER TABLE "{table}" RENAME TO "{old_table}"')
+    partition_by = f' PARTITION BY RANGE ("{column}")' if partitioned else ''
+    op.execute(
+        f'CREATE TABLE "{table}" (LIKE "{old_table}" '
+        f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}'
+    )
+
+    if partitioned:
+        # Existing rows go into one history partition, dropped by retention
+        # once all of it is past the cutoff
+        now = datetime.utcnow()
+        start = _partition_start(now, interval)
+        op.execute(
+            f'CREATE TABLE "{table}_history" PARTITION OF "{table}" '
+            f"FOR VALUES FROM (MINVALUE) TO ('{start.isoformat(sep=' ')}')"
+        )
+        while start < now + PARTITION_LOOKAHEAD:
+            end = _next_start(start, interval)
+            op.execute(
+                f'CREATE TABLE "{_partition_name(table, start, interval)}" '
+                f'PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start.isoformat(sep=' ')}') "
+                f"TO ('{end.isoformat(sep=' ')}')"
+            )
+            start = end
+
+    op.execute(f'INSERT INTO "{table}" SELECT * FROM "{old_table}"')
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{table}".id')
+    op.execute(f'DROP TABLE "{old_table}"')
+
+    # Keys on a partitioned table must include the partition column
+    primary_key = f'id, "{column}"' if partitioned else 'id'
+    op.execute(
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ({primary_key})'
+    )
+
+    widened = WIDENED_UNIQUE_KEYS.get(table, [])
+
+    def keyed(definition):
+        if 'UNIQUE' not in definition:
+            return definition
+        columns = _columns(definition)
+        if partitioned and column not in columns:
+            return _with_columns(definition, columns + [column])
+        if not partitioned and columns == widened + [column]:
+            return _with_columns(definition, widened)
+        return definition
+
+    for name, _, definition in constraints:
+        op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {keyed(definition)}')
+    for definition in indexes:
+        op.execute(keyed(definition))
+
+
+def upgrade():
+    """Convert log tables to range partitioned tables"""
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    tables = set(sa.inspect(bind).get_table_names())
+
+    for table, column, interval in PARTITIONED_TABLES:
+        if table not in tables or _is_partitioned(bind, table):
+            continue
+
+        # Partition keys are part of the primary key, so every row needs one
+        fallback = 'created_at' if 'created_at' in {
+            col['name'] for col in sa.inspect(bind).get_columns(table)
+        } else 'now()'
+        op.execute(
+            f'UPDATE "{table}" SET "{column}" = COALESCE({fallback}, now()) '
+            f'WHERE "{column}" IS NULL'
+        )
+        op.execute(f'ALTER TABLE "{table}" ALTER COLUMN "{column}" SET NOT NULL')
+
+        _rebuild(table, column, interval, partitioned=True)
+
+
+def downgrade():
+    """Convert partitioned log tables back to plain tables"""
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    for table, column, interval in reversed(PARTITIONED_TABLES):
+        if _is_partitioned(bind, table):
+            _rebuild(table, column, interval, partitioned=False)
@@ -501,6 +501,9 @@ async def shutdown_event():
     await stop_queue_monitor()
     # Stop priority monitor
     await stop_priority_monitor()
+    # Write buffered A/B test exposures
+    from modules.promotions.services.ab_assignment import exposure_recorder
+    exposure_recorder.close()
 
 
 @app.get("/")
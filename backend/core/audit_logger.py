@@ -7,12 +7,29 @@ This module provides comprehensive audit logging for compliance and security mon
 import json
 import logging
 import asyncio
-from datetime import datetime
-from typing import Dict, Optional, Any
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import aiofiles
 
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    JSON,
+    Text,
+    Index,
+    UniqueConstraint,
+    case,
+    func,
+    select,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
@@ -26,17 +43,88 @@ logger = logging.getLogger(__name__)
 AUDIT_LOG_DIR = Path("/var/log/auraconnect/audit") if IS_PRODUCTION else Path("./logs/audit")
 AUDIT_LOG_DIR.mkdir(parents=True, exist_ok=True)
 
+# Entries that could not be queued or written, replayed once the database catches up
+AUDIT_OVERFLOW_FILE = AUDIT_LOG_DIR / "audit_overflow.jsonl"
+
+# Most entries written to the database in one insert
+AUDIT_BATCH_SIZE = 500
+
+# Longest a batch waits for more entries once it has one
+AUDIT_BATCH_WAIT_MS = 200
+
+# Queued entries beyond this make callers wait, then spill to the overflow file
+AUDIT_QUEUE_MAX_SIZE = 10000
+
+# How long a caller waits for room in a full queue before spilling to file
+AUDIT_BACKPRESSURE_SECONDS = 0.05
+
+# How long a start entry waits for its completion so both are written as one row
+AUDIT_START_HOLD_SECONDS = 2.0
+
+# Starts written without their completion, remembered so the completion lands
+# on the same row; audit_logs is partitioned by timestamp, so rows are keyed by
+# request_id and the start's timestamp
+AUDIT_WRITTEN_STARTS_MAX = 10000
+
+# How far before a completion its start row is looked up when the start was
+# written by another worker, before a restart or evicted from memory
+AUDIT_START_LOOKUP_WINDOW = timedelta(hours=1)
+
+# Columns written for every audit row
+AUDIT_ROW_COLUMNS = (
+    "timestamp",
+    "operation_type",
+    "user_id",
+    "client_ip",
+    "request_id",
+    "status",
+    "status_code",
+    "duration_ms",
+    "request_data",
+    "response_data",
+    "error_message",
+    "audit_metadata",
+)
+
+# Fields a completion or failure entry sets on its request's row
+AUDIT_RESULT_COLUMNS = (
+    "status",
+    "status_code",
+    "duration_ms",
+    "response_data",
+    "error_message",
+)
+
+audit_queue_depth = Gauge(
+    "audit_log_queue_depth",
+    "Audit entries waiting to be written to the database",
+)
+audit_batch_size = Histogram(
+    "audit_log_batch_size",
+    "Audit rows written per database insert",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500),
+)
+audit_flush_latency = Histogram(
+    "audit_log_flush_duration_seconds",
+    "Time taken to write one batch of audit rows",
+)
+audit_overflow_entries = Counter(
+    "audit_log_overflow_entries_total",
+    "Audit entries spilled to the overflow file",
+    ["reason"],
+)
+
 
 class AuditLog(Base):
     """Database model for audit logs."""
     __tablename__ = "audit_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     operation_type = Column(String(50), index=True)
     user_id = Column(Integer, nullable=True, index=True)
     client_ip = Column(String(45))  # Support IPv6
-    request_id = Column(String(100), unique=True, index=True)
+    request_id = Column(String(100), index=True)
     status = Column(String(20))  # started, completed, failed
     status_code = Column(Integer, nullable=True)
     duration_ms = Column(Integer, nullable=True)
@@ -48,6 +136,7 @@ class AuditLog(Base):
     __table_args__ = (
         Index("idx_audit_user_operation", "user_id", "operation_type"),
         Index("idx_audit_timestamp_operation", "timestamp", "operation_type"),
+        UniqueConstraint("request_id", "timestamp", name="uq_audit_request_timestamp"),
     )
 
 
@@ -61,8 +150,17 @@ class AuditLogger:
     def __init__(self):
         self.file_logger = self._setup_file_logger()
         self._db_session = None
-        self._write_queue = asyncio.Queue(maxsize=1000)
+        self._write_queue = asyncio.Queue(maxsize=AUDIT_QUEUE_MAX_SIZE)
         self._writer_task = None
+        # Start rows waiting for their completion, oldest first
+        self._held_starts: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        # Timestamps of starts written on their own, by request
+        self._written_starts: "OrderedDict[str, str]" = OrderedDict()
+        # Completions whose start row's timestamp is looked up before writing
+        self._unmatched_completions: set = set()
+        self._overflow_pending = AUDIT_OVERFLOW_FILE.exists()
+        self._last_batch_size = 0
+        self._last_flush_ms = 0.0
     
     def _setup_file_logger(self) -> logging.Logger:
         """Set up file-based audit logger."""
@@ -145,10 +243,7 @@ class AuditLogger:
         self.file_logger.info(f"AUDIT_START: {json.dumps(log_entry)}")
         
         # Queue for database write
-        try:
-            self._write_queue.put_nowait(("start", log_entry))
-        except asyncio.QueueFull:
-            logger.warning("Audit write queue full, dropping database write")
+        await self._enqueue("start", log_entry)
     
     async def log_operation_complete(
         self,
@@ -173,10 +268,7 @@ class AuditLogger:
         self.file_logger.info(f"AUDIT_COMPLETE: {json.dumps(log_entry)}")
         
         # Queue for database write
-        try:
-            self._write_queue.put_nowait(("complete", log_entry))
-        except asyncio.QueueFull:
-            logger.warning("Audit write queue full, dropping database write")
+        await self._enqueue("complete", log_entry)
     
     async def log_operation_failure(
         self,
@@ -199,10 +291,7 @@ class AuditLogger:
         self.file_logger.error(f"AUDIT_FAILURE: {json.dumps(log_entry)}")
         
         # Queue for database write
-        try:
-            self._write_queue.put_nowait(("failure", log_entry))
-        except asyncio.QueueFull:
-            logger.warning("Audit write queue full, dropping database write")
+        await self._enqueue("failure", log_entry)
     
     async def log_security_event(
         self,
@@ -231,74 +320,316 @@ class AuditLogger:
         # Also log to application logger for monitoring
         logger.warning(f"Security event: {event_type} - {description}")
     
+    def get_metrics(self) -> Dict[str, Any]:
+        """Current state of the database writer."""
+        return {
+            "queue_depth": self._write_queue.qsize(),
+            "held_starts": len(self._held_starts),
+            "last_batch_size": self._last_batch_size,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "overflow_pending": self._overflow_pending,
+        }
+    
+    async def _enqueue(self, operation: str, log_entry: Dict[str, Any]):
+        """Queue an entry for the database, waiting briefly when the queue is full."""
+        if not self._db_session:
+            # File-only logging; the file logger already has the entry
+            return
+        
+        item = (operation, log_entry)
+        try:
+            self._write_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(
+                    self._write_queue.put(item), AUDIT_BACKPRESSURE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Audit write queue full, spilling entry to overflow file")
+                await self._write_overflow([item], reason="queue_full")
+        audit_queue_depth.set(self._write_queue.qsize())
+    
     async def _background_writer(self):
-        """Background task to write audit logs to database."""
+        """Background task to write audit logs to database in batches."""
         while True:
+            batch, stop = await self._next_batch()
+            rows = self._merge_batch(batch, flush_all=stop)
+            flushed = await self._flush(rows) if rows else True
+            
+            if stop:
+                break
+            
+            # Catch up on spilled entries once the queue has drained
+            if flushed and self._overflow_pending and self._write_queue.empty():
+                await self._replay_overflow()
+    
+    async def _next_batch(self) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+        """
+        Wait for an entry, then take up to AUDIT_BATCH_SIZE entries or
+        whatever arrives within AUDIT_BATCH_WAIT_MS.
+        
+        Returns the batch and whether the shutdown signal was reached.
+        """
+        loop = asyncio.get_running_loop()
+        batch = []
+        
+        # Held starts must still be written if no further entries arrive
+        timeout = AUDIT_START_HOLD_SECONDS if self._held_starts else None
+        try:
+            item = await asyncio.wait_for(self._write_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return batch, False
+        
+        deadline = loop.time() + AUDIT_BATCH_WAIT_MS / 1000
+        while True:
+            if item is None:
+                return batch, True
+            batch.append(item)
+            if len(batch) >= AUDIT_BATCH_SIZE:
+                break
+            
             try:
-                # Get item from queue
-                item = await self._write_queue.get()
-                
-                # Check for shutdown signal
-                if item is None:
+                item = self._write_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
                     break
-                
-                operation, log_entry = item
-                
-                # Skip if no database session
-                if not self._db_session:
+                try:
+                    item = await asyncio.wait_for(self._write_queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        
+        audit_queue_depth.set(self._write_queue.qsize())
+        return batch, False
+    
+    def _merge_batch(
+        self,
+        batch: List[Tuple[str, Dict[str, Any]]],
+        flush_all: bool = False,
+        hold_starts: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Turn queued entries into audit rows.
+        
+        A start entry is held until its completion or failure arrives, so the
+        pair becomes one row; starts held longer than AUDIT_START_HOLD_SECONDS
+        are written on their own and completed later by the upsert. With
+        hold_starts off, as for replayed entries, the batch's own starts are
+        written at once and other held starts are left alone.
+        
+        Spilled rows sharing a key are merged as the upsert would merge them,
+        since one insert cannot update the same row twice.
+        """
+        rows = []
+        # Rows in this batch by request, so each request is inserted once
+        request_rows = {}
+        # Spilled rows in this batch by (request_id, timestamp)
+        spilled_rows = {}
+        # Starts written in this batch without being held
+        unheld_starts = []
+        now = time.monotonic()
+        
+        for operation, log_entry in batch:
+            request_id = log_entry.get("request_id")
+            if operation == "row":
+                key = (request_id, log_entry.get("timestamp"))
+                if request_id is None:
+                    rows.append(log_entry)
+                elif key in spilled_rows:
+                    self._merge_result(spilled_rows[key], log_entry)
+                else:
+                    rows.append(log_entry)
+                    spilled_rows[key] = log_entry
+                    request_rows.setdefault(request_id, log_entry)
+                continue
+            
+            if operation == "start":
+                row = self._audit_row(log_entry)
+                if request_id is None:
+                    rows.append(row)
+                elif hold_starts:
+                    self._held_starts[request_id] = (row, now)
+                else:
+                    rows.append(row)
+                    request_rows[request_id] = row
+                    unheld_starts.append(row)
+                continue
+            
+            held = self._held_starts.pop(request_id, None)
+            row = request_rows.get(request_id)
+            if row is None:
+                row = held[0] if held else self._audit_row(log_entry)
+                if not held and request_id in self._written_starts:
+                    row["timestamp"] = self._written_starts.pop(request_id)
+                elif not held and request_id is not None:
+                    self._unmatched_completions.add(request_id)
+                rows.append(row)
+                if request_id is not None:
+                    request_rows[request_id] = row
+            for column in AUDIT_RESULT_COLUMNS:
+                row[column] = log_entry.get(column)
+        
+        for row in unheld_starts:
+            if row["status"] == "started":
+                self._remember_written_start(row)
+        
+        if not hold_starts:
+            return rows
+        
+        for request_id, (row, held_at) in list(self._held_starts.items()):
+            if not flush_all and now - held_at < AUDIT_START_HOLD_SECONDS:
+                break
+            rows.append(row)
+            del self._held_starts[request_id]
+            self._remember_written_start(row)
+        
+        return rows
+    
+    def _remember_written_start(self, row: Dict[str, Any]):
+        """Keep a start written alone so its completion targets the same row."""
+        self._written_starts[row["request_id"]] = row["timestamp"]
+        if len(self._written_starts) > AUDIT_WRITTEN_STARTS_MAX:
+            self._written_starts.popitem(last=False)
+    
+    @staticmethod
+    def _merge_result(row: Dict[str, Any], later: Dict[str, Any]):
+        """Apply a later row's result fields, as the upsert's ON CONFLICT does."""
+        for column in AUDIT_RESULT_COLUMNS:
+            value = later.get(column)
+            if value is None or (column == "status" and value == "started"):
+                continue
+            row[column] = value
+    
+    @staticmethod
+    def _audit_row(log_entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {column: log_entry.get(column) for column in AUDIT_ROW_COLUMNS}
+    
+    def _upsert_statement(self, rows: List[Dict[str, Any]]):
+        """
+        One multi-row insert; a row whose request was already written as
+        started takes the result fields instead of failing on its key.
+        """
+        values = [
+            {**row, "timestamp": datetime.fromisoformat(row["timestamp"])}
+            for row in rows
+        ]
+        statement = insert(AuditLog).values(values)
+        excluded = statement.excluded
+        return statement.on_conflict_do_update(
+            index_elements=[AuditLog.request_id, AuditLog.timestamp],
+            set_={
+                "status": case(
+                    (excluded.status == "started", AuditLog.status),
+                    else_=excluded.status,
+                ),
+                "status_code": func.coalesce(excluded.status_code, AuditLog.status_code),
+                "duration_ms": func.coalesce(excluded.duration_ms, AuditLog.duration_ms),
+                "response_data": func.coalesce(
+                    excluded.response_data, AuditLog.response_data
+                ),
+                "error_message": func.coalesce(
+                    excluded.error_message, AuditLog.error_message
+                ),
+            },
+        )
+    
+    async def _match_started_rows(
+        self, session, rows: List[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Give completions whose start is not known in memory the timestamp of
+        their started row, if one was written, so the upsert completes that
+        row instead of inserting a second one. Returns the request_ids checked.
+        """
+        unmatched = {
+            row["request_id"]: row
+            for row in rows
+            if row["request_id"] in self._unmatched_completions
+        }
+        if not unmatched:
+            return []
+        
+        earliest = min(
+            datetime.fromisoformat(row["timestamp"]) for row in unmatched.values()
+        ) - AUDIT_START_LOOKUP_WINDOW
+        result = await session.execute(
+            select(AuditLog.request_id, func.max(AuditLog.timestamp))
+            .where(
+                AuditLog.request_id.in_(list(unmatched)),
+                AuditLog.status == "started",
+                AuditLog.timestamp >= earliest,
+            )
+            .group_by(AuditLog.request_id)
+        )
+        for request_id, started_at in result.all():
+            unmatched[request_id]["timestamp"] = started_at.isoformat()
+        return list(unmatched)
+    
+    async def _flush(self, rows: List[Dict[str, Any]]) -> bool:
+        """Write rows in one statement; rows that fail go to the overflow file."""
+        start_time = time.perf_counter()
+        try:
+            async with self._db_session() as session:
+                matched = await self._match_started_rows(session, rows)
+                await session.execute(self._upsert_statement(rows))
+                await session.commit()
+            # Kept on failure so replaying the spilled rows looks them up again
+            self._unmatched_completions.difference_update(matched)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} audit logs to database: {e}")
+            await self._write_overflow(
+                [("row", row) for row in rows], reason="write_failed"
+            )
+            return False
+        finally:
+            self._last_batch_size = len(rows)
+            self._last_flush_ms = (time.perf_counter() - start_time) * 1000
+            audit_batch_size.observe(len(rows))
+            audit_flush_latency.observe(self._last_flush_ms / 1000)
+    
+    async def _write_overflow(
+        self, items: List[Tuple[str, Dict[str, Any]]], reason: str
+    ):
+        """Append entries to the overflow file for a later replay."""
+        lines = "".join(
+            json.dumps({"operation": operation, "entry": entry}, default=str) + "\n"
+            for operation, entry in items
+        )
+        try:
+            async with aiofiles.open(AUDIT_OVERFLOW_FILE, "a", encoding="utf-8") as f:
+                await f.write(lines)
+            self._overflow_pending = True
+            audit_overflow_entries.labels(reason=reason).inc(len(items))
+        except Exception as e:
+            logger.error(f"Failed to write audit overflow file: {e}")
+    
+    async def _replay_overflow(self):
+        """Write spilled entries to the database in batches."""
+        replay_file = AUDIT_OVERFLOW_FILE.with_suffix(".replay")
+        try:
+            # New spills go to a fresh overflow file while this one is replayed
+            os.replace(AUDIT_OVERFLOW_FILE, replay_file)
+        except FileNotFoundError:
+            self._overflow_pending = False
+            return
+        self._overflow_pending = False
+        
+        batch = []
+        async with aiofiles.open(replay_file, "r", encoding="utf-8") as f:
+            async for line in f:
+                if not line.strip():
                     continue
-                
-                # Write to database
-                async with self._db_session() as session:
-                    if operation == "start":
-                        audit_log = AuditLog(
-                            timestamp=datetime.fromisoformat(log_entry["timestamp"]),
-                            operation_type=log_entry["operation_type"],
-                            user_id=log_entry.get("user_id"),
-                            client_ip=log_entry.get("client_ip"),
-                            request_id=log_entry.get("request_id"),
-                            status="started",
-                            request_data=log_entry.get("request_data"),
-                            metadata=log_entry.get("metadata")
-                        )
-                        session.add(audit_log)
-                    
-                    elif operation in ["complete", "failure"]:
-                        # Update existing log entry
-                        result = await session.execute(
-                            "UPDATE audit_logs SET status = :status, "
-                            "status_code = :status_code, duration_ms = :duration_ms, "
-                            "response_data = :response_data, error_message = :error_message "
-                            "WHERE request_id = :request_id",
-                            {
-                                "status": log_entry["status"],
-                                "status_code": log_entry.get("status_code"),
-                                "duration_ms": log_entry.get("duration_ms"),
-                                "response_data": log_entry.get("response_data"),
-                                "error_message": log_entry.get("error_message"),
-                                "request_id": log_entry["request_id"]
-                            }
-                        )
-                        
-                        # If no existing entry, create new one
-                        if result.rowcount == 0:
-                            audit_log = AuditLog(
-                                timestamp=datetime.fromisoformat(log_entry["timestamp"]),
-                                operation_type=log_entry["operation_type"],
-                                request_id=log_entry["request_id"],
-                                status=log_entry["status"],
-                                status_code=log_entry.get("status_code"),
-                                duration_ms=log_entry.get("duration_ms"),
-                                response_data=log_entry.get("response_data"),
-                                error_message=log_entry.get("error_message")
-                            )
-                            session.add(audit_log)
-                    
-                    await session.commit()
-                    
-            except Exception as e:
-                logger.error(f"Failed to write audit log to database: {e}")
-                # Continue processing other items
+                record = json.loads(line)
+                batch.append((record["operation"], record["entry"]))
+                if len(batch) >= AUDIT_BATCH_SIZE:
+                    await self._flush(self._merge_batch(batch, hold_starts=False))
+                    batch = []
+        if batch:
+            await self._flush(self._merge_batch(batch, hold_starts=False))
+        
+        replay_file.unlink()
+        logger.info("Replayed audit overflow file")
 
 
 # Global audit logger instance
@@ -90,6 +90,10 @@ class POSMenuMapping(Base, TimestampMixin):
     sync_hash = Column(
         String(64), nullable=True
     )  # Hash of synced data for change detection
+    # Per-side hashes of the data as of its last sync; push compares
+    # AuraConnect data with aura_hash and pull compares POS data with pos_hash
+    aura_hash = Column(String(64), nullable=True)
+    pos_hash = Column(String(64), nullable=True)
 
     # Status tracking
     is_active = Column(Boolean, nullable=False, default=True)
@@ -104,6 +108,12 @@ class POSMenuMapping(Base, TimestampMixin):
         Index("ix_pos_menu_mappings_entity", "entity_type", "aura_entity_id"),
         Index("ix_pos_menu_mappings_pos_entity", "pos_vendor", "pos_entity_id"),
         Index("ix_pos_menu_mappings_sync_status", "sync_enabled", "is_active"),
+        Index(
+            "ix_pos_menu_mappings_integration_type",
+            "pos_integration_id",
+            "entity_type",
+            "is_active",
+        ),
     )
 
     def __repr__(self):
@@ -142,6 +152,9 @@ class MenuSyncJob(Base, TimestampMixin):
     successful_entities = Column(Integer, nullable=False, default=0)
     failed_entities = Column(Integer, nullable=False, default=0)
     conflicts_detected = Column(Integer, nullable=False, default=0)
+    sync_metrics = Column(
+        JSON, nullable=True
+    )  # Entities scanned/changed/transferred/skipped and wall time
 
     # Error handling
     error_message = Column(Text, nullable=True)
@@ -60,6 +60,8 @@ class POSMenuMapping(POSMenuMappingBase):
     aura_last_modified: Optional[datetime] = None
     pos_last_modified: Optional[datetime] = None
     sync_hash: Optional[str] = None
+    aura_hash: Optional[str] = None
+    pos_hash: Optional[str] = None
     is_active: bool
     created_at: datetime
     updated_at: datetime
@@ -100,6 +102,7 @@ class MenuSyncJob(MenuSyncJobBase):
     successful_entities: int = 0
     failed_entities: int = 0
     conflicts_detected: int = 0
+    sync_metrics: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
     retry_count: int = 0
     max_retries: int = 3
@@ -294,6 +297,7 @@ class StartSyncRequest(BaseModel):
     entity_types: Optional[List[str]] = None
     entity_ids: Optional[List[int]] = None
     force_sync: bool = False
+    delta_sync: bool = True  # Skip entities whose content hash is unchanged
     conflict_resolution: Optional[ConflictResolution] = None
 
 
@@ -301,6 +305,7 @@ class SyncStatusResponse(BaseModel):
     job_id: uuid.UUID
     status: SyncStatus
     progress: Dict[str, int]  # processed, total, conflicts, errors
+    metrics: Optional[Dict[str, Any]] = None  # scanned, changed, transferred
     started_at: Optional[datetime] = None
     estimated_completion: Optional[datetime] = None
     current_operation: Optional[str] = None
@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 import asyncio
 import json
 import hashlib
+import logging
+import time
 import uuid
 from contextlib import contextmanager
 
@@ -36,6 +38,24 @@ from ..modules.pos.adapters.square_adapter import SquareAdapter
 from ..modules.pos.adapters.toast_adapter import ToastAdapter
 from ..modules.pos.adapters.clover_adapter import CloverAdapter
 
+logger = logging.getLogger(__name__)
+
+# Changed entities sent per vendor batch-upsert call in delta push
+DELTA_PUSH_BATCH_SIZE = 100
+
+# Entity IDs per IN (...) clause when bulk-loading AuraConnect entities
+BULK_LOAD_CHUNK_SIZE = 5000
+
+# Entity types the POS adapters can batch upsert
+BATCH_UPSERT_ENTITY_TYPES = ("category", "item", "modifier_group")
+
+AURA_ENTITY_MODELS = {
+    "category": MenuCategory,
+    "item": MenuItem,
+    "modifier_group": ModifierGroup,
+    "modifier": Modifier,
+}
+
 
 class MenuSyncService:
     """Service for synchronizing menu data between AuraConnect and POS systems"""
@@ -105,6 +125,7 @@ class MenuSyncService:
             triggered_by_id=user_id,
             job_config={
                 "force_sync": request.force_sync,
+                "delta_sync": request.delta_sync,
                 "conflict_resolution": request.conflict_resolution
                 or sync_config.default_conflict_resolution,
             },
@@ -281,12 +302,14 @@ class MenuSyncService:
         aura_hash = self._calculate_entity_hash(aura_data) if aura_data else None
         pos_hash = self._calculate_entity_hash(pos_data) if pos_data else None
 
-        # Check if either side has changed since last sync
-        aura_changed = aura_hash != mapping.sync_hash
-        pos_changed = pos_hash != mapping.sync_hash
+        # Check if either side has changed since it was last synced
+        aura_changed = aura_hash != mapping.aura_hash
+        pos_changed = pos_hash != mapping.pos_hash
 
+        self._record_metric(ctx, "scanned")
         if not aura_changed and not pos_changed:
             # No changes detected
+            self._record_metric(ctx, "skipped")
             await self._log_sync_operation(
                 sync_job,
                 mapping,
@@ -297,6 +320,8 @@ class MenuSyncService:
             )
             return
 
+        self._record_metric(ctx, "changed")
+
         # Handle different change scenarios
         if aura_changed and not pos_changed:
             # Only AuraConnect changed, push to POS
@@ -502,7 +527,9 @@ class MenuSyncService:
             "sync_job": sync_job,
             "version_id": version_id,
             "start_time": datetime.utcnow(),
+            "metrics": {"scanned": 0, "changed": 0, "transferred": 0, "skipped": 0},
         }
+        started = time.monotonic()
 
         try:
             yield context
@@ -510,6 +537,24 @@ class MenuSyncService:
             # Log any unhandled exceptions
             print(f"Sync context error: {str(e)}")
             raise
+        finally:
+            sync_job.sync_metrics = {
+                **context["metrics"],
+                "wall_time_ms": int((time.monotonic() - started) * 1000),
+            }
+
+    def _record_metric(self, ctx: Dict, name: str, count: int = 1):
+        """Increment a delta sync counter on the sync context"""
+        metrics = ctx.get("metrics")
+        if metrics is not None:
+            metrics[name] += count
+
+    def _is_delta_sync(self, sync_job: MenuSyncJob) -> bool:
+        """Whether unchanged entities (same content hash) should be skipped"""
+        job_config = sync_job.job_config or {}
+        return job_config.get("delta_sync", True) and not job_config.get(
+            "force_sync", False
+        )
 
     async def _log_sync_operation(
         self,
@@ -706,6 +751,7 @@ class MenuSyncService:
                 "conflicts": sync_job.conflicts_detected,
                 "errors": sync_job.failed_entities,
             },
+            metrics=sync_job.sync_metrics,
             started_at=sync_job.started_at,
             estimated_completion=estimated_completion,
             current_operation=f"Processing {sync_job.sync_direction.value} sync",
@@ -718,96 +764,16 @@ class MenuSyncService:
     ) -> Optional[Dict]:
         """Get entity data from AuraConnect system"""
         try:
-            if entity_type == "category":
-                entity = (
-                    self.db.query(MenuCategory)
-                    .filter(
-                        MenuCategory.id == entity_id, MenuCategory.deleted_at.is_(None)
-                    )
-                    .first()
-                )
-                if entity:
-                    return {
-                        "id": entity.id,
-                        "name": entity.name,
-                        "description": entity.description,
-                        "display_order": entity.display_order,
-                        "is_active": entity.is_active,
-                        "parent_category_id": entity.parent_category_id,
-                        "updated_at": (
-                            entity.updated_at.isoformat() if entity.updated_at else None
-                        ),
-                    }
-
-            elif entity_type == "item":
-                entity = (
-                    self.db.query(MenuItem)
-                    .filter(MenuItem.id == entity_id, MenuItem.deleted_at.is_(None))
-                    .first()
-                )
-                if entity:
-                    return {
-                        "id": entity.id,
-                        "name": entity.name,
-                        "description": entity.description,
-                        "price": float(entity.price),
-                        "category_id": entity.category_id,
-                        "sku": entity.sku,
-                        "is_active": entity.is_active,
-                        "is_available": entity.is_available,
-                        "calories": entity.calories,
-                        "dietary_tags": entity.dietary_tags,
-                        "allergens": entity.allergens,
-                        "updated_at": (
-                            entity.updated_at.isoformat() if entity.updated_at else None
-                        ),
-                    }
-
-            elif entity_type == "modifier_group":
-                entity = (
-                    self.db.query(ModifierGroup)
-                    .filter(
-                        ModifierGroup.id == entity_id,
-                        ModifierGroup.deleted_at.is_(None),
-                    )
-                    .first()
-                )
-                if entity:
-                    return {
-                        "id": entity.id,
-                        "name": entity.name,
-                        "description": entity.description,
-                        "selection_type": entity.selection_type,
-                        "min_selections": entity.min_selections,
-                        "max_selections": entity.max_selections,
-                        "is_required": entity.is_required,
-                        "is_active": entity.is_active,
-                        "updated_at": (
-                            entity.updated_at.isoformat() if entity.updated_at else None
-                        ),
-                    }
-
-            elif entity_type == "modifier":
-                entity = (
-                    self.db.query(Modifier)
-                    .filter(Modifier.id == entity_id, Modifier.deleted_at.is_(None))
-                    .first()
-                )
-                if entity:
-                    return {
-                        "id": entity.id,
-                        "name": entity.name,
-                        "description": entity.description,
-                        "price_adjustment": float(entity.price_adjustment),
-                        "price_type": entity.price_type,
-                        "is_active": entity.is_active,
-                        "is_available": entity.is_available,
-                        "updated_at": (
-                            entity.updated_at.isoformat() if entity.updated_at else None
-                        ),
-                    }
+            model = AURA_ENTITY_MODELS.get(entity_type)
+            if not model:
+                return None
 
-            return None
+            entity = (
+                self.db.query(model)
+                .filter(model.id == entity_id, model.deleted_at.is_(None))
+                .first()
+            )
+            return self._serialize_aura_entity(entity_type, entity) if entity else None
 
         except Exception as e:
             logger.error(
@@ -815,6 +781,83 @@ class MenuSyncService:
             )
             return None
 
+    async def _get_aura_entities_data(
+        self, entity_type: str, entity_ids: List[int]
+    ) -> Dict[int, Dict]:
+        """Bulk-load AuraConnect entities of one type, keyed by entity ID"""
+        model = AURA_ENTITY_MODELS.get(entity_type)
+        if not model or not entity_ids:
+            return {}
+
+        unique_ids = list(set(entity_ids))
+        entities = {}
+        for i in range(0, len(unique_ids), BULK_LOAD_CHUNK_SIZE):
+            chunk = unique_ids[i : i + BULK_LOAD_CHUNK_SIZE]
+            rows = (
+                self.db.query(model)
+                .filter(model.id.in_(chunk), model.deleted_at.is_(None))
+                .all()
+            )
+            for entity in rows:
+                entities[entity.id] = self._serialize_aura_entity(entity_type, entity)
+
+        return entities
+
+    def _serialize_aura_entity(self, entity_type: str, entity) -> Dict:
+        """Convert an AuraConnect menu entity into sync data"""
+        updated_at = entity.updated_at.isoformat() if entity.updated_at else None
+
+        if entity_type == "category":
+            return {
+                "id": entity.id,
+                "name": entity.name,
+                "description": entity.description,
+                "display_order": entity.display_order,
+                "is_active": entity.is_active,
+                "parent_category_id": entity.parent_category_id,
+                "updated_at": updated_at,
+            }
+
+        if entity_type == "item":
+            return {
+                "id": entity.id,
+                "name": entity.name,
+                "description": entity.description,
+                "price": float(entity.price),
+                "category_id": entity.category_id,
+                "sku": entity.sku,
+                "is_active": entity.is_active,
+                "is_available": entity.is_available,
+                "calories": entity.calories,
+                "dietary_tags": entity.dietary_tags,
+                "allergens": entity.allergens,
+                "updated_at": updated_at,
+            }
+
+        if entity_type == "modifier_group":
+            return {
+                "id": entity.id,
+                "name": entity.name,
+                "description": entity.description,
+                "selection_type": entity.selection_type,
+                "min_selections": entity.min_selections,
+                "max_selections": entity.max_selections,
+                "is_required": entity.is_required,
+                "is_active": entity.is_active,
+                "updated_at": updated_at,
+            }
+
+        return {
+            "id": entity.id,
+            "name": entity.name,
+            "description": entity.description,
+            "price_adjustment": float(entity.price_adjustment),
+            "price_type": entity.price_type,
+            "is_active": entity.is_active,
+            "is_available": entity.is_available,
+            "updated_at": updated_at,
+        }
+
     async def _get_pos_entity_data(
         self, pos_adapter, entity_type: str, pos_entity_id: str
     ) -> Optional[Dict]:
@@ -855,7 +898,12 @@ class MenuSyncService:
     async def _push_entity_type(
         self, sync_job: MenuSyncJob, pos_adapter, entity_type: str, ctx
     ):
-        """Push all entities of a specific type to POS"""
+        """Push all entities of a specific type to POS
+
+        AuraConnect entities are loaded in bulk and hashed in memory; in delta
+        mode mappings whose hash matches ``aura_hash`` are skipped and the
+        remaining ones are sent through the adapter's batch upsert.
+        """
         try:
             # Get all mappings for this entity type
             mappings = (
@@ -875,22 +923,103 @@ class MenuSyncService:
                 .all()
             )
 
+            aura_entities = await self._get_aura_entities_data(
+                entity_type, [mapping.aura_entity_id for mapping in mappings]
+            )
+            delta_sync = self._is_delta_sync(sync_job)
+            sync_job.total_entities += len(mappings)
+
+            changed = []
             for mapping in mappings:
-                try:
-                    # Get current AuraConnect data
-                    aura_data = await self._get_aura_entity_data(
-                        entity_type, mapping.aura_entity_id
+                self._record_metric(ctx, "scanned")
+                aura_data = aura_entities.get(mapping.aura_entity_id)
+
+                if not aura_data:
+                    logger.warning(
+                        f"AuraConnect {entity_type} {mapping.aura_entity_id} not found"
                     )
-                    if aura_data:
-                        await self._push_entity_to_pos(
-                            sync_job, pos_adapter, mapping, aura_data, ctx
-                        )
-                        sync_job.successful_entities += 1
-                    else:
-                        logger.warning(
-                            f"AuraConnect {entity_type} {mapping.aura_entity_id} not found"
+                    sync_job.failed_entities += 1
+                    sync_job.processed_entities += 1
+                    continue
+
+                if delta_sync and mapping.aura_hash == self._calculate_entity_hash(
+                    aura_data
+                ):
+                    self._record_metric(ctx, "skipped")
+                    sync_job.processed_entities += 1
+                    continue
+
+                changed.append((mapping, aura_data))
+
+            self._record_metric(ctx, "changed", len(changed))
+
+            pushed = []
+            for i in range(0, len(changed), DELTA_PUSH_BATCH_SIZE):
+                pushed += await self._push_entity_batch(
+                    sync_job,
+                    pos_adapter,
+                    entity_type,
+                    changed[i : i + DELTA_PUSH_BATCH_SIZE],
+                    ctx,
+                )
+
+            await self._refresh_pos_hashes(pos_adapter, entity_type, pushed)
+
+        except Exception as e:
+            logger.error(f"Error pushing {entity_type} entities: {str(e)}")
+            raise
+
+    async def _push_entity_batch(
+        self,
+        sync_job: MenuSyncJob,
+        pos_adapter,
+        entity_type: str,
+        batch: List[Tuple[POSMenuMapping, Dict]],
+        ctx,
+    ) -> List[POSMenuMapping]:
+        """Push a batch of changed entities; returns the mappings pushed
+
+        The adapter reports a failed entity in its result and raises only when
+        nothing was written, so the entity-by-entity fallback never creates an
+        entity the batch already created.
+        """
+        pushed = []
+        results = None
+        if entity_type in BATCH_UPSERT_ENTITY_TYPES:
+            try:
+                results = await pos_adapter.batch_upsert_menu_entities(
+                    entity_type,
+                    [
+                        (
+                            (
+                                mapping.pos_entity_id
+                                if mapping.pos_entity_id != "new"
+                                else None
+                            ),
+                            aura_data,
                         )
-                        sync_job.failed_entities += 1
+                        for mapping, aura_data in batch
+                    ],
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Batch upsert of {len(batch)} {entity_type} entities failed, "
+                    f"falling back to individual pushes: {str(e)}"
+                )
+
+        if results is None:
+            for mapping, aura_data in batch:
+                try:
+                    await self._push_entity_to_pos(
+                        sync_job,
+                        pos_adapter,
+                        mapping,
+                        aura_data,
+                        ctx,
+                        refresh_pos_hash=False,
+                    )
+                    sync_job.successful_entities += 1
+                    pushed.append(mapping)
 
                 except Exception as e:
                     logger.error(
@@ -900,20 +1029,94 @@ class MenuSyncService:
                     await self._log_sync_error(sync_job, mapping, str(e), ctx)
 
                 sync_job.processed_entities += 1
+            return pushed
 
+        if len(results) != len(batch):
+            logger.error(
+                f"Batch upsert returned {len(results)} results for {len(batch)} "
+                f"{entity_type} entities"
+            )
+
+        now = datetime.utcnow()
+        for index, (mapping, aura_data) in enumerate(batch):
+            if index >= len(results):
+                # Without a result the entity may not exist in POS
+                sync_job.failed_entities += 1
+                sync_job.processed_entities += 1
+                await self._log_sync_error(
+                    sync_job, mapping, "No result returned by batch upsert", ctx
+                )
+                continue
+
+            result = results[index]
+            if result.get("id") and mapping.pos_entity_id in (None, "", "new"):
+                mapping.pos_entity_id = result["id"]
+
+            if result.get("error"):
+                sync_job.failed_entities += 1
+                sync_job.processed_entities += 1
+                await self._log_sync_error(sync_job, mapping, result["error"], ctx)
+                continue
+
+            mapping.last_sync_at = now
+            mapping.last_sync_direction = SyncDirection.PUSH
+            mapping.aura_hash = self._calculate_entity_hash(aura_data)
+            mapping.sync_hash = mapping.aura_hash
+            self._record_metric(ctx, "transferred")
+
+            await self._log_sync_operation(
+                sync_job,
+                mapping,
+                "push",
+                SyncDirection.PUSH,
+                SyncStatus.SUCCESS,
+                ctx,
+                aura_data_after=aura_data,
+            )
+            sync_job.successful_entities += 1
+            sync_job.processed_entities += 1
+            pushed.append(mapping)
+
+        return pushed
+
+    async def _list_pos_entities(self, pos_adapter, entity_type: str) -> Dict:
+        """Load the POS entities of one type, keyed by POS ID"""
+        getters = {
+            "category": pos_adapter.get_menu_categories,
+            "item": pos_adapter.get_menu_items,
+            "modifier_group": pos_adapter.get_modifier_groups,
+        }
+        if entity_type not in getters:
+            return {}
+        return {entity.get("id"): entity for entity in await getters[entity_type]()}
+
+    async def _refresh_pos_hashes(
+        self, pos_adapter, entity_type: str, mappings: List[POSMenuMapping]
+    ):
+        """Record the POS side of pushed entities so the next sync sees no change"""
+        if not mappings:
+            return
+        try:
+            pos_entities = await self._list_pos_entities(pos_adapter, entity_type)
         except Exception as e:
-            logger.error(f"Error pushing {entity_type} entities: {str(e)}")
-            raise
+            logger.warning(f"Could not reload POS {entity_type} after push: {str(e)}")
+            return
+
+        for mapping in mappings:
+            pos_data = pos_entities.get(mapping.pos_entity_id)
+            if pos_data:
+                mapping.pos_hash = self._calculate_entity_hash(pos_data)
 
     async def _pull_categories(self, sync_job: MenuSyncJob, pos_adapter, ctx):
         """Pull categories from POS system"""
         try:
             pos_categories = await pos_adapter.get_menu_categories()
+            mappings = self._load_mappings_by_pos_id(sync_job, "category")
 
             for pos_category in pos_categories:
                 try:
                     await self._process_pos_entity(
-                        sync_job, "category", pos_category, pos_adapter, ctx
+                        sync_job, "category", pos_category, pos_adapter, ctx, mappings
                     )
                     sync_job.processed_entities += 1
 
@@ -931,11 +1134,12 @@ class MenuSyncService:
         """Pull menu items from POS system"""
         try:
             pos_items = await pos_adapter.get_menu_items()
+            mappings = self._load_mappings_by_pos_id(sync_job, "item")
 
             for pos_item in pos_items:
                 try:
                     await self._process_pos_entity(
-                        sync_job, "item", pos_item, pos_adapter, ctx
+                        sync_job, "item", pos_item, pos_adapter, ctx, mappings
                     )
                     sync_job.processed_entities += 1
 
@@ -953,11 +1157,18 @@ class MenuSyncService:
         """Pull modifiers from POS system"""
         try:
             pos_modifier_groups = await pos_adapter.get_modifier_groups()
+            group_mappings = self._load_mappings_by_pos_id(sync_job, "modifier_group")
+            modifier_mappings = self._load_mappings_by_pos_id(sync_job, "modifier")
 
             for pos_group in pos_modifier_groups:
                 try:
                     await self._process_pos_entity(
-                        sync_job, "modifier_group", pos_group, pos_adapter, ctx
+                        sync_job,
+                        "modifier_group",
+                        pos_group,
+                        pos_adapter,
+                        ctx,
+                        group_mappings,
                     )
                     sync_job.processed_entities += 1
 
@@ -966,7 +1177,12 @@ class MenuSyncService:
                     for pos_modifier in pos_modifiers:
                         try:
                             await self._process_pos_entity(
-                                sync_job, "modifier", pos_modifier, pos_adapter, ctx
+                                sync_job,
+                                "modifier",
+                                pos_modifier,
+                                pos_adapter,
+                                ctx,
+                                modifier_mappings,
                             )
                             sync_job.processed_entities += 1
                         except Exception as e:
@@ -990,25 +1206,46 @@ class MenuSyncService:
         pos_entity_data: Dict,
         pos_adapter,
         ctx,
+        mappings: Optional[Dict[str, POSMenuMapping]] = None,
     ):
-        """Process a single entity from POS system"""
+        """Process a single entity from POS system
+
+        ``mappings`` is the preloaded mapping index from
+        ``_load_mappings_by_pos_id``; without it the mapping is queried.
+        """
         pos_entity_id = pos_entity_data.get("id")
         if not pos_entity_id:
             logger.warning(f"POS {entity_type} missing ID, skipping")
             return
 
+        self._record_metric(ctx, "scanned")
+
         # Check if mapping exists
-        mapping = (
-            self.db.query(POSMenuMapping)
-            .filter(
-                and_(
-                    POSMenuMapping.pos_integration_id == sync_job.pos_integration_id,
-                    POSMenuMapping.entity_type == entity_type,
-                    POSMenuMapping.pos_entity_id == pos_entity_id,
+        if mappings is not None:
+            mapping = mappings.get(pos_entity_id)
+        else:
+            mapping = (
+                self.db.query(POSMenuMapping)
+                .filter(
+                    and_(
+                        POSMenuMapping.pos_integration_id
+                        == sync_job.pos_integration_id,
+                        POSMenuMapping.entity_type == entity_type,
+                        POSMenuMapping.pos_entity_id == pos_entity_id,
+                    )
                 )
+                .first()
             )
-            .first()
-        )
+
+        if (
+            mapping
+            and self._is_delta_sync(sync_job)
+            and mapping.pos_hash == self._calculate_entity_hash(pos_entity_data)
+        ):
+            self._record_metric(ctx, "skipped")
+            return
+
+        self._record_metric(ctx, "changed")
 
         if mapping:
             # Update existing mapping
@@ -1019,6 +1256,22 @@ class MenuSyncService:
                 sync_job, entity_type, pos_entity_data, ctx
             )
 
+    def _load_mappings_by_pos_id(
+        self, sync_job: MenuSyncJob, entity_type: str
+    ) -> Dict[str, POSMenuMapping]:
+        """Load all mappings of an entity type in one query, keyed by POS ID"""
+        mappings = (
+            self.db.query(POSMenuMapping)
+            .filter(
+                and_(
+                    POSMenuMapping.pos_integration_id == sync_job.pos_integration_id,
+                    POSMenuMapping.entity_type == entity_type,
+                )
+            )
+            .all()
+        )
+        return {mapping.pos_entity_id: mapping for mapping in mappings}
+
     async def _push_entity_to_pos(
         self,
         sync_job: MenuSyncJob,
@@ -1026,6 +1279,7 @@ class MenuSyncService:
         mapping: POSMenuMapping,
         entity_data: Dict,
         ctx,
+        refresh_pos_hash: bool = True,
     ):
         """Push a single entity to POS system"""
         try:
@@ -1072,7 +1326,11 @@ class MenuSyncService:
             # Update mapping metadata
             mapping.last_sync_at = datetime.utcnow()
             mapping.last_sync_direction = SyncDirection.PUSH
-            mapping.sync_hash = self._calculate_entity_hash(entity_data)
+            mapping.aura_hash = self._calculate_entity_hash(entity_data)
+            mapping.sync_hash = mapping.aura_hash
+            if refresh_pos_hash:
+                await self._refresh_pos_hashes(pos_adapter, entity_type, [mapping])
+            self._record_metric(ctx, "transferred")
 
             await self._log_sync_operation(
                 sync_job,
@@ -1104,6 +1362,7 @@ class MenuSyncService:
         try:
             entity_type = mapping.entity_type
             aura_entity_id = mapping.aura_entity_id
+            entity = None
 
             # Get current AuraConnect entity
             if entity_type == "category":
@@ -1129,8 +1388,15 @@ class MenuSyncService:
             # Update mapping metadata
             mapping.last_sync_at = datetime.utcnow()
             mapping.last_sync_direction = SyncDirection.PULL
-            mapping.sync_hash = self._calculate_entity_hash(entity_data)
+            mapping.pos_hash = self._calculate_entity_hash(entity_data)
+            mapping.sync_hash = mapping.pos_hash
+            if entity:
+                # Record the AuraConnect side as written so it is not pushed back
+                mapping.aura_hash = self._calculate_entity_hash(
+                    self._serialize_aura_entity(entity_type, entity)
+                )
             mapping.pos_entity_data = entity_data
+            self._record_metric(ctx, "transferred")
 
             await self._log_sync_operation(
                 sync_job,
@@ -1200,9 +1466,14 @@ class MenuSyncService:
                     pos_entity_data=pos_entity_data,
                     last_sync_at=datetime.utcnow(),
                     last_sync_direction=SyncDirection.PULL,
+                    aura_hash=self._calculate_entity_hash(
+                        self._serialize_aura_entity(entity_type, new_entity)
+                    ),
+                    pos_hash=self._calculate_entity_hash(pos_entity_data),
                     sync_hash=self._calculate_entity_hash(pos_entity_data),
                 )
                 self.db.add(mapping)
+                self._record_metric(ctx, "transferred")
 
                 await self._log_sync_operation(
                     sync_job,
@@ -0,0 +1,213 @@
+# backend/core/partitioning.py
+
+"""
+Time-range partitioning and retention for append-only log tables.
+
+On PostgreSQL the tables in PARTITIONED_TABLES are range partitioned on a
+timestamp column by the partition_log_tables migration. Partitions are
+created ahead of time by ``ensure_partitions`` and retention drops whole
+partitions. Rows before the cutoff in the partition that spans it, and all
+rows on databases without partitioning (SQLite in tests, or a table the
+migration has not converted yet), are removed with batched deletes.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# How far past the current partition new partitions are created
+PARTITION_LOOKAHEAD = timedelta(days=35)
+
+# Rows removed per statement by batched deletes
+RETENTION_DELETE_BATCH_SIZE = 5000
+
+# Upper bound of a range partition, as shown by pg_get_expr
+PARTITION_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """A table range partitioned on ``column`` by day or by month."""
+
+    table: str
+    column: str
+    interval: str  # "day" or "month"
+
+    def partition_start(self, value: datetime) -> datetime:
+        start = datetime(value.year, value.month, value.day)
+        return start.replace(day=1) if self.interval == "month" else start
+
+    def next_start(self, start: datetime) -> datetime:
+        if self.interval == "day":
+            return start + timedelta(days=1)
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    def partition_name(self, start: datetime) -> str:
+        suffix = start.strftime("%Y%m" if self.interval == "month" else "%Y%m%d")
+        return f"{self.table}_p{suffix}"
+
+
+PARTITIONED_TABLES: Dict[str, PartitionSpec] = {
+    spec.table: spec
+    for spec in (
+        PartitionSpec("audit_logs", "timestamp", "month"),
+        PartitionSpec("sync_logs", "started_at", "day"),
+        PartitionSpec("notification_channel_stats", "stat_date", "day"),
+        PartitionSpec("priority_metrics", "metric_date", "day"),
+        PartitionSpec("priority_adjustment_logs", "adjusted_at", "day"),
+        PartitionSpec("pricing_rule_metrics", "date", "month"),
+    )
+}
+
+
+class RetentionResult(NamedTuple):
+    partitions_dropped: List[str]
+    rows_deleted: int
+
+
+def is_partitioned(db: Session, table: str) -> bool:
+    """Whether ``table`` is a partitioned table in the connected database."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(
+        db.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+            ),
+            {"table": table},
+        ).scalar()
+    )
+
+
+def list_partitions(db: Session, table: str) -> List[Tuple[str, datetime]]:
+    """Range partitions of ``table`` with their upper bounds, oldest first."""
+    rows = db.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+        ),
+        {"table": table},
+    ).all()
+
+    partitions = []
+    for name, bound in rows:
+        match = PARTITION_UPPER_BOUND.search(bound or "")
+        if match:
+            # Bounds were written as naive timestamps; drop any offset shown
+            partitions.append((name, datetime.fromisoformat(match.group(1)[:19])))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partitions(
+    db: Session, spec: PartitionSpec, until: datetime, since: Optional[datetime] = None
+) -> List[str]:
+    """Create missing partitions of ``spec`` covering ``since`` to ``until``."""
+    created = []
+    start = spec.partition_start(since or datetime.utcnow())
+    existing = {name for name, _ in list_partitions(db, spec.table)}
+    while start < until:
+        end = spec.next_start(start)
+        name = spec.partition_name(start)
+        if name not in existing:
+            db.execute(
+                text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{spec.table}" '
+                    f"FOR VALUES FROM ('{start.isoformat(sep=' ')}') "
+                    f"TO ('{end.isoformat(sep=' ')}')"
+                )
+            )
+            created.append(name)
+        start = end
+    return created
+
+
+def ensure_partitions(db: Session) -> Dict[str, List[str]]:
+    """
+    Create partitions PARTITION_LOOKAHEAD ahead for every partitioned table.
+
+    Meant to run daily so inserts never hit a missing partition.
+    """
+    until = datetime.utcnow() + PARTITION_LOOKAHEAD
+    created = {}
+    for spec in PARTITIONED_TABLES.values():
+        if is_partitioned(db, spec.table):
+            created[spec.table] = create_partitions(db, spec, until)
+            db.commit()
+    return created
+
+
+def drop_partitions_before(db: Session, table: str, cutoff: datetime) -> List[str]:
+    """Detach and drop partitions of ``table`` holding only rows before ``cutoff``."""
+    dropped = []
+    for name, upper_bound in list_partitions(db, table):
+        if upper_bound > cutoff:
+            break
+        db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+        db.execute(text(f'DROP TABLE "{name}"'))
+        db.commit()
+        dropped.append(name)
+        logger.info(f"Dropped partition {name} of {table}")
+    return dropped
+
+
+def delete_in_batches(
+    db: Session,
+    model,
+    criteria: Sequence,
+    dependents: Sequence = (),
+    batch_size: int = RETENTION_DELETE_BATCH_SIZE,
+) -> int:
+    """
+    Delete rows of ``model`` matching ``criteria`` in committed batches.
+
+    Args:
+        dependents: Foreign key columns referencing ``model.id`` whose rows
+            are deleted along with the rows they reference
+
+    Returns:
+        Number of ``model`` rows deleted
+    """
+    deleted = 0
+    while True:
+        ids = (
+            db.execute(select(model.id).where(*criteria).limit(batch_size))
+            .scalars()
+            .all()
+        )
+        if not ids:
+            return deleted
+        for column in dependents:
+            db.execute(delete(column.class_).where(column.in_(ids)))
+        db.execute(delete(model).where(model.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            return deleted
+
+
+def purge_before(db: Session, model, cutoff: datetime) -> RetentionResult:
+    """
+    Remove rows of a partitioned log table older than ``cutoff``.
+
+    Whole partitions before the cutoff are dropped; what remains is deleted
+    in batches.
+    """
+    spec = PARTITIONED_TABLES[model.__tablename__]
+    dropped = []
+    if is_partitioned(db, spec.table):
+        dropped = drop_partitions_before(db, spec.table, cutoff)
+
+    rows_deleted = delete_in_batches(db, model, [getattr(model, spec.column) < cutoff])
+    return RetentionResult(dropped, rows_deleted)
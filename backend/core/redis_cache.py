@@ -375,10 +375,15 @@ class RedisCacheService:
         timeout: int = 10,
         blocking_timeout: Optional[float] = None
     ):
-        """Distributed lock using Redis."""
+        """
+        Distributed lock using Redis.
+
+        Yields the underlying lock so long-running holders can extend their
+        lease with ``reacquire()``; yields None when Redis is unavailable.
+        """
         if not self.redis_client:
             # No Redis, just yield without locking
-            yield
+            yield None
             return
             
         lock_key = f"{self.key_prefix}:locks:{name}"
@@ -392,7 +397,7 @@ class RedisCacheService:
             acquired = await lock.acquire()
             if not acquired:
                 raise TimeoutError(f"Could not acquire lock: {name}")
-            yield
+            yield lock
         finally:
             try:
                 await lock.release()
@@ -8,7 +8,7 @@ blacklisting, and cleanup for the AuraConnect authentication system.
 import os
 import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Set
+from typing import Callable, Dict, Iterable, Optional, Set
 from dataclasses import dataclass, field
 import redis
 from redis import Redis
@@ -22,6 +22,19 @@ logger = logging.getLogger(__name__)
 REDIS_URL = get_redis_url()
 SESSION_CLEANUP_INTERVAL = int(os.getenv("SESSION_CLEANUP_INTERVAL", "3600"))  # 1 hour
 
+# Sorted set of all session IDs scored by expiry time
+SESSION_EXPIRY_KEY = "session_expiry"
+
+# Expired sessions removed per pipelined round trip during cleanup
+SESSION_CLEANUP_BATCH_SIZE = 500
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def expiry_score(expires_at: datetime) -> float:
+    """Sorted set score for a naive UTC datetime."""
+    return (expires_at - EPOCH).total_seconds()
+
 
 @dataclass
 class Session:
@@ -95,9 +108,82 @@ class SessionManager:
         return f"session:{session_id}"
 
     def _get_user_sessions_key(self, user_id: int) -> str:
-        """Generate Redis key for user sessions list."""
+        """Generate Redis key for a user's sessions, scored by expiry."""
         return f"user_sessions:{user_id}"
 
+    @staticmethod
+    def _get_session_user_id(session_id: str) -> str:
+        """Session IDs start with the ID of the user they belong to."""
+        return session_id.split(":", 1)[0]
+
+    def _execute_user_pipeline(self, user_ids: Iterable, build: Callable) -> list:
+        """
+        Run a pipeline that touches the session index of the given users.
+
+        User session keys written before the expiry index are plain sets;
+        any found in the way are upgraded and the pipeline retried.
+        """
+        for attempt in range(2):
+            pipe = self.redis.pipeline()
+            build(pipe)
+            try:
+                return pipe.execute()
+            except redis.ResponseError as e:
+                if attempt or "WRONGTYPE" not in str(e):
+                    raise
+                for user_id in set(user_ids):
+                    self._upgrade_user_sessions_key(user_id)
+
+    def _upgrade_user_sessions_key(self, user_id):
+        """Convert a user's session set into a sorted set scored by expiry."""
+        user_sessions_key = self._get_user_sessions_key(user_id)
+        if self.redis.type(user_sessions_key) != "set":
+            return
+
+        session_ids = list(self.redis.smembers(user_sessions_key))
+        pipe = self.redis.pipeline()
+        for session_id in session_ids:
+            pipe.hget(self._get_session_key(session_id), "expires_at")
+        scores = {
+            session_id: expiry_score(datetime.fromisoformat(expires_at))
+            for session_id, expires_at in zip(session_ids, pipe.execute())
+            if expires_at
+        }
+
+        pipe = self.redis.pipeline()
+        pipe.delete(user_sessions_key)
+        if scores:
+            pipe.zadd(user_sessions_key, scores)
+            pipe.zadd(SESSION_EXPIRY_KEY, scores)
+        pipe.execute()
+        logger.info(f"Upgraded session index for user {user_id}")
+
+    def _remove_sessions(self, sessions: Dict[str, Optional[str]]) -> int:
+        """
+        Delete sessions and their index entries in one pipeline.
+
+        Args:
+            sessions: Session IDs mapped to the refresh token to blacklist, if any
+
+        Returns:
+            Number of sessions whose data was still stored
+        """
+        user_ids = [self._get_session_user_id(session_id) for session_id in sessions]
+        delete_positions = []
+
+        def build(pipe):
+            delete_positions.clear()
+            for session_id, user_id in zip(sessions, user_ids):
+                delete_positions.append(len(pipe))
+                pipe.delete(self._get_session_key(session_id))
+                pipe.zrem(self._get_user_sessions_key(user_id), session_id)
+                if sessions[session_id]:
+                    pipe.set(self._get_blacklist_key(sessions[session_id]), "1")
+            pipe.zrem(SESSION_EXPIRY_KEY, *sessions)
+
+        results = self._execute_user_pipeline(user_ids, build)
+        return sum(results[position] for position in delete_positions)
+
     def _get_blacklist_key(self, token: str) -> str:
         """Generate Redis key for blacklisted tokens."""
         return f"blacklist:{token}"
@@ -143,16 +229,20 @@ class SessionManager:
                 session_key = self._get_session_key(session_id)
                 user_sessions_key = self._get_user_sessions_key(user_id)
 
-                # Store session data
-                self.redis.hset(session_key, mapping=session.to_dict())
-
-                # Set expiration
                 ttl = int((expires_at - datetime.utcnow()).total_seconds())
-                self.redis.expire(session_key, ttl)
+                score = {session_id: expiry_score(expires_at)}
+
+                def build(pipe):
+                    # Store session data with expiration
+                    pipe.hset(session_key, mapping=session.to_dict())
+                    pipe.expire(session_key, ttl)
 
-                # Add to user sessions list
-                self.redis.sadd(user_sessions_key, session_id)
-                self.redis.expire(user_sessions_key, ttl)
+                    # Index by user and by expiry
+                    pipe.zadd(user_sessions_key, score)
+                    pipe.expire(user_sessions_key, ttl)
+                    pipe.zadd(SESSION_EXPIRY_KEY, score)
+
+                self._execute_user_pipeline([user_id], build)
 
             else:
                 # Fallback to memory storage
@@ -187,7 +277,7 @@ class SessionManager:
 
                 # Check if session is expired
                 if session.expires_at < datetime.utcnow():
-                    self.revoke_session(session_id)
+                    self._remove_sessions({session_id: session.refresh_token})
                     return None
 
                 # Update last accessed time
@@ -266,17 +356,8 @@ class SessionManager:
                 return False
 
             if self.redis:
-                session_key = self._get_session_key(session_id)
-                user_sessions_key = self._get_user_sessions_key(session.user_id)
-
-                # Remove session
-                self.redis.delete(session_key)
-
-                # Remove from user sessions list
-                self.redis.srem(user_sessions_key, session_id)
-
-                # Blacklist the refresh token
-                self.blacklist_token(session.refresh_token)
+                # Remove session and index entries, and blacklist the refresh token
+                self._remove_sessions({session_id: session.refresh_token})
 
             else:
                 # Memory storage
@@ -307,12 +388,29 @@ class SessionManager:
 
             if self.redis:
                 user_sessions_key = self._get_user_sessions_key(user_id)
-                session_ids = self.redis.smembers(user_sessions_key)
+                (session_ids,) = self._execute_user_pipeline(
+                    [user_id], lambda pipe: pipe.zrange(user_sessions_key, 0, -1)
+                )
 
+                pipe = self.redis.pipeline()
                 for session_id in session_ids:
-                    if self.revoke_session(session_id):
+                    pipe.hmget(
+                        self._get_session_key(session_id),
+                        "refresh_token",
+                        "expires_at",
+                    )
+                sessions = {}
+                current_time = datetime.utcnow()
+                for session_id, (refresh_token, expires_at) in zip(
+                    session_ids, pipe.execute()
+                ):
+                    sessions[session_id] = refresh_token
+                    if expires_at and datetime.fromisoformat(expires_at) > current_time:
                         revoked_count += 1
 
+                if sessions:
+                    self._remove_sessions(sessions)
+
                 # Clean up user sessions list
                 self.redis.delete(user_sessions_key)
 
@@ -400,22 +498,24 @@ class SessionManager:
             current_time = datetime.utcnow()
 
             if self.redis:
-                # Redis handles expiration automatically, but we can clean up orphaned data
-                cursor = 0
+                # Redis expires session data itself; the expiry index says which
+                # sessions are due so their index entries can be removed too
+                now = expiry_score(current_time)
                 while True:
-                    cursor, keys = self.redis.scan(cursor, match="session:*", count=100)
-                    for key in keys:
-                        session_data = self.redis.hgetall(key)
-                        if session_data:
-                            expires_at = datetime.fromisoformat(
-                                session_data["expires_at"]
-                            )
-                            if expires_at < current_time:
-                                self.redis.delete(key)
-                                cleaned_count += 1
-                    if cursor == 0:
+                    session_ids = self.redis.zrangebyscore(
+                        SESSION_EXPIRY_KEY,
+                        "-inf",
+                        now,
+                        start=0,
+                        num=SESSION_CLEANUP_BATCH_SIZE,
+                    )
+                    if not session_ids:
                         break
 
+                    cleaned_count += self._remove_sessions(
+                        {session_id: None for session_id in session_ids}
+                    )
+
             else:
                 # Memory storage cleanup
                 expired_sessions = [
@@ -450,7 +550,11 @@ class SessionManager:
         try:
             if self.redis:
                 user_sessions_key = self._get_user_sessions_key(user_id)
-                return self.redis.scard(user_sessions_key)
+                now = expiry_score(datetime.utcnow())
+                (count,) = self._execute_user_pipeline(
+                    [user_id], lambda pipe: pipe.zcount(user_sessions_key, now, "+inf")
+                )
+                return count
             else:
                 return sum(
                     1
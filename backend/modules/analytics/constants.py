@@ -7,7 +7,7 @@ Centralizes all configuration values and thresholds.
 """
 
 # Batch Processing Limits
-MAX_BATCH_SIZE = 100  # Maximum entities per batch forecast
+MAX_BATCH_SIZE = 1000  # Maximum entities per batch forecast
 MAX_PRODUCTS_PER_OPTIMIZATION = 50  # Maximum products per stock optimization
 MAX_EXPORT_ROWS = 100000  # Maximum rows for report export
 
@@ -21,6 +21,7 @@ MAX_HORIZON_DAYS = 90
 CACHE_TTL_SECONDS = 300  # 5 minutes cache TTL for forecasts
 REPORT_CACHE_TTL = 3600  # 1 hour cache for reports
 MODEL_CACHE_TTL = 1800  # 30 minutes cache for trained models
+FORECAST_STORE_TTL = 86400  # 24 hours for forecasts stored by series fingerprint
 
 # Model Configuration
 MIN_DATA_POINTS_FOR_FORECAST = 7  # Minimum historical points needed
@@ -57,6 +58,7 @@ MIN_SAMPLES_FOR_ANOMALY = 5  # Minimum samples needed
 # Performance Monitoring
 SLOW_QUERY_THRESHOLD_MS = 1000  # 1 second for slow query warning
 MAX_FORECAST_COMPUTATION_TIME_MS = 5000  # 5 seconds max per forecast
+FORECAST_POOL_MAX_WORKERS = 4  # Worker processes for batch model fitting
 
 # Real-time Updates
 REALTIME_UPDATE_INTERVALS = {
@@ -121,6 +123,19 @@ ENABLE_PROPHET_MODEL = True  # Requires additional dependency
 ENABLE_NEURAL_MODELS = False  # Future enhancement
 ENABLE_AUTO_RETRAIN = True  # Automatic model retraining
 ENABLE_EXTERNAL_FACTORS = True  # Weather, events, etc.
+ENABLE_SALES_CUBE = False  # Answer sales aggregates from the in-memory cube
+
+# Sales Cube
+SALES_CUBE_REFRESH_SECONDS = 60  # Minimum age before a cube pulls new orders
+SALES_CUBE_LOAD_CHUNK = 50000  # Order item rows fetched per round trip
+SALES_CUBE_MAX_IDLE_SECONDS = 3600  # Drop tenant cubes unused for this long
+
+# AI Assistant
+CHAT_SESSION_IDLE_SECONDS = 3600  # Sessions expire after an hour without messages
+CHAT_SESSION_LOCAL_MAX = 1000  # Sessions cached in each worker's LRU
+CHAT_SESSION_HISTORY_LIMIT = 20  # Messages kept per session
+CHAT_RESULT_TTL_SECONDS = 30  # Cached query results covering today
+CHAT_RESULT_HISTORICAL_TTL_SECONDS = 600  # Cached results for closed date ranges
 
 # Validation Rules
 MIN_PRODUCT_NAME_LENGTH = 3
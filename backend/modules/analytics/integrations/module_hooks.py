@@ -9,7 +9,7 @@ the analytics system of events that should trigger real-time metrics updates.
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -37,6 +37,7 @@ async def order_completed_hook(
     items_count: int,
     table_no: Optional[int] = None,
     completed_at: Optional[datetime] = None,
+    items: Optional[List[Dict[str, Any]]] = None,
 ):
     """
     Hook to be called when an order is completed.
@@ -52,6 +53,7 @@ async def order_completed_hook(
         items_count: Number of items in the order
         table_no: Table number (if applicable)
         completed_at: Completion timestamp (defaults to now)
+        items: Line items with product_id, quantity and price (optional)
     """
     try:
         event = OrderCompletedEvent(
@@ -62,6 +64,7 @@ async def order_completed_hook(
             items_count=items_count,
             completed_at=completed_at or datetime.now(),
             table_no=table_no,
+            items=items,
         )
 
         await event_processor.process_order_completed(event)
@@ -81,6 +84,7 @@ def order_completed_sync(
     items_count: int,
     table_no: Optional[int] = None,
     completed_at: Optional[datetime] = None,
+    items: Optional[List[Dict[str, Any]]] = None,
 ):
     """
     Synchronous version of order_completed_hook for non-async contexts.
@@ -97,6 +101,7 @@ def order_completed_sync(
                 items_count=items_count,
                 table_no=table_no,
                 completed_at=completed_at,
+                items=items,
             )
         )
     except Exception as e:
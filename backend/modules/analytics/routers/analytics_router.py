@@ -502,6 +502,7 @@ async def health_check():
 @router.post("/export/csv")
 async def export_to_csv(
     request: SalesReportRequest,
+    compress: bool = Query(False, description="Gzip the CSV while streaming"),
     db: Session = Depends(get_db),
     current_user: User = Depends(
         require_analytics_permission(AnalyticsPermission.EXPORT_REPORTS)
@@ -511,7 +512,8 @@ async def export_to_csv(
     Export sales report to CSV format.
 
     Supports all report types: sales_summary, sales_detailed,
-    staff_performance, and product_performance.
+    staff_performance, and product_performance. Detailed reports are
+    streamed without a row limit.
     """
     try:
         from ..services.export_service import ExportService
@@ -519,7 +521,10 @@ async def export_to_csv(
         export_service = ExportService(db)
 
         return await export_service.export_sales_report(
-            request=request, format_type="csv", executed_by=current_user["id"]
+            request=request,
+            format_type="csv",
+            executed_by=current_user["id"],
+            compress=compress,
         )
 
     except Exception as e:
@@ -147,7 +147,7 @@ async def batch_forecast(
     """
     require_analytics_permission(current_user, "manage_analytics")
 
-    if len(batch_request.entity_ids) > MAX_BATCH_SIZE:
+    if len(batch_request.predictions) > MAX_BATCH_SIZE:
         raise HTTPException(
             status_code=400,
             detail=f"Batch size exceeds maximum limit of {MAX_BATCH_SIZE}",
@@ -184,8 +184,9 @@ class BatchForecastResult(BaseModel):
     status: str
     message: Optional[str] = None
     forecasts: Optional[List[DemandForecast]] = None
-    expected_waste_reduction: float
-    optimization_summary: Dict[str, Any]
+    summary: Optional[Dict[str, Any]] = None
+    expected_waste_reduction: float = 0.0
+    optimization_summary: Dict[str, Any] = Field(default_factory=dict)
     generated_at: datetime = Field(default_factory=datetime.now)
 
 
@@ -294,6 +294,9 @@ class OrderCompletedEvent(BaseModel):
     items_count: int
     completed_at: datetime
     table_no: Optional[int] = None
+    items: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Line items (product_id, quantity, price) for product metrics"
+    )
 
     class Config:
         json_encoders = {datetime: lambda v: v.isoformat(), Decimal: lambda v: float(v)}
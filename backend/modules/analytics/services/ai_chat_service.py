@@ -16,7 +16,8 @@ from decimal import Decimal
 from sqlalchemy.orm import Session
 from sqlalchemy import text, func, and_
 
-from core.database import get_db
+from core.database import get_db, SessionLocal
+from core.tenant_context import TenantContext
 from ..schemas.ai_assistant_schemas import (
     ChatMessage,
     ChatRequest,
@@ -39,6 +40,8 @@ from ..schemas.analytics_schemas import SalesFilterRequest
 from .ai_query_processor import AIQueryProcessor
 from .ai_security_service import AISecurityService
 from .ai_result_formatter import AIResultFormatter
+from .ai_session_store import ChatSessionStore
+from .cache_service import ChatResultCache, get_chat_result_cache
 from .sales_report_service import SalesReportService
 from .trend_service import TrendService
 from .realtime_metrics_service import realtime_metrics_service
@@ -49,11 +52,20 @@ logger = logging.getLogger(__name__)
 class AIChatService:
     """Service for managing AI analytics chat interactions"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        session_store: Optional[ChatSessionStore] = None,
+        result_cache: Optional[ChatResultCache] = None,
+        session_factory=SessionLocal,
+    ):
         self.query_processor = AIQueryProcessor()
         self.security_service = AISecurityService()
         self.result_formatter = AIResultFormatter()
-        self.sessions: Dict[str, ChatSession] = {}
+        self.sessions = session_store or ChatSessionStore()
+        self.result_cache = result_cache or get_chat_result_cache()
+        self.session_factory = session_factory
+        # Identical queries running concurrently share one execution
+        self._inflight: Dict[str, asyncio.Future] = {}
         self.query_executors = self._initialize_query_executors()
 
     def _initialize_query_executors(self) -> Dict[QueryIntent, callable]:
@@ -84,6 +96,7 @@ class AIChatService:
         Returns:
             AI assistant response with query results
         """
+        session = None
         try:
             # Validate request for security
             is_valid, error_message = self.security_service.validate_request(
@@ -181,15 +194,19 @@ class AIChatService:
                 f"An error occurred while processing your request: {error_type}",
                 metadata=error_details,
             )
+        finally:
+            if session is not None:
+                self.sessions.save(session)
 
     def _get_or_create_session(
         self, session_id: Optional[str], user_id: int
     ) -> ChatSession:
         """Get existing session or create new one"""
-        if session_id and session_id in self.sessions:
-            session = self.sessions[session_id]
-            session.last_activity = datetime.now()
-            return session
+        if session_id:
+            session = self.sessions.get(session_id)
+            if session:
+                session.last_activity = datetime.now()
+                return session
 
         # Create new session
         new_session_id = session_id or str(uuid.uuid4())
@@ -201,15 +218,79 @@ class AIChatService:
             context=QueryContext(session_id=new_session_id, user_id=user_id),
         )
 
-        self.sessions[new_session_id] = session
+        self.sessions.save(session)
         return session
 
     async def _execute_query(
         self, query: AnalyticsQuery, user_id: int, db: Session
     ) -> QueryResult:
-        """Execute the analytics query based on intent"""
+        """
+        Execute the analytics query, reusing a recent result for the same
+        normalized query and tenant.
+        """
         start_time = datetime.now()
+        cache_key = self._result_cache_key(query)
+
+        cached = self._get_cached_result(cache_key)
+        if cached is None and cache_key in self._inflight:
+            # The same query is already running for another session
+            cached = await asyncio.shield(self._inflight[cache_key])
+        if cached is not None:
+            result = QueryResult.model_validate(cached)
+            result.query_id = str(uuid.uuid4())
+            result.execution_time_ms = int(
+                (datetime.now() - start_time).total_seconds() * 1000
+            )
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        result = None
+        try:
+            result = await self._run_query(query, user_id, db, start_time)
+            if result.status == "success":
+                self._store_cached_result(cache_key, query, result)
+            return result
+        finally:
+            # Waiters run the query themselves if this one did not succeed
+            future.set_result(
+                result.model_dump() if result and result.status == "success" else None
+            )
+            del self._inflight[cache_key]
+
+    def _result_cache_key(self, query: AnalyticsQuery) -> str:
+        context = TenantContext.get() or {}
+        tenant = {
+            "restaurant_id": context.get("restaurant_id"),
+            "location_id": context.get("location_id"),
+        }
+        return self.result_cache.result_key(query.model_dump(mode="json"), tenant)
+
+    def _get_cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.result_cache.get_result(cache_key)
+        except Exception as e:
+            logger.warning(f"Chat result cache read failed: {e}")
+            return None
+
+    def _store_cached_result(
+        self, cache_key: str, query: AnalyticsQuery, result: QueryResult
+    ):
+        try:
+            self.result_cache.store_result(
+                cache_key, result.model_dump(), query.time_range
+            )
+        except Exception as e:
+            logger.warning(f"Chat result cache write failed: {e}")
 
+    async def _run_query(
+        self,
+        query: AnalyticsQuery,
+        user_id: int,
+        db: Session,
+        start_time: datetime,
+    ) -> QueryResult:
+        """Execute the analytics query based on intent"""
         try:
             # Get appropriate executor
             executor = self.query_executors.get(
@@ -274,7 +355,7 @@ class AIChatService:
 
             # Get sales summary
             service = SalesReportService(db)
-            summary = service.generate_sales_summary(filters)
+            summary = await asyncio.to_thread(service.generate_sales_summary, filters)
 
             # Format as chart data
             chart_data = ChartData(
@@ -333,7 +414,9 @@ class AIChatService:
                 "hourly" if days_diff <= 1 else "daily" if days_diff <= 30 else "weekly"
             )
 
-            trends = trend_service.get_revenue_trend(start_date, end_date, granularity)
+            trends = await asyncio.to_thread(
+                trend_service.get_revenue_trend, start_date, end_date, granularity
+            )
 
             # Format as line chart
             chart_data = ChartData(
@@ -394,8 +477,8 @@ class AIChatService:
 
             # Get staff performance
             service = SalesReportService(db)
-            performance = service.generate_staff_performance_report(
-                filters, page=1, per_page=10
+            performance = await asyncio.to_thread(
+                service.generate_staff_performance_report, filters, page=1, per_page=10
             )
 
             # Format as table
@@ -470,8 +553,11 @@ class AIChatService:
 
             # Get product performance
             service = SalesReportService(db)
-            products = service.generate_product_performance_report(
-                filters, page=1, per_page=10
+            products = await asyncio.to_thread(
+                service.generate_product_performance_report,
+                filters,
+                page=1,
+                per_page=10,
             )
 
             # Format as pie chart for top products
@@ -528,11 +614,12 @@ class AIChatService:
             end_date = date.fromisoformat(query.time_range["end_date"])
 
             if metric == "revenue":
-                trends = trend_service.get_revenue_trend(start_date, end_date, "daily")
+                get_trend = trend_service.get_revenue_trend
             elif metric == "orders":
-                trends = trend_service.get_order_trend(start_date, end_date, "daily")
+                get_trend = trend_service.get_order_trend
             else:
-                trends = trend_service.get_customer_trend(start_date, end_date, "daily")
+                get_trend = trend_service.get_customer_trend
+            trends = await asyncio.to_thread(get_trend, start_date, end_date, "daily")
 
             # Calculate trend statistics
             stats = trend_service.get_trend_statistics(trends)
@@ -785,16 +872,14 @@ class AIChatService:
 
     def get_session_history(self, session_id: str) -> Optional[List[ChatMessage]]:
         """Get conversation history for a session"""
-        if session_id in self.sessions:
-            return self.sessions[session_id].context.conversation_history
+        session = self.sessions.get(session_id)
+        if session:
+            return session.context.conversation_history
         return None
 
     def clear_session(self, session_id: str) -> bool:
         """Clear a chat session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            return True
-        return False
+        return self.sessions.delete(session_id)
 
     async def process_batch_messages(
         self, requests: List[ChatRequest], user_id: int, db: Session
@@ -811,24 +896,38 @@ class AIChatService:
             List of chat responses
 
         Note:
-            Processes messages concurrently where possible while
-            maintaining conversation context order.
+            Different sessions are processed concurrently, each with its own
+            database session; messages within a session run in order.
+            Responses are returned in request order.
         """
-        responses = []
-
-        # Group by session for context preservation
-        session_groups = {}
-        for request in requests:
-            session_id = request.session_id or "default"
-            if session_id not in session_groups:
-                session_groups[session_id] = []
-            session_groups[session_id].append(request)
-
-        # Process each session's messages in order
-        for session_id, session_requests in session_groups.items():
-            for request in session_requests:
-                response = await self.process_message(request, user_id, db)
-                responses.append(response)
+        # Requests without a session each start their own conversation
+        session_groups: Dict[str, List[int]] = {}
+        for index, request in enumerate(requests):
+            group = request.session_id or f"new:{index}"
+            session_groups.setdefault(group, []).append(index)
+
+        responses: List[Optional[ChatResponse]] = [None] * len(requests)
+
+        async def process_group(indexes: List[int], group_db: Session):
+            for index in indexes:
+                responses[index] = await self.process_message(
+                    requests[index], user_id, group_db
+                )
+
+        # A database session must not be shared between concurrent groups
+        group_dbs = [db] + [
+            self.session_factory() for _ in range(len(session_groups) - 1)
+        ]
+        try:
+            await asyncio.gather(
+                *(
+                    process_group(indexes, group_db)
+                    for indexes, group_db in zip(session_groups.values(), group_dbs)
+                )
+            )
+        finally:
+            for group_db in group_dbs[1:]:
+                group_db.close()
 
         return responses
 
@@ -0,0 +1,173 @@
+# backend/modules/analytics/services/ai_session_store.py
+
+"""
+Session store for the AI analytics assistant.
+
+Sessions live in Redis so any worker can continue a conversation, with a
+bounded in-process LRU in front of it. Without Redis the LRU is the store.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import redis
+from redis.exceptions import RedisError
+
+from core.config import settings
+from ..constants import (
+    CHAT_SESSION_HISTORY_LIMIT,
+    CHAT_SESSION_IDLE_SECONDS,
+    CHAT_SESSION_LOCAL_MAX,
+)
+from ..schemas.ai_assistant_schemas import ChatSession
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY_PREFIX = "analytics:ai_chat:session:"
+
+
+class ChatSessionStore:
+    """Chat sessions in Redis behind a bounded local LRU with idle eviction"""
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        max_local: int = CHAT_SESSION_LOCAL_MAX,
+        idle_seconds: int = CHAT_SESSION_IDLE_SECONDS,
+        use_redis: bool = True,
+    ):
+        self.redis_client = redis_client
+        if self.redis_client is None and use_redis:
+            self.redis_client = self._init_redis()
+        self.max_local = max_local
+        self.idle_seconds = idle_seconds
+        # session_id -> (version, last access, session), least recent first
+        self.local: "OrderedDict[str, Tuple[int, float, ChatSession]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _init_redis(self) -> Optional[redis.Redis]:
+        """Initialize Redis connection"""
+        try:
+            redis_url = getattr(settings, "REDIS_URL", "redis://localhost:6379/0")
+            client = redis.from_url(redis_url, decode_responses=True)
+            client.ping()
+            logger.info("Redis connection established for AI chat sessions")
+            return client
+        except Exception as e:
+            logger.warning(f"Redis not available, keeping chat sessions local: {e}")
+            return None
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """
+        Load a session.
+
+        The local copy is used while its version matches Redis, so only a
+        small version read is needed per message unless another worker
+        updated the session.
+        """
+        with self._lock:
+            self._evict_idle()
+            entry = self.local.get(session_id)
+
+        if self.redis_client:
+            key = self._key(session_id)
+            try:
+                version = self.redis_client.hget(key, "version")
+                if version is None:
+                    # Expired or cleared elsewhere
+                    self._drop_local(session_id)
+                    return None
+                version = int(version)
+                if entry is None or entry[0] != version:
+                    data = self.redis_client.hget(key, "data")
+                    if data is None:
+                        self._drop_local(session_id)
+                        return None
+                    entry = (version, 0.0, ChatSession.model_validate_json(data))
+            except (RedisError, ValueError) as e:
+                logger.warning(f"Failed to load chat session {session_id}: {e}")
+
+        if entry is None:
+            return None
+
+        self._remember(session_id, entry[0], entry[2])
+        return entry[2]
+
+    def save(self, session: ChatSession):
+        """Persist a session and refresh its idle timeout"""
+        history = session.context.conversation_history
+        if len(history) > CHAT_SESSION_HISTORY_LIMIT:
+            session.context.conversation_history = history[-CHAT_SESSION_HISTORY_LIMIT:]
+
+        version = 0
+        if self.redis_client:
+            key = self._key(session.session_id)
+            try:
+                pipe = self.redis_client.pipeline()
+                pipe.hincrby(key, "version", 1)
+                pipe.hset(key, "data", session.model_dump_json())
+                pipe.expire(key, self.idle_seconds)
+                version = pipe.execute()[0]
+            except RedisError as e:
+                logger.warning(
+                    f"Failed to persist chat session {session.session_id}: {e}"
+                )
+
+        self._remember(session.session_id, version, session)
+
+    def delete(self, session_id: str) -> bool:
+        """Remove a session everywhere; True if it existed"""
+        existed = self._drop_local(session_id)
+        if self.redis_client:
+            try:
+                existed = bool(self.redis_client.delete(self._key(session_id))) or (
+                    existed
+                )
+            except RedisError as e:
+                logger.warning(f"Failed to delete chat session {session_id}: {e}")
+        return existed
+
+    def local_sessions(self) -> List[ChatSession]:
+        """Sessions cached by this worker"""
+        with self._lock:
+            self._evict_idle()
+            return [session for _, _, session in self.local.values()]
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_idle()
+            return len(self.local)
+
+    def values(self) -> List[ChatSession]:
+        return self.local_sessions()
+
+    def _remember(self, session_id: str, version: int, session: ChatSession):
+        with self._lock:
+            self.local[session_id] = (version, time.monotonic(), session)
+            self.local.move_to_end(session_id)
+            while len(self.local) > self.max_local:
+                self.local.popitem(last=False)
+            self._evict_idle()
+
+    def _drop_local(self, session_id: str) -> bool:
+        with self._lock:
+            return self.local.pop(session_id, None) is not None
+
+    def _evict_idle(self):
+        # Entries are kept in access order, so idle ones are at the front
+        cutoff = time.monotonic() - self.idle_seconds
+        while self.local:
+            session_id, (_, last_access, _) = next(iter(self.local.items()))
+            if last_access > cutoff:
+                break
+            del self.local[session_id]
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"{SESSION_KEY_PREFIX}{session_id}"
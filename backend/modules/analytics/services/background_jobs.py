@@ -15,10 +15,14 @@ from ..models.analytics_models import (
     AlertRule,
     AggregationPeriod,
 )
+from .rollup_service import AnalyticsRollupService
 from modules.orders.models.order_models import Order, OrderItem
 
 logger = logging.getLogger(__name__)
 
+# Rollups only touch buckets with changed orders, so they can run often
+ROLLUP_REFRESH_INTERVAL_SECONDS = 300
+
 
 class AnalyticsBackgroundJobs:
     """Background job processor for analytics tasks"""
@@ -35,6 +39,7 @@ class AnalyticsBackgroundJobs:
         # Schedule periodic tasks
         self.tasks = [
             asyncio.create_task(self._refresh_materialized_views()),
+            asyncio.create_task(self._refresh_rollups()),
             asyncio.create_task(self._update_snapshots()),
             asyncio.create_task(self._evaluate_alerts()),
             asyncio.create_task(self._cleanup_old_data()),
@@ -80,6 +85,23 @@ class AnalyticsBackgroundJobs:
             # Refresh every 6 hours
             await asyncio.sleep(6 * 3600)
 
+    async def _refresh_rollups(self):
+        """Fold orders and POS snapshots changed since the last run into the rollups"""
+        while self.running:
+            db = None
+            try:
+                db = next(get_db())
+                AnalyticsRollupService(db).refresh()
+
+            except Exception as e:
+                logger.error(f"Error refreshing analytics rollups: {e}")
+
+            finally:
+                if db is not None:
+                    db.close()
+
+            await asyncio.sleep(ROLLUP_REFRESH_INTERVAL_SECONDS)
+
     async def _update_snapshots(self):
         """Update sales analytics snapshots"""
         while self.running:
@@ -9,7 +9,7 @@ Provides in-memory and Redis-based caching for frequently accessed data.
 import json
 import logging
 from typing import Optional, Any, Dict, List
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import hashlib
 import pickle
 from functools import wraps
@@ -25,8 +25,12 @@ from modules.analytics.constants import (
     CACHE_TTL_SECONDS,
     REPORT_CACHE_TTL,
     MODEL_CACHE_TTL,
+    FORECAST_STORE_TTL,
+    CHAT_RESULT_TTL_SECONDS,
+    CHAT_RESULT_HISTORICAL_TTL_SECONDS,
 )
 from modules.analytics.exceptions import CacheError
+from core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -293,10 +297,91 @@ class ModelCache(CacheService):
         return self.clear_pattern(pattern)
 
 
+class ForecastStore(CacheService):
+    """Store of computed forecasts, valid while the source series is unchanged"""
+
+    def store_forecast(
+        self,
+        entity_type: str,
+        entity_id: Optional[int],
+        variant: str,
+        fingerprint: str,
+        forecast: Dict[str, Any],
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        """Store a forecast together with the fingerprint of its input series"""
+        key = f"forecast:{entity_type}:{entity_id or 'all'}:{variant}"
+        self.set(
+            key,
+            {"fingerprint": fingerprint, "forecast": forecast},
+            ttl_seconds or FORECAST_STORE_TTL,
+        )
+
+    def get_forecast(
+        self,
+        entity_type: str,
+        entity_id: Optional[int],
+        variant: str,
+        fingerprint: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Retrieve a stored forecast if it was computed from the same series"""
+        key = f"forecast:{entity_type}:{entity_id or 'all'}:{variant}"
+        entry = self.get(key)
+        if entry and entry.get("fingerprint") == fingerprint:
+            return entry["forecast"]
+        return None
+
+
+class ChatResultCache(CacheService):
+    """Short-lived results of AI assistant analytics queries"""
+
+    def result_key(self, query: Dict[str, Any], tenant: Dict[str, Any]) -> str:
+        """Key for a query that ignores wording and filter order"""
+        params = {
+            "intent": query.get("intent"),
+            "time_range": query.get("time_range"),
+            "filters": _normalize_filters(query.get("filters")),
+            "metrics": query.get("metrics") or [],
+            "group_by": query.get("group_by"),
+            "sort_by": query.get("sort_by"),
+            "limit": query.get("limit"),
+            "tenant": tenant,
+        }
+        return self._generate_key("chat_result", params)
+
+    def store_result(
+        self, key: str, result: Dict[str, Any], time_range: Optional[Dict[str, Any]]
+    ) -> None:
+        """Cache a result; closed date ranges are kept longer"""
+        ttl = CHAT_RESULT_TTL_SECONDS
+        end_date = (time_range or {}).get("end_date")
+        if end_date and str(end_date) < date.today().isoformat():
+            ttl = CHAT_RESULT_HISTORICAL_TTL_SECONDS
+        self.set(key, result, ttl)
+
+    def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a cached result"""
+        return self.get(key)
+
+
+def _normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Drop empty filters and sort list values"""
+    normalized = {}
+    for name, value in (filters or {}).items():
+        if value is None or value == []:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(value, key=str)
+        normalized[name] = value
+    return normalized
+
+
 # Global cache instances
 _cache_service = None
 _historical_cache = None
 _model_cache = None
+_forecast_store = None
+_chat_result_cache = None
 
 
 def get_cache_service() -> CacheService:
@@ -322,3 +407,19 @@ def get_model_cache() -> ModelCache:
     if _model_cache is None:
         _model_cache = ModelCache()
     return _model_cache
+
+
+def get_forecast_store() -> ForecastStore:
+    """Get forecast store instance"""
+    global _forecast_store
+    if _forecast_store is None:
+        _forecast_store = ForecastStore()
+    return _forecast_store
+
+
+def get_chat_result_cache() -> ChatResultCache:
+    """Get AI assistant result cache instance"""
+    global _chat_result_cache
+    if _chat_result_cache is None:
+        _chat_result_cache = ChatResultCache(getattr(settings, "REDIS_URL", None))
+    return _chat_result_cache
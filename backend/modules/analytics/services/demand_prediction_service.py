@@ -7,19 +7,24 @@ Analyzes historical sales data, external factors, and seasonality patterns
 to generate accurate demand forecasts.
 """
 
+import asyncio
 import logging
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, text
+from sqlalchemy import bindparam, func, and_, text
+from concurrent.futures import ProcessPoolExecutor
 import uuid
 from .secure_query_builder import SecureQueryBuilder
 
 from core.database import get_db
 from modules.analytics.schemas.predictive_analytics_schemas import (
+    BatchForecastResult,
+    BatchPredictionRequest,
     DemandForecastRequest,
+    PredictionRequest,
     DemandForecast,
     PredictionPoint,
     ForecastMetadata,
@@ -32,6 +37,7 @@ from modules.analytics.services.predictive_models import (
     ModelFactory,
     BaseForecastModel,
     EnsembleModel,
+    series_fingerprint,
 )
 from modules.analytics.models.analytics_models import (
     SalesAnalyticsSnapshot,
@@ -59,14 +65,91 @@ from modules.analytics.constants import (
     MIN_DATA_POINTS_FOR_FORECAST,
     CACHE_TTL_SECONDS,
     WEATHER_IMPACT_THRESHOLDS,
+    FORECAST_POOL_MAX_WORKERS,
 )
 from modules.analytics.services.cache_service import (
     get_historical_cache,
-    get_model_cache,
+    get_forecast_store,
 )
 
 logger = logging.getLogger(__name__)
 
+# Class name of a fitted model -> model type reported in forecast metadata
+MODEL_TYPE_BY_CLASS = {
+    "ARIMAModel": ModelType.ARIMA,
+    "ExponentialSmoothingModel": ModelType.EXPONENTIAL_SMOOTHING,
+    "MovingAverageModel": ModelType.MOVING_AVERAGE,
+    "ProphetModel": ModelType.PROPHET,
+    "EnsembleModel": ModelType.ENSEMBLE,
+}
+
+_forecast_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_forecast_executor() -> ProcessPoolExecutor:
+    """Process pool that keeps model fitting off the event loop"""
+    global _forecast_executor
+    if _forecast_executor is None:
+        _forecast_executor = ProcessPoolExecutor(
+            max_workers=FORECAST_POOL_MAX_WORKERS
+        )
+    return _forecast_executor
+
+
+def compute_forecast(
+    time_series: pd.Series, model_type: Optional[str], horizon: int
+) -> Dict[str, Any]:
+    """
+    Fit a model and produce a forecast for one series.
+
+    Runs inside the forecast process pool, so it only takes and returns
+    picklable values.
+    """
+    if model_type:
+        model = ModelFactory.create_model(model_type)
+    else:
+        model = ModelFactory.auto_select_model(time_series)
+
+    model.fit(time_series)
+    predictions, lower_bounds, upper_bounds = model.predict(horizon)
+
+    return {
+        "model_class": model.__class__.__name__,
+        "predictions": np.asarray(predictions, dtype=float),
+        "lower_bounds": np.asarray(lower_bounds, dtype=float),
+        "upper_bounds": np.asarray(upper_bounds, dtype=float),
+        "seasonality": model.detect_seasonality(time_series),
+        "accuracy_metrics": calculate_accuracy_metrics(model, time_series),
+    }
+
+
+def calculate_accuracy_metrics(
+    model: BaseForecastModel, time_series: pd.Series
+) -> Dict[str, float]:
+    """Backtest a copy of the model on the last 20% of the series"""
+    if len(time_series) <= 20:
+        return {"mae": 0.0, "mape": 0.0, "rmse": 0.0}
+
+    n_test = len(time_series) // 5
+    train_data = time_series[:-n_test]
+    test_data = time_series[-n_test:]
+
+    # Reuse the fitted model's hyperparameters (e.g. the ARIMA order) so the
+    # backtest does not repeat the parameter search
+    temp_model = model.clone_unfitted()
+    temp_model.fit(train_data)
+    test_preds, _, _ = temp_model.predict(n_test)
+
+    mae = np.mean(np.abs(test_data.values - test_preds))
+    mape = np.mean(np.abs((test_data.values - test_preds) / test_data.values)) * 100
+    rmse = np.sqrt(np.mean((test_data.values - test_preds) ** 2))
+
+    return {
+        "mae": float(mae),
+        "mape": float(mape),
+        "rmse": float(rmse),
+    }
+
 
 class DemandPredictionService:
     """Service for predicting product and category demand"""
@@ -74,7 +157,7 @@ class DemandPredictionService:
     def __init__(self, db: Session):
         self.db = db
         self.historical_cache = get_historical_cache()
-        self.model_cache_service = get_model_cache()
+        self.forecast_store = get_forecast_store()
         self.external_factors = ExternalFactorsAnalyzer()
 
     async def forecast_demand(self, request: DemandForecastRequest) -> DemandForecast:
@@ -110,49 +193,14 @@ class DemandPredictionService:
                     time_series, request.external_factors
                 )
 
-            # Select or create model
-            model = self._get_or_create_model(
-                request.entity_type, request.entity_id, request.model_type, time_series
-            )
-
-            # Generate predictions
-            predictions, lower_bounds, upper_bounds = model.predict(
-                request.horizon_days
-            )
-
-            # Create prediction points
-            prediction_points = self._create_prediction_points(
-                predictions, lower_bounds, upper_bounds, request.time_granularity
-            )
-
-            # Detect patterns and generate insights
-            seasonality_patterns = model.detect_seasonality(time_series)
-            insights = self._generate_insights(
-                time_series, predictions, seasonality_patterns
-            )
-
-            # Calculate forecast metadata
-            metadata = self._create_forecast_metadata(
-                model, time_series, predictions, seasonality_patterns
-            )
-
-            # Generate recommendations
-            recommendations = self._generate_recommendations(
-                predictions, time_series, request
-            )
+            # Fit (or reuse a stored forecast for an unchanged series)
+            result = (await self._compute_forecasts([(request, time_series)]))[0]
+            if isinstance(result, Exception):
+                raise result
 
-            # Get entity name
             entity_name = self._get_entity_name(request.entity_type, request.entity_id)
 
-            return DemandForecast(
-                entity_id=request.entity_id,
-                entity_type=request.entity_type,
-                entity_name=entity_name,
-                predictions=prediction_points,
-                metadata=metadata,
-                insights=insights,
-                recommended_actions=recommendations,
-            )
+            return self._build_forecast(request, time_series, result, entity_name)
 
         except InsufficientDataError:
             raise  # Re-raise as is
@@ -182,14 +230,7 @@ class DemandPredictionService:
 
         # Determine date range
         end_date = date.today()
-        if granularity == TimeGranularity.HOURLY:
-            start_date = end_date - timedelta(days=30)
-        elif granularity == TimeGranularity.DAILY:
-            start_date = end_date - timedelta(days=180)
-        elif granularity == TimeGranularity.WEEKLY:
-            start_date = end_date - timedelta(days=365)
-        else:  # Monthly
-            start_date = end_date - timedelta(days=730)
+        start_date = end_date - timedelta(days=self._history_days(granularity))
 
         # Build query based on entity type using secure query builder
         if entity_type == "product":
@@ -283,43 +324,291 @@ class DemandPredictionService:
 
         return time_series
 
-    def _get_or_create_model(
+    async def batch_forecast(
+        self, batch_request: BatchPredictionRequest
+    ) -> BatchForecastResult:
+        """
+        Forecast many entities in one pass.
+
+        History for each (entity type, granularity) group is loaded with one
+        grouped query, unchanged series are answered from the forecast store
+        and the remaining models are fitted in the forecast process pool.
+        """
+        requests = batch_request.predictions
+        histories = self._load_batch_histories(requests)
+
+        jobs = []
+        errors = []
+        for request in requests:
+            key = (request.entity_type, request.time_granularity, request.entity_id)
+            history = histories.get(key)
+            available = 0 if history is None else len(history)
+
+            if available < MIN_DATA_POINTS_FOR_FORECAST:
+                errors.append(
+                    {
+                        "entity_type": request.entity_type,
+                        "entity_id": request.entity_id,
+                        "error": (
+                            f"Insufficient historical data: {available} points, "
+                            f"{MIN_DATA_POINTS_FOR_FORECAST} required"
+                        ),
+                    }
+                )
+                continue
+
+            time_series = self._prepare_time_series(history)
+            if getattr(request, "include_external_factors", False):
+                time_series = self._apply_external_factors(
+                    time_series, request.external_factors
+                )
+            jobs.append((request, time_series))
+
+        results = await self._compute_forecasts(jobs)
+        names = self._get_entity_names(request for request, _ in jobs)
+
+        forecasts = []
+        for (request, time_series), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                errors.append(
+                    {
+                        "entity_type": request.entity_type,
+                        "entity_id": request.entity_id,
+                        "error": str(result),
+                    }
+                )
+                continue
+
+            entity_name = names.get((request.entity_type, request.entity_id))
+            if entity_name is None:
+                entity_name = self._get_entity_name(
+                    request.entity_type, request.entity_id
+                )
+            forecasts.append(
+                self._build_forecast(request, time_series, result, entity_name)
+            )
+
+        return BatchForecastResult(
+            status="completed",
+            forecasts=forecasts,
+            summary={
+                "total_requested": len(requests),
+                "successful": len(forecasts),
+                "failed": len(errors),
+                "errors": errors,
+            },
+        )
+
+    async def _compute_forecasts(
+        self, jobs: List[Tuple[PredictionRequest, pd.Series]]
+    ) -> List[Any]:
+        """
+        Compute forecasts for prepared series.
+
+        Each result is the forecast dict, or the exception raised while
+        fitting. Series whose fingerprint matches a stored forecast are not
+        refitted.
+        """
+        results: List[Any] = [None] * len(jobs)
+        pending = []
+
+        for index, (request, time_series) in enumerate(jobs):
+            fingerprint = series_fingerprint(time_series)
+            stored = self.forecast_store.get_forecast(
+                request.entity_type,
+                request.entity_id,
+                self._forecast_variant(request),
+                fingerprint,
+            )
+            if stored is not None:
+                results[index] = stored
+            else:
+                pending.append((index, fingerprint))
+
+        if pending:
+            loop = asyncio.get_running_loop()
+            executor = get_forecast_executor()
+            computed = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        executor,
+                        compute_forecast,
+                        jobs[index][1],
+                        jobs[index][0].model_type.value
+                        if jobs[index][0].model_type
+                        else None,
+                        jobs[index][0].horizon_days,
+                    )
+                    for index, _ in pending
+                ],
+                return_exceptions=True,
+            )
+
+            for (index, fingerprint), result in zip(pending, computed):
+                results[index] = result
+                if isinstance(result, Exception):
+                    request = jobs[index][0]
+                    logger.warning(
+                        f"Forecast failed for {request.entity_type}:"
+                        f"{request.entity_id}: {result}"
+                    )
+                    continue
+
+                request = jobs[index][0]
+                self.forecast_store.store_forecast(
+                    request.entity_type,
+                    request.entity_id,
+                    self._forecast_variant(request),
+                    fingerprint,
+                    result,
+                )
+
+        logger.debug(
+            f"Computed {len(pending)} forecasts, "
+            f"{len(jobs) - len(pending)} served from store"
+        )
+        return results
+
+    @staticmethod
+    def _forecast_variant(request: PredictionRequest) -> str:
+        """Part of the store key for settings that change the forecast output"""
+        model_type = request.model_type.value if request.model_type else "auto"
+        return f"{request.time_granularity.value}:{model_type}:{request.horizon_days}"
+
+    def _build_forecast(
         self,
-        entity_type: str,
-        entity_id: Optional[int],
-        model_type: Optional[ModelType],
+        request: PredictionRequest,
         time_series: pd.Series,
-    ) -> BaseForecastModel:
-        """Get cached model or create new one"""
-        model_type_str = model_type.value if model_type else "auto"
+        result: Dict[str, Any],
+        entity_name: str,
+    ) -> DemandForecast:
+        """Turn a computed forecast into the API response"""
+        predictions = result["predictions"]
+
+        prediction_points = self._create_prediction_points(
+            predictions,
+            result["lower_bounds"],
+            result["upper_bounds"],
+            request.time_granularity,
+        )
+        insights = self._generate_insights(
+            time_series, predictions, result["seasonality"]
+        )
+        metadata = self._create_forecast_metadata(
+            result["model_class"],
+            time_series,
+            result["accuracy_metrics"],
+            result["seasonality"],
+        )
+        recommendations = self._generate_recommendations(
+            predictions, time_series, request
+        )
 
-        # Check cache first
-        cached_model = self.model_cache_service.get_model(
-            entity_type, entity_id, model_type_str
+        return DemandForecast(
+            entity_id=request.entity_id,
+            entity_type=request.entity_type,
+            entity_name=entity_name,
+            predictions=prediction_points,
+            metadata=metadata,
+            insights=insights,
+            recommended_actions=recommendations,
         )
 
-        if cached_model:
-            logger.debug(
-                f"Using cached model for {entity_type}:{entity_id}:{model_type_str}"
+    def _load_batch_histories(
+        self, requests: List[PredictionRequest]
+    ) -> Dict[Tuple[str, TimeGranularity, Optional[int]], pd.DataFrame]:
+        """Load history for every request, one grouped query per entity type"""
+        groups: Dict[Tuple[str, TimeGranularity], set] = {}
+        for request in requests:
+            groups.setdefault((request.entity_type, request.time_granularity), set()).add(
+                request.entity_id
             )
-            # Update with latest data
-            cached_model.fit(time_series)
-            return cached_model
 
-        # Create new model
-        if model_type:
-            model = ModelFactory.create_model(model_type.value)
-        else:
-            model = ModelFactory.auto_select_model(time_series)
+        histories = {}
+        for (entity_type, granularity), entity_ids in groups.items():
+            if entity_type in ("product", "category"):
+                frames = self._get_historical_demand_batch(
+                    entity_type, [i for i in entity_ids if i is not None], granularity
+                )
+            else:
+                frames = {}
+                for entity_id in entity_ids:
+                    try:
+                        frames[entity_id] = self._get_historical_demand(
+                            entity_type, entity_id, granularity
+                        )
+                    except ValueError:
+                        continue
+
+            for entity_id, frame in frames.items():
+                histories[(entity_type, granularity, entity_id)] = frame
+
+        return histories
+
+    def _get_historical_demand_batch(
+        self, entity_type: str, entity_ids: List[int], granularity: TimeGranularity
+    ) -> Dict[int, pd.DataFrame]:
+        """Historical demand for many products or categories in one query"""
+        frames = {}
+        missing = []
+
+        for entity_id in entity_ids:
+            cached = self.historical_cache.get_historical_data(
+                entity_type, entity_id, granularity.value
+            )
+            if cached is not None:
+                frames[entity_id] = cached
+            else:
+                missing.append(entity_id)
+
+        if not missing:
+            return frames
+
+        end_date = date.today()
+        start_date = end_date - timedelta(days=self._history_days(granularity))
 
-        model.fit(time_series)
+        if entity_type == "product":
+            query_template, base_params = (
+                SecureQueryBuilder.build_product_demand_batch_query(granularity)
+            )
+        else:
+            query_template, base_params = (
+                SecureQueryBuilder.build_category_demand_batch_query(granularity)
+            )
 
-        # Cache the model
-        self.model_cache_service.cache_model(
-            entity_type, entity_id, model_type_str, model
+        query = text(query_template).bindparams(
+            bindparam("entity_ids", expanding=True)
         )
+        params = {
+            **base_params,
+            "entity_ids": missing,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        rows = self.db.execute(query, params).fetchall()
+        if not rows:
+            return frames
+
+        df = pd.DataFrame(rows)
+        df["date"] = pd.to_datetime(df["date"])
+
+        for entity_id, group in df.groupby("entity_id", sort=False):
+            frame = group.drop(columns="entity_id").set_index("date")
+            frames[entity_id] = frame
+            self.historical_cache.cache_historical_data(
+                entity_type, entity_id, granularity.value, frame
+            )
+
+        return frames
 
-        return model
+    @staticmethod
+    def _history_days(granularity: TimeGranularity) -> int:
+        """How far back history is loaded for a granularity"""
+        return {
+            TimeGranularity.HOURLY: 30,
+            TimeGranularity.DAILY: 180,
+            TimeGranularity.WEEKLY: 365,
+        }.get(granularity, 730)
 
     def _create_prediction_points(
         self,
@@ -421,50 +710,13 @@ class DemandPredictionService:
 
     def _create_forecast_metadata(
         self,
-        model: BaseForecastModel,
+        model_class: str,
         time_series: pd.Series,
-        predictions: np.ndarray,
+        accuracy_metrics: Dict[str, float],
         seasonality: Dict[str, Any],
     ) -> ForecastMetadata:
         """Create forecast metadata"""
-        # Determine model type
-        model_type_map = {
-            "ARIMAModel": ModelType.ARIMA,
-            "ExponentialSmoothingModel": ModelType.EXPONENTIAL_SMOOTHING,
-            "MovingAverageModel": ModelType.MOVING_AVERAGE,
-            "ProphetModel": ModelType.PROPHET,
-            "EnsembleModel": ModelType.ENSEMBLE,
-        }
-
-        model_type = model_type_map.get(model.__class__.__name__, ModelType.ENSEMBLE)
-
-        # Calculate accuracy metrics (on training data)
-        if len(time_series) > 20:
-            # Use last 20% for validation
-            n_test = len(time_series) // 5
-            train_data = time_series[:-n_test]
-            test_data = time_series[-n_test:]
-
-            # Refit and predict
-            temp_model = ModelFactory.create_model(model_type.value)
-            temp_model.fit(train_data)
-            test_preds, _, _ = temp_model.predict(n_test)
-
-            # Calculate metrics
-            mae = np.mean(np.abs(test_data.values - test_preds))
-            mape = (
-                np.mean(np.abs((test_data.values - test_preds) / test_data.values))
-                * 100
-            )
-            rmse = np.sqrt(np.mean((test_data.values - test_preds) ** 2))
-
-            accuracy_metrics = {
-                "mae": float(mae),
-                "mape": float(mape),
-                "rmse": float(rmse),
-            }
-        else:
-            accuracy_metrics = {"mae": 0.0, "mape": 0.0, "rmse": 0.0}
+        model_type = MODEL_TYPE_BY_CLASS.get(model_class, ModelType.ENSEMBLE)
 
         # Determine confidence level
         avg_mape = accuracy_metrics.get("mape", 0)
@@ -564,6 +816,29 @@ class DemandPredictionService:
 
         return recommendations
 
+    def _get_entity_names(
+        self, requests: Iterable[PredictionRequest]
+    ) -> Dict[Tuple[str, int], str]:
+        """Names of all requested products and categories, one query per type"""
+        ids_by_type: Dict[str, set] = {"product": set(), "category": set()}
+        for request in requests:
+            if request.entity_type in ids_by_type and request.entity_id:
+                ids_by_type[request.entity_type].add(request.entity_id)
+
+        names = {}
+        for entity_type, model in (("product", MenuItem), ("category", MenuCategory)):
+            if not ids_by_type[entity_type]:
+                continue
+            rows = (
+                self.db.query(model.id, model.name)
+                .filter(model.id.in_(ids_by_type[entity_type]))
+                .all()
+            )
+            for entity_id, name in rows:
+                names[(entity_type, entity_id)] = name
+
+        return names
+
     def _get_entity_name(self, entity_type: str, entity_id: Optional[int]) -> str:
         """Get the name of the entity"""
         if entity_type == "overall":
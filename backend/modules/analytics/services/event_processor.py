@@ -3,13 +3,22 @@
 import asyncio
 import logging
 import json
-from typing import Dict, Any, List, Optional, Callable, Set
+import os
+import socket
+from typing import Dict, Any, List, Optional, Callable, Set, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
+from decimal import Decimal
 from enum import Enum
 from collections import defaultdict, deque
 import uuid
 
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+from sqlalchemy import text
+
+from core.config import settings
+from core.database import SessionLocal
 from ..schemas.realtime_schemas import (
     OrderCompletedEvent,
     StaffActionEvent,
@@ -22,6 +31,63 @@ from .alerting_service import AlertingService
 
 logger = logging.getLogger(__name__)
 
+# Redis stream shared by every processor instance
+EVENT_STREAM_KEY = "analytics:events"
+EVENT_CONSUMER_GROUP = "analytics-event-processors"
+# Approximate stream length cap; the oldest entries are trimmed first, so
+# keep it well above the largest expected consumer backlog
+EVENT_STREAM_MAXLEN = 100000
+# Entries read per XREADGROUP / XAUTOCLAIM call
+STREAM_BATCH_SIZE = 200
+STREAM_BLOCK_MS = 1000
+# Pending entries idle this long belong to a dead consumer and are reclaimed
+PENDING_IDLE_MS = 60000
+PENDING_RECLAIM_INTERVAL = 30  # seconds
+# Delay before retrying Redis after a failed connection
+STREAM_RETRY_INTERVAL = timedelta(seconds=30)
+# Broadcasts of events consumed from the stream are published here and relayed
+# by every processor to its own websocket clients
+EVENT_BROADCAST_CHANNEL = "analytics:broadcasts"
+# Local buffer cap when aggregates cannot be persisted
+MAX_BUFFERED_AGGREGATES = 10000
+# Processed event ids must outlive any redelivery of the same stream entry
+PROCESSED_EVENT_RETENTION = timedelta(days=1)
+PROCESSED_EVENT_PRUNE_INTERVAL = timedelta(hours=1)
+# Staff actions counted in the per-minute staff aggregates
+AGGREGATED_STAFF_ACTIONS = ("order_processed", "customer_served")
+
+# Records which events were already folded into the aggregates. Only ids that
+# were not claimed before are returned, so redelivered events count once.
+_CLAIM_EVENTS_SQL = """
+    INSERT INTO analytics_processed_events (event_id, processed_at)
+    SELECT unnest(CAST(:event_ids AS varchar[])), now()
+    ON CONFLICT (event_id) DO NOTHING
+    RETURNING event_id
+"""
+
+_UPSERT_AGGREGATES_SQL = """
+    INSERT INTO analytics_event_aggregates (
+        bucket_start, dimension, dimension_id, order_count, revenue,
+        quantity, action_count, updated_at
+    )
+    VALUES (
+        :bucket_start, :dimension, :dimension_id, :order_count, :revenue,
+        :quantity, :action_count, now()
+    )
+    ON CONFLICT (bucket_start, dimension, dimension_id) DO UPDATE SET
+        order_count = analytics_event_aggregates.order_count + EXCLUDED.order_count,
+        revenue = analytics_event_aggregates.revenue + EXCLUDED.revenue,
+        quantity = analytics_event_aggregates.quantity + EXCLUDED.quantity,
+        action_count = analytics_event_aggregates.action_count + EXCLUDED.action_count,
+        updated_at = now()
+"""
+
+_PRUNE_PROCESSED_EVENTS_SQL = """
+    DELETE FROM analytics_processed_events WHERE processed_at < :cutoff
+"""
+
+AggregateKey = Tuple[datetime, str, int]
+
 
 class EventType(str, Enum):
     """Types of real-time events"""
@@ -49,9 +115,32 @@ class EventMetrics:
 
 
 class RealtimeEventProcessor:
-    """Service for processing real-time events and triggering metrics updates"""
+    """
+    Service for processing real-time events and triggering metrics updates.
+
+    When Redis is reachable, queued events go through a Redis stream consumed
+    by a consumer group, so any number of processes share the work and
+    unacknowledged events survive restarts. Per-minute staff and product
+    aggregates are persisted before a batch is acknowledged. Without Redis the
+    processor falls back to its in-process queue.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        session_factory: Callable = SessionLocal,
+        use_streams: bool = True,
+    ):
+        self.redis_client = redis_client
+        self.session_factory = session_factory
+        self.use_streams = use_streams
+        self.consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._stream_ready = False
+        self._stream_retry_at: Optional[datetime] = None
+        self._stream_workers_started = False
+        self.num_workers = 3
+        self._last_prune: Optional[datetime] = None
 
-    def __init__(self):
         self.event_handlers: Dict[EventType, List[Callable]] = defaultdict(list)
         self.event_queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
         self.event_history: deque = deque(maxlen=1000)  # Keep last 1000 events
@@ -65,8 +154,8 @@ class RealtimeEventProcessor:
         self.event_counts = defaultdict(int)
         self.rate_limit_reset_time = datetime.now()
 
-        # Event aggregation for batch processing
-        self.aggregation_buffer: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # Handled events whose aggregates are not persisted yet
+        self.aggregation_buffer: List[Dict[str, Any]] = []
         self.aggregation_interval = 5  # seconds
 
         # Register default event handlers
@@ -78,13 +167,19 @@ class RealtimeEventProcessor:
             return
 
         self.is_running = True
+        self.num_workers = num_workers
         logger.info(f"Starting real-time event processor with {num_workers} workers")
 
-        # Start worker tasks
+        # Start worker tasks. Local workers also drain events queued while
+        # Redis was unreachable.
         for i in range(num_workers):
             task = asyncio.create_task(self._event_worker(f"worker-{i}"))
             self.worker_tasks.append(task)
 
+        # Stream consumers start as soon as Redis is reachable, now or later
+        if self.use_streams:
+            self.worker_tasks.append(asyncio.create_task(self._stream_connect_worker()))
+
         # Start aggregation task
         aggregation_task = asyncio.create_task(self._aggregation_worker())
         self.worker_tasks.append(aggregation_task)
@@ -108,6 +203,7 @@ class RealtimeEventProcessor:
         # Wait for tasks to complete
         await asyncio.gather(*self.worker_tasks, return_exceptions=True)
         self.worker_tasks.clear()
+        self._stream_workers_started = False
 
     def register_event_handler(self, event_type: EventType, handler: Callable):
         """Register an event handler for a specific event type"""
@@ -145,8 +241,16 @@ class RealtimeEventProcessor:
 
         try:
             if priority:
-                # Process high-priority events immediately
+                # Process high-priority events immediately; the stream copy
+                # only feeds the persisted aggregates
                 await self._process_single_event(event_record)
+                event_record["handled"] = True
+
+            if await self._publish_event(event_record):
+                return True
+
+            if priority:
+                self._buffer_aggregates([event_record])
             else:
                 # Queue normal events
                 await self.event_queue.put(event_record)
@@ -193,6 +297,8 @@ class RealtimeEventProcessor:
             "active_handlers": self.metrics.active_handlers,
             "queue_size": self.event_queue.qsize(),
             "queue_max_size": self.event_queue.maxsize,
+            "backend": "redis_streams" if self._stream_ready else "memory",
+            "buffered_aggregates": len(self.aggregation_buffer),
             "last_reset": (
                 self.metrics.last_reset.isoformat() if self.metrics.last_reset else None
             ),
@@ -248,6 +354,7 @@ class RealtimeEventProcessor:
 
                 # Process the event
                 await self._process_single_event(event_record)
+                self._buffer_aggregates([event_record])
 
                 # Mark task as done
                 self.event_queue.task_done()
@@ -341,8 +448,7 @@ class RealtimeEventProcessor:
                 await asyncio.sleep(self.aggregation_interval)
 
                 # Process aggregated events
-                if self.aggregation_buffer:
-                    await self._process_aggregated_events()
+                await self._process_aggregated_events()
 
             except Exception as e:
                 logger.error(f"Error in aggregation worker: {e}")
@@ -350,29 +456,34 @@ class RealtimeEventProcessor:
         logger.info("Event aggregation worker stopped")
 
     async def _process_aggregated_events(self):
-        """Process aggregated events for batch operations"""
-
-        for event_type, events in self.aggregation_buffer.items():
-            if not events:
-                continue
+        """Persist aggregates of locally handled events"""
+        records, self.aggregation_buffer = self.aggregation_buffer, []
 
+        if records:
             try:
-                if event_type == "order_metrics_update":
-                    # Batch update order metrics
-                    await self._batch_update_order_metrics(events)
-                elif event_type == "staff_performance_update":
-                    # Batch update staff performance
-                    await self._batch_update_staff_performance(events)
-
-                logger.debug(
-                    f"Processed {len(events)} aggregated events of type: {event_type}"
-                )
+                persisted = await asyncio.to_thread(self._persist_aggregates, records)
+                logger.debug(f"Persisted aggregates for {persisted} events")
+            except Exception as e:
+                logger.error(f"Error persisting aggregated events: {e}")
+                # Persisting is idempotent per event, so retry on the next cycle
+                self._buffer_aggregates(records)
 
+        if (
+            self._last_prune is None
+            or datetime.now() - self._last_prune >= PROCESSED_EVENT_PRUNE_INTERVAL
+        ):
+            try:
+                await asyncio.to_thread(self._prune_processed_events)
             except Exception as e:
-                logger.error(f"Error processing aggregated events {event_type}: {e}")
+                logger.error(f"Error pruning processed events: {e}")
 
-        # Clear aggregation buffer
-        self.aggregation_buffer.clear()
+    def _buffer_aggregates(self, records: List[Dict[str, Any]]):
+        """Queue handled events for the next aggregate flush"""
+        self.aggregation_buffer.extend(records)
+        overflow = len(self.aggregation_buffer) - MAX_BUFFERED_AGGREGATES
+        if overflow > 0:
+            del self.aggregation_buffer[:overflow]
+            logger.warning(f"Aggregation buffer full, dropped {overflow} events")
 
     async def _metrics_worker(self):
         """Worker for updating event processing metrics"""
@@ -454,18 +565,7 @@ class RealtimeEventProcessor:
             await realtime_metrics_service.invalidate_cache("hourly")
 
             # Update dashboard metrics
-            snapshot = await realtime_metrics_service.get_current_dashboard_snapshot()
-            await websocket_manager.broadcast_dashboard_update(snapshot)
-
-            # Add to aggregation buffer for batch processing
-            self.aggregation_buffer["order_metrics_update"].append(
-                {
-                    "order_id": order_data.get("order_id"),
-                    "staff_id": order_data.get("staff_id"),
-                    "amount": order_data.get("total_amount"),
-                    "timestamp": event_record["timestamp"],
-                }
-            )
+            await self._broadcast(event_record, "dashboard")
 
             logger.debug(
                 f"Processed order completed event: {order_data.get('order_id')}"
@@ -482,25 +582,13 @@ class RealtimeEventProcessor:
             action_type = action_data.get("action_type")
 
             # Handle specific staff actions
-            if action_type in ["order_processed", "customer_served"]:
+            if action_type in AGGREGATED_STAFF_ACTIONS:
                 # Invalidate performance cache
                 await realtime_metrics_service.invalidate_cache("performers")
 
-                # Add to aggregation buffer
-                self.aggregation_buffer["staff_performance_update"].append(
-                    {
-                        "staff_id": action_data.get("staff_id"),
-                        "action_type": action_type,
-                        "timestamp": event_record["timestamp"],
-                    }
-                )
-
             elif action_type in ["shift_started", "shift_ended"]:
                 # Update dashboard for staff availability changes
-                snapshot = (
-                    await realtime_metrics_service.get_current_dashboard_snapshot()
-                )
-                await websocket_manager.broadcast_dashboard_update(snapshot)
+                await self._broadcast(event_record, "dashboard")
 
             logger.debug(f"Processed staff action event: {action_type}")
 
@@ -517,14 +605,16 @@ class RealtimeEventProcessor:
 
             # Broadcast high-severity system events
             if severity in ["high", "critical"]:
-                await websocket_manager.broadcast_alert_notification(
+                await self._broadcast(
+                    event_record,
+                    "alert",
                     {
                         "type": "system_event",
                         "event_type": event_type,
                         "severity": severity,
                         "message": system_data.get("message", "System event occurred"),
                         "timestamp": event_record["timestamp"].isoformat(),
-                    }
+                    },
                 )
 
             logger.debug(f"Processed system event: {event_type} (severity: {severity})")
@@ -539,7 +629,9 @@ class RealtimeEventProcessor:
             alert_data = event_record["data"]
 
             # Broadcast alert notification
-            await websocket_manager.broadcast_alert_notification(
+            await self._broadcast(
+                event_record,
+                "alert",
                 {
                     "type": "alert_triggered",
                     "alert_id": alert_data.get("alert_id"),
@@ -550,7 +642,7 @@ class RealtimeEventProcessor:
                     "current_value": alert_data.get("current_value"),
                     "threshold_value": alert_data.get("threshold_value"),
                     "timestamp": event_record["timestamp"].isoformat(),
-                }
+                },
             )
 
             logger.info(f"Processed alert triggered: {alert_data.get('alert_name')}")
@@ -559,48 +651,374 @@ class RealtimeEventProcessor:
             logger.error(f"Error handling alert triggered event: {e}")
             raise
 
-    async def _batch_update_order_metrics(self, events: List[Dict[str, Any]]):
-        """Batch update order-related metrics"""
-        try:
-            # Group events by staff member
-            staff_metrics = defaultdict(lambda: {"orders": 0, "revenue": 0})
+    async def _broadcast(
+        self,
+        event_record: Dict[str, Any],
+        kind: str,
+        payload: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Send a dashboard refresh or an alert to websocket clients.
+
+        An event consumed from the stream is handled by one process only, so
+        its broadcast is published on EVENT_BROADCAST_CHANNEL and every
+        processor relays it to its own clients.
+        """
+        if event_record.get("from_stream"):
+            try:
+                await self.redis_client.publish(
+                    EVENT_BROADCAST_CHANNEL,
+                    json.dumps({"kind": kind, "payload": payload}, default=str),
+                )
+                return
+            except Exception as e:
+                logger.error(f"Failed to publish broadcast, sending locally: {e}")
 
-            for event in events:
-                staff_id = event.get("staff_id")
-                amount = float(event.get("amount", 0))
+        await self._deliver_broadcast(kind, payload)
+
+    async def _deliver_broadcast(self, kind: str, payload: Optional[Dict[str, Any]]):
+        """Send a broadcast to this process's websocket clients"""
+        if kind == "dashboard":
+            snapshot = await realtime_metrics_service.get_current_dashboard_snapshot()
+            await websocket_manager.broadcast_dashboard_update(snapshot)
+        else:
+            await websocket_manager.broadcast_alert_notification(payload)
 
-                staff_metrics[staff_id]["orders"] += 1
-                staff_metrics[staff_id]["revenue"] += amount
+    async def _broadcast_relay_worker(self):
+        """Relay broadcasts published by stream consumers to local clients"""
+        while self.is_running:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(EVENT_BROADCAST_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        broadcast = json.loads(message["data"])
+                        await self._deliver_broadcast(
+                            broadcast["kind"], broadcast.get("payload")
+                        )
+                    except Exception as e:
+                        logger.error(f"Error relaying broadcast: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Broadcast subscription lost: {e}")
+                await asyncio.sleep(STREAM_RETRY_INTERVAL.total_seconds())
+            finally:
+                await pubsub.aclose()
 
-            # Update metrics (this would typically involve database updates)
-            logger.debug(
-                f"Batch updated order metrics for {len(staff_metrics)} staff members"
-            )
+    # Redis stream transport
 
+    async def _stream_connect_worker(self):
+        """Retry Redis until the stream is ready, which starts its consumers"""
+        while self.is_running and not await self._ensure_stream():
+            await asyncio.sleep(STREAM_RETRY_INTERVAL.total_seconds())
+
+    def _start_stream_workers(self):
+        """Start the stream consumers the first time the stream is ready"""
+        if self._stream_workers_started or not self.is_running:
+            return
+        self._stream_workers_started = True
+
+        for i in range(self.num_workers):
+            task = asyncio.create_task(self._stream_worker(f"stream-{i}"))
+            self.worker_tasks.append(task)
+        self.worker_tasks.append(asyncio.create_task(self._reclaim_worker()))
+        self.worker_tasks.append(asyncio.create_task(self._broadcast_relay_worker()))
+
+    async def _ensure_stream(self) -> bool:
+        """Connect to Redis and create the consumer group if needed"""
+        if self._stream_ready:
+            return True
+        if not self.use_streams:
+            return False
+        if self._stream_retry_at and datetime.now() < self._stream_retry_at:
+            return False
+
+        try:
+            if self.redis_client is None:
+                self.redis_client = redis.from_url(
+                    settings.REDIS_URL, decode_responses=True
+                )
+            try:
+                await self.redis_client.xgroup_create(
+                    EVENT_STREAM_KEY, EVENT_CONSUMER_GROUP, id="0", mkstream=True
+                )
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            self._stream_ready = True
+            logger.info(f"Event processor using Redis stream {EVENT_STREAM_KEY}")
+            # Also reached when Redis comes back after a failed start
+            self._start_stream_workers()
         except Exception as e:
-            logger.error(f"Error in batch order metrics update: {e}")
-            raise
+            logger.warning(f"Redis streams unavailable, using local queue: {e}")
+            self._stream_retry_at = datetime.now() + STREAM_RETRY_INTERVAL
+
+        return self._stream_ready
+
+    async def _publish_event(self, event_record: Dict[str, Any]) -> bool:
+        """Append an event to the shared stream"""
+        if not await self._ensure_stream():
+            return False
 
-    async def _batch_update_staff_performance(self, events: List[Dict[str, Any]]):
-        """Batch update staff performance metrics"""
         try:
-            # Group events by staff member and action type
-            staff_actions = defaultdict(lambda: defaultdict(int))
+            await self.redis_client.xadd(
+                EVENT_STREAM_KEY,
+                {"event": json.dumps(event_record, default=str)},
+                maxlen=EVENT_STREAM_MAXLEN,
+                approximate=True,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to publish event to stream: {e}")
+            self._stream_ready = False
+            self._stream_retry_at = datetime.now() + STREAM_RETRY_INTERVAL
+            return False
+
+    async def _stream_worker(self, worker_name: str):
+        """Consume batches of new stream entries for this consumer"""
+        consumer = f"{self.consumer_prefix}-{worker_name}"
+        logger.info(f"Stream worker {consumer} started")
+
+        while self.is_running:
+            try:
+                await self._consume_stream(consumer, block_ms=STREAM_BLOCK_MS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in stream worker {consumer}: {e}")
+                if "NOGROUP" in str(e):
+                    # Redis lost the group (e.g. restarted empty); recreate it
+                    self._stream_ready = False
+                    await self._ensure_stream()
+                await asyncio.sleep(1)
 
-            for event in events:
-                staff_id = event.get("staff_id")
-                action_type = event.get("action_type")
+        logger.info(f"Stream worker {consumer} stopped")
 
-                staff_actions[staff_id][action_type] += 1
+    async def _reclaim_worker(self):
+        """Periodically take over entries left pending by dead consumers"""
+        consumer = f"{self.consumer_prefix}-reclaim"
 
-            # Update performance metrics
-            logger.debug(
-                f"Batch updated staff performance for {len(staff_actions)} staff members"
+        while self.is_running:
+            try:
+                await asyncio.sleep(PENDING_RECLAIM_INTERVAL)
+                reclaimed = await self._reclaim_pending(consumer)
+                if reclaimed:
+                    logger.info(f"Reclaimed {reclaimed} pending stream entries")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reclaiming pending stream entries: {e}")
+
+    async def _consume_stream(
+        self, consumer: str, block_ms: Optional[int] = None
+    ) -> int:
+        """Read and process one batch of new entries; returns the batch size"""
+        response = await self.redis_client.xreadgroup(
+            EVENT_CONSUMER_GROUP,
+            consumer,
+            {EVENT_STREAM_KEY: ">"},
+            count=STREAM_BATCH_SIZE,
+            block=block_ms,
+        )
+
+        consumed = 0
+        for _, entries in response or []:
+            await self._process_stream_batch(entries)
+            consumed += len(entries)
+        return consumed
+
+    async def _reclaim_pending(self, consumer: str) -> int:
+        """Claim and process entries idle longer than PENDING_IDLE_MS"""
+        start_id = "0-0"
+        reclaimed = 0
+
+        while True:
+            next_id, entries, *_ = await self.redis_client.xautoclaim(
+                EVENT_STREAM_KEY,
+                EVENT_CONSUMER_GROUP,
+                consumer,
+                min_idle_time=PENDING_IDLE_MS,
+                start_id=start_id,
+                count=STREAM_BATCH_SIZE,
             )
+            if entries:
+                await self._process_stream_batch(entries)
+                reclaimed += len(entries)
+            if next_id in ("0-0", b"0-0"):
+                return reclaimed
+            start_id = next_id
+
+    async def _process_stream_batch(self, entries: List[Tuple[str, Dict[str, str]]]):
+        """Handle a batch of entries, persist its aggregates, then ack it"""
+        entry_ids = []
+        records = []
+
+        for entry_id, fields in entries:
+            entry_ids.append(entry_id)
+            record = self._decode_stream_entry(entry_id, fields)
+            if record is None:
+                continue
+
+            # Priority events were handled by the producer
+            if not record.get("handled"):
+                await self._process_single_event(record)
+            records.append(record)
+
+        # Raises before the ack if the database is unavailable; the entries
+        # stay pending and are reclaimed later
+        await asyncio.to_thread(self._persist_aggregates, records)
+        await self.redis_client.xack(EVENT_STREAM_KEY, EVENT_CONSUMER_GROUP, *entry_ids)
 
+    def _decode_stream_entry(
+        self, entry_id: str, fields: Optional[Dict[str, str]]
+    ) -> Optional[Dict[str, Any]]:
+        """Rebuild an event record from a stream entry"""
+        try:
+            record = json.loads(fields["event"])
+            record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+            EventType(record["type"])
+            record["from_stream"] = True
+            return record
         except Exception as e:
-            logger.error(f"Error in batch staff performance update: {e}")
+            # Trimmed or malformed entries are acknowledged and dropped
+            logger.error(f"Dropping unreadable stream entry {entry_id}: {e}")
+            self.metrics.failed_events += 1
+            return None
+
+    # Windowed aggregates
+
+    def _persist_aggregates(self, records: List[Dict[str, Any]]) -> int:
+        """Fold events into the per-minute aggregates exactly once"""
+        contributions = {}
+        for record in records:
+            rows = self._aggregate_contributions(record)
+            if rows:
+                contributions[record["id"]] = rows
+        if not contributions:
+            return 0
+
+        db = self.session_factory()
+        try:
+            claimed = db.execute(
+                text(_CLAIM_EVENTS_SQL), {"event_ids": list(contributions)}
+            )
+            new_ids = {row.event_id for row in claimed}
+
+            totals: Dict[AggregateKey, Dict[str, Any]] = {}
+            for event_id in new_ids:
+                for key, deltas in contributions[event_id]:
+                    bucket = totals.setdefault(
+                        key,
+                        {
+                            "order_count": 0,
+                            "revenue": Decimal("0"),
+                            "quantity": 0,
+                            "action_count": 0,
+                        },
+                    )
+                    for name, value in deltas.items():
+                        bucket[name] += value
+
+            if totals:
+                db.execute(
+                    text(_UPSERT_AGGREGATES_SQL),
+                    [
+                        {
+                            "bucket_start": bucket_start,
+                            "dimension": dimension,
+                            "dimension_id": dimension_id,
+                            **values,
+                        }
+                        for (bucket_start, dimension, dimension_id), values in sorted(
+                            totals.items()
+                        )
+                    ],
+                )
+            db.commit()
+            return len(new_ids)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _prune_processed_events(self):
+        """Forget processed event ids older than the redelivery window"""
+        db = self.session_factory()
+        try:
+            db.execute(
+                text(_PRUNE_PROCESSED_EVENTS_SQL),
+                {"cutoff": datetime.now() - PROCESSED_EVENT_RETENTION},
+            )
+            db.commit()
+            self._last_prune = datetime.now()
+        except Exception:
+            db.rollback()
             raise
+        finally:
+            db.close()
+
+    def _aggregate_contributions(
+        self, record: Dict[str, Any]
+    ) -> List[Tuple[AggregateKey, Dict[str, Any]]]:
+        """Per-minute staff/product deltas contributed by one event"""
+        data = record.get("data") or {}
+        contributions = []
+
+        if record["type"] == EventType.ORDER_COMPLETED.value:
+            bucket = _minute_bucket(data.get("completed_at") or record["timestamp"])
+            if data.get("staff_id") is not None:
+                contributions.append(
+                    (
+                        (bucket, "staff", int(data["staff_id"])),
+                        {
+                            "order_count": 1,
+                            "revenue": _to_decimal(data.get("total_amount")),
+                        },
+                    )
+                )
+            for item in data.get("items") or []:
+                product_id = item.get("product_id") or item.get("menu_item_id")
+                if product_id is None:
+                    continue
+                quantity = int(item.get("quantity") or 1)
+                revenue = (
+                    _to_decimal(item["total"])
+                    if item.get("total") is not None
+                    else _to_decimal(item.get("price")) * quantity
+                )
+                contributions.append(
+                    (
+                        (bucket, "product", int(product_id)),
+                        {"order_count": 1, "quantity": quantity, "revenue": revenue},
+                    )
+                )
+
+        elif record["type"] == EventType.STAFF_ACTION.value:
+            if (
+                data.get("action_type") in AGGREGATED_STAFF_ACTIONS
+                and data.get("staff_id") is not None
+            ):
+                bucket = _minute_bucket(data.get("timestamp") or record["timestamp"])
+                contributions.append(
+                    ((bucket, "staff", int(data["staff_id"])), {"action_count": 1})
+                )
+
+        return contributions
+
+
+def _minute_bucket(value: Any) -> datetime:
+    """Truncate a datetime (or ISO string) to the start of its minute"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(second=0, microsecond=0)
+
+
+def _to_decimal(value: Any) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal("0")
 
 
 # Global event processor instance
@@ -3,7 +3,8 @@
 import io
 import csv
 import logging
-from typing import List, Dict, Any, Optional, Union
+import zlib
+from typing import List, Dict, Any, Optional, Union, Iterable, Iterator
 from datetime import datetime
 from decimal import Decimal
 import tempfile
@@ -12,6 +13,7 @@ import os
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 
 from ..schemas.analytics_schemas import (
     SalesReportRequest,
@@ -24,6 +26,17 @@ from .sales_report_service import SalesReportService
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per server-side cursor round trip when streaming exports
+EXPORT_FETCH_BATCH_SIZE = 2000
+
+# Rows encoded into each streamed CSV chunk
+CSV_CHUNK_ROWS = 1000
+
+# Bytes per chunk when streaming a finished XLSX file
+FILE_CHUNK_SIZE = 64 * 1024
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 try:
     from reportlab.lib import colors
     from reportlab.lib.pagesizes import letter, A4
@@ -46,6 +59,7 @@ try:
     import openpyxl
     from openpyxl.styles import Font, PatternFill, Alignment
     from openpyxl.utils import get_column_letter
+    from openpyxl.cell import WriteOnlyCell
 
     OPENPYXL_AVAILABLE = True
 except ImportError:
@@ -63,20 +77,35 @@ class ExportService:
         self.sales_service = SalesReportService(db)
 
     async def export_sales_report(
-        self, request: SalesReportRequest, format_type: str, executed_by: int
+        self,
+        request: SalesReportRequest,
+        format_type: str,
+        executed_by: int,
+        compress: bool = False,
     ) -> StreamingResponse:
         """
         Export sales report in the specified format.
 
+        Detailed sales reports in CSV or XLSX are streamed straight from a
+        server-side cursor with no row limit; see ``stream_detailed_sales_report``.
+
         Args:
             request: Sales report request with filters and configuration
             format_type: Export format (csv, pdf, xlsx)
             executed_by: ID of the user requesting the export
+            compress: Gzip streamed CSV output on the fly
 
         Returns:
             StreamingResponse with the exported file
         """
         try:
+            if request.report_type.value == "sales_detailed" and (
+                format_type.lower() in ("csv", "xlsx")
+            ):
+                return self.stream_detailed_sales_report(
+                    request, format_type.lower(), compress=compress
+                )
+
             # Generate the report data based on type
             if request.report_type.value == "sales_detailed":
                 data = self.sales_service.generate_detailed_sales_report(
@@ -128,6 +157,136 @@ class ExportService:
                 detail="Failed to export sales report",
             )
 
+    def stream_detailed_sales_report(
+        self, request: SalesReportRequest, format_type: str, compress: bool = False
+    ) -> StreamingResponse:
+        """
+        Stream a detailed sales report without materialising it.
+
+        Rows come from ``SalesReportService.iter_detailed_sales_rows`` and are
+        encoded in chunks on a worker thread, so memory use is constant
+        regardless of row count. XLSX uses openpyxl's write-only workbook,
+        spooled to a temporary file and streamed once complete.
+        """
+        rows = self.sales_service.iter_detailed_sales_rows(
+            request.filters,
+            sort_by=request.sort_by,
+            sort_order=request.sort_order,
+            batch_size=EXPORT_FETCH_BATCH_SIZE,
+        )
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        if format_type == "xlsx":
+            if not OPENPYXL_AVAILABLE:
+                raise HTTPException(
+                    status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                    detail="Excel export requires openpyxl library. Please install: pip install openpyxl",
+                )
+            return StreamingResponse(
+                iterate_in_threadpool(
+                    self._xlsx_chunks(rows, request.report_type.value, request)
+                ),
+                media_type=XLSX_MEDIA_TYPE,
+                headers={
+                    "Content-Disposition": f"attachment; filename=sales_report_{timestamp}.xlsx"
+                },
+            )
+
+        filename = f"sales_report_{timestamp}.csv"
+        if compress:
+            filename += ".gz"
+
+        return StreamingResponse(
+            iterate_in_threadpool(
+                self._csv_chunks(rows, request.report_type.value, compress)
+            ),
+            media_type="application/gzip" if compress else "text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+
+    def _csv_chunks(
+        self, rows: Iterable[Any], report_type: str, compress: bool = False
+    ) -> Iterator[bytes]:
+        """Encode rows as CSV, yielding one chunk per CSV_CHUNK_ROWS rows"""
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # wbits=31 writes a gzip container rather than a raw zlib stream
+        compressor = zlib.compressobj(wbits=31) if compress else None
+
+        def drain() -> bytes:
+            data = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            return compressor.compress(data) if compressor else data
+
+        writer.writerow(self._get_csv_headers(report_type))
+
+        for row_count, item in enumerate(rows, 1):
+            writer.writerow(self._format_csv_row(item, report_type))
+            if row_count % CSV_CHUNK_ROWS == 0:
+                chunk = drain()
+                if chunk:
+                    yield chunk
+
+        chunk = drain()
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
+
+    def _xlsx_chunks(
+        self, rows: Iterable[Any], report_type: str, request: SalesReportRequest
+    ) -> Iterator[bytes]:
+        """Write rows to a write-only workbook and yield the saved file"""
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Sales Report")
+
+        headers = self._get_excel_headers(report_type)
+        # Write-only sheets cannot be measured afterwards, so widths are fixed
+        for col in range(1, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 18
+
+        ws.append([f"Sales Report - {report_type.replace('_', ' ').title()}"])
+        ws.append(
+            [
+                f"Period: {request.filters.date_from} to {request.filters.date_to} | Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            ]
+        )
+        ws.append([])
+
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(
+            start_color="366092", end_color="366092", fill_type="solid"
+        )
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        for item in rows:
+            ws.append(self._format_excel_row(item, report_type))
+
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
+        temp_path = temp_file.name
+        temp_file.close()
+
+        try:
+            wb.save(temp_path)
+            with open(temp_path, "rb") as f:
+                while True:
+                    chunk = f.read(FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
     async def _export_csv(
         self,
         data: List[
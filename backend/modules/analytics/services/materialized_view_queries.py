@@ -4,7 +4,10 @@
 Query services that leverage materialized views for optimal performance.
 
 These queries use pre-aggregated data from materialized views to provide
-fast analytics responses without complex joins and aggregations.
+fast analytics responses without complex joins and aggregations. Sales,
+product, hourly and POS provider figures are served from the incrementally
+maintained rollup tables (see ``rollup_service``) rather than from views
+that need a full refresh.
 """
 
 from typing import List, Dict, Optional, Any, Tuple
@@ -14,8 +17,19 @@ from sqlalchemy import text, and_, or_
 from sqlalchemy.orm import Session
 import logging
 
+from .rollup_service import AnalyticsRollupService
+
 logger = logging.getLogger(__name__)
 
+# Views whose contents now live in rollup tables; refreshing them by name runs
+# the incremental rollup refresh instead
+ROLLUP_BACKED_VIEWS = {
+    "mv_daily_sales_summary",
+    "mv_product_performance",
+    "mv_hourly_sales_patterns",
+    "mv_pos_provider_daily_summary",
+}
+
 
 class MaterializedViewQueries:
     """Provides optimized queries using materialized views"""
@@ -27,7 +41,7 @@ class MaterializedViewQueries:
         end_date: date,
         restaurant_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Get daily sales summary from materialized view"""
+        """Get daily sales summary from the daily sales rollup"""
         
         query = """
             SELECT 
@@ -45,7 +59,7 @@ class MaterializedViewQueries:
                 active_staff,
                 highest_order_value,
                 lowest_order_value
-            FROM mv_daily_sales_summary
+            FROM analytics_rollup_daily_sales
             WHERE sale_date BETWEEN :start_date AND :end_date
         """
         
@@ -92,7 +106,7 @@ class MaterializedViewQueries:
         limit: int = 10,
         restaurant_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Get top performing products from materialized view"""
+        """Get top performing products from the product rollup"""
         
         query = """
             SELECT 
@@ -105,7 +119,7 @@ class MaterializedViewQueries:
                 SUM(order_count) as total_orders,
                 AVG(avg_price) as average_price,
                 COUNT(DISTINCT sale_date) as days_sold
-            FROM mv_product_performance
+            FROM analytics_rollup_product_daily
             WHERE sale_date BETWEEN :start_date AND :end_date
         """
         
@@ -151,7 +165,7 @@ class MaterializedViewQueries:
         restaurant_id: Optional[int] = None,
         day_of_week: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Get hourly sales patterns from materialized view"""
+        """Get hourly sales patterns over the last 90 days from the hourly rollup"""
         
         query = """
             SELECT 
@@ -159,14 +173,14 @@ class MaterializedViewQueries:
                 day_of_week,
                 SUM(order_count) as total_orders,
                 SUM(total_revenue) as total_revenue,
-                AVG(avg_order_value) as avg_order_value,
+                COALESCE(SUM(total_revenue) / NULLIF(SUM(order_count), 0), 0) as avg_order_value,
                 SUM(unique_customers) as total_customers,
-                AVG(avg_processing_minutes) as avg_processing_time
-            FROM mv_hourly_sales_patterns
-            WHERE 1=1
+                SUM(processing_minutes_sum) / NULLIF(SUM(processed_orders), 0) as avg_processing_time
+            FROM analytics_rollup_hourly_sales
+            WHERE sale_date >= :window_start
         """
         
-        params = {}
+        params = {"window_start": date.today() - timedelta(days=90)}
         
         if restaurant_id:
             query += " AND restaurant_id = :restaurant_id"
@@ -267,33 +281,42 @@ class MaterializedViewQueries:
         end_date: date,
         provider_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Get POS provider performance trends from materialized view"""
+        """Get POS provider performance trends from the provider rollup"""
         
         query = """
             SELECT 
-                provider_id,
-                provider_name,
-                provider_code,
-                snapshot_date,
-                total_transactions,
-                successful_transactions,
-                failed_transactions,
-                total_transaction_value,
-                avg_uptime,
-                avg_sync_time,
-                total_terminals,
-                online_terminals
-            FROM mv_pos_provider_daily_summary
-            WHERE snapshot_date BETWEEN :start_date AND :end_date
+                r.provider_id,
+                epp.provider_name,
+                epp.provider_code,
+                r.snapshot_date,
+                r.total_transactions,
+                r.successful_transactions,
+                r.failed_transactions,
+                r.total_transaction_value,
+                r.avg_uptime,
+                r.avg_sync_time,
+                COALESCE(th.total_terminals, 0) as total_terminals,
+                COALESCE(th.online_terminals, 0) as online_terminals
+            FROM analytics_rollup_pos_provider_daily r
+            JOIN external_pos_providers epp ON r.provider_id = epp.id
+            LEFT JOIN (
+                SELECT 
+                    provider_id,
+                    COUNT(DISTINCT terminal_id) as total_terminals,
+                    COUNT(DISTINCT CASE WHEN is_online THEN terminal_id END) as online_terminals
+                FROM pos_terminal_health
+                GROUP BY provider_id
+            ) th ON th.provider_id = r.provider_id
+            WHERE r.snapshot_date BETWEEN :start_date AND :end_date
         """
         
         params = {"start_date": start_date, "end_date": end_date}
         
         if provider_id:
-            query += " AND provider_id = :provider_id"
+            query += " AND r.provider_id = :provider_id"
             params["provider_id"] = provider_id
         
-        query += " ORDER BY provider_id, snapshot_date"
+        query += " ORDER BY r.provider_id, r.snapshot_date"
         
         result = db.execute(text(query), params)
         
@@ -337,15 +360,19 @@ class MaterializedViewQueries:
     
     @staticmethod
     def refresh_materialized_views(db: Session, view_name: Optional[str] = None):
-        """Manually refresh materialized views"""
+        """Manually refresh materialized views and the analytics rollups"""
         
         try:
-            if view_name:
+            if view_name in ROLLUP_BACKED_VIEWS:
+                AnalyticsRollupService(db).refresh()
+                logger.info(f"Refreshed rollups backing {view_name}")
+            elif view_name:
                 # Refresh specific view
                 db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view_name}"))
                 logger.info(f"Refreshed materialized view: {view_name}")
             else:
-                # Refresh all analytics views
+                # Refresh all analytics views and fold new orders into the rollups
+                AnalyticsRollupService(db).refresh()
                 db.execute(text("SELECT refresh_analytics_materialized_views()"))
                 logger.info("Refreshed all analytics materialized views")
             
@@ -385,6 +412,7 @@ class MaterializedViewQueries:
         return {
             "materialized_views": views,
             "count": len(views),
+            "rollups": AnalyticsRollupService(db).get_state(),
         }
 
 
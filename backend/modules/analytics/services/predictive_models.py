@@ -7,6 +7,7 @@ Implements various forecasting algorithms including ARIMA, Prophet,
 exponential smoothing, and ensemble methods.
 """
 
+import hashlib
 import logging
 import numpy as np
 import pandas as pd
@@ -26,6 +27,16 @@ warnings.filterwarnings("ignore")
 logger = logging.getLogger(__name__)
 
 
+def series_fingerprint(data: pd.Series) -> str:
+    """Identify a series by its last timestamp and a hash of index and values"""
+    if data.empty:
+        return "empty"
+
+    row_hashes = pd.util.hash_pandas_object(data, index=True).values
+    digest = hashlib.sha1(row_hashes.tobytes()).hexdigest()
+    return f"{data.index[-1]}:{len(data)}:{digest}"
+
+
 class BaseForecastModel(ABC):
     """Base class for all forecasting models"""
 
@@ -51,6 +62,10 @@ class BaseForecastModel(ABC):
         """
         pass
 
+    def clone_unfitted(self) -> "BaseForecastModel":
+        """Fresh instance carrying the hyperparameters this model settled on"""
+        return self.__class__(confidence_level=self.confidence_level)
+
     def evaluate(self, actual: pd.Series, predicted: pd.Series) -> Dict[str, float]:
         """Evaluate model performance"""
         mae = mean_absolute_error(actual, predicted)
@@ -92,13 +107,16 @@ class ARIMAModel(BaseForecastModel):
     def __init__(self, order: Tuple[int, int, int] = None, **kwargs):
         super().__init__(**kwargs)
         self.order = order or (1, 1, 1)  # Default ARIMA(1,1,1)
+        self.order_selected = order is not None
 
     def fit(self, data: pd.Series, auto_select: bool = True) -> None:
         """Fit ARIMA model to the data"""
         try:
-            if auto_select:
-                # Auto-select best ARIMA parameters
+            # The order grid search fits up to 8 models, so it only runs on
+            # the first fit; refits (ensemble weight tuning, new data) reuse it
+            if auto_select and not self.order_selected:
                 self.order = self._select_best_order(data)
+                self.order_selected = True
 
             self.model = ARIMA(data, order=self.order)
             self.fitted_model = self.model.fit()
@@ -129,6 +147,9 @@ class ARIMAModel(BaseForecastModel):
 
         return predictions, lower_bounds, upper_bounds
 
+    def clone_unfitted(self) -> "ARIMAModel":
+        return ARIMAModel(order=self.order, confidence_level=self.confidence_level)
+
     def _select_best_order(self, data: pd.Series) -> Tuple[int, int, int]:
         """Auto-select best ARIMA order using AIC"""
         # Check stationarity
@@ -228,6 +249,13 @@ class MovingAverageModel(BaseForecastModel):
         self.weighted = weighted
         self.last_values = None
 
+    def clone_unfitted(self) -> "MovingAverageModel":
+        return MovingAverageModel(
+            window=self.window,
+            weighted=self.weighted,
+            confidence_level=self.confidence_level,
+        )
+
     def fit(self, data: pd.Series, **kwargs) -> None:
         """Fit moving average model"""
         if len(data) < self.window:
@@ -363,6 +391,12 @@ class EnsembleModel(BaseForecastModel):
         ]
         self.weights = None
 
+    def clone_unfitted(self) -> "EnsembleModel":
+        return EnsembleModel(
+            models=[model.clone_unfitted() for model in self.models],
+            confidence_level=self.confidence_level,
+        )
+
     def fit(self, data: pd.Series, optimize_weights: bool = True) -> None:
         """Fit all models in the ensemble"""
         successful_models = []
@@ -10,10 +10,13 @@ from dataclasses import dataclass, asdict
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text, and_, or_
 import redis
+from redis.exceptions import RedisError
+import uuid
 from contextlib import asynccontextmanager
 
 from core.database import get_db
 from core.config import settings
+from core.redis_cache import RedisCacheService, redis_cache
 from ..models.analytics_models import (
     SalesAnalyticsSnapshot,
     AggregationPeriod,
@@ -24,6 +27,16 @@ from modules.staff.models.staff_models import StaffMember
 
 logger = logging.getLogger(__name__)
 
+# Only the worker holding this lock computes dashboard snapshots
+SNAPSHOT_LEADER_LOCK = "analytics:dashboard_snapshot_leader"
+# Leader lease; a dead leader is replaced at most this long after it stops
+# renewing. Renewed every third of the lease.
+SNAPSHOT_LEADER_LEASE_SECONDS = 15
+# How often followers try to take over leadership
+SNAPSHOT_LEADER_RETRY_SECONDS = 5
+# Pub/sub channel carrying snapshots from the leader to every worker
+SNAPSHOT_CHANNEL = "analytics:dashboard:snapshots"
+
 
 @dataclass
 class RealtimeMetric:
@@ -94,8 +107,17 @@ class DashboardSnapshot:
 class RealtimeMetricsService:
     """Service for managing real-time dashboard metrics with caching and streaming"""
 
-    def __init__(self, redis_client: Optional[redis.Redis] = None):
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        coordination_cache: Optional[RedisCacheService] = None,
+    ):
         self.redis_client = redis_client or self._init_redis()
+        # Async Redis used for leader election and snapshot pub/sub
+        self.coordination_cache = coordination_cache or redis_cache
+        self.instance_id = str(uuid.uuid4())
+        self.is_leader = False
+        self._last_snapshot_at: Optional[datetime] = None
         self.subscribers: Set[Callable] = set()
         self.is_running = False
         self.update_interval = 30  # Update every 30 seconds
@@ -130,11 +152,17 @@ class RealtimeMetricsService:
         self.is_running = True
         logger.info("Starting real-time metrics service")
 
+        if not self.coordination_cache.redis_client:
+            await self.coordination_cache.initialize()
+
         # Start background tasks
         update_task = asyncio.create_task(self._metrics_update_loop())
+        listener_task = asyncio.create_task(self._snapshot_listener())
         cleanup_task = asyncio.create_task(self._cache_cleanup_loop())
 
-        await asyncio.gather(update_task, cleanup_task, return_exceptions=True)
+        await asyncio.gather(
+            update_task, listener_task, cleanup_task, return_exceptions=True
+        )
 
     async def stop_realtime_updates(self):
         """Stop the real-time metrics service"""
@@ -274,28 +302,143 @@ class RealtimeMetricsService:
     # Private methods
 
     async def _metrics_update_loop(self):
-        """Background loop for updating metrics"""
+        """
+        Background loop for updating metrics.
+
+        Workers compete for a leased Redis lock; the holder computes each
+        snapshot and publishes it, the others retry until the lease lapses.
+        Without Redis every worker computes its own snapshots.
+        """
         while self.is_running:
             try:
-                # Generate new dashboard snapshot
-                snapshot = await self._generate_dashboard_snapshot()
+                async with self.coordination_cache.lock(
+                    SNAPSHOT_LEADER_LOCK,
+                    timeout=SNAPSHOT_LEADER_LEASE_SECONDS,
+                    blocking_timeout=0,
+                ) as lease:
+                    await self._lead_snapshot_updates(lease)
+            except TimeoutError:
+                # Another worker holds the lease
+                await asyncio.sleep(SNAPSHOT_LEADER_RETRY_SECONDS)
+            except RedisError as e:
+                # Election unavailable: keep this worker's dashboards fresh
+                logger.warning(f"Snapshot leader election failed: {e}")
+                await self._refresh_snapshot()
+                await asyncio.sleep(self.update_interval)
+            except Exception as e:
+                logger.error(f"Error in metrics update loop: {e}")
+                await asyncio.sleep(self.update_interval)
 
-                # Cache the snapshot
-                await self._cache_dashboard_snapshot(snapshot)
+    async def _lead_snapshot_updates(self, lease):
+        """Compute and publish snapshots while holding the leader lease"""
+        renewal = asyncio.create_task(self._renew_leader_lease(lease))
+        self.is_leader = True
+        logger.info(f"Worker {self.instance_id} is dashboard snapshot leader")
 
-                # Notify all subscribers
-                await self._notify_subscribers(snapshot)
+        try:
+            while self.is_running and not renewal.done():
+                await self._refresh_snapshot()
 
-                # Log metrics update
-                logger.info(
-                    f"Dashboard metrics updated: Revenue: ${snapshot.revenue_today}, Orders: {snapshot.orders_today}"
-                )
+                # Wait for next update, stepping down early if the lease is lost
+                await asyncio.wait({renewal}, timeout=self.update_interval)
+        finally:
+            self.is_leader = False
+            renewal.cancel()
+
+    async def _refresh_snapshot(self):
+        """Compute a snapshot, cache and publish it, and notify subscribers"""
+        try:
+            # Generate new dashboard snapshot
+            snapshot = await self._generate_dashboard_snapshot()
 
+            # Cache the snapshot and hand it to the other workers
+            await self._cache_dashboard_snapshot(snapshot)
+            await self._publish_snapshot(snapshot)
+
+            # Notify local subscribers
+            self._last_snapshot_at = snapshot.timestamp
+            await self._notify_subscribers(snapshot)
+
+            # Log metrics update
+            logger.info(
+                f"Dashboard metrics updated: Revenue: ${snapshot.revenue_today}, Orders: {snapshot.orders_today}"
+            )
+
+        except Exception as e:
+            logger.error(f"Error in metrics update loop: {e}")
+
+    async def _renew_leader_lease(self, lease):
+        """Extend the leader lease until it can no longer be renewed"""
+        if lease is None:
+            # No Redis: nothing to renew, lead until stopped
+            await asyncio.Event().wait()
+
+        while True:
+            await asyncio.sleep(SNAPSHOT_LEADER_LEASE_SECONDS / 3)
+            try:
+                await lease.reacquire()
             except Exception as e:
-                logger.error(f"Error in metrics update loop: {e}")
+                logger.warning(f"Lost dashboard snapshot leader lease: {e}")
+                return
 
-            # Wait for next update
-            await asyncio.sleep(self.update_interval)
+    async def _publish_snapshot(self, snapshot: DashboardSnapshot):
+        """Publish a snapshot to the other workers"""
+        client = self.coordination_cache.redis_client
+        if not client:
+            return
+
+        try:
+            await client.publish(
+                SNAPSHOT_CHANNEL,
+                json.dumps(
+                    {"source": self.instance_id, "snapshot": snapshot.to_dict()},
+                    default=str,
+                ),
+            )
+        except Exception as e:
+            logger.error(f"Error publishing dashboard snapshot: {e}")
+
+    async def _snapshot_listener(self):
+        """Fan snapshots published by the leader out to local subscribers"""
+        client = self.coordination_cache.redis_client
+        if not client:
+            return
+
+        while self.is_running:
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(SNAPSHOT_CHANNEL)
+                while self.is_running:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message:
+                        await self._handle_published_snapshot(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in dashboard snapshot listener: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def _handle_published_snapshot(self, payload: Any):
+        """Deliver a snapshot published by another worker"""
+        try:
+            message = json.loads(payload)
+            if message.get("source") == self.instance_id:
+                return
+            snapshot = self._snapshot_from_dict(message["snapshot"])
+        except Exception as e:
+            logger.error(f"Ignoring malformed dashboard snapshot: {e}")
+            return
+
+        # A deposed leader may still publish once; never go back in time
+        if self._last_snapshot_at and snapshot.timestamp <= self._last_snapshot_at:
+            return
+
+        self._last_snapshot_at = snapshot.timestamp
+        await self._notify_subscribers(snapshot)
 
     async def _cache_cleanup_loop(self):
         """Background loop for cache cleanup"""
@@ -622,28 +765,30 @@ class RealtimeMetricsService:
         try:
             cached_data = self.redis_client.get(self._cache_keys["dashboard_snapshot"])
             if cached_data:
-                data = json.loads(cached_data)
-                # Reconstruct DashboardSnapshot from dict
-                return DashboardSnapshot(
-                    timestamp=datetime.fromisoformat(data["timestamp"]),
-                    revenue_today=Decimal(str(data["revenue_today"])),
-                    orders_today=data["orders_today"],
-                    customers_today=data["customers_today"],
-                    average_order_value=Decimal(str(data["average_order_value"])),
-                    revenue_growth=data["revenue_growth"],
-                    order_growth=data["order_growth"],
-                    customer_growth=data["customer_growth"],
-                    top_staff=data["top_staff"],
-                    top_products=data["top_products"],
-                    hourly_trends=data["hourly_trends"],
-                    active_alerts=data["active_alerts"],
-                    critical_metrics=data["critical_metrics"],
-                )
+                return self._snapshot_from_dict(json.loads(cached_data))
         except Exception as e:
             logger.error(f"Error getting cached dashboard: {e}")
 
         return None
 
+    def _snapshot_from_dict(self, data: Dict[str, Any]) -> DashboardSnapshot:
+        """Reconstruct DashboardSnapshot from its dict form"""
+        return DashboardSnapshot(
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            revenue_today=Decimal(str(data["revenue_today"])),
+            orders_today=data["orders_today"],
+            customers_today=data["customers_today"],
+            average_order_value=Decimal(str(data["average_order_value"])),
+            revenue_growth=data["revenue_growth"],
+            order_growth=data["order_growth"],
+            customer_growth=data["customer_growth"],
+            top_staff=data["top_staff"],
+            top_products=data["top_products"],
+            hourly_trends=data["hourly_trends"],
+            active_alerts=data["active_alerts"],
+            critical_metrics=data["critical_metrics"],
+        )
+
     async def _cache_dashboard_snapshot(self, snapshot: DashboardSnapshot):
         """Cache dashboard snapshot"""
         if not self.redis_client:
@@ -0,0 +1,516 @@
+# backend/modules/analytics/services/rollup_service.py
+
+"""
+Incremental maintenance of the analytics rollup tables.
+
+Instead of re-running the full aggregation behind each materialized view,
+every refresh looks at source rows modified since the last high-water mark,
+works out which (day, restaurant) or (day, provider) buckets they belong to
+and recomputes only those buckets. A voided, refunded or late-arriving order
+bumps ``updated_at`` and therefore lands its bucket back in the next run, so
+the same path covers corrections. Changes that leave no trace in
+``updated_at`` (hard deletes, an order moved to a different day) are handled
+by ``recompute_order_range``.
+"""
+
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+ORDER_ROLLUP = "orders"
+POS_ROLLUP = "pos_snapshots"
+
+# Re-scan this far behind the high-water mark so rows committed late with an
+# older updated_at are still picked up; recomputing a bucket is idempotent
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Number of dirty buckets recomputed per statement
+BUCKET_BATCH_SIZE = 500
+
+# Advisory lock keys serializing bucket recomputes across workers, so two
+# overlapping refreshes cannot both delete and then both insert a bucket
+ROLLUP_LOCK_KEYS = {ORDER_ROLLUP: 72810281, POS_ROLLUP: 72810282}
+
+# Hourly patterns only cover the trailing 90 days
+HOURLY_RETENTION_DAYS = 90
+
+# Order statuses that count as sales / as cancellations
+SALE_STATUSES = ("completed", "paid")
+CANCELLED_STATUSES = ("cancelled", "voided")
+
+Bucket = Tuple[date, Optional[int]]
+
+_ORDER_BUCKETS_CTE = """
+    WITH dirty AS (
+        SELECT *
+        FROM unnest(CAST(:bucket_dates AS date[]), CAST(:bucket_keys AS integer[]))
+            AS d(sale_date, restaurant_id)
+    )
+"""
+
+_ORDER_BUCKET_JOIN = """
+    JOIN dirty d
+        ON DATE(o.order_date) = d.sale_date
+        AND o.restaurant_id IS NOT DISTINCT FROM d.restaurant_id
+    WHERE o.order_date >= :min_date
+        AND o.order_date < :max_date
+        AND o.deleted_at IS NULL
+"""
+
+_DAILY_SALES_RECOMPUTE = [
+    _ORDER_BUCKETS_CTE + """
+    DELETE FROM analytics_rollup_daily_sales r
+    USING dirty d
+    WHERE r.sale_date = d.sale_date
+        AND r.restaurant_id IS NOT DISTINCT FROM d.restaurant_id
+    """,
+    _ORDER_BUCKETS_CTE
+    + """
+    INSERT INTO analytics_rollup_daily_sales (
+        sale_date, restaurant_id, total_orders, unique_customers, total_revenue,
+        avg_order_value, total_discounts, total_tax, completed_orders,
+        cancelled_orders, lunch_orders, dinner_orders, active_staff,
+        highest_order_value, lowest_order_value, refreshed_at
+    )
+    SELECT
+        DATE(o.order_date),
+        o.restaurant_id,
+        COUNT(o.id) FILTER (WHERE o.status IN :sale_statuses),
+        COUNT(DISTINCT o.customer_id) FILTER (WHERE o.status IN :sale_statuses),
+        COALESCE(SUM(o.total_amount) FILTER (WHERE o.status IN :sale_statuses), 0),
+        COALESCE(AVG(o.total_amount) FILTER (WHERE o.status IN :sale_statuses), 0),
+        COALESCE(SUM(o.discount_amount) FILTER (WHERE o.status IN :sale_statuses), 0),
+        COALESCE(SUM(o.tax_amount) FILTER (WHERE o.status IN :sale_statuses), 0),
+        COUNT(o.id) FILTER (WHERE o.status = 'completed'),
+        COUNT(o.id) FILTER (WHERE o.status IN :cancelled_statuses),
+        COUNT(o.id) FILTER (
+            WHERE o.status IN :sale_statuses
+                AND EXTRACT(hour FROM o.order_date) BETWEEN 11 AND 14
+        ),
+        COUNT(o.id) FILTER (
+            WHERE o.status IN :sale_statuses
+                AND EXTRACT(hour FROM o.order_date) BETWEEN 17 AND 21
+        ),
+        COUNT(DISTINCT o.staff_id) FILTER (WHERE o.status IN :sale_statuses),
+        COALESCE(MAX(o.total_amount) FILTER (WHERE o.status IN :sale_statuses), 0),
+        COALESCE(MIN(o.total_amount) FILTER (WHERE o.status IN :sale_statuses), 0),
+        NOW()
+    FROM orders o
+    """
+    + _ORDER_BUCKET_JOIN
+    + """
+        AND o.status IN :tracked_statuses
+    GROUP BY DATE(o.order_date), o.restaurant_id
+    """,
+]
+
+_PRODUCT_DAILY_RECOMPUTE = [
+    _ORDER_BUCKETS_CTE + """
+    DELETE FROM analytics_rollup_product_daily r
+    USING dirty d
+    WHERE r.sale_date = d.sale_date
+        AND r.restaurant_id IS NOT DISTINCT FROM d.restaurant_id
+    """,
+    _ORDER_BUCKETS_CTE
+    + """
+    INSERT INTO analytics_rollup_product_daily (
+        sale_date, restaurant_id, product_id, product_name, category_id,
+        category_name, quantity_sold, revenue, order_count, unique_customers,
+        avg_price
+    )
+    SELECT
+        DATE(o.order_date),
+        o.restaurant_id,
+        oi.menu_item_id,
+        mi.name,
+        mi.category_id,
+        mc.name,
+        SUM(oi.quantity),
+        SUM(oi.price * oi.quantity),
+        COUNT(DISTINCT o.id),
+        COUNT(DISTINCT o.customer_id),
+        AVG(oi.price)
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
+    LEFT JOIN menu_categories mc ON mi.category_id = mc.id
+    """
+    + _ORDER_BUCKET_JOIN
+    + """
+        AND o.status IN :sale_statuses
+    GROUP BY
+        DATE(o.order_date), o.restaurant_id, oi.menu_item_id,
+        mi.name, mi.category_id, mc.name
+    """,
+]
+
+_HOURLY_SALES_RECOMPUTE = [
+    _ORDER_BUCKETS_CTE + """
+    DELETE FROM analytics_rollup_hourly_sales r
+    USING dirty d
+    WHERE r.sale_date = d.sale_date
+        AND r.restaurant_id IS NOT DISTINCT FROM d.restaurant_id
+    """,
+    _ORDER_BUCKETS_CTE
+    + """
+    INSERT INTO analytics_rollup_hourly_sales (
+        sale_date, hour_of_day, day_of_week, restaurant_id, order_count,
+        total_revenue, unique_customers, processing_minutes_sum, processed_orders
+    )
+    SELECT
+        DATE(o.order_date),
+        EXTRACT(hour FROM o.order_date),
+        EXTRACT(dow FROM o.order_date),
+        o.restaurant_id,
+        COUNT(o.id),
+        COALESCE(SUM(o.total_amount), 0),
+        COUNT(DISTINCT o.customer_id),
+        COALESCE(SUM(EXTRACT(epoch FROM (o.completed_at - o.created_at)) / 60), 0),
+        COUNT(o.completed_at)
+    FROM orders o
+    """
+    + _ORDER_BUCKET_JOIN
+    + """
+        AND o.status IN :sale_statuses
+        AND o.order_date >= :hourly_cutoff
+    GROUP BY
+        DATE(o.order_date),
+        EXTRACT(hour FROM o.order_date),
+        EXTRACT(dow FROM o.order_date),
+        o.restaurant_id
+    """,
+]
+
+_POS_PROVIDER_RECOMPUTE = [
+    """
+    WITH dirty AS (
+        SELECT *
+        FROM unnest(CAST(:bucket_dates AS date[]), CAST(:bucket_keys AS integer[]))
+            AS d(snapshot_date, provider_id)
+    )
+    DELETE FROM analytics_rollup_pos_provider_daily r
+    USING dirty d
+    WHERE r.snapshot_date = d.snapshot_date AND r.provider_id = d.provider_id
+    """,
+    """
+    WITH dirty AS (
+        SELECT *
+        FROM unnest(CAST(:bucket_dates AS date[]), CAST(:bucket_keys AS integer[]))
+            AS d(snapshot_date, provider_id)
+    )
+    INSERT INTO analytics_rollup_pos_provider_daily (
+        provider_id, snapshot_date, total_transactions, successful_transactions,
+        failed_transactions, total_transaction_value, avg_uptime, avg_sync_time
+    )
+    SELECT
+        pas.provider_id,
+        pas.snapshot_date,
+        SUM(pas.total_transactions),
+        SUM(pas.successful_transactions),
+        SUM(pas.failed_transactions),
+        SUM(pas.total_transaction_value),
+        AVG(pas.uptime_percentage),
+        AVG(pas.average_sync_time_ms)
+    FROM pos_analytics_snapshots pas
+    JOIN dirty d
+        ON pas.snapshot_date = d.snapshot_date AND pas.provider_id = d.provider_id
+    GROUP BY pas.provider_id, pas.snapshot_date
+    """,
+]
+
+
+class AnalyticsRollupService:
+    """Keeps the analytics rollup tables current from a high-water mark"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Fold every source change since the last run into the rollups"""
+        return {
+            ORDER_ROLLUP: self.refresh_order_rollups(),
+            POS_ROLLUP: self.refresh_pos_rollups(),
+        }
+
+    def refresh_order_rollups(self) -> Dict[str, Any]:
+        """Recompute daily, product and hourly buckets touched by changed orders"""
+        started = time.perf_counter()
+        since = self._scan_start(ORDER_ROLLUP)
+
+        buckets, changed_rows, high_water_mark = self._changed_order_buckets(since)
+        self._recompute_order_buckets(buckets)
+        self._prune_hourly_rollup()
+        self._save_state(ORDER_ROLLUP, high_water_mark, changed_rows, len(buckets))
+
+        return self._run_summary(ORDER_ROLLUP, changed_rows, buckets, started)
+
+    def refresh_pos_rollups(self) -> Dict[str, Any]:
+        """Recompute provider days touched by changed POS analytics snapshots"""
+        started = time.perf_counter()
+        since = self._scan_start(POS_ROLLUP)
+
+        buckets, changed_rows, high_water_mark = self._changed_pos_buckets(since)
+        for batch in self._batches(buckets):
+            self._lock_rollup(POS_ROLLUP)
+            self._execute_recompute(_POS_PROVIDER_RECOMPUTE, batch, {})
+            self.db.commit()
+        self._save_state(POS_ROLLUP, high_water_mark, changed_rows, len(buckets))
+
+        return self._run_summary(POS_ROLLUP, changed_rows, buckets, started)
+
+    def recompute_order_range(
+        self,
+        start_date: date,
+        end_date: date,
+        restaurant_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Rebuild order rollups for a date range regardless of the watermark.
+
+        Used to correct buckets whose orders were hard-deleted or moved to
+        another day, and to reconcile the rollups after a bulk import.
+        """
+        started = time.perf_counter()
+
+        query = """
+            SELECT DATE(order_date) AS sale_date, restaurant_id
+            FROM orders
+            WHERE order_date >= :start_date AND order_date < :end_date
+            UNION
+            SELECT sale_date, restaurant_id
+            FROM analytics_rollup_daily_sales
+            WHERE sale_date >= :start_date AND sale_date < :end_date
+        """
+        params = {
+            "start_date": start_date,
+            "end_date": end_date + timedelta(days=1),
+        }
+        rows = self.db.execute(text(query), params).fetchall()
+
+        buckets = sorted(
+            (row.sale_date, row.restaurant_id)
+            for row in rows
+            if restaurant_id is None or row.restaurant_id == restaurant_id
+        )
+        self._recompute_order_buckets(buckets)
+
+        return self._run_summary(ORDER_ROLLUP, 0, buckets, started)
+
+    def get_state(self) -> List[Dict[str, Any]]:
+        """Return watermark and last-run statistics for each rollup"""
+        result = self.db.execute(text("""
+                SELECT rollup_name, high_water_mark, last_run_at,
+                       last_run_rows, last_run_buckets
+                FROM analytics_rollup_state
+                ORDER BY rollup_name
+                """))
+        return [
+            {
+                "name": row.rollup_name,
+                "high_water_mark": row.high_water_mark,
+                "last_run_at": row.last_run_at,
+                "last_run_rows": row.last_run_rows,
+                "last_run_buckets": row.last_run_buckets,
+            }
+            for row in result
+        ]
+
+    def _scan_start(self, rollup_name: str) -> Optional[datetime]:
+        """Point to scan from: the stored watermark minus the overlap window"""
+        high_water_mark = self.db.execute(
+            text(
+                "SELECT high_water_mark FROM analytics_rollup_state "
+                "WHERE rollup_name = :rollup_name"
+            ),
+            {"rollup_name": rollup_name},
+        ).scalar()
+
+        if high_water_mark is None:
+            return None
+        return high_water_mark - WATERMARK_OVERLAP
+
+    def _changed_order_buckets(
+        self, since: Optional[datetime]
+    ) -> Tuple[List[Bucket], int, Optional[datetime]]:
+        """Buckets holding orders modified after ``since`` (all when None)"""
+        query = """
+            SELECT DATE(order_date) AS sale_date,
+                   restaurant_id,
+                   COUNT(*) AS changed_rows,
+                   MAX(updated_at) AS max_updated_at
+            FROM orders
+        """
+        params: Dict[str, Any] = {}
+        if since is not None:
+            query += " WHERE updated_at > :since"
+            params["since"] = since
+        query += " GROUP BY DATE(order_date), restaurant_id"
+
+        return self._collect_buckets(self.db.execute(text(query), params))
+
+    def _changed_pos_buckets(
+        self, since: Optional[datetime]
+    ) -> Tuple[List[Bucket], int, Optional[datetime]]:
+        """Provider days holding snapshots modified after ``since``"""
+        query = """
+            SELECT snapshot_date AS sale_date,
+                   provider_id AS restaurant_id,
+                   COUNT(*) AS changed_rows,
+                   MAX(updated_at) AS max_updated_at
+            FROM pos_analytics_snapshots
+        """
+        params: Dict[str, Any] = {}
+        if since is not None:
+            query += " WHERE updated_at > :since"
+            params["since"] = since
+        query += " GROUP BY snapshot_date, provider_id"
+
+        return self._collect_buckets(self.db.execute(text(query), params))
+
+    @staticmethod
+    def _collect_buckets(
+        rows: Iterable[Any],
+    ) -> Tuple[List[Bucket], int, Optional[datetime]]:
+        buckets = []
+        changed_rows = 0
+        high_water_mark = None
+
+        for row in rows:
+            if row.sale_date is None:
+                continue
+            buckets.append((row.sale_date, row.restaurant_id))
+            changed_rows += row.changed_rows
+            if high_water_mark is None or row.max_updated_at > high_water_mark:
+                high_water_mark = row.max_updated_at
+
+        buckets.sort(key=lambda bucket: (bucket[0], bucket[1] or 0))
+        return buckets, changed_rows, high_water_mark
+
+    def _recompute_order_buckets(self, buckets: List[Bucket]):
+        """Replace the daily, product and hourly rows of each bucket"""
+        hourly_cutoff = date.today() - timedelta(days=HOURLY_RETENTION_DAYS)
+        params = {
+            "sale_statuses": SALE_STATUSES,
+            "cancelled_statuses": CANCELLED_STATUSES,
+            "tracked_statuses": SALE_STATUSES + CANCELLED_STATUSES,
+            "hourly_cutoff": hourly_cutoff,
+        }
+
+        for batch in self._batches(buckets):
+            try:
+                self._lock_rollup(ORDER_ROLLUP)
+                params["min_date"] = batch[0][0]
+                params["max_date"] = batch[-1][0] + timedelta(days=1)
+
+                self._execute_recompute(_DAILY_SALES_RECOMPUTE, batch, params)
+                self._execute_recompute(_PRODUCT_DAILY_RECOMPUTE, batch, params)
+
+                hourly_batch = [
+                    bucket for bucket in batch if bucket[0] >= hourly_cutoff
+                ]
+                if hourly_batch:
+                    self._execute_recompute(
+                        _HOURLY_SALES_RECOMPUTE, hourly_batch, params
+                    )
+
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+
+    def _lock_rollup(self, rollup_name: str):
+        """Hold the rollup's advisory lock until the current transaction ends"""
+        self.db.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_key)"),
+            {"lock_key": ROLLUP_LOCK_KEYS[rollup_name]},
+        )
+
+    def _execute_recompute(
+        self, statements: List[str], batch: List[Bucket], params: Dict[str, Any]
+    ):
+        bucket_params = dict(params)
+        bucket_params["bucket_dates"] = [bucket[0] for bucket in batch]
+        bucket_params["bucket_keys"] = [bucket[1] for bucket in batch]
+
+        for statement in statements:
+            # Status tuples are rendered as IN lists
+            expanding = [
+                bindparam(name, expanding=True)
+                for name, value in params.items()
+                if isinstance(value, tuple) and f":{name}" in statement
+            ]
+            self.db.execute(text(statement).bindparams(*expanding), bucket_params)
+
+    def _prune_hourly_rollup(self):
+        """Drop hourly rows that have slid out of the pattern window"""
+        cutoff = date.today() - timedelta(days=HOURLY_RETENTION_DAYS)
+        self.db.execute(
+            text("DELETE FROM analytics_rollup_hourly_sales WHERE sale_date < :cutoff"),
+            {"cutoff": cutoff},
+        )
+        self.db.commit()
+
+    def _save_state(
+        self,
+        rollup_name: str,
+        high_water_mark: Optional[datetime],
+        changed_rows: int,
+        bucket_count: int,
+    ):
+        """
+        Advance the watermark only after every bucket has been committed.
+
+        An overlapping run that finishes later never moves it backwards.
+        """
+        self.db.execute(
+            text("""
+                INSERT INTO analytics_rollup_state (
+                    rollup_name, high_water_mark, last_run_at,
+                    last_run_rows, last_run_buckets
+                )
+                VALUES (:rollup_name, :high_water_mark, NOW(), :rows, :buckets)
+                ON CONFLICT (rollup_name) DO UPDATE SET
+                    high_water_mark = GREATEST(
+                        EXCLUDED.high_water_mark,
+                        analytics_rollup_state.high_water_mark
+                    ),
+                    last_run_at = EXCLUDED.last_run_at,
+                    last_run_rows = EXCLUDED.last_run_rows,
+                    last_run_buckets = EXCLUDED.last_run_buckets
+                """),
+            {
+                "rollup_name": rollup_name,
+                "high_water_mark": high_water_mark,
+                "rows": changed_rows,
+                "buckets": bucket_count,
+            },
+        )
+        self.db.commit()
+
+    @staticmethod
+    def _batches(buckets: List[Bucket]) -> Iterable[List[Bucket]]:
+        for start in range(0, len(buckets), BUCKET_BATCH_SIZE):
+            yield buckets[start : start + BUCKET_BATCH_SIZE]
+
+    @staticmethod
+    def _run_summary(
+        rollup_name: str, changed_rows: int, buckets: List[Bucket], started: float
+    ) -> Dict[str, Any]:
+        duration_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Rollup '{rollup_name}' refreshed {len(buckets)} buckets "
+            f"from {changed_rows} changed rows in {duration_ms:.0f}ms"
+        )
+        return {
+            "changed_rows": changed_rows,
+            "buckets_refreshed": len(buckets),
+            "duration_ms": round(duration_ms, 2),
+        }
+
+
+__all__ = ["AnalyticsRollupService"]
@@ -0,0 +1,771 @@
+# backend/modules/analytics/services/sales_cube.py
+
+"""
+In-memory columnar cube of completed order items.
+
+Each tenant gets its own cube holding two fact tables as NumPy columns: one
+row per order (date, hour, staff, category, channel, customer and order
+amounts) and one row per order item (order row, product, quantity, revenue).
+Staff, product, category, channel and customer are dictionary encoded; dates
+are kept as day ordinals so range filters stay vectorised. Group-by, filter
+and sum queries are answered by masking and binning these arrays. Queries
+the cube cannot express return None from ``CubeQuery.from_filters`` or raise
+``CubeUnsupportedQuery`` so callers fall through to SQL.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from core.tenant_context import TenantContext, apply_tenant_filter
+from modules.orders.models.order_models import Order, OrderItem
+from ..constants import (
+    ENABLE_SALES_CUBE,
+    SALES_CUBE_LOAD_CHUNK,
+    SALES_CUBE_MAX_IDLE_SECONDS,
+    SALES_CUBE_REFRESH_SECONDS,
+)
+from ..schemas.analytics_schemas import SalesFilterRequest
+
+logger = logging.getLogger(__name__)
+
+# Re-read orders modified this long before the last load so rows committed
+# late with an older updated_at are not missed; reloading an order is idempotent
+LOAD_OVERLAP = timedelta(minutes=5)
+
+# Dimensions available for grouping
+ORDER_DIMENSIONS = ("date", "hour", "staff", "category", "channel")
+ITEM_DIMENSIONS = ("product",)
+DIMENSIONS = ORDER_DIMENSIONS + ITEM_DIMENSIONS
+
+# Compact the order table once this share of its rows has been superseded
+COMPACTION_RATIO = 0.25
+
+# Stand-in for NULL ids inside integer columns
+NULL_ID = -1
+
+# Largest combined group key; wider groupings fall through to SQL
+MAX_GROUP_KEY = 2**62
+
+# Key spaces up to this size are grouped by counting rather than sorting
+DENSE_GROUP_KEYS = 1 << 20
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+class CubeUnsupportedQuery(Exception):
+    """Raised when a query cannot be answered from the cube"""
+
+
+class DimensionDictionary:
+    """Maps dimension values to dense integer codes"""
+
+    def __init__(self):
+        self.codes: Dict[Hashable, int] = {}
+        self.values: List[Hashable] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, values: np.ndarray) -> np.ndarray:
+        """Codes for an array of values, adding unseen values"""
+        uniques, inverse = np.unique(values, return_inverse=True)
+        unique_codes = np.fromiter(
+            (self._code(value) for value in uniques.tolist()),
+            dtype=np.int32,
+            count=len(uniques),
+        )
+        return unique_codes[inverse.reshape(-1)]
+
+    def lookup(self, values: Iterable[Hashable]) -> np.ndarray:
+        """Codes of known values; unknown values match nothing"""
+        return np.fromiter(
+            (self.codes[value] for value in values if value in self.codes),
+            dtype=np.int32,
+        )
+
+    def decode(self, codes: np.ndarray) -> List[Any]:
+        return [
+            None if value == NULL_ID else value
+            for value in (self.values[code] for code in codes.tolist())
+        ]
+
+    def _code(self, value: Hashable) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _ColumnTable:
+    """Equally sized NumPy columns with amortised appends"""
+
+    def __init__(self, dtypes: Dict[str, Any], capacity: int = 1024):
+        self.size = 0
+        self.columns = {
+            name: np.empty(capacity, dtype=dtype) for name, dtype in dtypes.items()
+        }
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name][: self.size]
+
+    def append(self, values: Dict[str, np.ndarray]):
+        count = len(next(iter(values.values())))
+        needed = self.size + count
+        capacity = len(next(iter(self.columns.values())))
+
+        if needed > capacity:
+            capacity = max(needed, capacity * 2)
+            for name, column in self.columns.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[: self.size] = column[: self.size]
+                self.columns[name] = grown
+
+        for name, column in self.columns.items():
+            column[self.size : needed] = values[name]
+        self.size = needed
+
+    def keep(self, mask: np.ndarray):
+        """Drop rows where mask is False"""
+        for column in self.columns.values():
+            kept = column[: self.size][mask]
+            column[: len(kept)] = kept
+        self.size = int(mask.sum())
+
+
+@dataclass
+class CubeQuery:
+    """Filters and grouping for a cube aggregation"""
+
+    group_by: Tuple[str, ...] = ()
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    hours: Optional[Sequence[int]] = None
+    staff_ids: Optional[Sequence[int]] = None
+    product_ids: Optional[Sequence[int]] = None
+    category_ids: Optional[Sequence[int]] = None
+    customer_ids: Optional[Sequence[int]] = None
+    channels: Optional[Sequence[str]] = None
+    min_order_value: Optional[float] = None
+    max_order_value: Optional[float] = None
+
+    @classmethod
+    def from_filters(
+        cls, filters: SalesFilterRequest, group_by: Sequence[str] = ()
+    ) -> Optional["CubeQuery"]:
+        """Translate report filters; None when the cube cannot answer them"""
+        # Only completed orders are loaded
+        if not filters.only_completed_orders:
+            return None
+
+        return cls(
+            group_by=tuple(group_by),
+            date_from=filters.date_from,
+            date_to=filters.date_to,
+            staff_ids=filters.staff_ids or None,
+            product_ids=filters.product_ids or None,
+            category_ids=filters.category_ids or None,
+            customer_ids=filters.customer_ids or None,
+            min_order_value=(
+                float(filters.min_order_value) if filters.min_order_value else None
+            ),
+            max_order_value=(
+                float(filters.max_order_value) if filters.max_order_value else None
+            ),
+        )
+
+
+class SalesCube:
+    """Columnar order and order item facts for one tenant"""
+
+    def __init__(self, tenant_key: Tuple = ()):
+        self.tenant_key = tenant_key
+        self.orders = _ColumnTable(
+            {
+                "order_id": np.int64,
+                "day": np.int32,
+                "hour": np.int8,
+                "staff": np.int32,
+                "category": np.int32,
+                "channel": np.int32,
+                "customer": np.int32,
+                "total": np.float64,
+                "discount": np.float64,
+                "tax": np.float64,
+                "live": np.bool_,
+            }
+        )
+        self.items = _ColumnTable(
+            {
+                "order_row": np.int32,
+                "product": np.int32,
+                "quantity": np.int32,
+                "revenue": np.float64,
+            }
+        )
+        self.dictionaries = {
+            name: DimensionDictionary()
+            for name in ("staff", "product", "category", "channel", "customer")
+        }
+        self.order_rows: Dict[int, int] = {}
+        self.superseded = 0
+
+        self.high_water_mark: Optional[datetime] = None
+        self.refreshed_at: Optional[float] = None
+        self.last_used = time.monotonic()
+        self.lock = threading.RLock()
+
+    @property
+    def item_count(self) -> int:
+        return self.items.size
+
+    # Loading
+
+    def load_facts(self, facts: Dict[str, np.ndarray]):
+        """
+        Add item-level facts, replacing any orders already in the cube.
+
+        Columns: order_id, created_at (datetime64), staff_id, category_id,
+        customer_id (NULL_ID for none), channel, total, discount, tax,
+        product_id, quantity, price. All rows of an order must be passed in
+        the same call.
+        """
+        with self.lock:
+            order_ids, first, item_order = np.unique(
+                facts["order_id"], return_index=True, return_inverse=True
+            )
+            self.remove_orders(order_ids.tolist())
+
+            created = facts["created_at"][first].astype("datetime64[s]")
+            days = created.astype("datetime64[D]")
+            base = self.orders.size
+
+            self.orders.append(
+                {
+                    "order_id": order_ids,
+                    "day": (days - _EPOCH).astype(np.int32),
+                    "hour": (created - days).astype("timedelta64[h]").astype(np.int8),
+                    "staff": self.dictionaries["staff"].encode(
+                        facts["staff_id"][first]
+                    ),
+                    "category": self.dictionaries["category"].encode(
+                        facts["category_id"][first]
+                    ),
+                    "channel": self.dictionaries["channel"].encode(
+                        facts["channel"][first]
+                    ),
+                    "customer": self.dictionaries["customer"].encode(
+                        facts["customer_id"][first]
+                    ),
+                    "total": facts["total"][first],
+                    "discount": facts["discount"][first],
+                    "tax": facts["tax"][first],
+                    "live": np.ones(len(order_ids), dtype=np.bool_),
+                }
+            )
+            self.order_rows.update(
+                zip(order_ids.tolist(), range(base, base + len(order_ids)))
+            )
+
+            self.items.append(
+                {
+                    "order_row": base + item_order.reshape(-1),
+                    "product": self.dictionaries["product"].encode(facts["product_id"]),
+                    "quantity": facts["quantity"],
+                    "revenue": facts["price"] * facts["quantity"],
+                }
+            )
+
+    def remove_orders(self, order_ids: Iterable[int]):
+        """Drop orders (and their items) from the cube"""
+        with self.lock:
+            rows = [
+                self.order_rows.pop(order_id)
+                for order_id in order_ids
+                if order_id in self.order_rows
+            ]
+            if not rows:
+                return
+
+            self.orders.columns["live"][rows] = False
+            self.superseded += len(rows)
+            if self.superseded > self.orders.size * COMPACTION_RATIO:
+                self._compact()
+
+    def refresh(self, db: Session) -> int:
+        """Load orders changed since the last refresh; returns items loaded"""
+        with self.lock:
+            since = (
+                self.high_water_mark - LOAD_OVERLAP if self.high_water_mark else None
+            )
+            latest = self.high_water_mark
+
+            if since is not None:
+                # Orders that left the completed state or were deleted
+                gone = apply_tenant_filter(
+                    db.query(Order.id, Order.updated_at), Order
+                ).filter(
+                    Order.updated_at > since,
+                    or_(Order.status != "completed", Order.deleted_at.isnot(None)),
+                )
+                gone_rows = gone.all()
+                self.remove_orders(row.id for row in gone_rows)
+                latest = max([latest] + [row.updated_at for row in gone_rows])
+
+            query = (
+                db.query(
+                    Order.id,
+                    Order.created_at,
+                    Order.updated_at,
+                    Order.staff_id,
+                    Order.category_id,
+                    Order.customer_id,
+                    Order.table_no,
+                    Order.external_id,
+                    Order.total_amount,
+                    Order.discount_amount,
+                    Order.tax_amount,
+                    OrderItem.menu_item_id,
+                    OrderItem.quantity,
+                    OrderItem.price,
+                )
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .filter(Order.status == "completed", Order.deleted_at.is_(None))
+            )
+            query = apply_tenant_filter(query, Order)
+            if since is not None:
+                query = query.filter(Order.updated_at > since)
+            query = query.order_by(Order.id).yield_per(SALES_CUBE_LOAD_CHUNK)
+
+            loaded = 0
+            for rows in _order_complete_chunks(iter(query), SALES_CUBE_LOAD_CHUNK):
+                self.load_facts(_facts_from_rows(rows))
+                loaded += len(rows)
+                chunk_latest = max(row.updated_at for row in rows)
+                latest = max(latest, chunk_latest) if latest else chunk_latest
+
+            self.high_water_mark = latest
+            self.refreshed_at = time.monotonic()
+            logger.info(
+                f"Sales cube {self.tenant_key} loaded {loaded} order items "
+                f"({self.items.size} total)"
+            )
+            return loaded
+
+    def refresh_if_stale(self, db: Session, max_age_seconds: float):
+        with self.lock:
+            if (
+                self.refreshed_at is None
+                or time.monotonic() - self.refreshed_at >= max_age_seconds
+            ):
+                self.refresh(db)
+
+    # Queries
+
+    def aggregate(self, query: CubeQuery) -> List[Dict[str, Any]]:
+        """
+        Group and sum the facts matching a query.
+
+        Returns one row per group (a single row without grouping) with the
+        grouped dimension values plus orders, customers, quantity, revenue
+        (item revenue), order_total, discounts and tax. Order-level amounts
+        count each order once per group.
+        """
+        unknown = set(query.group_by) - set(DIMENSIONS)
+        if unknown:
+            raise CubeUnsupportedQuery(f"Unknown dimensions: {sorted(unknown)}")
+
+        with self.lock:
+            self.last_used = time.monotonic()
+
+            order_mask = self._order_mask(query)
+            item_rows = self.items["order_row"]
+            item_level = query.product_ids is not None or "product" in query.group_by
+
+            if item_level:
+                item_mask = order_mask[item_rows]
+                if query.product_ids is not None:
+                    item_mask &= np.isin(
+                        self.items["product"],
+                        self.dictionaries["product"].lookup(query.product_ids),
+                    )
+                selected = np.flatnonzero(item_mask)
+                rows = item_rows[selected]
+            else:
+                selected = None
+                rows = np.flatnonzero(order_mask)
+
+            if len(rows) == 0:
+                return [] if query.group_by else [_empty_row()]
+
+            keys, key_space, decoders = self._group_keys(query.group_by, selected, rows)
+            if query.group_by:
+                groups, inverse = _group_codes(keys, key_space)
+            else:
+                groups, inverse = np.zeros(1, dtype=np.int64), keys
+            group_count = len(groups)
+
+            if item_level:
+                # Each order counts once per group however many items matched
+                item_groups, item_selected = inverse, selected
+                # Items are stored order by order, so order-major pair keys
+                # arrive nearly sorted
+                order_pairs = _distinct(
+                    rows.astype(np.int64) * group_count + inverse, kind="stable"
+                )
+                pair_rows = order_pairs // group_count
+                pair_groups = order_pairs % group_count
+            else:
+                # Orders are already distinct; items inherit their order's group
+                pair_groups, pair_rows = inverse, rows
+                order_groups = np.full(self.orders.size, -1, dtype=np.int64)
+                order_groups[rows] = inverse
+                item_groups = order_groups[item_rows]
+                item_selected = np.flatnonzero(item_groups >= 0)
+                item_groups = item_groups[item_selected]
+
+            quantity = np.bincount(
+                item_groups,
+                weights=self.items["quantity"][item_selected],
+                minlength=group_count,
+            )
+            revenue = np.bincount(
+                item_groups,
+                weights=self.items["revenue"][item_selected],
+                minlength=group_count,
+            )
+
+            orders = np.bincount(pair_groups, minlength=group_count)
+            totals = {
+                measure: np.bincount(
+                    pair_groups,
+                    weights=self.orders[column][pair_rows],
+                    minlength=group_count,
+                )
+                for measure, column in (
+                    ("order_total", "total"),
+                    ("discounts", "discount"),
+                    ("tax", "tax"),
+                )
+            }
+
+            customer_space = max(len(self.dictionaries["customer"]), 1)
+            customers = self.orders["customer"][pair_rows]
+            known = customers != self._null_code("customer")
+            customer_pairs = _distinct(
+                pair_groups[known].astype(np.int64) * customer_space + customers[known]
+            )
+            unique_customers = np.bincount(
+                customer_pairs // customer_space, minlength=group_count
+            )
+
+            dimension_values = self._decode_groups(groups, query.group_by, decoders)
+
+            return [
+                {
+                    **{dim: dimension_values[dim][i] for dim in query.group_by},
+                    "orders": int(orders[i]),
+                    "customers": int(unique_customers[i]),
+                    "quantity": int(round(quantity[i])),
+                    "revenue": float(revenue[i]),
+                    "order_total": float(totals["order_total"][i]),
+                    "discounts": float(totals["discounts"][i]),
+                    "tax": float(totals["tax"][i]),
+                }
+                for i in range(group_count)
+            ]
+
+    # Internals
+
+    def _order_mask(self, query: CubeQuery) -> np.ndarray:
+        orders = self.orders
+        mask = orders["live"].copy()
+
+        if query.date_from:
+            mask &= orders["day"] >= _day_ordinal(query.date_from)
+        if query.date_to:
+            mask &= orders["day"] <= _day_ordinal(query.date_to)
+        if query.hours is not None:
+            mask &= np.isin(orders["hour"], np.asarray(query.hours, dtype=np.int8))
+
+        for dimension, values in (
+            ("staff", query.staff_ids),
+            ("category", query.category_ids),
+            ("customer", query.customer_ids),
+            ("channel", query.channels),
+        ):
+            if values is not None:
+                mask &= np.isin(
+                    orders[dimension], self.dictionaries[dimension].lookup(values)
+                )
+
+        if query.min_order_value is not None:
+            mask &= orders["total"] >= query.min_order_value
+        if query.max_order_value is not None:
+            mask &= orders["total"] <= query.max_order_value
+
+        return mask
+
+    def _group_keys(
+        self, group_by: Sequence[str], selected: np.ndarray, rows: np.ndarray
+    ) -> Tuple[np.ndarray, int, Dict[str, Tuple[int, Callable]]]:
+        """
+        Mixed-radix group key per selected row, the size of the key space and
+        per-dimension decoders.
+
+        ``rows`` are order rows; ``selected`` are item rows when the query
+        works at item level and None otherwise.
+        """
+        keys = np.zeros(len(rows), dtype=np.int64)
+        decoders = {}
+        key_space = 1
+
+        for dimension in group_by:
+            if dimension == "product":
+                codes = self.items["product"][selected].astype(np.int64)
+                radix = len(self.dictionaries["product"])
+                decode = self.dictionaries["product"].decode
+            elif dimension == "date":
+                days = self.orders["day"][rows].astype(np.int64)
+                first_day = int(days.min()) if len(days) else 0
+                codes = days - first_day
+                radix = int(codes.max()) + 1 if len(codes) else 1
+                decode = _date_decoder(first_day)
+            elif dimension == "hour":
+                codes = self.orders["hour"][rows].astype(np.int64)
+                radix = 24
+                decode = lambda values: values.tolist()
+            else:
+                codes = self.orders[dimension][rows].astype(np.int64)
+                radix = len(self.dictionaries[dimension])
+                decode = self.dictionaries[dimension].decode
+
+            radix = max(radix, 1)
+            key_space *= radix
+            if key_space > MAX_GROUP_KEY:
+                raise CubeUnsupportedQuery("Grouping too wide for the cube")
+
+            keys = keys * radix + codes
+            decoders[dimension] = (radix, decode)
+
+        return keys, key_space, decoders
+
+    def _decode_groups(
+        self,
+        groups: np.ndarray,
+        group_by: Sequence[str],
+        decoders: Dict[str, Tuple[int, Callable]],
+    ) -> Dict[str, List[Any]]:
+        values = {}
+        remaining = groups.copy()
+        for dimension in reversed(group_by):
+            radix, decode = decoders[dimension]
+            values[dimension] = decode(remaining % radix)
+            remaining //= radix
+        return values
+
+    def _null_code(self, dimension: str) -> int:
+        return self.dictionaries[dimension].codes.get(NULL_ID, -1)
+
+    def _compact(self):
+        """Physically drop superseded orders and their items"""
+        live = self.orders["live"].copy()
+        new_rows = np.cumsum(live, dtype=np.int64) - 1
+
+        item_rows = self.items["order_row"]
+        self.items.keep(live[item_rows])
+        self.items.columns["order_row"][: self.items.size] = new_rows[
+            self.items["order_row"]
+        ]
+        self.orders.keep(live)
+
+        self.order_rows = dict(
+            zip(self.orders["order_id"].tolist(), range(self.orders.size))
+        )
+        self.superseded = 0
+
+
+class SalesCubeRegistry:
+    """Per-tenant sales cubes, loaded lazily and refreshed incrementally"""
+
+    def __init__(
+        self,
+        enabled: bool = ENABLE_SALES_CUBE,
+        refresh_seconds: float = SALES_CUBE_REFRESH_SECONDS,
+        max_idle_seconds: float = SALES_CUBE_MAX_IDLE_SECONDS,
+    ):
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self.cubes: Dict[Tuple, SalesCube] = {}
+        self._lock = threading.Lock()
+
+    def get_cube(self, db: Session) -> Optional[SalesCube]:
+        """Cube for the current tenant, or None when it cannot be used"""
+        if not self.enabled:
+            return None
+
+        context = TenantContext.get()
+        if not context:
+            return None
+        tenant_key = (context.get("restaurant_id"), context.get("location_id"))
+
+        with self._lock:
+            self._evict_idle()
+            cube = self.cubes.get(tenant_key)
+            if cube is None:
+                cube = self.cubes[tenant_key] = SalesCube(tenant_key)
+
+        try:
+            cube.refresh_if_stale(db, self.refresh_seconds)
+        except Exception as e:
+            logger.error(f"Sales cube refresh failed for tenant {tenant_key}: {e}")
+            return None
+        return cube
+
+    def invalidate(self, tenant_key: Optional[Tuple] = None):
+        """Drop one tenant's cube, or all cubes"""
+        with self._lock:
+            if tenant_key is None:
+                self.cubes.clear()
+            else:
+                self.cubes.pop(tenant_key, None)
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for tenant_key, cube in list(self.cubes.items()):
+            if now - cube.last_used > self.max_idle_seconds:
+                del self.cubes[tenant_key]
+                logger.info(f"Evicted idle sales cube for tenant {tenant_key}")
+
+
+def _order_complete_chunks(rows: Iterable, size: int) -> Iterable[List]:
+    """Chunk id-ordered rows without splitting an order across chunks"""
+    carry: List = []
+    while True:
+        chunk = carry + list(islice(rows, size))
+        if len(chunk) == len(carry):
+            if carry:
+                yield carry
+            return
+
+        last_id = chunk[-1].id
+        split = len(chunk)
+        while split > 0 and chunk[split - 1].id == last_id:
+            split -= 1
+        if split == 0:
+            # One order larger than the chunk; keep reading
+            carry = chunk
+            continue
+
+        carry = chunk[split:]
+        yield chunk[:split]
+
+
+def _facts_from_rows(rows: List) -> Dict[str, np.ndarray]:
+    """Column arrays for load_facts from order/item result rows"""
+    count = len(rows)
+    return {
+        "order_id": np.fromiter((row.id for row in rows), np.int64, count),
+        "created_at": np.array([row.created_at for row in rows], dtype="datetime64[s]"),
+        "staff_id": _ids(row.staff_id for row in rows),
+        "category_id": _ids(row.category_id for row in rows),
+        "customer_id": _ids(row.customer_id for row in rows),
+        "channel": np.array([_channel(row) for row in rows]),
+        "total": _amounts(row.total_amount for row in rows),
+        "discount": _amounts(row.discount_amount for row in rows),
+        "tax": _amounts(row.tax_amount for row in rows),
+        "product_id": _ids(row.menu_item_id for row in rows),
+        "quantity": np.fromiter((row.quantity for row in rows), np.int32, count),
+        "price": _amounts(row.price for row in rows),
+    }
+
+
+def _channel(row) -> str:
+    """Sales channel implied by how the order was placed"""
+    if row.table_no is not None:
+        return "dine_in"
+    if row.external_id is not None:
+        return "external"
+    return "direct"
+
+
+def _ids(values: Iterable[Optional[int]]) -> np.ndarray:
+    return np.fromiter(
+        (NULL_ID if value is None else value for value in values), np.int64
+    )
+
+
+def _amounts(values: Iterable[Any]) -> np.ndarray:
+    return np.fromiter(
+        (0.0 if value is None else float(value) for value in values), np.float64
+    )
+
+
+def _group_codes(keys: np.ndarray, key_space: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct group keys and each row's group index"""
+    if key_space <= max(len(keys), DENSE_GROUP_KEYS):
+        # Small key space: a counting pass instead of a sort
+        present = np.bincount(keys, minlength=key_space) > 0
+        lookup = np.cumsum(present, dtype=np.int64) - 1
+        return np.flatnonzero(present), lookup[keys]
+    groups, inverse = np.unique(keys, return_inverse=True)
+    return groups, inverse.reshape(-1)
+
+
+def _distinct(values: np.ndarray, kind: Optional[str] = None) -> np.ndarray:
+    """Sorted distinct values; sorting beats hash-based np.unique on int64"""
+    values = np.sort(values, kind=kind)
+    keep = np.ones(len(values), dtype=bool)
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return values[keep]
+
+
+def _day_ordinal(value: date) -> int:
+    return int((np.datetime64(value, "D") - _EPOCH).astype(np.int64))
+
+
+def _date_decoder(first_day: int) -> Callable[[np.ndarray], List[date]]:
+    def decode(codes: np.ndarray) -> List[date]:
+        return (
+            (_EPOCH + (codes + first_day).astype("timedelta64[D]"))
+            .astype(object)
+            .tolist()
+        )
+
+    return decode
+
+
+def _empty_row() -> Dict[str, Any]:
+    return {
+        "orders": 0,
+        "customers": 0,
+        "quantity": 0,
+        "revenue": 0.0,
+        "order_total": 0.0,
+        "discounts": 0.0,
+        "tax": 0.0,
+    }
+
+
+# Global registry used by the report services
+sales_cube_registry = SalesCubeRegistry()
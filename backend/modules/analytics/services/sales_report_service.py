@@ -1,7 +1,7 @@
 # backend/modules/analytics/services/sales_report_service.py
 
 import logging
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import Dict, List, Optional, Any, Tuple, Union, Iterator
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
@@ -34,9 +34,10 @@ from ..schemas.analytics_schemas import (
     ReportExecutionResponse,
     DashboardMetricsResponse,
 )
-from modules.orders.models.order_models import Order, OrderItem
+from modules.orders.models.order_models import Order, OrderItem, Category
 from modules.staff.models.staff_models import StaffMember
 from .optimized_queries import OptimizedAnalyticsQueries
+from .sales_cube import CubeQuery, CubeUnsupportedQuery, sales_cube_registry
 from ..utils.query_monitor import monitor_query_performance
 from ..utils.cache_manager import cached_query
 
@@ -186,6 +187,51 @@ class SalesReportService:
             logger.error(f"Error generating detailed sales report: {e}")
             raise
 
+    def iter_detailed_sales_rows(
+        self,
+        filters: SalesFilterRequest,
+        sort_by: str = "total_revenue",
+        sort_order: str = "desc",
+        batch_size: int = 2000,
+    ) -> Iterator[Any]:
+        """Stream every detailed sales row matching the filters for export
+
+        Selects plain columns (staff and category names joined in) through a
+        server-side cursor fetched ``batch_size`` rows at a time, so memory
+        stays flat no matter how many rows match. Row attributes match the
+        fields of ``SalesDetailResponse`` used by the exporters.
+        """
+
+        query = self._build_snapshots_query(filters)
+        query = self._apply_sorting(query, sort_by, sort_order)
+
+        query = (
+            query.outerjoin(
+                StaffMember, SalesAnalyticsSnapshot.staff_id == StaffMember.id
+            )
+            .outerjoin(Category, SalesAnalyticsSnapshot.category_id == Category.id)
+            .with_entities(
+                SalesAnalyticsSnapshot.id,
+                SalesAnalyticsSnapshot.snapshot_date,
+                SalesAnalyticsSnapshot.staff_id,
+                StaffMember.name.label("staff_name"),
+                SalesAnalyticsSnapshot.product_id,
+                SalesAnalyticsSnapshot.category_id,
+                Category.name.label("category_name"),
+                SalesAnalyticsSnapshot.total_orders,
+                SalesAnalyticsSnapshot.total_revenue,
+                SalesAnalyticsSnapshot.total_items_sold,
+                SalesAnalyticsSnapshot.average_order_value,
+                SalesAnalyticsSnapshot.total_discounts,
+                SalesAnalyticsSnapshot.total_tax,
+                SalesAnalyticsSnapshot.net_revenue,
+                SalesAnalyticsSnapshot.unique_customers,
+            )
+            .yield_per(batch_size)
+        )
+
+        yield from query
+
     def generate_staff_performance_report(
         self, filters: SalesFilterRequest, page: int = 1, per_page: int = 50
     ) -> List[StaffPerformanceResponse]:
@@ -369,6 +415,10 @@ class SalesReportService:
     ) -> SalesCalculationResult:
         """Calculate core sales metrics from orders data with tenant isolation"""
 
+        cube_rows = self._cube_aggregate(filters)
+        if cube_rows is not None:
+            return self._metrics_from_cube_row(cube_rows[0])
+
         # Build base query from orders
         query = self.db.query(Order).join(OrderItem)
 
@@ -408,6 +458,54 @@ class SalesReportService:
             returning_customers=returning_customers,
         )
 
+    def _cube_aggregate(
+        self, filters: SalesFilterRequest, group_by: Tuple[str, ...] = ()
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Answer an aggregation from the tenant's sales cube, or None for SQL"""
+
+        query = CubeQuery.from_filters(filters, group_by)
+        if query is None:
+            return None
+
+        return self._run_cube_query(query)
+
+    def _run_cube_query(self, query: CubeQuery) -> Optional[List[Dict[str, Any]]]:
+        """Run a cube query for the current tenant, or None for SQL"""
+
+        cube = sales_cube_registry.get_cube(self.db)
+        if cube is None:
+            return None
+
+        try:
+            return cube.aggregate(query)
+        except CubeUnsupportedQuery as e:
+            logger.debug(f"Sales cube fell through to SQL: {e}")
+            return None
+
+    def _metrics_from_cube_row(self, row: Dict[str, Any]) -> SalesCalculationResult:
+        """Build sales metrics from an aggregated cube row"""
+
+        total_revenue = _to_money(row["order_total"])
+        total_discounts = _to_money(row["discounts"])
+        average_order_value = (
+            _to_money(row["order_total"] / row["orders"])
+            if row["orders"]
+            else Decimal("0")
+        )
+
+        return SalesCalculationResult(
+            total_orders=row["orders"],
+            total_revenue=total_revenue,
+            total_items_sold=row["quantity"],
+            average_order_value=average_order_value,
+            total_discounts=total_discounts,
+            total_tax=_to_money(row["tax"]),
+            net_revenue=total_revenue - total_discounts,
+            unique_customers=row["customers"],
+            new_customers=0,
+            returning_customers=row["customers"],
+        )
+
     def _apply_order_filters(
         self, query, filters: SalesFilterRequest, skip_tenant_filter: bool = False
     ):
@@ -741,6 +839,10 @@ class SalesReportService:
     def _get_total_revenue(self, filters: SalesFilterRequest) -> Decimal:
         """Get total revenue for market share calculations with tenant isolation"""
 
+        cube_rows = self._cube_aggregate(filters)
+        if cube_rows is not None:
+            return _to_money(cube_rows[0]["order_total"])
+
         query = self.db.query(func.coalesce(func.sum(Order.total_amount), 0)).join(
             OrderItem
         )
@@ -752,6 +854,10 @@ class SalesReportService:
     def _get_total_quantity(self, filters: SalesFilterRequest) -> int:
         """Get total quantity sold for market share calculations with tenant isolation"""
 
+        cube_rows = self._cube_aggregate(filters)
+        if cube_rows is not None:
+            return cube_rows[0]["quantity"]
+
         query = self.db.query(func.coalesce(func.sum(OrderItem.quantity), 0)).join(
             Order
         )
@@ -833,6 +939,35 @@ class SalesReportService:
 
         start_date = current_date - timedelta(days=30)
 
+        # One grouped pass over the cube instead of a query per day
+        cube_rows = self._run_cube_query(
+            CubeQuery(
+                group_by=("date",),
+                date_from=start_date,
+                date_to=start_date + timedelta(days=29),
+            )
+        )
+        if cube_rows is not None:
+            by_date = {row["date"]: row for row in cube_rows}
+            days = [start_date + timedelta(days=i) for i in range(30)]
+            revenue_trend = [
+                {
+                    "date": day.isoformat(),
+                    "value": float(
+                        _to_money(by_date[day]["order_total"]) if day in by_date else 0
+                    ),
+                }
+                for day in days
+            ]
+            order_trend = [
+                {
+                    "date": day.isoformat(),
+                    "value": by_date[day]["orders"] if day in by_date else 0,
+                }
+                for day in days
+            ]
+            return revenue_trend, order_trend
+
         # Daily revenue trend
         revenue_trend = []
         order_trend = []
@@ -853,3 +988,7 @@ class SalesReportService:
             )
 
         return revenue_trend, order_trend
+
+
+def _to_money(value: float) -> Decimal:
+    return Decimal(str(round(value, 2)))
@@ -19,6 +19,21 @@ class TimeGranularity(str, Enum):
     MONTHLY = "month"
 
 
+# DATE_TRUNC units for granularity values used by the request schemas
+_DATE_TRUNC_UNITS = {
+    "hourly": "hour",
+    "daily": "day",
+    "weekly": "week",
+    "monthly": "month",
+}
+
+
+def _date_trunc_unit(granularity: Any) -> str:
+    """Map a granularity enum (schema or builder) to a DATE_TRUNC unit"""
+    value = getattr(granularity, "value", granularity)
+    return _DATE_TRUNC_UNITS.get(value, value)
+
+
 class SecureQueryBuilder:
     """Builds secure parameterized SQL queries for analytics"""
     
@@ -49,7 +64,7 @@ class SecureQueryBuilder:
         ORDER BY date
         """
         
-        return query, {"date_trunc": granularity.value}
+        return query, {"date_trunc": _date_trunc_unit(granularity)}
     
     @staticmethod
     def build_category_demand_query(
@@ -78,7 +93,69 @@ class SecureQueryBuilder:
         ORDER BY date
         """
         
-        return query, {"date_trunc": granularity.value}
+        return query, {"date_trunc": _date_trunc_unit(granularity)}
+    
+    @staticmethod
+    def build_product_demand_batch_query(
+        granularity: TimeGranularity
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build parameterized SQL query for demand of many products at once.
+        
+        The product IDs are bound as an expanding ``:entity_ids`` parameter and
+        rows are keyed by ``entity_id`` so one scan serves a whole batch.
+        
+        Returns:
+            Tuple of (query_template, parameters_dict)
+        """
+        query = """
+        SELECT 
+            oi.menu_item_id as entity_id,
+            DATE_TRUNC(:date_trunc, o.created_at) as date,
+            SUM(oi.quantity) as demand,
+            COUNT(DISTINCT o.id) as order_count,
+            AVG(oi.unit_price) as avg_price
+        FROM order_items oi
+        JOIN orders o ON oi.order_id = o.id
+        WHERE oi.menu_item_id IN :entity_ids
+            AND o.created_at >= :start_date
+            AND o.created_at <= :end_date
+            AND o.status NOT IN ('cancelled', 'failed')
+        GROUP BY oi.menu_item_id, DATE_TRUNC(:date_trunc, o.created_at)
+        ORDER BY entity_id, date
+        """
+        
+        return query, {"date_trunc": _date_trunc_unit(granularity)}
+    
+    @staticmethod
+    def build_category_demand_batch_query(
+        granularity: TimeGranularity
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build parameterized SQL query for demand of many categories at once.
+        
+        Returns:
+            Tuple of (query_template, parameters_dict)
+        """
+        query = """
+        SELECT 
+            mi.category_id as entity_id,
+            DATE_TRUNC(:date_trunc, o.created_at) as date,
+            SUM(oi.quantity) as demand,
+            COUNT(DISTINCT o.id) as order_count,
+            COUNT(DISTINCT oi.menu_item_id) as product_variety
+        FROM order_items oi
+        JOIN orders o ON oi.order_id = o.id
+        JOIN menu_items mi ON oi.menu_item_id = mi.id
+        WHERE mi.category_id IN :entity_ids
+            AND o.created_at >= :start_date
+            AND o.created_at <= :end_date
+            AND o.status NOT IN ('cancelled', 'failed')
+        GROUP BY mi.category_id, DATE_TRUNC(:date_trunc, o.created_at)
+        ORDER BY entity_id, date
+        """
+        
+        return query, {"date_trunc": _date_trunc_unit(granularity)}
     
     @staticmethod
     def build_overall_demand_query(
@@ -104,7 +181,7 @@ class SecureQueryBuilder:
         ORDER BY date
         """
         
-        return query, {"date_trunc": granularity.value}
+        return query, {"date_trunc": _date_trunc_unit(granularity)}
     
     @staticmethod
     def build_sales_metrics_query(
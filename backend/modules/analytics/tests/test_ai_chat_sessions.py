@@ -0,0 +1,259 @@
+# backend/modules/analytics/tests/test_ai_chat_sessions.py
+
+"""
+Tests for the AI assistant session store, query result cache and concurrent
+batch processing.
+"""
+
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+from core.tenant_context import TenantContext
+from modules.analytics.constants import CHAT_SESSION_HISTORY_LIMIT
+from modules.analytics.schemas.ai_assistant_schemas import (
+    AnalyticsQuery,
+    ChatMessage,
+    ChatRequest,
+    ChatSession,
+    MessageRole,
+    QueryContext,
+    QueryIntent,
+    QueryResult,
+)
+from modules.analytics.services import ai_session_store
+from modules.analytics.services.ai_chat_service import AIChatService
+from modules.analytics.services.ai_session_store import ChatSessionStore
+from modules.analytics.services.cache_service import ChatResultCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_store(server=None, **kwargs):
+    if server is None:
+        return ChatSessionStore(use_redis=False, **kwargs)
+    return ChatSessionStore(
+        redis_client=fakeredis.FakeRedis(server=server, decode_responses=True),
+        **kwargs,
+    )
+
+
+def make_session(session_id="s1", user_id=1):
+    return ChatSession(
+        session_id=session_id,
+        user_id=user_id,
+        started_at=datetime.now(),
+        last_activity=datetime.now(),
+        context=QueryContext(session_id=session_id, user_id=user_id),
+    )
+
+
+def make_service(server=None, session_factory=Mock):
+    service = AIChatService(
+        session_store=make_store(server),
+        result_cache=ChatResultCache(),
+        session_factory=session_factory,
+    )
+    service.security_service.validate_request = Mock(return_value=(True, None))
+    service.security_service.is_query_allowed = Mock(return_value=(True, None))
+    return service
+
+
+def sales_query(**filters):
+    return AnalyticsQuery(
+        original_text="Show me sales",
+        intent=QueryIntent.SALES_REPORT,
+        time_range={"start_date": "2026-10-01", "end_date": "2026-10-07"},
+        filters=filters or None,
+        confidence_score=0.9,
+    )
+
+
+@pytest.fixture(autouse=True)
+def tenant():
+    TenantContext.set(restaurant_id=1, location_id=1)
+    yield
+    TenantContext.clear()
+
+
+class TestChatSessionStore:
+    def test_sessions_are_shared_between_workers(self, server):
+        first, second = make_store(server), make_store(server)
+
+        session = make_session()
+        first.save(session)
+        loaded = second.get("s1")
+        assert loaded.user_id == 1
+
+        # An update from another worker replaces the stale local copy
+        loaded.message_count = 5
+        second.save(loaded)
+        assert first.get("s1").message_count == 5
+
+        assert first.delete("s1")
+        assert second.get("s1") is None
+        assert "s1" not in first
+
+    def test_local_cache_is_bounded(self):
+        store = make_store(max_local=2)
+
+        for session_id in ("a", "b", "c"):
+            store.save(make_session(session_id))
+        store.get("b")
+        store.save(make_session("d"))
+
+        assert len(store) == 2
+        assert {session.session_id for session in store.values()} == {"b", "d"}
+
+    def test_idle_sessions_are_evicted(self, server, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(ai_session_store.time, "monotonic", lambda: now[0])
+        store = make_store(server, idle_seconds=60)
+
+        store.save(make_session("idle"))
+        now[0] += 90
+        store.save(make_session("fresh"))
+
+        assert [session.session_id for session in store.values()] == ["fresh"]
+        # Redis expires sessions after the same idle period
+        assert 0 < store.redis_client.ttl("analytics:ai_chat:session:fresh") <= 60
+
+    def test_history_is_trimmed_on_save(self):
+        store = make_store()
+        session = make_session()
+        session.context.conversation_history = [
+            ChatMessage(id=str(index), role=MessageRole.USER, content=str(index))
+            for index in range(CHAT_SESSION_HISTORY_LIMIT + 10)
+        ]
+
+        store.save(session)
+
+        history = store.get("s1").context.conversation_history
+        assert len(history) == CHAT_SESSION_HISTORY_LIMIT
+        assert history[-1].content == str(CHAT_SESSION_HISTORY_LIMIT + 9)
+
+
+class TestResultCache:
+    @pytest.mark.asyncio
+    async def test_equivalent_queries_execute_once(self):
+        service = make_service()
+        calls = []
+
+        async def executor(query, user_id, db):
+            calls.append(query)
+            return QueryResult(query_id="q", summary="Sales")
+
+        service.query_executors[QueryIntent.SALES_REPORT] = executor
+
+        first = await service._execute_query(sales_query(staff_ids=[3, 1]), 1, Mock())
+        second = await service._execute_query(sales_query(staff_ids=[1, 3]), 2, Mock())
+
+        assert len(calls) == 1
+        assert second.summary == first.summary
+        assert second.query_id != first.query_id
+
+        TenantContext.set(restaurant_id=2, location_id=1)
+        await service._execute_query(sales_query(staff_ids=[1, 3]), 1, Mock())
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_queries_share_execution(self):
+        service = make_service()
+        calls = []
+
+        async def executor(query, user_id, db):
+            calls.append(query)
+            await asyncio.sleep(0.05)
+            return QueryResult(query_id="q", summary="Sales")
+
+        service.query_executors[QueryIntent.SALES_REPORT] = executor
+
+        results = await asyncio.gather(
+            *(service._execute_query(sales_query(), 1, Mock()) for _ in range(3))
+        )
+
+        assert len(calls) == 1
+        assert [result.summary for result in results] == ["Sales"] * 3
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        service = make_service()
+        calls = []
+
+        async def executor(query, user_id, db):
+            calls.append(query)
+            raise ValueError("bad range")
+
+        service.query_executors[QueryIntent.SALES_REPORT] = executor
+
+        for _ in range(2):
+            result = await service._execute_query(sales_query(), 1, Mock())
+            assert result.status == "error"
+        assert len(calls) == 2
+
+
+class TestBatchProcessing:
+    @pytest.mark.asyncio
+    async def test_sessions_run_concurrently_in_order(self, server):
+        opened = []
+
+        def session_factory():
+            db = Mock()
+            opened.append(db)
+            return db
+
+        service = make_service(server, session_factory)
+        running = 0
+        peak = 0
+        seen = []
+
+        async def execute(query, user_id, db, start_time):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            seen.append((query.original_text, db))
+            await asyncio.sleep(0.05)
+            running -= 1
+            return QueryResult(query_id="q", summary=query.original_text)
+
+        requests = [
+            ChatRequest(message="Show sales for a1", session_id="a"),
+            ChatRequest(message="Show sales for b1", session_id="b"),
+            ChatRequest(message="Show sales for a2", session_id="a"),
+            ChatRequest(message="Show sales for new"),
+        ]
+        db = Mock()
+        # The messages normalize to one query; keep them apart in the cache
+        service._result_cache_key = lambda query: query.original_text
+        with patch.object(service, "_run_query", side_effect=execute):
+            responses = await service.process_batch_messages(requests, 1, db)
+
+        assert peak == 3
+        assert [response.query_result.summary for response in responses] == [
+            request.message for request in requests
+        ]
+        assert all(r.message.role == MessageRole.ASSISTANT for r in responses)
+
+        # Messages of one session run in order on one database session
+        session_a = [(text, db) for text, db in seen if "for a" in text]
+        assert [text for text, _ in session_a] == [
+            "Show sales for a1",
+            "Show sales for a2",
+        ]
+        assert session_a[0][1] is session_a[1][1]
+        assert len({id(db) for _, db in seen}) == 3
+        assert len(opened) == 2
+        assert all(db.close.called for db in opened)
+
+        # Both turns are in the persisted conversation
+        history = service.get_session_history("a")
+        assert [message.role for message in history] == [
+            MessageRole.USER,
+            MessageRole.ASSISTANT,
+        ] * 2
@@ -0,0 +1,221 @@
+# backend/modules/analytics/tests/test_batch_forecasting.py
+
+"""
+Tests for batch demand forecasting: grouped history loading, the forecast
+store and fingerprint-based refit skipping.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from unittest.mock import Mock, patch
+
+from modules.analytics.services import demand_prediction_service
+from modules.analytics.services.cache_service import (
+    ForecastStore,
+    HistoricalDataCache,
+)
+from modules.analytics.services.demand_prediction_service import (
+    DemandPredictionService,
+    compute_forecast,
+)
+from modules.analytics.services.predictive_models import (
+    ARIMAModel,
+    series_fingerprint,
+)
+from modules.analytics.schemas.predictive_analytics_schemas import (
+    BatchPredictionRequest,
+    DemandForecastRequest,
+    ModelType,
+)
+
+DemandRow = namedtuple("DemandRow", "entity_id date demand order_count avg_price")
+
+
+def demand_rows(entity_ids, days=60, seed=7):
+    rng = np.random.default_rng(seed)
+    start = date.today() - timedelta(days=days)
+    return [
+        DemandRow(entity_id, start + timedelta(days=day), int(rng.poisson(40)), 10, 5.0)
+        for entity_id in entity_ids
+        for day in range(days)
+    ]
+
+
+def product_request(entity_id, model_type=ModelType.MOVING_AVERAGE):
+    return DemandForecastRequest(
+        entity_id=entity_id,
+        entity_type="product",
+        horizon_days=7,
+        model_type=model_type,
+    )
+
+
+@pytest.fixture
+def mock_db():
+    db = Mock()
+    db.query.return_value.filter.return_value.all.return_value = [
+        (entity_id, f"Item {entity_id}") for entity_id in range(1, 10)
+    ]
+    return db
+
+
+@pytest.fixture
+def demand_service(mock_db):
+    service = DemandPredictionService(mock_db)
+    service.historical_cache = HistoricalDataCache()
+    service.forecast_store = ForecastStore()
+    return service
+
+
+@pytest.fixture
+def thread_executor():
+    # Threads keep patched callables visible to the fitting step
+    executor = ThreadPoolExecutor(max_workers=2)
+    with patch.object(
+        demand_prediction_service, "get_forecast_executor", return_value=executor
+    ):
+        yield executor
+    executor.shutdown()
+
+
+class TestSeriesFingerprint:
+    def test_fingerprint_tracks_content_and_last_timestamp(self):
+        index = pd.date_range("2026-01-01", periods=30, freq="D")
+        series = pd.Series(np.arange(30, dtype=float), index=index)
+
+        assert series_fingerprint(series) == series_fingerprint(series.copy())
+
+        changed = series.copy()
+        changed.iloc[3] += 1
+        assert series_fingerprint(changed) != series_fingerprint(series)
+
+        extended = pd.concat(
+            [series, pd.Series([1.0], index=[index[-1] + pd.Timedelta(days=1)])]
+        )
+        assert series_fingerprint(extended) != series_fingerprint(series)
+
+
+class TestBatchForecasting:
+    @pytest.mark.asyncio
+    async def test_batch_loads_history_with_one_grouped_query(
+        self, demand_service, mock_db, thread_executor
+    ):
+        rows = demand_rows([1, 2, 3]) + demand_rows([4], days=3)
+        mock_db.execute.return_value.fetchall.return_value = rows
+
+        result = await demand_service.batch_forecast(
+            BatchPredictionRequest(
+                predictions=[product_request(entity_id) for entity_id in (1, 2, 3, 4)]
+            )
+        )
+
+        assert mock_db.execute.call_count == 1
+        assert result.status == "completed"
+        assert len(result.forecasts) == 3
+        assert [f.entity_name for f in result.forecasts] == [
+            "Item 1",
+            "Item 2",
+            "Item 3",
+        ]
+        assert result.summary["failed"] == 1
+        assert result.summary["errors"][0]["entity_id"] == 4
+
+    @pytest.mark.asyncio
+    async def test_unchanged_series_is_served_from_store(
+        self, demand_service, mock_db, thread_executor
+    ):
+        mock_db.execute.return_value.fetchall.return_value = demand_rows([1, 2])
+        batch = BatchPredictionRequest(
+            predictions=[product_request(1), product_request(2)]
+        )
+
+        with patch.object(
+            demand_prediction_service,
+            "compute_forecast",
+            side_effect=compute_forecast,
+        ) as fit:
+            first = await demand_service.batch_forecast(batch)
+            second = await demand_service.batch_forecast(batch)
+
+        assert fit.call_count == 2
+        assert [
+            [point.predicted_value for point in f.predictions] for f in first.forecasts
+        ] == [
+            [point.predicted_value for point in f.predictions] for f in second.forecasts
+        ]
+
+    @pytest.mark.asyncio
+    async def test_changed_series_is_refitted(
+        self, demand_service, mock_db, thread_executor
+    ):
+        mock_db.execute.return_value.fetchall.return_value = demand_rows([1])
+        batch = BatchPredictionRequest(predictions=[product_request(1)])
+
+        with patch.object(
+            demand_prediction_service,
+            "compute_forecast",
+            side_effect=compute_forecast,
+        ) as fit:
+            await demand_service.batch_forecast(batch)
+
+            # New sales arrive once the cached history expires
+            demand_service.historical_cache = HistoricalDataCache()
+            mock_db.execute.return_value.fetchall.return_value = demand_rows(
+                [1], seed=8
+            )
+            await demand_service.batch_forecast(batch)
+
+        assert fit.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_single_forecast_uses_store(self, demand_service, thread_executor):
+        history = pd.DataFrame(
+            {
+                "date": pd.date_range(end=date.today(), periods=40, freq="D"),
+                "demand": np.random.default_rng(1).poisson(30, 40),
+            }
+        ).set_index("date")
+        request = product_request(1)
+
+        with (
+            patch.object(
+                demand_service, "_get_historical_demand", return_value=history
+            ),
+            patch.object(demand_service, "_get_entity_name", return_value="Latte"),
+            patch.object(
+                demand_prediction_service,
+                "compute_forecast",
+                side_effect=compute_forecast,
+            ) as fit,
+        ):
+            first = await demand_service.forecast_demand(request)
+            second = await demand_service.forecast_demand(request)
+
+        assert fit.call_count == 1
+        assert len(first.predictions) == 7
+        assert first.metadata.model_used == ModelType.MOVING_AVERAGE
+        assert [point.predicted_value for point in second.predictions] == [
+            point.predicted_value for point in first.predictions
+        ]
+
+
+class TestArimaOrderReuse:
+    def test_refit_reuses_selected_order(self):
+        rng = np.random.default_rng(3)
+        index = pd.date_range("2026-01-01", periods=60, freq="D")
+        series = pd.Series(50 + rng.normal(0, 3, 60).cumsum(), index=index)
+
+        model = ARIMAModel()
+        with patch.object(
+            ARIMAModel, "_select_best_order", return_value=(1, 1, 0)
+        ) as select:
+            model.fit(series)
+            model.fit(series[:-5])
+            model.clone_unfitted().fit(series)
+
+        assert select.call_count == 1
+        assert model.order == (1, 1, 0)
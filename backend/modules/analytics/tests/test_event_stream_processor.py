@@ -0,0 +1,313 @@
+# backend/modules/analytics/tests/test_event_stream_processor.py
+
+"""
+Tests for the Redis stream backed event processor: batch consumption,
+acknowledgement, pending-entry reclaim and idempotent aggregate upserts.
+"""
+
+import asyncio
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from modules.analytics.services import event_processor as event_processor_module
+from modules.analytics.services.event_processor import (
+    EVENT_CONSUMER_GROUP,
+    EVENT_STREAM_KEY,
+    EventType,
+    RealtimeEventProcessor,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class FakeAggregateSession:
+    """Emulates the processed-event claim and records aggregate upserts"""
+
+    def __init__(self, store):
+        self.store = store
+        self.commit = Mock()
+        self.rollback = Mock()
+        self.close = Mock()
+
+    def execute(self, statement, params=None):
+        statement.compile(dialect=postgresql.dialect())
+        sql = str(statement)
+        result = Mock()
+
+        if "analytics_processed_events" in sql and "INSERT" in sql:
+            if self.store.fail_claims:
+                raise RuntimeError("database unavailable")
+            new_ids = [
+                event_id
+                for event_id in dict.fromkeys(params["event_ids"])
+                if event_id not in self.store.processed
+            ]
+            self.store.processed.update(new_ids)
+            result.__iter__ = Mock(
+                return_value=iter([Mock(event_id=event_id) for event_id in new_ids])
+            )
+        elif "analytics_event_aggregates" in sql:
+            for row in params:
+                key = (row["bucket_start"], row["dimension"], row["dimension_id"])
+                totals = self.store.aggregates.setdefault(
+                    key,
+                    {
+                        "order_count": 0,
+                        "revenue": Decimal("0"),
+                        "quantity": 0,
+                        "action_count": 0,
+                    },
+                )
+                for name in totals:
+                    totals[name] += row[name]
+        return result
+
+
+class AggregateStore:
+    def __init__(self):
+        self.processed = set()
+        self.aggregates = {}
+        self.fail_claims = False
+
+    def session(self):
+        return FakeAggregateSession(self)
+
+
+@pytest.fixture
+def store():
+    return AggregateStore()
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture(autouse=True)
+def quiet_side_effects():
+    metrics = Mock(
+        invalidate_cache=AsyncMock(),
+        get_current_dashboard_snapshot=AsyncMock(return_value={}),
+    )
+    websockets = Mock(
+        broadcast_dashboard_update=AsyncMock(),
+        broadcast_alert_notification=AsyncMock(),
+    )
+    with patch.object(
+        event_processor_module, "realtime_metrics_service", metrics
+    ), patch.object(event_processor_module, "websocket_manager", websockets):
+        yield websockets
+
+
+def make_processor(redis_client, store):
+    return RealtimeEventProcessor(
+        redis_client=redis_client, session_factory=store.session
+    )
+
+
+def order_event(order_id, staff_id=7, completed_at="2026-10-18T12:03:41"):
+    return {
+        "order_id": order_id,
+        "staff_id": staff_id,
+        "total_amount": Decimal("18.50"),
+        "items_count": 2,
+        "completed_at": completed_at,
+        "items": [
+            {"product_id": 3, "quantity": 2, "price": "4.25"},
+            {"product_id": 5, "quantity": 1, "price": "10.00"},
+        ],
+    }
+
+
+MINUTE = datetime(2026, 10, 18, 12, 3)
+
+
+class TestStreamConsumption:
+    @pytest.mark.asyncio
+    async def test_batch_is_persisted_then_acknowledged(self, redis_client, store):
+        processor = make_processor(redis_client, store)
+
+        for order_id in (1, 2):
+            await processor.process_event(
+                EventType.ORDER_COMPLETED, order_event(order_id)
+            )
+        await processor.process_event(
+            EventType.STAFF_ACTION,
+            {
+                "staff_id": 7,
+                "action_type": "order_processed",
+                "timestamp": "2026-10-18T12:03:05",
+            },
+        )
+
+        assert processor.event_queue.qsize() == 0
+        assert await redis_client.xlen(EVENT_STREAM_KEY) == 3
+
+        consumed = await processor._consume_stream("worker-a")
+
+        assert consumed == 3
+        assert processor.metrics.total_events_processed == 3
+        pending = await redis_client.xpending(EVENT_STREAM_KEY, EVENT_CONSUMER_GROUP)
+        assert pending["pending"] == 0
+
+        assert store.aggregates[(MINUTE, "staff", 7)] == {
+            "order_count": 2,
+            "revenue": Decimal("37.00"),
+            "quantity": 0,
+            "action_count": 1,
+        }
+        assert store.aggregates[(MINUTE, "product", 3)]["quantity"] == 4
+        assert store.aggregates[(MINUTE, "product", 3)]["revenue"] == Decimal("17.00")
+        assert store.aggregates[(MINUTE, "product", 5)]["order_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_priority_events_are_handled_once(self, redis_client, store):
+        processor = make_processor(redis_client, store)
+
+        with patch.object(
+            processor,
+            "_handle_order_completed",
+            new=AsyncMock(),
+        ) as handler:
+            processor.event_handlers[EventType.ORDER_COMPLETED] = [handler]
+            await processor.process_event(
+                EventType.ORDER_COMPLETED, order_event(1), priority=True
+            )
+            await processor._consume_stream("worker-a")
+
+        assert handler.await_count == 1
+        assert store.aggregates[(MINUTE, "staff", 7)]["order_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_stays_pending_and_is_reclaimed(
+        self, redis_client, store, monkeypatch
+    ):
+        monkeypatch.setattr(event_processor_module, "PENDING_IDLE_MS", 0)
+        crashed = make_processor(redis_client, store)
+        survivor = make_processor(redis_client, store)
+
+        await crashed.process_event(EventType.ORDER_COMPLETED, order_event(1))
+        store.fail_claims = True
+        with pytest.raises(RuntimeError):
+            await crashed._consume_stream("worker-a")
+
+        pending = await redis_client.xpending(EVENT_STREAM_KEY, EVENT_CONSUMER_GROUP)
+        assert pending["pending"] == 1
+
+        store.fail_claims = False
+        reclaimed = await survivor._reclaim_pending("worker-b")
+
+        assert reclaimed == 1
+        pending = await redis_client.xpending(EVENT_STREAM_KEY, EVENT_CONSUMER_GROUP)
+        assert pending["pending"] == 0
+        assert store.aggregates[(MINUTE, "staff", 7)]["order_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unreadable_entries_are_acknowledged(self, redis_client, store):
+        processor = make_processor(redis_client, store)
+        await processor._ensure_stream()
+        await redis_client.xadd(EVENT_STREAM_KEY, {"event": "not json"})
+
+        await processor._consume_stream("worker-a")
+
+        pending = await redis_client.xpending(EVENT_STREAM_KEY, EVENT_CONSUMER_GROUP)
+        assert pending["pending"] == 0
+        assert processor.metrics.failed_events == 1
+
+    @pytest.mark.asyncio
+    async def test_consumers_start_once_redis_is_reachable(self, redis_client, store):
+        processor = make_processor(redis_client, store)
+        processor.is_running = True
+        processor.num_workers = 2
+        create_group = redis_client.xgroup_create
+        redis_client.xgroup_create = AsyncMock(side_effect=ConnectionError("down"))
+
+        assert not await processor._ensure_stream()
+        assert processor.worker_tasks == []
+
+        redis_client.xgroup_create = create_group
+        processor._stream_retry_at = None
+        await processor.process_event(
+            EventType.STAFF_ACTION,
+            {"staff_id": 7, "action_type": "order_processed"},
+        )
+
+        # Two consumers, the reclaim worker and the broadcast relay
+        assert len(processor.worker_tasks) == 4
+        await processor.stop_processor()
+
+    @pytest.mark.asyncio
+    async def test_stream_broadcasts_reach_every_processor(
+        self, redis_client, store, quiet_side_effects
+    ):
+        consumer = make_processor(redis_client, store)
+        listener = make_processor(redis_client, store)
+        listener.is_running = True
+        relay = asyncio.create_task(listener._broadcast_relay_worker())
+        await asyncio.sleep(0.05)
+
+        await consumer.process_event(
+            EventType.STAFF_ACTION,
+            {"staff_id": 7, "action_type": "shift_started"},
+        )
+        await consumer._consume_stream("worker-a")
+
+        broadcast = quiet_side_effects.broadcast_dashboard_update
+        for _ in range(50):
+            if broadcast.await_count:
+                break
+            await asyncio.sleep(0.01)
+        relay.cancel()
+        await asyncio.gather(relay, return_exceptions=True)
+
+        # Delivered once, by the relay, rather than by the consuming worker
+        assert broadcast.await_count == 1
+
+
+class TestAggregatePersistence:
+    def test_redelivered_events_are_counted_once(self, store):
+        processor = RealtimeEventProcessor(
+            session_factory=store.session, use_streams=False
+        )
+        record = {
+            "id": "evt-1",
+            "type": EventType.ORDER_COMPLETED.value,
+            "data": order_event(1),
+            "timestamp": datetime(2026, 10, 18, 12, 4),
+        }
+
+        assert processor._persist_aggregates([record, record]) == 1
+        assert processor._persist_aggregates([record]) == 0
+        assert store.aggregates[(MINUTE, "staff", 7)]["order_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_fallback_persists_buffered_events(self, store):
+        processor = RealtimeEventProcessor(
+            session_factory=store.session, use_streams=False
+        )
+
+        await processor.process_event(
+            EventType.ORDER_COMPLETED, order_event(1), priority=True
+        )
+        await processor._process_aggregated_events()
+
+        assert processor.aggregation_buffer == []
+        assert store.aggregates[(MINUTE, "product", 5)]["revenue"] == Decimal("10.00")
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_events_buffered(self, store):
+        processor = RealtimeEventProcessor(
+            session_factory=store.session, use_streams=False
+        )
+        store.fail_claims = True
+
+        await processor.process_event(
+            EventType.ORDER_COMPLETED, order_event(1), priority=True
+        )
+        await processor._process_aggregated_events()
+
+        assert len(processor.aggregation_buffer) == 1
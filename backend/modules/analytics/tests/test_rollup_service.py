@@ -0,0 +1,184 @@
+# backend/modules/analytics/tests/test_rollup_service.py
+
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from sqlalchemy.dialects import postgresql
+
+from modules.analytics.services import rollup_service
+from modules.analytics.services.rollup_service import (
+    AnalyticsRollupService,
+    WATERMARK_OVERLAP,
+)
+
+
+class FakeRollupSession:
+    """Records SQL issued by the rollup service and serves canned results"""
+
+    def __init__(self, high_water_mark=None, changed=None, range_rows=None):
+        self.high_water_mark = high_water_mark
+        self.changed = changed or []
+        self.range_rows = range_rows or []
+        self.statements = []
+        self.commit = Mock()
+        self.rollback = Mock()
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append((sql, params or {}))
+        # Every statement must render for PostgreSQL with its bind parameters
+        statement.compile(dialect=postgresql.dialect())
+
+        result = Mock()
+        if "SELECT high_water_mark" in sql:
+            result.scalar.return_value = self.high_water_mark
+        elif "UNION" in sql:
+            result.fetchall.return_value = self.range_rows
+        elif "MAX(updated_at)" in sql:
+            result.__iter__ = Mock(return_value=iter(self.changed))
+        return result
+
+    def statements_for(self, table, verb):
+        return [
+            (sql, params)
+            for sql, params in self.statements
+            if table in sql and verb in sql
+        ]
+
+
+def changed_bucket(day, restaurant_id, rows, updated_at):
+    return SimpleNamespace(
+        sale_date=day,
+        restaurant_id=restaurant_id,
+        changed_rows=rows,
+        max_updated_at=updated_at,
+    )
+
+
+class TestAnalyticsRollupService:
+    """Incremental rollup refresh driven by the order high-water mark"""
+
+    def test_first_run_backfills_and_stores_watermark(self):
+        today = date.today()
+        latest = datetime.now()
+        db = FakeRollupSession(
+            changed=[
+                changed_bucket(today, 1, 3, latest - timedelta(minutes=1)),
+                changed_bucket(today - timedelta(days=1), 1, 2, latest),
+                changed_bucket(today, None, 1, latest - timedelta(hours=1)),
+            ]
+        )
+
+        summary = AnalyticsRollupService(db).refresh_order_rollups()
+
+        assert summary["changed_rows"] == 6
+        assert summary["buckets_refreshed"] == 3
+
+        scan_sql, scan_params = db.statements_for("FROM orders", "MAX(updated_at)")[0]
+        assert "updated_at >" not in scan_sql
+        assert scan_params == {}
+
+        inserts = db.statements_for("analytics_rollup_daily_sales", "INSERT")
+        assert len(inserts) == 1
+        params = inserts[0][1]
+        assert params["bucket_dates"] == [today - timedelta(days=1), today, today]
+        assert params["bucket_keys"] == [1, None, 1]
+        assert params["min_date"] == today - timedelta(days=1)
+        assert params["max_date"] == today + timedelta(days=1)
+
+        state_params = db.statements_for("analytics_rollup_state", "INSERT")[0][1]
+        assert state_params["high_water_mark"] == latest
+        assert state_params["buckets"] == 3
+
+    def test_incremental_run_scans_from_watermark_with_overlap(self):
+        watermark = datetime(2026, 10, 18, 12, 0)
+        db = FakeRollupSession(high_water_mark=watermark)
+
+        summary = AnalyticsRollupService(db).refresh_order_rollups()
+
+        assert summary["buckets_refreshed"] == 0
+        scan_sql, scan_params = db.statements_for("FROM orders", "MAX(updated_at)")[0]
+        assert "updated_at > :since" in scan_sql
+        assert scan_params["since"] == watermark - WATERMARK_OVERLAP
+        assert not db.statements_for("analytics_rollup_daily_sales", "INSERT")
+
+    def test_buckets_are_recomputed_in_batches(self, monkeypatch):
+        monkeypatch.setattr(rollup_service, "BUCKET_BATCH_SIZE", 2)
+        today = date.today()
+        latest = datetime.now()
+        db = FakeRollupSession(
+            changed=[
+                changed_bucket(today - timedelta(days=offset), 1, 1, latest)
+                for offset in range(5)
+            ]
+        )
+
+        AnalyticsRollupService(db).refresh_order_rollups()
+
+        deletes = db.statements_for("analytics_rollup_daily_sales", "DELETE")
+        assert [len(params["bucket_dates"]) for _, params in deletes] == [2, 2, 1]
+        assert len(db.statements_for("analytics_rollup_product_daily", "INSERT")) == 3
+
+    def test_each_batch_holds_the_rollup_lock(self, monkeypatch):
+        monkeypatch.setattr(rollup_service, "BUCKET_BATCH_SIZE", 2)
+        latest = datetime.now()
+        db = FakeRollupSession(
+            changed=[
+                changed_bucket(date.today() - timedelta(days=offset), 1, 1, latest)
+                for offset in range(3)
+            ]
+        )
+
+        AnalyticsRollupService(db).refresh_order_rollups()
+
+        # Each batch's transaction takes the lock before deleting its buckets
+        recompute = [
+            sql
+            for sql, _ in db.statements
+            if "pg_advisory_xact_lock" in sql
+            or ("DELETE" in sql and "analytics_rollup_daily_sales" in sql)
+        ]
+        assert ["pg_advisory_xact_lock" in sql for sql in recompute] == [
+            True,
+            False,
+            True,
+            False,
+        ]
+        lock_params = db.statements_for("pg_advisory_xact_lock", "SELECT")[0][1]
+        assert lock_params == {
+            "lock_key": rollup_service.ROLLUP_LOCK_KEYS[rollup_service.ORDER_ROLLUP]
+        }
+
+    def test_hourly_rollup_skips_buckets_outside_window(self):
+        old_day = date.today() - timedelta(days=200)
+        db = FakeRollupSession(
+            changed=[
+                changed_bucket(old_day, 1, 1, datetime.now()),
+                changed_bucket(date.today(), 1, 1, datetime.now()),
+            ]
+        )
+
+        AnalyticsRollupService(db).refresh_order_rollups()
+
+        hourly_inserts = db.statements_for("analytics_rollup_hourly_sales", "INSERT")
+        assert len(hourly_inserts) == 1
+        assert hourly_inserts[0][1]["bucket_dates"] == [date.today()]
+
+    def test_recompute_range_includes_buckets_only_in_rollup(self):
+        day = date(2026, 10, 1)
+        db = FakeRollupSession(
+            range_rows=[
+                SimpleNamespace(sale_date=day, restaurant_id=1),
+                SimpleNamespace(sale_date=day, restaurant_id=2),
+            ]
+        )
+
+        summary = AnalyticsRollupService(db).recompute_order_range(
+            day, day, restaurant_id=2
+        )
+
+        assert summary["buckets_refreshed"] == 1
+        deletes = db.statements_for("analytics_rollup_daily_sales", "DELETE")
+        assert deletes[0][1]["bucket_keys"] == [2]
+        assert not db.statements_for("analytics_rollup_state", "INSERT")
@@ -0,0 +1,270 @@
+# backend/modules/analytics/tests/test_sales_cube.py
+
+"""
+Tests for the in-memory sales cube: vectorised aggregation against a plain
+pandas reference, incremental order replacement and the SQL fall-through.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from modules.analytics.schemas.analytics_schemas import SalesFilterRequest
+from modules.analytics.services import sales_cube as sales_cube_module
+from modules.analytics.services.sales_cube import (
+    NULL_ID,
+    CubeQuery,
+    CubeUnsupportedQuery,
+    SalesCube,
+    _facts_from_rows,
+    _order_complete_chunks,
+)
+
+
+def synthetic_facts(orders=300, seed=11, first_order_id=1):
+    """Item-level facts with 1-4 items per order"""
+    rng = np.random.default_rng(seed)
+    items_per_order = rng.integers(1, 5, orders)
+    order_ids = np.repeat(
+        np.arange(first_order_id, first_order_id + orders), items_per_order
+    )
+    start = np.datetime64("2026-09-01T00:00:00")
+    created = start + rng.integers(0, 30 * 24 * 3600, orders).astype("timedelta64[s]")
+    totals = np.round(rng.uniform(5, 120, orders), 2)
+
+    def per_order(values):
+        return np.repeat(values, items_per_order)
+
+    count = len(order_ids)
+    return {
+        "order_id": order_ids,
+        "created_at": per_order(created),
+        "staff_id": per_order(rng.integers(1, 6, orders)),
+        "category_id": per_order(rng.integers(1, 4, orders)),
+        "customer_id": per_order(
+            np.where(rng.random(orders) < 0.2, NULL_ID, rng.integers(1, 80, orders))
+        ),
+        "channel": per_order(rng.choice(["dine_in", "external", "direct"], orders)),
+        "total": per_order(totals),
+        "discount": per_order(np.round(totals * 0.05, 2)),
+        "tax": per_order(np.round(totals * 0.08, 2)),
+        "product_id": rng.integers(1, 25, count),
+        "quantity": rng.integers(1, 4, count).astype(np.int32),
+        "price": np.round(rng.uniform(2, 30, count), 2),
+    }
+
+
+def reference_frame(facts):
+    frame = pd.DataFrame(facts)
+    frame["date"] = frame["created_at"].astype("datetime64[s]").dt.date
+    frame["staff"] = frame["staff_id"]
+    frame["product"] = frame["product_id"]
+    frame["revenue"] = frame["price"] * frame["quantity"]
+    return frame
+
+
+def reference_rows(frame, group_by):
+    rows = []
+    groups = frame.groupby(list(group_by)) if group_by else [((), frame)]
+    for key, group in groups:
+        key = key if isinstance(key, tuple) else (key,)
+        orders = group.drop_duplicates("order_id")
+        customers = orders.loc[orders["customer_id"] != NULL_ID, "customer_id"]
+        rows.append(
+            {
+                **dict(zip(group_by, key)),
+                "orders": len(orders),
+                "customers": customers.nunique(),
+                "quantity": int(group["quantity"].sum()),
+                "revenue": pytest.approx(group["revenue"].sum()),
+                "order_total": pytest.approx(orders["total"].sum()),
+                "discounts": pytest.approx(orders["discount"].sum()),
+                "tax": pytest.approx(orders["tax"].sum()),
+            }
+        )
+    return rows
+
+
+@pytest.fixture
+def facts():
+    return synthetic_facts()
+
+
+@pytest.fixture
+def cube(facts):
+    cube = SalesCube()
+    cube.load_facts(facts)
+    return cube
+
+
+class TestSalesCubeAggregation:
+    def test_summary_matches_reference(self, cube, facts):
+        assert cube.aggregate(CubeQuery()) == reference_rows(reference_frame(facts), ())
+
+    def test_group_by_date_and_staff_matches_reference(self, cube, facts):
+        frame = reference_frame(facts)
+        frame = frame[
+            (frame["date"] >= date(2026, 9, 5)) & (frame["date"] <= date(2026, 9, 20))
+        ]
+
+        rows = cube.aggregate(
+            CubeQuery(
+                group_by=("date", "staff"),
+                date_from=date(2026, 9, 5),
+                date_to=date(2026, 9, 20),
+            )
+        )
+
+        assert rows == reference_rows(frame, ("date", "staff"))
+
+    def test_product_filter_and_grouping_count_orders_once(self, cube, facts):
+        frame = reference_frame(facts)
+        frame = frame[frame["product_id"].isin([2, 3, 5])]
+
+        rows = cube.aggregate(
+            CubeQuery(group_by=("product",), product_ids=[2, 3, 5, 999])
+        )
+
+        assert rows == reference_rows(frame, ("product",))
+
+    def test_order_level_filters(self, cube, facts):
+        frame = reference_frame(facts)
+        frame = frame[
+            frame["channel"].isin(["dine_in"])
+            & frame["staff_id"].isin([1, 2])
+            & (frame["total"] >= 20)
+        ]
+
+        rows = cube.aggregate(
+            CubeQuery(channels=["dine_in"], staff_ids=[1, 2], min_order_value=20)
+        )
+
+        assert rows == reference_rows(frame, ())
+
+    def test_empty_selection(self, cube):
+        assert cube.aggregate(CubeQuery(staff_ids=[999]))[0]["orders"] == 0
+        assert cube.aggregate(CubeQuery(group_by=("date",), staff_ids=[999])) == []
+
+    def test_unknown_dimension_is_unsupported(self, cube):
+        with pytest.raises(CubeUnsupportedQuery):
+            cube.aggregate(CubeQuery(group_by=("table",)))
+
+
+class TestSalesCubeLoading:
+    def test_reloaded_orders_replace_previous_rows(self, cube, facts):
+        before = cube.aggregate(CubeQuery())[0]
+
+        # Order 1 is edited: one item at a new price
+        edited = {
+            name: values[facts["order_id"] == 1][:1] for name, values in facts.items()
+        }
+        edited["price"] = np.array([100.0])
+        edited["quantity"] = np.array([1], dtype=np.int32)
+        cube.load_facts(edited)
+
+        after = cube.aggregate(CubeQuery())[0]
+        old_items = facts["order_id"] == 1
+        expected_revenue = (
+            before["revenue"]
+            - float((facts["price"][old_items] * facts["quantity"][old_items]).sum())
+            + 100.0
+        )
+        assert after["orders"] == before["orders"]
+        assert after["revenue"] == pytest.approx(expected_revenue)
+
+    def test_compaction_keeps_results(self, facts):
+        cube = SalesCube()
+        cube.load_facts(facts)
+        removed = list(range(1, 101))
+        cube.remove_orders(removed)
+
+        # A third of the orders were superseded, so the tables were compacted
+        assert cube.superseded == 0
+        assert cube.orders.size == 200
+
+        frame = reference_frame(facts)
+        frame = frame[~frame["order_id"].isin(removed)]
+        assert cube.aggregate(CubeQuery(group_by=("staff",))) == reference_rows(
+            frame, ("staff",)
+        )
+
+        cube.load_facts(synthetic_facts(orders=50, seed=3, first_order_id=1000))
+        assert cube.aggregate(CubeQuery())[0]["orders"] == 250
+
+    def test_chunks_never_split_an_order(self):
+        rows = [SimpleNamespace(id=order_id) for order_id in [1, 1, 2, 2, 2, 3, 4, 4]]
+
+        chunks = list(_order_complete_chunks(iter(rows), 3))
+
+        assert [[row.id for row in chunk] for chunk in chunks] == [
+            [1, 1],
+            [2, 2, 2],
+            [3],
+            [4, 4],
+        ]
+
+    def test_facts_from_rows(self):
+        created = datetime(2026, 10, 1, 18, 30)
+        row = SimpleNamespace(
+            id=5,
+            created_at=created,
+            updated_at=created,
+            staff_id=2,
+            category_id=None,
+            customer_id=None,
+            table_no=4,
+            external_id=None,
+            total_amount=None,
+            discount_amount=0,
+            tax_amount=1,
+            menu_item_id=9,
+            quantity=2,
+            price=3.5,
+        )
+        cube = SalesCube()
+        cube.load_facts(_facts_from_rows([row]))
+
+        rows = cube.aggregate(
+            CubeQuery(group_by=("date", "hour", "channel", "category"))
+        )
+        assert rows[0]["date"] == date(2026, 10, 1)
+        assert rows[0]["hour"] == 18
+        assert rows[0]["channel"] == "dine_in"
+        assert rows[0]["category"] is None
+        assert rows[0]["customers"] == 0
+        assert rows[0]["revenue"] == 7.0
+
+
+class TestSalesReportFallThrough:
+    def test_incomplete_order_filters_use_sql(self):
+        assert (
+            CubeQuery.from_filters(SalesFilterRequest(only_completed_orders=False))
+            is None
+        )
+
+    def test_trend_uses_single_grouped_cube_query(self, cube):
+        from modules.analytics.services.sales_report_service import (
+            SalesReportService,
+        )
+
+        service = SalesReportService(Mock())
+        with (
+            patch.object(
+                sales_cube_module.sales_cube_registry, "get_cube", return_value=cube
+            ),
+            patch.object(cube, "aggregate", wraps=cube.aggregate) as aggregate,
+        ):
+            revenue_trend, order_trend = service._get_trend_data(date(2026, 9, 30))
+
+        assert aggregate.call_count == 1
+        assert len(revenue_trend) == 30
+        assert (
+            sum(point["value"] for point in order_trend)
+            == cube.aggregate(
+                CubeQuery(date_from=date(2026, 8, 31), date_to=date(2026, 9, 29))
+            )[0]["orders"]
+        )
+        service.db.query.assert_not_called()
@@ -0,0 +1,158 @@
+# backend/modules/analytics/tests/test_snapshot_leader_election.py
+
+"""
+Tests for dashboard snapshot leader election: one worker computes and
+publishes snapshots, the others fan them out, and a dead leader is replaced
+once its lease lapses.
+"""
+
+import asyncio
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+from core.redis_cache import RedisCacheService
+from modules.analytics.services import realtime_metrics_service as metrics_module
+from modules.analytics.services.realtime_metrics_service import (
+    DashboardSnapshot,
+    RealtimeMetricsService,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+# Lock renewal and release run Lua scripts
+pytest.importorskip("lupa")
+
+
+@pytest.fixture(autouse=True)
+def fast_election(monkeypatch):
+    monkeypatch.setattr(metrics_module, "SNAPSHOT_LEADER_LEASE_SECONDS", 0.3)
+    monkeypatch.setattr(metrics_module, "SNAPSHOT_LEADER_RETRY_SECONDS", 0.05)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_snapshot(orders=1):
+    return DashboardSnapshot(
+        timestamp=datetime.now(),
+        revenue_today=Decimal("100.00"),
+        orders_today=orders,
+        customers_today=1,
+        average_order_value=Decimal("100.00"),
+        revenue_growth=0.0,
+        order_growth=0.0,
+        customer_growth=0.0,
+        top_staff=[],
+        top_products=[],
+        hourly_trends=[],
+        active_alerts=0,
+        critical_metrics=[],
+    )
+
+
+def make_worker(server):
+    cache = RedisCacheService()
+    cache.redis_client = fakeredis.aioredis.FakeRedis(server=server)
+    worker = RealtimeMetricsService(
+        redis_client=fakeredis.FakeRedis(server=server, decode_responses=True),
+        coordination_cache=cache,
+    )
+    worker.update_interval = 0.05
+    worker._generate_dashboard_snapshot = AsyncMock(side_effect=make_snapshot)
+    worker.received = []
+    worker.subscribe_to_updates(worker.received.append)
+    return worker
+
+
+async def run_workers(*workers):
+    tasks = []
+    for worker in workers:
+        worker.is_running = True
+        tasks.append(asyncio.create_task(worker._metrics_update_loop()))
+        tasks.append(asyncio.create_task(worker._snapshot_listener()))
+    return tasks
+
+
+async def stop_workers(workers, tasks):
+    for worker in workers:
+        worker.is_running = False
+    await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5)
+
+
+class TestSnapshotLeaderElection:
+    @pytest.mark.asyncio
+    async def test_single_leader_computes_and_followers_receive(self, server):
+        workers = [make_worker(server) for _ in range(3)]
+
+        tasks = await run_workers(*workers)
+        await asyncio.sleep(0.5)
+        await stop_workers(workers, tasks)
+
+        computing = [w for w in workers if w._generate_dashboard_snapshot.await_count]
+        assert len(computing) == 1
+
+        leader = computing[0]
+        for follower in set(workers) - {leader}:
+            assert follower.received
+            assert follower.received[-1].timestamp <= leader.received[-1].timestamp
+            # Snapshots arrive in order
+            timestamps = [snapshot.timestamp for snapshot in follower.received]
+            assert timestamps == sorted(timestamps)
+
+    @pytest.mark.asyncio
+    async def test_follower_takes_over_when_leader_dies(self, server):
+        # A leader that crashed without releasing its lease
+        dead_leader = fakeredis.aioredis.FakeRedis(server=server)
+        await dead_leader.set(
+            f"auraconnect:locks:{metrics_module.SNAPSHOT_LEADER_LOCK}",
+            "dead-token",
+            px=300,
+        )
+        worker = make_worker(server)
+
+        tasks = await run_workers(worker)
+        await asyncio.sleep(0.15)
+        assert worker._generate_dashboard_snapshot.await_count == 0
+
+        await asyncio.sleep(0.5)
+        assert worker.is_leader
+        assert worker._generate_dashboard_snapshot.await_count > 0
+        await stop_workers([worker], tasks)
+
+    @pytest.mark.asyncio
+    async def test_leader_keeps_lease_beyond_its_timeout(self, server):
+        leader = make_worker(server)
+        follower = make_worker(server)
+
+        leader_tasks = await run_workers(leader)
+        await asyncio.sleep(0.1)
+        follower_tasks = await run_workers(follower)
+        # Several lease periods; renewal keeps the first worker in charge
+        await asyncio.sleep(1.0)
+        await stop_workers([leader, follower], leader_tasks + follower_tasks)
+
+        assert follower._generate_dashboard_snapshot.await_count == 0
+        assert follower.received
+
+    @pytest.mark.asyncio
+    async def test_stale_snapshot_from_deposed_leader_is_ignored(self, server):
+        worker = make_worker(server)
+        newer, older = make_snapshot(orders=2), make_snapshot(orders=1)
+        older.timestamp = newer.timestamp.replace(year=newer.timestamp.year - 1)
+
+        for snapshot in (newer, older):
+            await worker._handle_published_snapshot(
+                metrics_module.json.dumps(
+                    {"source": "other", "snapshot": snapshot.to_dict()}
+                )
+            )
+        await worker._handle_published_snapshot(
+            metrics_module.json.dumps(
+                {"source": worker.instance_id, "snapshot": make_snapshot().to_dict()}
+            )
+        )
+
+        assert [snapshot.orders_today for snapshot in worker.received] == [2]
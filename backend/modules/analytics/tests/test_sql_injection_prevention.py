@@ -5,6 +5,9 @@ Tests for SQL injection prevention measures.
 import pytest
 from datetime import date
 from modules.analytics.services.secure_query_builder import SecureQueryBuilder, TimeGranularity
+from modules.analytics.schemas.predictive_analytics_schemas import (
+    TimeGranularity as SchemaGranularity,
+)
 from modules.analytics.utils.input_sanitizer import InputSanitizer
 
 
@@ -59,6 +62,20 @@ class TestSecureQueryBuilder:
         # Check params are properly set
         assert params["date_trunc"] == "month"
     
+    def test_demand_queries_accept_schema_granularity(self):
+        """Test that request schema granularities become DATE_TRUNC units"""
+        builders = [
+            SecureQueryBuilder.build_product_demand_query,
+            SecureQueryBuilder.build_category_demand_query,
+            SecureQueryBuilder.build_overall_demand_query,
+        ]
+        
+        for builder in builders:
+            _, params = builder(SchemaGranularity.DAILY)
+            assert params["date_trunc"] == "day"
+            _, params = builder(SchemaGranularity.HOURLY)
+            assert params["date_trunc"] == "hour"
+    
     def test_sales_metrics_query_with_filters(self):
         """Test sales metrics query with various filters"""
         filters = {
@@ -24,7 +24,10 @@ from modules.feedback.models.feedback_models import (
     ReviewAggregate,
     SentimentScore,
 )
-from modules.feedback.services.sentiment_service import sentiment_service
+from modules.feedback.services.sentiment_service import (
+    SENTIMENT_PAGE_SIZE,
+    sentiment_service,
+)
 from modules.feedback.services.moderation_service import ContentModerationService
 from modules.feedback.services.aggregation_service import ReviewAggregationService
 from modules.feedback.services.analytics_service import FeedbackAnalyticsService
@@ -102,6 +105,8 @@ class BackgroundTaskProcessor:
 
             if task_type == "sentiment_analysis":
                 await self._process_sentiment_analysis(task_data)
+            elif task_type == "sentiment_backfill":
+                await self._process_sentiment_backfill(task_data)
             elif task_type == "content_moderation":
                 await self._process_content_moderation(task_data)
             elif task_type == "review_aggregation":
@@ -163,6 +168,24 @@ class BackgroundTaskProcessor:
         finally:
             db.close()
 
+    async def _process_sentiment_backfill(self, data: Dict[str, Any]):
+        """Analyze stored reviews in pages and write results back in bulk"""
+        db = SessionLocal()
+        try:
+            stats = await sentiment_service.analyze_stored_reviews(
+                db,
+                review_ids=data.get("review_ids"),
+                page_size=data.get("page_size", SENTIMENT_PAGE_SIZE),
+                force_reanalysis=data.get("force_reanalysis", False),
+            )
+            logger.info(
+                f"Sentiment backfill processed {stats['processed']} reviews "
+                f"at {stats['texts_per_second']} texts/s"
+            )
+
+        finally:
+            db.close()
+
     async def _process_content_moderation(self, data: Dict[str, Any]):
         """Process content moderation for reviews and feedback"""
         db = SessionLocal()
@@ -337,6 +360,18 @@ class BackgroundTaskProcessor:
 
         await self.enqueue_task("sentiment_analysis", data)
 
+    async def enqueue_sentiment_backfill(
+        self,
+        review_ids: Optional[List[int]] = None,
+        force_reanalysis: bool = False,
+    ):
+        """Enqueue batch sentiment analysis of stored reviews"""
+        data = {"force_reanalysis": force_reanalysis}
+        if review_ids is not None:
+            data["review_ids"] = review_ids
+
+        await self.enqueue_task("sentiment_backfill", data)
+
     async def enqueue_content_moderation(
         self, review_id: Optional[int] = None, feedback_id: Optional[int] = None
     ):
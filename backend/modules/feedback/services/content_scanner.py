@@ -0,0 +1,150 @@
+# backend/modules/feedback/services/content_scanner.py
+
+"""
+Compiled multi-pattern scanners for content moderation.
+
+Term lists are matched with an Aho-Corasick automaton and regex lists with a
+combined pattern, so the number of passes over a text depends on how many
+patterns match rather than on how long the lists grow.
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Pattern, Sequence, Set, Tuple
+
+
+class TermScanner:
+    """Aho-Corasick automaton finding which terms occur anywhere in a text"""
+
+    def __init__(self, terms: Sequence[str]):
+        self.terms = list(terms)
+
+        # Trie of the terms; transitions found while scanning are added later
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        for index, term in enumerate(self.terms):
+            if not term:
+                continue
+            node = 0
+            for char in term:
+                child = self._transitions[node].get(char)
+                if child is None:
+                    child = len(self._transitions)
+                    self._transitions[node][char] = child
+                    self._transitions.append({})
+                    self._outputs.append(())
+                node = child
+            self._outputs[node] += (index,)
+
+        # Failure links point at the longest proper suffix that is also a
+        # prefix of some term; outputs include every term ending there
+        self._fail = [0] * len(self._transitions)
+        queue = deque(self._transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._transitions[node].items():
+                queue.append(child)
+                self._fail[child] = self._step(self._fail[node], char)
+                self._outputs[child] += self._outputs[self._fail[child]]
+
+        self._alphabet = frozenset(char for term in self.terms for char in term)
+
+    def _step(self, node: int, char: str) -> int:
+        """Follow failure links until ``char`` can be consumed"""
+        while char not in self._transitions[node]:
+            if node == 0:
+                return 0
+            node = self._fail[node]
+        return self._transitions[node][char]
+
+    def find(self, text: str) -> Set[int]:
+        """Indices of the terms found in ``text``"""
+        transitions = self._transitions
+        outputs = self._outputs
+        alphabet = self._alphabet
+        found = set()
+        node = 0
+
+        for char in text:
+            if char not in alphabet:
+                node = 0
+                continue
+            next_node = transitions[node].get(char)
+            if next_node is None:
+                # Remember the transition so later texts take it directly
+                next_node = self._step(node, char)
+                transitions[node][char] = next_node
+            node = next_node
+            if outputs[node]:
+                found.update(outputs[node])
+
+        return found
+
+
+class PatternScanner:
+    """
+    Combined regex telling which of several patterns match a text.
+
+    Each pattern sits in a lookahead, so every position is tried against all
+    of them in one pass. Where several patterns match at one position only the
+    first is reported, so after a match the text is scanned again with the
+    patterns not found yet; that is one more pass per round that finds
+    something. Patterns must not use numbered backreferences.
+    """
+
+    def __init__(self, patterns: Sequence[str], flags: int = 0):
+        self.patterns = list(patterns)
+        self.flags = flags
+        self._combined: Dict[Tuple[int, ...], Pattern] = {}
+        self._all = tuple(range(len(self.patterns)))
+        if self._all:
+            # Fail on a bad pattern here rather than on first use
+            self._combined_for(self._all)
+
+    def find(self, text: str) -> Set[int]:
+        """Indices of the patterns matching ``text``"""
+        found: Set[int] = set()
+        remaining = self._all
+        while remaining:
+            matched = {
+                int(match.lastgroup[1:])
+                for match in self._combined_for(remaining).finditer(text)
+            }
+            if not matched:
+                break
+            found |= matched
+            remaining = tuple(index for index in remaining if index not in matched)
+        return found
+
+    def _combined_for(self, indices: Tuple[int, ...]) -> Pattern:
+        combined = self._combined.get(indices)
+        if combined is None:
+            combined = re.compile(
+                "|".join(
+                    f"(?=(?P<p{index}>{self.patterns[index]}))" for index in indices
+                ),
+                self.flags,
+            )
+            self._combined[indices] = combined
+        return combined
+
+
+@lru_cache(maxsize=8)
+def _cached_term_scanner(terms: Tuple[str, ...]) -> TermScanner:
+    return TermScanner(terms)
+
+
+@lru_cache(maxsize=8)
+def _cached_pattern_scanner(patterns: Tuple[str, ...], flags: int) -> PatternScanner:
+    return PatternScanner(patterns, flags)
+
+
+def get_term_scanner(terms: Sequence[str]) -> TermScanner:
+    """Scanner for ``terms``, compiled once per distinct list"""
+    return _cached_term_scanner(tuple(terms))
+
+
+def get_pattern_scanner(patterns: Sequence[str], flags: int = 0) -> PatternScanner:
+    """Scanner for ``patterns``, compiled once per distinct list"""
+    return _cached_pattern_scanner(tuple(patterns), flags)
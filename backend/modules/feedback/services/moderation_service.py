@@ -16,10 +16,29 @@ from modules.feedback.models.feedback_models import (
     SentimentScore,
 )
 from modules.feedback.services.sentiment_service import sentiment_service
+from modules.feedback.services.content_scanner import (
+    PatternScanner,
+    get_pattern_scanner,
+    get_term_scanner,
+)
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Personal information patterns: (item, pattern, severity)
+PERSONAL_INFO_PATTERNS = [
+    ("email_address", r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", 0.8),
+    ("phone_number", r"\b\d{3}-\d{3}-\d{4}\b", 0.8),  # 123-456-7890
+    ("phone_number", r"\b\(\d{3}\)\s*\d{3}-\d{4}\b", 0.8),  # (123) 456-7890
+    ("phone_number", r"\b\d{10}\b", 0.8),  # 1234567890
+    ("credit_card", r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b", 1.0),  # basic
+    ("ssn", r"\b\d{3}-\d{2}-\d{4}\b", 1.0),
+]
+
+PERSONAL_INFO_SCANNER = PatternScanner(
+    [pattern for _, pattern, _ in PERSONAL_INFO_PATTERNS]
+)
+
 
 @dataclass
 class ModerationResult:
@@ -42,6 +61,28 @@ class ContentModerationService:
         self.spam_patterns = self._load_spam_patterns()
         self.moderation_rules = self._load_moderation_rules()
 
+    @property
+    def profanity_words(self) -> Dict[str, float]:
+        return self._profanity_words
+
+    @profanity_words.setter
+    def profanity_words(self, words: Dict[str, float]) -> None:
+        # Assign a new mapping to change the list; the scanner is rebuilt here
+        self._profanity_words = words
+        self._profanity_terms = list(words)
+        self._profanity_scanner = get_term_scanner(self._profanity_terms)
+
+    @property
+    def spam_patterns(self) -> Dict[str, float]:
+        return self._spam_patterns
+
+    @spam_patterns.setter
+    def spam_patterns(self, patterns: Dict[str, float]) -> None:
+        # Assign a new mapping to change the list; the scanner is rebuilt here
+        self._spam_patterns = patterns
+        self._spam_pattern_list = list(patterns)
+        self._spam_scanner = get_pattern_scanner(self._spam_pattern_list, re.IGNORECASE)
+
     def moderate_review(
         self, review: Review, auto_moderate: bool = True
     ) -> ModerationResult:
@@ -403,14 +444,13 @@ class ContentModerationService:
     def _check_profanity(self, content: str) -> Dict[str, Any]:
         """Check for profane language"""
 
-        content_lower = content.lower()
-        found_words = []
-        severity = 0.0
-
-        for word, score in self.profanity_words.items():
-            if word in content_lower:
-                found_words.append(word)
-                severity = max(severity, score)
+        found_words = [
+            self._profanity_terms[index]
+            for index in sorted(self._profanity_scanner.find(content.lower()))
+        ]
+        severity = max(
+            (self.profanity_words[word] for word in found_words), default=0.0
+        )
 
         return {
             "found": len(found_words) > 0,
@@ -422,13 +462,13 @@ class ContentModerationService:
     def _check_spam_patterns(self, content: str) -> Dict[str, Any]:
         """Check for spam patterns"""
 
-        matched_patterns = []
-        severity = 0.0
-
-        for pattern, score in self.spam_patterns.items():
-            if re.search(pattern, content, re.IGNORECASE):
-                matched_patterns.append(pattern)
-                severity = max(severity, score)
+        matched_patterns = [
+            self._spam_pattern_list[index]
+            for index in sorted(self._spam_scanner.find(content))
+        ]
+        severity = max(
+            (self.spam_patterns[pattern] for pattern in matched_patterns), default=0.0
+        )
 
         # Additional spam indicators
         # Excessive repetition
@@ -461,36 +501,11 @@ class ContentModerationService:
         found_items = []
         severity = 0.0
 
-        # Email patterns
-        email_pattern = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
-        if re.search(email_pattern, content):
-            found_items.append("email_address")
-            severity = max(severity, 0.8)
-
-        # Phone number patterns
-        phone_patterns = [
-            r"\b\d{3}-\d{3}-\d{4}\b",  # 123-456-7890
-            r"\b\(\d{3}\)\s*\d{3}-\d{4}\b",  # (123) 456-7890
-            r"\b\d{10}\b",  # 1234567890
-        ]
-
-        for pattern in phone_patterns:
-            if re.search(pattern, content):
-                found_items.append("phone_number")
-                severity = max(severity, 0.8)
-                break
-
-        # Credit card patterns (basic)
-        cc_pattern = r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b"
-        if re.search(cc_pattern, content):
-            found_items.append("credit_card")
-            severity = max(severity, 1.0)
-
-        # Social security numbers
-        ssn_pattern = r"\b\d{3}-\d{2}-\d{4}\b"
-        if re.search(ssn_pattern, content):
-            found_items.append("ssn")
-            severity = max(severity, 1.0)
+        for index in sorted(PERSONAL_INFO_SCANNER.find(content)):
+            item, _, score = PERSONAL_INFO_PATTERNS[index]
+            if item not in found_items:
+                found_items.append(item)
+            severity = max(severity, score)
 
         return {
             "found": len(found_items) > 0,
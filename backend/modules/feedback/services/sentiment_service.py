@@ -1,19 +1,89 @@
 # backend/modules/feedback/services/sentiment_service.py
 
 import re
+import os
+import time
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Sequence, Tuple
 from dataclasses import dataclass
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import asyncio
 import aiohttp
 import json
 
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
 from modules.feedback.models.feedback_models import Review, Feedback, SentimentScore
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Batches with at least this many texts are sharded across the process pool
+SENTIMENT_POOL_MIN_BATCH = 500
+
+# Texts sent to a pool worker per task
+SENTIMENT_CHUNK_SIZE = 250
+
+# Worker processes for large sentiment batches
+SENTIMENT_POOL_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Reviews loaded and written back per page when analyzing stored reviews
+SENTIMENT_PAGE_SIZE = 1000
+
+# Words that flip the score of keywords up to NEGATION_WINDOW words after them
+NEGATION_WORDS = frozenset(
+    ["not", "no", "never", "none", "nothing", "nobody", "nowhere", "neither"]
+)
+NEGATION_WINDOW = 3
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+SPECIAL_CHARACTERS_PATTERN = re.compile(r"[^\w\s!?.,;:-]")
+CONTRACTION_PATTERNS = [
+    (re.compile(pattern), replacement)
+    for pattern, replacement in [
+        (r"don't", "do not"),
+        (r"won't", "will not"),
+        (r"can't", "cannot"),
+        (r"n't", " not"),
+        (r"'re", " are"),
+        (r"'ve", " have"),
+        (r"'ll", " will"),
+        (r"'d", " would"),
+    ]
+]
+
+# (pattern, score) pairs for pattern based analysis
+SENTIMENT_PATTERNS = [
+    # Very positive patterns
+    (r"\b(excellent|amazing|outstanding|fantastic|perfect|love|adore)\b", 2.0),
+    (r"\b(highly recommend|best ever|extremely happy|very satisfied)\b", 1.8),
+    # Positive patterns
+    (r"\b(good|great|nice|happy|satisfied|pleased|recommend)\b", 1.0),
+    (r"\b(pretty good|quite nice|fairly happy)\b", 0.8),
+    # Negative patterns
+    (r"\b(bad|poor|disappointing|unsatisfied|unhappy|dislike)\b", -1.0),
+    (r"\b(not good|not happy|not satisfied|could be better)\b", -0.8),
+    # Very negative patterns
+    (r"\b(terrible|awful|horrible|hate|disgusting|worst)\b", -2.0),
+    (
+        r"\b(completely disappointed|total waste|never again|extremely poor)\b",
+        -1.8,
+    ),
+    # Intensity modifiers
+    (
+        r"\b(very|extremely|really|super|incredibly|absolutely)\s+(\w+)",
+        1.5,
+    ),  # Multiplier
+    (r"\b(somewhat|kind of|sort of|a bit)\s+(\w+)", 0.7),  # Reducer
+]
+COMPILED_SENTIMENT_PATTERNS = [
+    (pattern, re.compile(pattern, re.IGNORECASE), score)
+    for pattern, score in SENTIMENT_PATTERNS
+]
+
 
 @dataclass
 class SentimentResult:
@@ -25,6 +95,82 @@ class SentimentResult:
     processing_time_ms: float
 
 
+class SentimentLexicon:
+    """Sentiment keywords compiled for lookups on tokenized text"""
+
+    def __init__(self, keywords: Dict[str, float]):
+        # Hashable form of the keywords, identifying the lexicon to pool workers
+        self.key: Tuple[Tuple[str, float], ...] = tuple(sorted(keywords.items()))
+        self.unigrams: Dict[str, float] = {}
+        # First word -> second word -> score
+        self.bigrams: Dict[str, Dict[str, float]] = {}
+
+        for phrase, score in keywords.items():
+            words = phrase.split(" ")
+            if len(words) == 1:
+                self.unigrams[phrase] = score
+            elif len(words) == 2:
+                self.bigrams.setdefault(words[0], {})[words[1]] = score
+
+    def match(self, words: List[str]) -> Tuple[List[float], List[Dict[str, Any]]]:
+        """Scores and matches of the unigrams and bigrams found in ``words``"""
+        unigrams = self.unigrams
+        bigrams = self.bigrams
+        last_index = len(words) - 1
+        last_negation = -NEGATION_WINDOW - 1
+        sentiment_scores = []
+        matched_keywords = []
+
+        for i, word in enumerate(words):
+            is_negated = i - last_negation <= NEGATION_WINDOW
+
+            base_score = unigrams.get(word)
+            if base_score is not None:
+                score = -base_score if is_negated else base_score
+                sentiment_scores.append(score)
+                matched_keywords.append(
+                    {
+                        "word": word,
+                        "base_score": base_score,
+                        "final_score": score,
+                        "negated": is_negated,
+                    }
+                )
+
+            followers = bigrams.get(word)
+            if followers and i < last_index:
+                base_score = followers.get(words[i + 1])
+                if base_score is not None:
+                    score = -base_score if is_negated else base_score
+                    sentiment_scores.append(score)
+                    matched_keywords.append(
+                        {
+                            "phrase": f"{word} {words[i + 1]}",
+                            "base_score": base_score,
+                            "final_score": score,
+                            "negated": is_negated,
+                        }
+                    )
+
+            if word in NEGATION_WORDS:
+                last_negation = i
+
+        return sentiment_scores, matched_keywords
+
+
+_sentiment_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_sentiment_executor() -> ProcessPoolExecutor:
+    """Process pool that runs large sentiment batches outside the GIL"""
+    global _sentiment_executor
+    if _sentiment_executor is None:
+        _sentiment_executor = ProcessPoolExecutor(
+            max_workers=SENTIMENT_POOL_MAX_WORKERS
+        )
+    return _sentiment_executor
+
+
 class SentimentAnalysisService:
     """Service for analyzing sentiment of reviews and feedback"""
 
@@ -32,6 +178,15 @@ class SentimentAnalysisService:
         self.sentiment_keywords = self._load_sentiment_keywords()
         self.processing_cache = {}  # Simple in-memory cache
 
+    @property
+    def sentiment_keywords(self) -> Dict[str, float]:
+        return self._sentiment_keywords
+
+    @sentiment_keywords.setter
+    def sentiment_keywords(self, keywords: Dict[str, float]):
+        self._sentiment_keywords = keywords
+        self.lexicon = SentimentLexicon(keywords)
+
     def analyze_review_sentiment(
         self, review: Review, force_reanalysis: bool = False
     ) -> SentimentResult:
@@ -50,6 +205,11 @@ class SentimentAnalysisService:
                 processing_time_ms=0.0,
             )
 
+        return self._analyze_text_sentiment(*self._review_item(review))
+
+    def _review_item(self, review) -> Tuple[str, Dict[str, Any]]:
+        """Text and context analyzed for a review or a row of review columns"""
+
         # Combine title and content for analysis
         text_to_analyze = ""
         if review.title:
@@ -63,7 +223,7 @@ class SentimentAnalysisService:
             "is_verified": review.is_verified_purchase,
         }
 
-        return self._analyze_text_sentiment(text_to_analyze, rating_context)
+        return text_to_analyze, rating_context
 
     def analyze_feedback_sentiment(
         self, feedback: Feedback, force_reanalysis: bool = False
@@ -134,25 +294,14 @@ class SentimentAnalysisService:
         text = text.lower()
 
         # Remove extra whitespace
-        text = re.sub(r"\s+", " ", text)
+        text = WHITESPACE_PATTERN.sub(" ", text)
 
         # Remove special characters but keep punctuation that affects sentiment
-        text = re.sub(r"[^\w\s!?.,;:-]", " ", text)
+        text = SPECIAL_CHARACTERS_PATTERN.sub(" ", text)
 
         # Handle negations (expand contractions)
-        negation_patterns = [
-            (r"don't", "do not"),
-            (r"won't", "will not"),
-            (r"can't", "cannot"),
-            (r"n't", " not"),
-            (r"'re", " are"),
-            (r"'ve", " have"),
-            (r"'ll", " will"),
-            (r"'d", " would"),
-        ]
-
-        for pattern, replacement in negation_patterns:
-            text = re.sub(pattern, replacement, text)
+        for pattern, replacement in CONTRACTION_PATTERNS:
+            text = pattern.sub(replacement, text)
 
         return text.strip()
 
@@ -161,45 +310,8 @@ class SentimentAnalysisService:
     ) -> Dict[str, Any]:
         """Analyze sentiment using keyword matching"""
 
-        words = text.split()
-        sentiment_scores = []
-        matched_keywords = []
-
-        # Analyze each word/phrase
-        for i, word in enumerate(words):
-            # Check for negation context
-            is_negated = self._check_negation_context(words, i)
-
-            # Single word analysis
-            if word in self.sentiment_keywords:
-                base_score = self.sentiment_keywords[word]
-                # Flip score if negated
-                score = -base_score if is_negated else base_score
-                sentiment_scores.append(score)
-                matched_keywords.append(
-                    {
-                        "word": word,
-                        "base_score": base_score,
-                        "final_score": score,
-                        "negated": is_negated,
-                    }
-                )
-
-            # Bigram analysis (two-word phrases)
-            if i < len(words) - 1:
-                bigram = f"{word} {words[i + 1]}"
-                if bigram in self.sentiment_keywords:
-                    base_score = self.sentiment_keywords[bigram]
-                    score = -base_score if is_negated else base_score
-                    sentiment_scores.append(score)
-                    matched_keywords.append(
-                        {
-                            "phrase": bigram,
-                            "base_score": base_score,
-                            "final_score": score,
-                            "negated": is_negated,
-                        }
-                    )
+        # Unigrams and bigrams, with negation, in one pass over the tokens
+        sentiment_scores, matched_keywords = self.lexicon.match(text.split())
 
         # Calculate overall sentiment
         if sentiment_scores:
@@ -228,36 +340,11 @@ class SentimentAnalysisService:
     ) -> Dict[str, Any]:
         """Analyze sentiment using pattern matching"""
 
-        sentiment_patterns = [
-            # Very positive patterns
-            (r"\b(excellent|amazing|outstanding|fantastic|perfect|love|adore)\b", 2.0),
-            (r"\b(highly recommend|best ever|extremely happy|very satisfied)\b", 1.8),
-            # Positive patterns
-            (r"\b(good|great|nice|happy|satisfied|pleased|recommend)\b", 1.0),
-            (r"\b(pretty good|quite nice|fairly happy)\b", 0.8),
-            # Negative patterns
-            (r"\b(bad|poor|disappointing|unsatisfied|unhappy|dislike)\b", -1.0),
-            (r"\b(not good|not happy|not satisfied|could be better)\b", -0.8),
-            # Very negative patterns
-            (r"\b(terrible|awful|horrible|hate|disgusting|worst)\b", -2.0),
-            (
-                r"\b(completely disappointed|total waste|never again|extremely poor)\b",
-                -1.8,
-            ),
-            # Intensity modifiers
-            (
-                r"\b(very|extremely|really|super|incredibly|absolutely)\s+(\w+)",
-                1.5,
-            ),  # Multiplier
-            (r"\b(somewhat|kind of|sort of|a bit)\s+(\w+)", 0.7),  # Reducer
-        ]
-
         pattern_scores = []
         matched_patterns = []
 
-        for pattern, score in sentiment_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for pattern, compiled, score in COMPILED_SENTIMENT_PATTERNS:
+            for match in compiled.finditer(text):
                 pattern_scores.append(score)
                 matched_patterns.append(
                     {
@@ -385,22 +472,10 @@ class SentimentAnalysisService:
     def _check_negation_context(self, words: List[str], position: int) -> bool:
         """Check if a word is in a negation context"""
 
-        negation_words = [
-            "not",
-            "no",
-            "never",
-            "none",
-            "nothing",
-            "nobody",
-            "nowhere",
-            "neither",
-        ]
-        negation_window = 3  # Look back 3 words
-
-        start = max(0, position - negation_window)
+        start = max(0, position - NEGATION_WINDOW)
         context_words = words[start:position]
 
-        return any(word in negation_words for word in context_words)
+        return any(word in NEGATION_WORDS for word in context_words)
 
     def _score_to_sentiment(self, score: float) -> SentimentScore:
         """Convert numerical score to sentiment enum"""
@@ -515,34 +590,162 @@ class SentimentAnalysisService:
             "user friendly": 1.0,
         }
 
+    def analyze_texts(
+        self, texts: Sequence[Tuple[str, Optional[Dict[str, Any]]]]
+    ) -> List[SentimentResult]:
+        """Analyze (text, context) pairs in this process"""
+        return [self._analyze_text_sentiment(text, context) for text, context in texts]
+
     async def analyze_batch_async(
-        self, items: List[Dict[str, Any]], batch_size: int = 10
+        self, items: List[Dict[str, Any]], batch_size: int = SENTIMENT_CHUNK_SIZE
     ) -> List[SentimentResult]:
-        """Analyze sentiment for multiple items asynchronously"""
-
-        results = []
-
-        # Process in batches to avoid overwhelming the system
-        for i in range(0, len(items), batch_size):
-            batch = items[i : i + batch_size]
-            batch_tasks = []
-
-            for item in batch:
-                if "text" in item:
-                    # Direct text analysis
-                    task = asyncio.create_task(
-                        self._analyze_text_sentiment_async(
-                            item["text"], item.get("context", {})
-                        )
-                    )
-                    batch_tasks.append(task)
+        """
+        Analyze sentiment for multiple items asynchronously.
+
+        Batches of SENTIMENT_POOL_MIN_BATCH texts or more are split into
+        chunks of ``batch_size`` and analyzed across the sentiment process
+        pool; smaller batches, or any batch on a single core, run in one call
+        on the default executor.
+        """
+
+        texts = [
+            (item["text"], item.get("context", {})) for item in items if "text" in item
+        ]
+        if not texts:
+            return []
 
-            # Wait for batch to complete
-            batch_results = await asyncio.gather(*batch_tasks)
-            results.extend(batch_results)
+        start_time = time.perf_counter()
+        loop = asyncio.get_running_loop()
 
+        if len(texts) < SENTIMENT_POOL_MIN_BATCH or SENTIMENT_POOL_MAX_WORKERS < 2:
+            results = await loop.run_in_executor(None, self.analyze_texts, texts)
+        else:
+            executor = get_sentiment_executor()
+            chunks = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        executor,
+                        analyze_text_chunk,
+                        self.lexicon.key,
+                        texts[i : i + batch_size],
+                    )
+                    for i in range(0, len(texts), batch_size)
+                ]
+            )
+            results = [result for chunk in chunks for result in chunk]
+
+        elapsed = time.perf_counter() - start_time
+        logger.debug(
+            f"Analyzed {len(texts)} texts in {elapsed:.3f}s "
+            f"({len(texts) / max(elapsed, 1e-9):.0f} texts/s)"
+        )
         return results
 
+    async def analyze_stored_reviews(
+        self,
+        db: Session,
+        review_ids: Optional[Sequence[int]] = None,
+        page_size: int = SENTIMENT_PAGE_SIZE,
+        force_reanalysis: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Analyze stored reviews page by page and write the results back in bulk.
+
+        Reviews are read in id order, ``page_size`` at a time, analyzed as one
+        batch and written with a single bulk update per page, so memory stays
+        bounded however many reviews there are. Reviews that already have a
+        sentiment score are skipped unless ``force_reanalysis`` is set.
+
+        Returns:
+            Counts of reviews and pages processed and the throughput in
+            texts per second
+        """
+
+        start_time = time.perf_counter()
+        processed = 0
+        pages = 0
+
+        for rows in self._review_pages(db, review_ids, page_size, force_reanalysis):
+            results = await self.analyze_batch_async(
+                [dict(zip(("text", "context"), self._review_item(row))) for row in rows]
+            )
+            db.execute(
+                update(Review),
+                [
+                    {
+                        "id": row.id,
+                        "sentiment_score": result.score,
+                        "sentiment_confidence": result.confidence,
+                        "sentiment_analysis_data": result.raw_data,
+                    }
+                    for row, result in zip(rows, results)
+                ],
+            )
+            db.commit()
+
+            processed += len(rows)
+            pages += 1
+
+        elapsed = time.perf_counter() - start_time
+        texts_per_second = processed / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Analyzed sentiment of {processed} reviews in {pages} pages "
+            f"({texts_per_second:.0f} texts/s)"
+        )
+
+        return {
+            "processed": processed,
+            "pages": pages,
+            "elapsed_seconds": round(elapsed, 3),
+            "texts_per_second": round(texts_per_second, 1),
+        }
+
+    def _review_pages(
+        self,
+        db: Session,
+        review_ids: Optional[Sequence[int]],
+        page_size: int,
+        force_reanalysis: bool,
+    ):
+        """Pages of the review columns needed for analysis, in id order"""
+
+        query = db.query(
+            Review.id,
+            Review.title,
+            Review.content,
+            Review.rating,
+            Review.review_type,
+            Review.is_verified_purchase,
+        )
+        if not force_reanalysis:
+            query = query.filter(Review.sentiment_score.is_(None))
+
+        if review_ids is not None:
+            ids = sorted(set(review_ids))
+            for i in range(0, len(ids), page_size):
+                rows = (
+                    query.filter(Review.id.in_(ids[i : i + page_size]))
+                    .order_by(Review.id)
+                    .all()
+                )
+                if rows:
+                    yield rows
+            return
+
+        # Keyset pagination, so later pages cost the same as the first
+        last_id = 0
+        while True:
+            rows = (
+                query.filter(Review.id > last_id)
+                .order_by(Review.id)
+                .limit(page_size)
+                .all()
+            )
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
+
     async def _analyze_text_sentiment_async(
         self, text: str, context: Dict[str, Any] = None
     ) -> SentimentResult:
@@ -623,5 +826,28 @@ class SentimentAnalysisService:
         }
 
 
+@lru_cache(maxsize=4)
+def _lexicon_service(
+    keywords: Tuple[Tuple[str, float], ...],
+) -> SentimentAnalysisService:
+    """Service with the given keywords, compiled once per worker process"""
+    service = SentimentAnalysisService()
+    service.sentiment_keywords = dict(keywords)
+    return service
+
+
+def analyze_text_chunk(
+    keywords: Tuple[Tuple[str, float], ...],
+    texts: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+) -> List[SentimentResult]:
+    """
+    Analyze a chunk of (text, context) pairs against ``keywords``.
+
+    Runs inside the sentiment process pool, so it only takes and returns
+    picklable values.
+    """
+    return _lexicon_service(keywords).analyze_texts(texts)
+
+
 # Global sentiment analysis service instance
 sentiment_service = SentimentAnalysisService()
@@ -0,0 +1,178 @@
+# backend/modules/feedback/tests/test_content_scanner.py
+
+import random
+import re
+import time
+
+import pytest
+
+from modules.feedback.services.content_scanner import PatternScanner, TermScanner
+from modules.feedback.services.moderation_service import ContentModerationService
+
+SAMPLE_TEXTS = [
+    "The food was great, will come back!",
+    "What a stupid idiot the waiter was, damn",
+    "BUY NOW!!! Click here for free money at www.example.com",
+    "Call me at 555-123-4567 or (555) 123-4567, email me@example.com",
+    "My card 4111 1111 1111 1111 and SSN 123-45-6789 were stolen",
+    "hellooo, best product ever, it changed my life, tell everyone",
+    "",
+]
+
+
+def naive_terms(terms, text):
+    return {index for index, term in enumerate(terms) if term in text}
+
+
+def naive_patterns(patterns, text, flags=0):
+    return {
+        index
+        for index, pattern in enumerate(patterns)
+        if re.search(pattern, text, flags)
+    }
+
+
+def random_text(rng, alphabet, length):
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+class TestTermScanner:
+    """Aho-Corasick term matching"""
+
+    def test_overlapping_terms(self):
+        scanner = TermScanner(["he", "she", "his", "hers"])
+
+        assert scanner.find("ushers") == {0, 1, 3}
+        assert scanner.find("this") == {2}
+        assert scanner.find("") == set()
+
+    def test_matches_substring_search(self):
+        rng = random.Random(3)
+        terms = [random_text(rng, "abc", rng.randint(1, 5)) for _ in range(60)]
+        scanner = TermScanner(terms)
+
+        for _ in range(300):
+            text = random_text(rng, "abcd ", rng.randint(0, 40))
+            assert scanner.find(text) == naive_terms(terms, text)
+
+    def test_multilingual_terms(self):
+        scanner = TermScanner(["mierda", "scheiße", "くそ"])
+
+        assert scanner.find("das ist scheiße und くそ") == {1, 2}
+
+
+class TestPatternScanner:
+    """Combined regex matching"""
+
+    def test_patterns_matching_at_the_same_position(self):
+        patterns = [r"CLICK here", r"\b[A-Z]{5,}\b", r"!{3,}"]
+        scanner = PatternScanner(patterns)
+
+        assert scanner.find("CLICK here!!!") == {0, 1, 2}
+        assert scanner.find("nothing to see") == set()
+
+    def test_patterns_only_matching_where_another_does(self):
+        # "a" only ever matches where "ab" is reported first
+        scanner = PatternScanner([r"ab", r"a", r"z"])
+
+        assert scanner.find("xxab") == {0, 1}
+        # The second pass only tried the patterns not found yet
+        assert set(scanner._combined) == {(0, 1, 2), (1, 2), (2,)}
+
+    def test_matches_individual_searches(self):
+        service = ContentModerationService(db=None)
+        patterns = list(service.spam_patterns)
+        scanner = PatternScanner(patterns, re.IGNORECASE)
+
+        for text in SAMPLE_TEXTS:
+            assert scanner.find(text) == naive_patterns(patterns, text, re.IGNORECASE)
+
+
+class TestModerationChecks:
+    """Moderation checks keep their results"""
+
+    def test_profanity(self):
+        service = ContentModerationService(db=None)
+
+        result = service._check_profanity("What a STUPID idiot, damn it to hell")
+
+        assert result == {
+            "found": True,
+            "words": ["damn", "hell", "stupid", "idiot"],
+            "severity": 0.6,
+            "count": 4,
+        }
+
+    def test_personal_information(self):
+        service = ContentModerationService(db=None)
+
+        result = service._check_personal_information(SAMPLE_TEXTS[3] + " 123-45-6789")
+
+        assert result == {
+            "found": True,
+            "items": ["email_address", "phone_number", "ssn"],
+            "severity": 1.0,
+        }
+
+    def test_spam_patterns(self):
+        service = ContentModerationService(db=None)
+
+        result = service._check_spam_patterns(SAMPLE_TEXTS[2])
+
+        assert result["is_spam"] is True
+        assert result["patterns"] == [
+            r"\b(buy now|click here|limited time|act fast)\b",
+            r"\b(free money|make money|work from home)\b",
+            r"www\.[a-zA-Z0-9-]+\.[a-z]{2,}",
+            r"\b[A-Z]{5,}\b",
+            r"[!]{3,}",
+        ]
+        assert result["severity"] == 0.8
+
+    def test_assigning_a_list_rebuilds_the_scanner(self):
+        service = ContentModerationService(db=None)
+        service.profanity_words = {**service.profanity_words, "awful": 0.5}
+
+        result = service._check_profanity("an awful meal")
+
+        assert result["words"] == ["awful"]
+        assert result["severity"] == 0.5
+
+
+class TestScannerBenchmark:
+    """Backlog of 100k reviews against thousands of terms"""
+
+    REVIEWS = 100_000
+    TERMS = 3000
+
+    @pytest.mark.slow
+    def test_bulk_scan(self):
+        rng = random.Random(11)
+        alphabet = "abcdefghijklmnopqrstuvwxyzäöüéñ"
+        terms = sorted(
+            {random_text(rng, alphabet, rng.randint(4, 9)) for _ in range(self.TERMS)}
+        )
+        words = [random_text(rng, alphabet, rng.randint(2, 8)) for _ in range(5000)]
+        reviews = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(10, 40)))
+            for _ in range(self.REVIEWS)
+        ]
+        scanner = TermScanner(terms)
+
+        start_time = time.perf_counter()
+        found = [scanner.find(review) for review in reviews]
+        scanner_elapsed = time.perf_counter() - start_time
+
+        # Substring search per term, as before, on a sample of the reviews
+        sample = reviews[:2000]
+        start_time = time.perf_counter()
+        expected = [naive_terms(terms, review) for review in sample]
+        naive_elapsed = (time.perf_counter() - start_time) * self.REVIEWS / len(sample)
+
+        assert found[: len(sample)] == expected
+        assert scanner_elapsed < naive_elapsed
+
+        print(
+            f"{self.REVIEWS} reviews x {len(terms)} terms: {scanner_elapsed:.2f}s "
+            f"scanned, ~{naive_elapsed:.2f}s with per-term substring search"
+        )
@@ -0,0 +1,207 @@
+# backend/modules/feedback/tests/test_sentiment_batch.py
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from modules.feedback.models.feedback_models import ReviewType, SentimentScore
+from modules.feedback.services import sentiment_service as sentiment_module
+from modules.feedback.services.sentiment_service import (
+    SentimentAnalysisService,
+    analyze_text_chunk,
+)
+
+VOCABULARY = [
+    "excellent",
+    "terrible",
+    "good",
+    "bad",
+    "not",
+    "never",
+    "no",
+    "very",
+    "the",
+    "food",
+    "was",
+    "service",
+    "poor",
+    "quality",
+    "highly",
+    "recommend",
+    "waste",
+    "of",
+    "money",
+]
+
+
+def random_texts(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(0, 30)))
+        for _ in range(count)
+    ]
+
+
+def comparable(results):
+    return [(r.score, r.confidence, r.raw_data) for r in results]
+
+
+@pytest.fixture
+def service():
+    return SentimentAnalysisService()
+
+
+@pytest.fixture
+def thread_executor():
+    # Threads keep the test independent of process start-up
+    executor = ThreadPoolExecutor(max_workers=2)
+    with patch.object(
+        sentiment_module, "get_sentiment_executor", return_value=executor
+    ):
+        yield executor
+    executor.shutdown()
+
+
+class TestSentimentLexicon:
+    """Compiled keyword lookups"""
+
+    def test_matches_word_by_word_lookup(self, service):
+        keywords = service.sentiment_keywords
+
+        for text in random_texts(300):
+            words = text.split()
+            expected = []
+            for i, word in enumerate(words):
+                negated = service._check_negation_context(words, i)
+                phrases = [word] + [
+                    f"{word} {next_word}" for next_word in words[i + 1 : i + 2]
+                ]
+                for phrase in phrases:
+                    if phrase in keywords:
+                        score = keywords[phrase]
+                        expected.append(-score if negated else score)
+
+            assert service.lexicon.match(words)[0] == expected
+
+    def test_bigrams_are_negated_by_preceding_words(self, service):
+        scores, matches = service.lexicon.match("never highly recommend".split())
+
+        assert matches[0]["phrase"] == "highly recommend"
+        assert matches[0]["negated"] is True
+        assert scores == [-1.8, -1.2]
+
+    def test_assigning_keywords_rebuilds_lexicon(self, service):
+        service.sentiment_keywords = {"tasty": 1.0, "too salty": -1.0}
+
+        scores, matches = service.lexicon.match("tasty but too salty".split())
+
+        assert scores == [1.0, -1.0]
+        assert [m.get("word") or m.get("phrase") for m in matches] == [
+            "tasty",
+            "too salty",
+        ]
+
+
+class TestBatchAnalysis:
+    """Batch analysis across the process pool"""
+
+    @pytest.mark.asyncio
+    async def test_pool_results_match_in_process_results(
+        self, service, thread_executor
+    ):
+        texts = random_texts(120)
+        items = [{"text": text, "context": {"rating": 4.0}} for text in texts]
+
+        with patch.multiple(
+            sentiment_module, SENTIMENT_POOL_MIN_BATCH=50, SENTIMENT_POOL_MAX_WORKERS=2
+        ):
+            results = await service.analyze_batch_async(items, batch_size=25)
+
+        expected = service.analyze_texts([(text, {"rating": 4.0}) for text in texts])
+        assert comparable(results) == comparable(expected)
+
+    @pytest.mark.asyncio
+    async def test_items_without_text_are_skipped(self, service):
+        results = await service.analyze_batch_async(
+            [{"text": "excellent"}, {"review_id": 3}]
+        )
+
+        assert len(results) == 1
+        assert results[0].score == SentimentScore.VERY_POSITIVE
+
+    def test_chunks_use_the_given_keywords(self):
+        results = analyze_text_chunk((("tasty", 2.0),), [("so tasty", {})])
+
+        assert results[0].raw_data["individual_results"][0]["matched_keywords"] == [
+            {"word": "tasty", "base_score": 2.0, "final_score": 2.0, "negated": False}
+        ]
+
+
+class TestStoredReviewAnalysis:
+    """Paged analysis of stored reviews"""
+
+    @pytest.mark.asyncio
+    async def test_each_page_is_written_with_one_bulk_update(self, service):
+        rows = [
+            SimpleNamespace(
+                id=review_id,
+                title=None,
+                content=text,
+                rating=3.0,
+                review_type=ReviewType.PRODUCT,
+                is_verified_purchase=False,
+            )
+            for review_id, text in enumerate(random_texts(5), start=1)
+        ]
+        db = Mock()
+
+        with patch.object(
+            service, "_review_pages", return_value=iter([rows[:3], rows[3:]])
+        ):
+            stats = await service.analyze_stored_reviews(db, page_size=3)
+
+        assert stats["processed"] == 5
+        assert stats["pages"] == 2
+        assert db.execute.call_count == 2
+        assert db.commit.call_count == 2
+
+        written = db.execute.call_args_list[0].args[1]
+        assert [mapping["id"] for mapping in written] == [1, 2, 3]
+        expected = service.analyze_review_sentiment(rows[0], force_reanalysis=True)
+        assert written[0]["sentiment_score"] == expected.score
+        assert written[0]["sentiment_analysis_data"] == expected.raw_data
+
+
+class TestBatchThroughput:
+    """Process pool throughput on a large batch"""
+
+    TEXTS = 20_000
+
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_pool_throughput(self, service):
+        items = [{"text": text, "context": {}} for text in random_texts(self.TEXTS)]
+
+        start_time = time.perf_counter()
+        expected = service.analyze_texts([(item["text"], {}) for item in items])
+        serial_rate = self.TEXTS / (time.perf_counter() - start_time)
+
+        # Warm up the pool so worker start-up is not counted
+        await service.analyze_batch_async(
+            items[: sentiment_module.SENTIMENT_POOL_MIN_BATCH]
+        )
+
+        start_time = time.perf_counter()
+        results = await service.analyze_batch_async(items)
+        pool_rate = self.TEXTS / (time.perf_counter() - start_time)
+
+        assert comparable(results) == comparable(expected)
+        print(
+            f"{self.TEXTS} texts: {serial_rate:.0f} texts/s in process, "
+            f"{pool_rate:.0f} texts/s across "
+            f"{sentiment_module.SENTIMENT_POOL_MAX_WORKERS} workers"
+        )
@@ -56,11 +56,13 @@ async def websocket_station_endpoint(
             "data": station_data,
         })
         
-        # Send current items
-        items = service.get_station_display_items(station_id)
+        # Send current items with the projection version they reflect
+        projection = service.get_station_projection(station_id)
         await websocket.send_json({
             "type": "items_init",
-            "data": items,
+            "epoch": projection.epoch if projection else None,
+            "version": projection.version if projection else 0,
+            "data": projection.display_items() if projection else [],
         })
         
         # Keep connection alive and handle incoming messages
@@ -122,12 +124,37 @@ async def websocket_station_endpoint(
                 
                 elif data.get("type") == "refresh":
                     # Resend current items
-                    items = service.get_station_display_items(station_id)
+                    projection = service.get_station_projection(station_id)
                     await websocket.send_json({
                         "type": "items_refresh",
-                        "data": items,
+                        "epoch": projection.epoch if projection else None,
+                        "version": projection.version if projection else 0,
+                        "data": projection.display_items() if projection else [],
                     })
                 
+                elif data.get("type") == "sync":
+                    # Send only what changed since the screen's last version
+                    changes = service.get_station_changes(
+                        station_id,
+                        int(data.get("since_version", 0)),
+                        epoch=data.get("epoch"),
+                    )
+                    if changes["full_refresh"]:
+                        await websocket.send_json({
+                            "type": "items_refresh",
+                            "epoch": changes["epoch"],
+                            "version": changes["version"],
+                            "data": changes["items"],
+                        })
+                    else:
+                        await websocket.send_json({
+                            "type": "items_delta",
+                            "station_id": station_id,
+                            "epoch": changes["epoch"],
+                            "version": changes["version"],
+                            "changes": changes["changes"],
+                        })
+                
             except asyncio.TimeoutError:
                 # Send heartbeat
                 await kds_websocket_manager.send_heartbeat(station_id)
@@ -237,6 +264,32 @@ async def get_station_display(
         raise HTTPException(status_code=500, detail=f"Error retrieving display: {str(e)}")
 
 
+@router.get("/station/{station_id}/changes")
+async def get_station_changes(
+    station_id: int,
+    since_version: int = Query(..., ge=0),
+    epoch: Optional[str] = Query(None),
+    limit: int = Query(50, le=100),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """Get display changes for a station since a projection version"""
+    
+    service = KDSRealtimeService(db)
+    
+    try:
+        return {
+            "success": True,
+            "data": service.get_station_changes(
+                station_id, since_version, limit, epoch=epoch
+            ),
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving changes: {str(e)}")
+
+
 @router.put("/items/{item_id}/status")
 async def update_item_status(
     item_id: int,
@@ -345,6 +398,7 @@ async def fire_course(
                 item.id,
                 {"fire_time": datetime.utcnow().isoformat(), "status": "fired"},
             )
+        await service.publish_projection_changes()
         
         return {
             "success": True,
@@ -22,6 +22,12 @@ from ..models.kds_models import (
     StationStatus,
 )
 from ..services.kds_websocket_manager import kds_websocket_manager
+from ..services.kds_station_projection import (
+    INACTIVE_STATUSES,
+    ProjectedItem,
+    StationProjection,
+    kds_projection_store,
+)
 from modules.orders.models.order_models import Order, OrderItem
 from modules.menu.models import MenuItem
 from modules.staff.models.staff_models import StaffMember
@@ -45,6 +51,9 @@ class KDSRealtimeService:
     def __init__(self, db: Session):
         self.db = db
         self.ws_manager = kds_websocket_manager
+        self.projections = kds_projection_store
+        # Projection changes not yet sent to station screens
+        self.pending_changes: List[Dict[str, Any]] = []
 
     async def process_new_order(self, order_id: int) -> List[KDSOrderItem]:
         """Process a new order and route items to stations"""
@@ -80,6 +89,8 @@ class KDSRealtimeService:
         # Send WebSocket notifications
         for kds_item in kds_items:
             await self._notify_new_item(kds_item)
+            self._project_item(kds_item, order)
+        await self.publish_projection_changes()
         
         logger.info(f"Processed order {order_id} with {len(kds_items)} KDS items")
         return kds_items
@@ -355,6 +366,8 @@ class KDSRealtimeService:
         
         # Send WebSocket update
         await self._notify_item_update(item)
+        self._project_item(item)
+        await self.publish_projection_changes()
         
         # Log status change
         logger.info(
@@ -414,75 +427,159 @@ class KDSRealtimeService:
     ) -> List[Dict[str, Any]]:
         """Get display items for a station"""
         
-        from sqlalchemy.orm import joinedload
+        if include_completed:
+            warning, critical, items = self._query_station_items(
+                station_id, include_completed=True, limit=limit
+            )
+            return [item.to_display(warning, critical) for item in items]
         
-        query = self.db.query(KDSOrderItem).options(
-            joinedload(KDSOrderItem.station)
-        ).filter(
-            KDSOrderItem.station_id == station_id
-        )
+        projection = self.get_station_projection(station_id)
+        return projection.display_items(limit) if projection else []
+
+    def get_station_projection(self, station_id: int) -> Optional[StationProjection]:
+        """Get a station's board projection, loading it on first use"""
+        
+        projection = self.projections.get(station_id)
+        if projection:
+            return projection
+        
+        station = self._query_station_items(station_id)
+        if station is None:
+            return None
+        
+        warning, critical, items = station
+        return self.projections.create(station_id, warning, critical, items)
+
+    def get_station_changes(
+        self,
+        station_id: int,
+        since_version: int,
+        limit: int = 50,
+        epoch: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get board changes after a version, or the full board if too far behind
+        
+        The version only counts with the epoch it was sent with; a version
+        from another worker or an older build of the projection gets the
+        full board.
+        """
+        
+        projection = self.get_station_projection(station_id)
+        if not projection:
+            raise ValueError(f"Station {station_id} not found")
+        
+        # Read the version first; replaying a change already shown is harmless
+        version = projection.version
+        changes = projection.changes_since(since_version, epoch)
+        if changes is None:
+            return {
+                "station_id": station_id,
+                "epoch": projection.epoch,
+                "version": version,
+                "full_refresh": True,
+                "items": projection.display_items(limit),
+            }
+        
+        return {
+            "station_id": station_id,
+            "epoch": projection.epoch,
+            "version": version,
+            "full_refresh": False,
+            "changes": changes,
+        }
+
+    def _query_station_items(
+        self,
+        station_id: int,
+        include_completed: bool = False,
+        limit: Optional[int] = None,
+    ) -> Optional[Tuple[Optional[int], Optional[int], List[ProjectedItem]]]:
+        """Load a station's thresholds and items with their orders in one query"""
         
+        item_filter = KDSOrderItem.station_id == KitchenStation.id
         if not include_completed:
-            query = query.filter(
-                KDSOrderItem.status.notin_([
-                    DisplayStatus.COMPLETED,
-                    DisplayStatus.CANCELLED,
-                ])
+            item_filter = and_(
+                item_filter, KDSOrderItem.status.notin_(INACTIVE_STATUSES)
             )
         
-        # Order by priority and received time
-        query = query.order_by(
-            KDSOrderItem.priority.desc(),
-            KDSOrderItem.received_at,
-        ).limit(limit)
+        # Orders have no separate number; the order id is shown instead
+        query = (
+            self.db.query(
+                KitchenStation.warning_time_minutes,
+                KitchenStation.critical_time_minutes,
+                KDSOrderItem,
+                Order.id,
+                Order.table_no,
+            )
+            .select_from(KitchenStation)
+            .outerjoin(KDSOrderItem, item_filter)
+            .outerjoin(OrderItem, OrderItem.id == KDSOrderItem.order_item_id)
+            .outerjoin(Order, Order.id == OrderItem.order_id)
+            .filter(KitchenStation.id == station_id)
+            .order_by(KDSOrderItem.priority.desc(), KDSOrderItem.received_at)
+        )
+        if limit is not None:
+            query = query.limit(limit)
         
-        items = query.all()
+        rows = query.all()
+        if not rows:
+            return None
         
-        display_items = []
-        for item in items:
-            # Get order information
-            order_item = self.db.query(OrderItem).filter_by(id=item.order_item_id).first()
-            order = None
-            if order_item:
-                order = self.db.query(Order).filter_by(id=order_item.order_id).first()
-            
-            # Calculate elapsed time
-            elapsed_time = (datetime.utcnow() - item.received_at).total_seconds()
-            
-            # Determine display status (color coding)
-            # Use the preloaded station relationship or fetch if not loaded
-            station = item.station if hasattr(item, 'station') and item.station else self.db.query(KitchenStation).filter_by(id=item.station_id).first()
-            display_status = "normal"
-            
-            if station:
-                if elapsed_time / 60 > station.critical_time_minutes:
-                    display_status = "critical"
-                elif elapsed_time / 60 > station.warning_time_minutes:
-                    display_status = "warning"
-            
-            display_item = {
-                "id": item.id,
-                "order_number": order.order_number if order else "N/A",
-                "table_number": order.table_number if order and hasattr(order, "table_number") else None,
-                "display_name": item.display_name,
-                "quantity": item.quantity,
-                "modifiers": item.modifiers,
-                "special_instructions": item.special_instructions,
-                "status": item.status.value,
-                "display_status": display_status,
-                "priority": item.priority,
-                "course_number": item.course_number,
-                "elapsed_time": int(elapsed_time),
-                "target_time": item.target_time.isoformat() if item.target_time else None,
-                "is_late": item.is_late,
-                "recall_count": item.recall_count,
-                "fire_time": item.fire_time.isoformat() if item.fire_time else None,
-                "can_start": not item.fire_time or datetime.utcnow() >= item.fire_time,
-            }
-            
-            display_items.append(display_item)
+        warning, critical = rows[0][0], rows[0][1]
+        items = [
+            ProjectedItem.from_item(
+                item, str(order_id) if order_id else None, table_number
+            )
+            for _, _, item, order_id, table_number in rows
+            if item is not None
+        ]
+        items.sort(key=lambda projected: projected.sort_key)
+        return warning, critical, items
+
+    def _project_item(self, item: KDSOrderItem, order: Optional[Order] = None):
+        """Apply an item change to its station's projection, if loaded"""
         
-        return display_items
+        projection = self.projections.get(item.station_id)
+        if not projection:
+            return
+        
+        existing = projection.get(item.id)
+        if existing:
+            order_number, table_number = existing.order_number, existing.table_number
+        elif item.status in INACTIVE_STATUSES:
+            return
+        else:
+            if order is None:
+                order = (
+                    self.db.query(Order)
+                    .join(OrderItem, OrderItem.order_id == Order.id)
+                    .filter(OrderItem.id == item.order_item_id)
+                    .first()
+                )
+            order_number = str(order.id) if order else None
+            table_number = order.table_no if order else None
+        
+        change = projection.apply(
+            ProjectedItem.from_item(item, order_number, table_number)
+        )
+        self.pending_changes.append(
+            {"station_id": item.station_id, "epoch": projection.epoch, **change}
+        )
+
+    async def publish_projection_changes(self):
+        """Send pending projection changes to station screens"""
+        
+        changes, self.pending_changes = self.pending_changes, []
+        by_station: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+        for change in changes:
+            change = dict(change)
+            key = (change.pop("station_id"), change.pop("epoch"))
+            by_station.setdefault(key, []).append(change)
+        
+        for (station_id, epoch), station_changes in by_station.items():
+            await self.ws_manager.broadcast_item_changes(
+                station_id, station_changes[-1]["version"], station_changes, epoch=epoch
+            )
 
     async def bump_item(self, item_id: int, staff_id: Optional[int] = None):
         """Mark item as ready and remove from active display"""
@@ -505,6 +602,8 @@ class KDSRealtimeService:
             item.id,
             {"status": "ready", "completed_at": item.completed_at.isoformat()},
         )
+        self._project_item(item)
+        await self.publish_projection_changes()
         
         # Auto-complete after delay
         asyncio.create_task(self._auto_complete_item(item.id))
@@ -520,6 +619,8 @@ class KDSRealtimeService:
             self.db.commit()
             
             await self.ws_manager.broadcast_item_removal(item.station_id, item.id)
+            self._project_item(item)
+            await self.publish_projection_changes()
 
     def get_station_summary(self, station_id: int) -> Dict[str, Any]:
         """Get summary information for a station"""
@@ -619,6 +720,10 @@ class KDSRealtimeService:
         
         self.db.commit()
         
+        # Sent by the caller through publish_projection_changes
+        for item in items:
+            self._project_item(item)
+        
         logger.info(f"Fired course {course_number} for order {order_id} ({len(items)} items)")
         
         return items
\ No newline at end of file
@@ -0,0 +1,288 @@
+# backend/modules/kds/services/kds_station_projection.py
+
+"""
+In-memory projection of each kitchen station's board.
+
+A station's active items are loaded once with a single joined query and then
+kept current by the KDS events that change them (new item, status change,
+bump, recall, fire course). Every change bumps the station's version and is
+kept in a short history, so a screen that knows version N can be sent only
+the changes after it. Versions only mean something within one build of a
+projection, so each build gets its own epoch that screens send back with the
+version.
+"""
+
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from collections import deque
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..models.kds_models import DisplayStatus, KDSOrderItem
+
+# Changes kept per station for screens catching up
+PROJECTION_HISTORY_SIZE = 500
+
+# Projections are reloaded at least this often to pick up changes made by
+# other workers
+PROJECTION_MAX_AGE_SECONDS = 30
+
+# Statuses no longer shown on the board
+INACTIVE_STATUSES = (DisplayStatus.COMPLETED, DisplayStatus.CANCELLED)
+
+
+@dataclass(frozen=True)
+class ProjectedItem:
+    """A board item with its order details denormalized"""
+
+    id: int
+    order_item_id: int
+    order_number: str
+    table_number: Optional[int]
+    display_name: str
+    quantity: int
+    modifiers: Any
+    special_instructions: Optional[str]
+    status: DisplayStatus
+    priority: int
+    course_number: int
+    received_at: datetime
+    target_time: Optional[datetime]
+    fire_time: Optional[datetime]
+    recall_count: int
+
+    @classmethod
+    def from_item(
+        cls,
+        item: KDSOrderItem,
+        order_number: Optional[str],
+        table_number: Optional[int],
+    ) -> "ProjectedItem":
+        return cls(
+            id=item.id,
+            order_item_id=item.order_item_id,
+            order_number=order_number or "N/A",
+            table_number=table_number,
+            display_name=item.display_name,
+            quantity=item.quantity,
+            modifiers=item.modifiers,
+            special_instructions=item.special_instructions,
+            status=item.status,
+            priority=item.priority or 0,
+            course_number=item.course_number,
+            received_at=item.received_at or datetime.utcnow(),
+            target_time=item.target_time,
+            fire_time=item.fire_time,
+            recall_count=item.recall_count or 0,
+        )
+
+    @property
+    def sort_key(self) -> Tuple:
+        # Highest priority first, then oldest
+        return (-self.priority, self.received_at, self.id)
+
+    def to_display(
+        self,
+        warning_minutes: Optional[int],
+        critical_minutes: Optional[int],
+        now: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
+        elapsed_time = (now - self.received_at).total_seconds()
+
+        display_status = "normal"
+        if critical_minutes is not None and elapsed_time / 60 > critical_minutes:
+            display_status = "critical"
+        elif warning_minutes is not None and elapsed_time / 60 > warning_minutes:
+            display_status = "warning"
+
+        return {
+            "id": self.id,
+            "order_number": self.order_number,
+            "table_number": self.table_number,
+            "display_name": self.display_name,
+            "quantity": self.quantity,
+            "modifiers": self.modifiers,
+            "special_instructions": self.special_instructions,
+            "status": self.status.value,
+            "display_status": display_status,
+            "priority": self.priority,
+            "course_number": self.course_number,
+            "elapsed_time": int(elapsed_time),
+            "target_time": self.target_time.isoformat() if self.target_time else None,
+            "is_late": bool(self.target_time and now > self.target_time),
+            "recall_count": self.recall_count,
+            "fire_time": self.fire_time.isoformat() if self.fire_time else None,
+            "can_start": not self.fire_time or now >= self.fire_time,
+        }
+
+
+class StationProjection:
+    """Active items of one station, sorted for display, with a change log"""
+
+    def __init__(
+        self,
+        station_id: int,
+        warning_minutes: Optional[int] = None,
+        critical_minutes: Optional[int] = None,
+        version: int = 0,
+        history_size: int = PROJECTION_HISTORY_SIZE,
+    ):
+        self.station_id = station_id
+        self.warning_minutes = warning_minutes
+        self.critical_minutes = critical_minutes
+        self.loaded_at = time.monotonic()
+        # Identifies this build; versions from another worker or an earlier
+        # build of the station are not comparable with ours
+        self.epoch = uuid.uuid4().hex
+        # Changes at or below this version are not in the history
+        self.base_version = version
+        self.version = version
+        self.items: Dict[int, ProjectedItem] = {}
+        self.order: List[Tuple] = []
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def load(self, items: List[ProjectedItem]):
+        """Cold start contents; not recorded as changes"""
+        with self._lock:
+            for item in items:
+                self._put(item)
+
+    def get(self, item_id: int) -> Optional[ProjectedItem]:
+        return self.items.get(item_id)
+
+    def apply(self, item: ProjectedItem) -> Dict[str, Any]:
+        """Add, update or drop an item by its status; returns the change"""
+        with self._lock:
+            if item.status in INACTIVE_STATUSES:
+                self._drop(item.id)
+                return self._record({"type": "remove", "item_id": item.id})
+
+            self._put(item)
+            return self._record(
+                {
+                    "type": "upsert",
+                    "item_id": item.id,
+                    "item": item.to_display(
+                        self.warning_minutes, self.critical_minutes
+                    ),
+                }
+            )
+
+    def update(self, item_id: int, **fields) -> Optional[Dict[str, Any]]:
+        """Change fields of a projected item; None if it is not on the board"""
+        item = self.items.get(item_id)
+        if item is None:
+            return None
+        return self.apply(replace(item, **fields))
+
+    def remove(self, item_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if item_id not in self.items:
+                return None
+            self._drop(item_id)
+            return self._record({"type": "remove", "item_id": item_id})
+
+    def display_items(
+        self, limit: int = 50, now: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        now = now or datetime.utcnow()
+        with self._lock:
+            keys = self.order[:limit]
+            return [
+                self.items[key[-1]].to_display(
+                    self.warning_minutes, self.critical_minutes, now
+                )
+                for key in keys
+            ]
+
+    def changes_since(
+        self, version: int, epoch: Optional[str]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Changes after a version; None when the screen must reload instead"""
+        with self._lock:
+            if epoch != self.epoch or version > self.version:
+                return None
+            oldest = self.history[0]["version"] if self.history else self.version + 1
+            if version < self.base_version or version + 1 < oldest:
+                return None
+            return [change for change in self.history if change["version"] > version]
+
+    def _put(self, item: ProjectedItem):
+        self._drop(item.id)
+        self.items[item.id] = item
+        insort(self.order, item.sort_key)
+
+    def _drop(self, item_id: int):
+        existing = self.items.pop(item_id, None)
+        if existing is not None:
+            index = bisect_left(self.order, existing.sort_key)
+            del self.order[index]
+
+    def _record(self, change: Dict[str, Any]) -> Dict[str, Any]:
+        self.version += 1
+        change["version"] = self.version
+        self.history.append(change)
+        return change
+
+
+class KDSProjectionStore:
+    """Per-worker station projections"""
+
+    def __init__(self, max_age_seconds: float = PROJECTION_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self.projections: Dict[int, StationProjection] = {}
+        # Versions stay increasing across reloads of a station
+        self.last_versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, station_id: int) -> Optional[StationProjection]:
+        """Current projection of a station, if loaded and fresh"""
+        projection = self.projections.get(station_id)
+        if (
+            projection is not None
+            and time.monotonic() - projection.loaded_at < self.max_age_seconds
+        ):
+            return projection
+        return None
+
+    def create(
+        self,
+        station_id: int,
+        warning_minutes: Optional[int],
+        critical_minutes: Optional[int],
+        items: List[ProjectedItem],
+    ) -> StationProjection:
+        with self._lock:
+            previous = self.projections.get(station_id)
+            version = max(
+                self.last_versions.get(station_id, 0),
+                previous.version if previous else 0,
+            )
+            # A reload is a new starting point that screens must refresh to
+            projection = StationProjection(
+                station_id, warning_minutes, critical_minutes, version=version + 1
+            )
+            projection.load(items)
+            self.projections[station_id] = projection
+            self.last_versions[station_id] = projection.version
+        return projection
+
+    def invalidate(self, station_id: Optional[int] = None):
+        """Reload one station, or every station, on next use"""
+        with self._lock:
+            stations = (
+                [station_id] if station_id is not None else list(self.projections)
+            )
+            for station in stations:
+                projection = self.projections.pop(station, None)
+                if projection is not None:
+                    self.last_versions[station] = projection.version
+
+
+# Global projection store
+kds_projection_store = KDSProjectionStore()
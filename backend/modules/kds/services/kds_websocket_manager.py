@@ -5,7 +5,7 @@ WebSocket manager for real-time KDS updates.
 """
 
 from fastapi import WebSocket
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 import json
 import asyncio
 import logging
@@ -118,6 +118,24 @@ class KDSWebSocketManager:
         }
         await self.broadcast_to_station(station_id, message)
 
+    async def broadcast_item_changes(
+        self,
+        station_id: int,
+        version: int,
+        changes: List[dict],
+        epoch: Optional[str] = None,
+    ):
+        """Broadcast board changes up to a version of the station projection"""
+        message = {
+            "type": "items_delta",
+            "station_id": station_id,
+            "epoch": epoch,
+            "version": version,
+            "changes": changes,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+        await self.broadcast_to_station(station_id, message)
+
     async def broadcast_station_update(self, station_id: int, data: dict):
         """Broadcast station update"""
         message = {
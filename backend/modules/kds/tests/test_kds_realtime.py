@@ -11,6 +11,7 @@ from unittest.mock import Mock, patch, AsyncMock, MagicMock
 from sqlalchemy.orm import Session
 
 from ..services.kds_realtime_service import KDSRealtimeService, CourseType
+from ..services.kds_station_projection import KDSProjectionStore
 from ..models.kds_models import (
     KDSOrderItem,
     KitchenStation,
@@ -38,6 +39,7 @@ def realtime_service(db_session):
     service = KDSRealtimeService(db_session)
     # Mock WebSocket manager
     service.ws_manager = AsyncMock()
+    service.projections = KDSProjectionStore()
     return service
 
 
@@ -451,10 +453,12 @@ class TestStationDisplay:
             item.fire_time = None
             items.append(item)
         
-        # Setup mocks
-        db_session.query(KDSOrderItem).filter().order_by().limit().all.return_value = items
-        db_session.query(OrderItem).filter_by().first.return_value = None
-        db_session.query(KitchenStation).filter_by().first.return_value = sample_stations[0]
+        # Setup mocks: one joined row per item, orders not found
+        station = sample_stations[0]
+        db_session.query().select_from().outerjoin().outerjoin().outerjoin().filter().order_by().all.return_value = [
+            (station.warning_time_minutes, station.critical_time_minutes, item, None, None)
+            for item in items
+        ]
         
         # Get display items
         display_items = realtime_service.get_station_display_items(1)
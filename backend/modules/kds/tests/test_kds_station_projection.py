@@ -0,0 +1,276 @@
+# backend/modules/kds/tests/test_kds_station_projection.py
+
+"""
+Tests for the in-memory station board projection
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+from sqlalchemy.orm import Session
+
+from ..models.kds_models import DisplayStatus, KDSOrderItem
+from ..services.kds_realtime_service import KDSRealtimeService
+from ..services.kds_station_projection import (
+    KDSProjectionStore,
+    ProjectedItem,
+    StationProjection,
+)
+
+BASE_TIME = datetime.utcnow()
+
+
+def make_item(item_id, priority=0, minutes_ago=0, station_id=1, **fields):
+    item = Mock(spec=KDSOrderItem)
+    item.id = item_id
+    item.order_item_id = 100 + item_id
+    item.station_id = station_id
+    item.display_name = f"Item {item_id}"
+    item.quantity = 1
+    item.modifiers = []
+    item.special_instructions = None
+    item.status = DisplayStatus.PENDING
+    item.priority = priority
+    item.course_number = 1
+    item.received_at = BASE_TIME - timedelta(minutes=minutes_ago)
+    item.target_time = None
+    item.fire_time = None
+    item.recall_count = 0
+    for name, value in fields.items():
+        setattr(item, name, value)
+    return item
+
+
+def project(item, order_number="7", table_number=4):
+    return ProjectedItem.from_item(item, order_number, table_number)
+
+
+class TestStationProjection:
+    """Board ordering and versioned changes"""
+
+    def test_items_sorted_by_priority_then_age(self):
+        projection = StationProjection(1, warning_minutes=5, critical_minutes=10)
+        projection.load(
+            [
+                project(make_item(1, priority=0, minutes_ago=12)),
+                project(make_item(2, priority=10, minutes_ago=1)),
+                project(make_item(3, priority=0, minutes_ago=6)),
+            ]
+        )
+
+        items = projection.display_items()
+        assert [item["id"] for item in items] == [2, 1, 3]
+        assert [item["display_status"] for item in items] == [
+            "normal",
+            "critical",
+            "warning",
+        ]
+        assert items[0]["order_number"] == "7"
+        assert items[0]["table_number"] == 4
+        assert projection.version == 0
+
+    def test_changes_move_and_remove_items(self):
+        projection = StationProjection(1)
+        projection.load([project(make_item(1)), project(make_item(2, minutes_ago=5))])
+
+        projection.update(1, priority=20)
+        projection.update(2, status=DisplayStatus.IN_PROGRESS)
+        projection.update(1, status=DisplayStatus.COMPLETED)
+
+        assert projection.version == 3
+        assert [item["id"] for item in projection.display_items()] == [2]
+        assert projection.display_items()[0]["status"] == "in_progress"
+        assert projection.update(99, priority=1) is None
+        assert projection.remove(1) is None
+
+    def test_changes_since_version(self):
+        projection = StationProjection(1)
+        projection.apply(project(make_item(1)))
+        projection.apply(project(make_item(2)))
+        projection.remove(1)
+
+        epoch = projection.epoch
+        changes = projection.changes_since(1, epoch)
+        assert [change["version"] for change in changes] == [2, 3]
+        assert changes[0]["type"] == "upsert"
+        assert changes[0]["item"]["id"] == 2
+        assert changes[1] == {"type": "remove", "item_id": 1, "version": 3}
+        assert projection.changes_since(3, epoch) == []
+        # Versions from the future cannot be caught up
+        assert projection.changes_since(4, epoch) is None
+
+    def test_versions_from_another_build_must_reload(self):
+        projection = StationProjection(1)
+        other = StationProjection(1)
+        projection.apply(project(make_item(1)))
+        other.apply(project(make_item(2)))
+
+        assert projection.epoch != other.epoch
+        # Same version number, different build
+        assert projection.changes_since(0, other.epoch) is None
+        assert projection.changes_since(0, None) is None
+        assert len(projection.changes_since(0, projection.epoch)) == 1
+
+    def test_screens_too_far_behind_must_reload(self):
+        projection = StationProjection(1, history_size=3)
+        for item_id in range(1, 6):
+            projection.apply(project(make_item(item_id)))
+
+        assert projection.changes_since(1, projection.epoch) is None
+        assert len(projection.changes_since(2, projection.epoch)) == 3
+
+
+class TestKDSProjectionStore:
+    """Projection lifetime"""
+
+    def test_versions_increase_across_reloads(self):
+        store = KDSProjectionStore()
+        projection = store.create(1, 5, 10, [])
+        projection.apply(project(make_item(1)))
+        store.invalidate(1)
+
+        assert store.get(1) is None
+        reloaded = store.create(1, 5, 10, [])
+        assert reloaded.version > projection.version
+        # Screens at the old version reload rather than miss changes
+        assert reloaded.changes_since(projection.version, projection.epoch) is None
+
+    def test_projections_expire(self):
+        store = KDSProjectionStore(max_age_seconds=0)
+        store.create(1, 5, 10, [])
+
+        assert store.get(1) is None
+
+
+class TestRealtimeServiceProjection:
+    """KDS events keep loaded projections current"""
+
+    @pytest.fixture
+    def db_session(self):
+        return Mock(spec=Session)
+
+    @pytest.fixture
+    def service(self, db_session):
+        service = KDSRealtimeService(db_session)
+        service.ws_manager = AsyncMock()
+        service.projections = KDSProjectionStore()
+        return service
+
+    @staticmethod
+    def rows(items, order_id=7, table_no=4):
+        return [(5, 10, item, order_id, table_no) for item in items]
+
+    def joined_query(self, db_session):
+        return (
+            db_session.query()
+            .select_from()
+            .outerjoin()
+            .outerjoin()
+            .outerjoin()
+            .filter()
+            .order_by()
+        )
+
+    def test_cold_start_runs_one_joined_query(self, service, db_session):
+        query = self.joined_query(db_session)
+        query.all.return_value = self.rows([make_item(1), make_item(2, priority=5)])
+
+        first = service.get_station_display_items(1)
+        second = service.get_station_display_items(1)
+
+        assert query.all.call_count == 1
+        assert first == second
+        assert [item["id"] for item in first] == [2, 1]
+        assert first[0]["order_number"] == "7"
+        assert first[0]["table_number"] == 4
+
+    def test_unknown_station_has_no_projection(self, service, db_session):
+        self.joined_query(db_session).all.return_value = []
+
+        assert service.get_station_display_items(99) == []
+        with pytest.raises(ValueError):
+            service.get_station_changes(99, 0)
+
+    @pytest.mark.asyncio
+    async def test_status_changes_are_sent_as_deltas(self, service, db_session):
+        item = make_item(1)
+        self.joined_query(db_session).all.return_value = self.rows([item])
+        projection = service.get_station_projection(1)
+        version = projection.version
+
+        db_session.query(KDSOrderItem).filter_by().first.return_value = item
+        with patch.object(service, "_check_order_completion"):
+            await service.update_item_status(1, DisplayStatus.IN_PROGRESS)
+            await service.update_item_status(1, DisplayStatus.COMPLETED)
+
+        broadcast = service.ws_manager.broadcast_item_changes
+        assert broadcast.call_count == 2
+        station_id, sent_version, changes = broadcast.call_args_list[0].args
+        assert (station_id, sent_version) == (1, version + 1)
+        assert changes[0]["item"]["status"] == "in_progress"
+        # Order details carried over without another lookup
+        assert changes[0]["item"]["order_number"] == "7"
+        assert broadcast.call_args_list[1].args[2][0]["type"] == "remove"
+
+        assert broadcast.call_args_list[0].kwargs["epoch"] == projection.epoch
+
+        result = service.get_station_changes(1, version, epoch=projection.epoch)
+        assert result["full_refresh"] is False
+        assert result["epoch"] == projection.epoch
+        assert [change["version"] for change in result["changes"]] == [
+            version + 1,
+            version + 2,
+        ]
+        assert service.get_station_display_items(1) == []
+
+    def test_versions_from_another_worker_get_the_full_board(self, service, db_session):
+        self.joined_query(db_session).all.return_value = self.rows([make_item(1)])
+        projection = service.get_station_projection(1)
+        projection.update(1, priority=5)
+
+        # Another worker built its own projection, with versions overlapping ours
+        other = KDSRealtimeService(db_session)
+        other.projections = KDSProjectionStore()
+        rebuilt = other.get_station_projection(1)
+        rebuilt.update(1, priority=6)
+        rebuilt.update(1, priority=7)
+        assert rebuilt.base_version <= projection.version < rebuilt.version
+
+        result = other.get_station_changes(
+            1, projection.version, epoch=projection.epoch
+        )
+        assert result["full_refresh"] is True
+        assert result["epoch"] == rebuilt.epoch
+        assert result["items"][0]["priority"] == 7
+
+        result = other.get_station_changes(1, projection.version, epoch=rebuilt.epoch)
+        assert result["full_refresh"] is False
+        assert len(result["changes"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_cold_stations_are_left_alone(self, service, db_session):
+        item = make_item(1, station_id=3)
+        db_session.query(KDSOrderItem).filter_by().first.return_value = item
+
+        await service.update_item_status(1, DisplayStatus.IN_PROGRESS)
+
+        assert service.projections.get(3) is None
+        service.ws_manager.broadcast_item_changes.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_fired_course_is_published(self, service, db_session):
+        items = [make_item(1, course_number=2), make_item(2, course_number=2)]
+        self.joined_query(db_session).all.return_value = self.rows(items)
+        service.get_station_projection(1)
+        db_session.query(KDSOrderItem).join().filter().all.return_value = items
+
+        service.fire_course(7, 2)
+        await service.publish_projection_changes()
+
+        station_id, version, changes = (
+            service.ws_manager.broadcast_item_changes.call_args.args
+        )
+        assert version == service.get_station_projection(1).version
+        assert len(changes) == 2
+        assert all(change["item"]["can_start"] for change in changes)
+        assert service.pending_changes == []
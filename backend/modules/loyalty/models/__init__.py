@@ -10,6 +10,8 @@ from .rewards_models import (
     RewardCampaign,
     RewardRedemption,
     LoyaltyPointsTransaction,
+    CustomerPointsBalance,
+    PointsExpiryBucket,
     RewardAnalytics,
 )
 
@@ -23,5 +25,7 @@ __all__ = [
     "RewardCampaign",
     "RewardRedemption",
     "LoyaltyPointsTransaction",
+    "CustomerPointsBalance",
+    "PointsExpiryBucket",
     "RewardAnalytics",
-]
\ No newline at end of file
+]
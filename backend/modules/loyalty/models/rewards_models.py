@@ -5,6 +5,7 @@ from sqlalchemy import (
     Integer,
     String,
     ForeignKey,
+    Date,
     DateTime,
     Float,
     Text,
@@ -207,6 +208,7 @@ class CustomerReward(Base, TimestampMixin):
         Index("ix_customer_rewards_v2_customer_status", "customer_id", "status"),
         Index("ix_customer_rewards_v2_validity", "valid_from", "valid_until"),
         Index("ix_customer_rewards_v2_expiry", "valid_until", "status"),
+        Index("ix_customer_rewards_v2_template_customer", "template_id", "customer_id"),
     )
 
     @property
@@ -267,6 +269,11 @@ class RewardCampaign(Base, TimestampMixin):
     rewards_distributed = Column(Integer, default=0)
     target_audience_size = Column(Integer, nullable=True)
 
+    # Automated run progress; the cursor is the last customer id handled by
+    # an unfinished run, so a crashed run resumes after it
+    run_cursor = Column(Integer, nullable=True)
+    last_run_at = Column(DateTime, nullable=True)
+
     # Relationships
     template = relationship("RewardTemplate")
 
@@ -371,6 +378,43 @@ class LoyaltyPointsTransaction(Base, TimestampMixin):
         return f"<LoyaltyPointsTransaction(id={self.id}, customer_id={self.customer_id}, points={self.points_change})>"
 
 
+class CustomerPointsBalance(Base):
+    """Running points totals per customer, maintained with every transaction"""
+
+    __tablename__ = "customer_points_balances"
+
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
+
+    # Sum of non-expired transactions, including points past their expiry
+    # date that the nightly expiry job has not processed yet
+    points_balance = Column(Integer, nullable=False, default=0)
+    lifetime_earned = Column(Integer, nullable=False, default=0)
+    lifetime_spent = Column(Integer, nullable=False, default=0)
+    lifetime_expired = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f"<CustomerPointsBalance(customer_id={self.customer_id}, balance={self.points_balance})>"
+
+
+class PointsExpiryBucket(Base):
+    """Points of a customer that expire on the same date"""
+
+    __tablename__ = "loyalty_points_expiry_buckets"
+
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
+    expires_on = Column(Date, primary_key=True)
+    points = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_loyalty_points_expiry_buckets_date", "expires_on"),)
+
+    def __repr__(self):
+        return f"<PointsExpiryBucket(customer_id={self.customer_id}, expires_on={self.expires_on}, points={self.points})>"
+
+
 class RewardAnalytics(Base, TimestampMixin):
     """Aggregated analytics for reward performance"""
 
@@ -17,6 +17,7 @@ from modules.auth.models import User
 from modules.auth.permissions import Permission, check_permission
 
 from ..services.loyalty_service import LoyaltyService
+from ..services.points_balance_service import PointsBalanceService
 from ..schemas.loyalty_schemas import (
     # Loyalty Program
     LoyaltyProgramCreate,
@@ -240,6 +241,30 @@ async def transfer_points(
     }
 
 
+@router.post("/points/reconcile", response_model=Dict[str, Any])
+@handle_api_errors
+async def reconcile_points_balances(
+    customer_ids: Optional[List[int]] = Body(None, embed=True),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Rebuild materialized points balances from the transaction ledger.
+
+    Checks the given customers, or every customer when none are given,
+    and corrects any balance or expiry bucket that has drifted.
+
+    Returns:
+        Number of customers checked and corrected
+
+    Raises:
+        403: Insufficient permissions
+    """
+    check_permission(current_user, Permission.LOYALTY_ADMIN)
+
+    return PointsBalanceService(db).rebuild_balances(customer_ids)
+
+
 # ========== Reward Templates ==========
 
 
@@ -0,0 +1,225 @@
+# backend/modules/loyalty/services/campaign_runner.py
+
+"""
+Set-based runner for automated reward campaigns.
+
+Eligible customers who are still below the campaign's per-customer limit
+are selected in one statement, paged by customer id, and rewarded with a
+bulk insert per chunk. Each chunk locks the campaign row, so the total limit
+holds across concurrent runs, and commits the customer id it reached, so an
+interrupted run resumes where it stopped.
+"""
+
+import logging
+import secrets
+import string
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Set
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models.rewards_models import (
+    CustomerReward,
+    RewardCampaign,
+    RewardTemplate,
+)
+from modules.customers.models.customer_models import Customer, CustomerTier
+
+logger = logging.getLogger(__name__)
+
+# Customers rewarded per bulk insert and commit
+CAMPAIGN_CHUNK_SIZE = 1000
+
+# Reward codes match the ones issued one at a time by the rewards engine
+REWARD_CODE_ALPHABET = string.ascii_uppercase + string.digits
+REWARD_CODE_LENGTH = 8
+
+
+class CampaignRunner:
+    """Distributes automated campaign rewards in bulk"""
+
+    def __init__(self, db: Session, chunk_size: int = CAMPAIGN_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def run(self, campaign_id: int) -> int:
+        """Issue the campaign's rewards to every eligible customer"""
+        distributed = 0
+        while True:
+            issued = self._run_chunk(campaign_id)
+            if issued is None:
+                break
+            distributed += issued
+
+        logger.info(f"Campaign {campaign_id} distributed {distributed} rewards")
+        return distributed
+
+    def _run_chunk(self, campaign_id: int) -> Optional[int]:
+        """Reward the next chunk of customers; None once the run is complete"""
+        now = datetime.utcnow()
+
+        # Locked until the chunk commits: serializes runs of the campaign
+        campaign = (
+            self.db.query(RewardCampaign)
+            .filter(RewardCampaign.id == campaign_id)
+            .with_for_update()
+            .one()
+        )
+        template = (
+            self.db.query(RewardTemplate)
+            .filter(RewardTemplate.id == campaign.template_id)
+            .first()
+        )
+        if not template or not template.is_active:
+            raise ValueError(f"Active reward template {campaign.template_id} not found")
+
+        limit = self.chunk_size
+        if campaign.max_rewards_total:
+            limit = min(
+                limit, campaign.max_rewards_total - (campaign.rewards_distributed or 0)
+            )
+
+        customer_ids = []
+        if limit > 0:
+            customer_ids = self._eligible_customer_ids(
+                campaign, template, after=campaign.run_cursor or 0, limit=limit
+            )
+
+        if not customer_ids:
+            campaign.run_cursor = None
+            campaign.last_run_at = now
+            self.db.commit()
+            return None
+
+        valid_until = now + timedelta(days=template.valid_days)
+        if template.valid_until_date and template.valid_until_date < valid_until:
+            valid_until = template.valid_until_date
+
+        codes = self._generate_codes(len(customer_ids))
+        self.db.execute(
+            insert(CustomerReward),
+            [
+                {
+                    "customer_id": customer_id,
+                    "template_id": template.id,
+                    "reward_type": template.reward_type,
+                    "title": template.title,
+                    "description": template.description,
+                    "value": template.value,
+                    "percentage": template.percentage,
+                    "points_cost": template.points_cost,
+                    "code": code,
+                    "valid_from": now,
+                    "valid_until": valid_until,
+                    "trigger_data": {"campaign_id": campaign.id},
+                }
+                for customer_id, code in zip(customer_ids, codes)
+            ],
+        )
+
+        self.db.execute(
+            update(RewardTemplate)
+            .where(RewardTemplate.id == template.id)
+            .values(total_issued=RewardTemplate.total_issued + len(customer_ids))
+        )
+        campaign.rewards_distributed = (campaign.rewards_distributed or 0) + len(
+            customer_ids
+        )
+        campaign.run_cursor = customer_ids[-1]
+        self.db.commit()
+
+        return len(customer_ids)
+
+    def _eligible_customer_ids(
+        self,
+        campaign: RewardCampaign,
+        template: RewardTemplate,
+        after: int,
+        limit: int,
+    ) -> List[int]:
+        """Next customers after ``after`` who may receive the campaign reward"""
+        query = self.db.query(Customer.id).filter(
+            Customer.deleted_at.is_(None), Customer.id > after
+        )
+
+        tiers = _tier_values(campaign.target_tiers)
+        if tiers is not None:
+            query = query.filter(Customer.tier.in_(tiers))
+        tiers = _tier_values(template.eligible_tiers)
+        if tiers is not None:
+            query = query.filter(Customer.tier.in_(tiers))
+
+        criteria = campaign.target_criteria or {}
+        if "min_total_spent" in criteria:
+            query = query.filter(Customer.total_spent >= criteria["min_total_spent"])
+        if "min_total_orders" in criteria:
+            query = query.filter(Customer.total_orders >= criteria["min_total_orders"])
+        if "inactive_days" in criteria:
+            cutoff_date = datetime.utcnow() - timedelta(days=criteria["inactive_days"])
+            query = query.filter(
+                or_(
+                    Customer.last_order_date.is_(None),
+                    Customer.last_order_date <= cutoff_date,
+                )
+            )
+
+        # Rewards already held, counted per candidate through the
+        # (template_id, customer_id) index
+        if campaign.max_rewards_per_customer:
+            query = query.filter(
+                _reward_count(
+                    template.id, CustomerReward.created_at >= campaign.start_date
+                )
+                < campaign.max_rewards_per_customer
+            )
+        if template.max_uses_per_customer:
+            query = query.filter(
+                _reward_count(template.id) < template.max_uses_per_customer
+            )
+
+        return [
+            customer_id for (customer_id,) in query.order_by(Customer.id).limit(limit)
+        ]
+
+    def _generate_codes(self, count: int) -> List[str]:
+        """Unique reward codes, checked against existing rewards in bulk"""
+        codes: Set[str] = set()
+        while len(codes) < count:
+            candidates = {_random_code() for _ in range(count - len(codes))} - codes
+            taken = {
+                code
+                for (code,) in self.db.query(CustomerReward.code).filter(
+                    CustomerReward.code.in_(candidates)
+                )
+            }
+            codes |= candidates - taken
+        return list(codes)
+
+
+def _tier_values(tiers: Optional[List[str]]) -> Optional[List[CustomerTier]]:
+    if not tiers:
+        return None
+    names = {tier.lower() for tier in tiers}
+    return [tier for tier in CustomerTier if tier.value in names]
+
+
+def _reward_count(template_id: int, *conditions) -> Any:
+    return (
+        select(func.count(CustomerReward.id))
+        .where(
+            and_(
+                CustomerReward.customer_id == Customer.id,
+                CustomerReward.template_id == template_id,
+                *conditions,
+            )
+        )
+        .correlate(Customer)
+        .scalar_subquery()
+    )
+
+
+def _random_code() -> str:
+    return "".join(
+        secrets.choice(REWARD_CODE_ALPHABET) for _ in range(REWARD_CODE_LENGTH)
+    )
@@ -27,10 +27,12 @@ from ..models.rewards_models import (
     RewardCampaign,
     RewardRedemption,
     LoyaltyPointsTransaction,
+    CustomerPointsBalance,
     RewardType,
     RewardStatus,
     TriggerType,
 )
+from .points_balance_service import PointsBalanceService
 from ..schemas.loyalty_schemas import (
     CustomerLoyaltyCreate,
     CustomerLoyaltyUpdate,
@@ -59,6 +61,7 @@ class LoyaltyService:
 
     def __init__(self, db: Session):
         self.db = db
+        self.balances = PointsBalanceService(db)
         self.default_points_per_dollar = 1.0
         self.default_points_expiry_days = 365
 
@@ -96,7 +99,8 @@ class LoyaltyService:
             raise NotFoundError("Customer", customer_id)
 
         # Get points balance and history
-        points_balance = self._get_customer_points_balance(customer_id)
+        points_summary = self.balances.get_summary(customer_id, expiring_days=30)
+        points_balance = points_summary.points_balance
         points_history = self._get_points_history(customer_id, days=90)
 
         # Get rewards statistics
@@ -105,14 +109,11 @@ class LoyaltyService:
         # Calculate tier and benefits
         tier_info = self._calculate_customer_tier(customer_id, points_balance)
 
-        # Get expiring points
-        expiring_points = self._get_expiring_points(customer_id, days=30)
-
         return CustomerLoyaltyStats(
             customer_id=customer_id,
             points_balance=points_balance,
-            lifetime_points_earned=self._get_lifetime_points_earned(customer_id),
-            lifetime_points_spent=self._get_lifetime_points_spent(customer_id),
+            lifetime_points_earned=points_summary.lifetime_earned,
+            lifetime_points_spent=points_summary.lifetime_spent,
             current_tier=tier_info["current_tier"],
             tier_benefits=tier_info["benefits"],
             points_history=points_history,
@@ -122,13 +123,31 @@ class LoyaltyService:
             visit_frequency=self._get_visit_frequency(customer_id),
             member_since=customer.created_at.date(),
             days_until_tier_upgrade=tier_info.get("days_until_upgrade"),
-            points_expiring_30_days=expiring_points,
+            points_expiring_30_days=points_summary.expiring_points,
         )
 
     def add_points(
         self, transaction_data: PointsTransactionCreate, staff_id: Optional[int] = None
     ) -> LoyaltyPointsTransaction:
         """Add points to customer account"""
+        transaction = self._record_points(transaction_data, staff_id)
+        self.db.commit()
+        self.db.refresh(transaction)
+
+        # Check for tier upgrade
+        self._check_tier_upgrade(
+            transaction_data.customer_id, transaction.points_balance_after
+        )
+
+        return transaction
+
+    def _record_points(
+        self,
+        transaction_data: PointsTransactionCreate,
+        staff_id: Optional[int] = None,
+        balance: Optional[CustomerPointsBalance] = None,
+    ) -> LoyaltyPointsTransaction:
+        """Write a ledger entry and update the materialized balance, uncommitted"""
         # Validate customer
         customer = (
             self.db.query(Customer)
@@ -139,10 +158,9 @@ class LoyaltyService:
         if not customer:
             raise NotFoundError("Customer", transaction_data.customer_id)
 
-        # Get current balance
-        current_balance = self._get_customer_points_balance(
-            transaction_data.customer_id
-        )
+        # Lock the balance so concurrent writers for the customer serialize
+        balance = balance or self.balances.lock(transaction_data.customer_id)
+        current_balance = self.balances.available_points(balance)
 
         # Validate transaction
         if (
@@ -179,12 +197,8 @@ class LoyaltyService:
             expires_at=transaction_data.expires_at,
         )
 
+        self.balances.apply(transaction, balance)
         self.db.add(transaction)
-        self.db.commit()
-        self.db.refresh(transaction)
-
-        # Check for tier upgrade
-        self._check_tier_upgrade(transaction_data.customer_id, new_balance)
 
         return transaction
 
@@ -232,8 +246,18 @@ class LoyaltyService:
         if not to_customer:
             raise NotFoundError("To customer", transfer.to_customer_id)
 
+        # Lock both balances in id order so opposite transfers cannot deadlock
+        balances = {
+            customer_id: self.balances.lock(customer_id)
+            for customer_id in sorted(
+                {transfer.from_customer_id, transfer.to_customer_id}
+            )
+        }
+
         # Check balance
-        from_balance = self._get_customer_points_balance(transfer.from_customer_id)
+        from_balance = self.balances.available_points(
+            balances[transfer.from_customer_id]
+        )
         if from_balance < transfer.points:
             raise APIValidationError(
                 "Insufficient points for transfer",
@@ -248,7 +272,10 @@ class LoyaltyService:
             reason=f"{transfer.reason} - to customer {transfer.to_customer_id}",
             source="transfer",
         )
-        debit_transaction = self.add_points(debit_data, staff_id)
+        debit_transaction = self._record_points(
+            debit_data, staff_id, balances[transfer.from_customer_id]
+        )
+        self.db.flush()
 
         # Create credit transaction
         credit_data = PointsTransactionCreate(
@@ -259,7 +286,18 @@ class LoyaltyService:
             source="transfer",
             reference_id=str(debit_transaction.id),
         )
-        credit_transaction = self.add_points(credit_data, staff_id)
+        credit_transaction = self._record_points(
+            credit_data, staff_id, balances[transfer.to_customer_id]
+        )
+
+        # Both sides of the transfer commit together
+        self.db.commit()
+        self.db.refresh(debit_transaction)
+        self.db.refresh(credit_transaction)
+
+        self._check_tier_upgrade(
+            transfer.to_customer_id, credit_transaction.points_balance_after
+        )
 
         return debit_transaction, credit_transaction
 
@@ -474,7 +512,8 @@ class LoyaltyService:
                 reward_id=reward.id,
                 source="reward_redemption",
             )
-            self.add_points(points_transaction)
+            # Committed together with the reward below
+            self._record_points(points_transaction)
 
         self.db.commit()
         self.db.refresh(reward)
@@ -798,46 +837,15 @@ class LoyaltyService:
 
     def _get_customer_points_balance(self, customer_id: int) -> int:
         """Get current points balance for customer"""
-        result = (
-            self.db.query(func.sum(LoyaltyPointsTransaction.points_change))
-            .filter(
-                LoyaltyPointsTransaction.customer_id == customer_id,
-                or_(
-                    LoyaltyPointsTransaction.expires_at == None,
-                    LoyaltyPointsTransaction.expires_at > datetime.utcnow(),
-                ),
-                LoyaltyPointsTransaction.is_expired == False,
-            )
-            .scalar()
-        )
-
-        return result or 0
+        return self.balances.get_balance(customer_id)
 
     def _get_lifetime_points_earned(self, customer_id: int) -> int:
         """Get total points earned by customer"""
-        result = (
-            self.db.query(func.sum(LoyaltyPointsTransaction.points_change))
-            .filter(
-                LoyaltyPointsTransaction.customer_id == customer_id,
-                LoyaltyPointsTransaction.points_change > 0,
-            )
-            .scalar()
-        )
-
-        return result or 0
+        return self.balances.get_summary(customer_id, expiring_days=0).lifetime_earned
 
     def _get_lifetime_points_spent(self, customer_id: int) -> int:
         """Get total points spent by customer"""
-        result = (
-            self.db.query(func.sum(func.abs(LoyaltyPointsTransaction.points_change)))
-            .filter(
-                LoyaltyPointsTransaction.customer_id == customer_id,
-                LoyaltyPointsTransaction.points_change < 0,
-            )
-            .scalar()
-        )
-
-        return result or 0
+        return self.balances.get_summary(customer_id, expiring_days=0).lifetime_spent
 
     def _get_points_history(
         self, customer_id: int, days: int = 90
@@ -1030,22 +1038,9 @@ class LoyaltyService:
 
     def _get_expiring_points(self, customer_id: int, days: int = 30) -> int:
         """Get points expiring within specified days"""
-        expiry_date = datetime.utcnow() + timedelta(days=days)
-
-        result = (
-            self.db.query(func.sum(LoyaltyPointsTransaction.points_change))
-            .filter(
-                LoyaltyPointsTransaction.customer_id == customer_id,
-                LoyaltyPointsTransaction.points_change > 0,
-                LoyaltyPointsTransaction.expires_at != None,
-                LoyaltyPointsTransaction.expires_at <= expiry_date,
-                LoyaltyPointsTransaction.expires_at > datetime.utcnow(),
-                LoyaltyPointsTransaction.is_expired == False,
-            )
-            .scalar()
-        )
-
-        return result or 0
+        return self.balances.get_summary(
+            customer_id, expiring_days=days
+        ).expiring_points
 
     def _get_average_order_value(self, customer_id: int) -> float:
         """Get customer's average order value"""
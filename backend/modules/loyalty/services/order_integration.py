@@ -5,6 +5,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 import logging
 
+from .points_balance_service import PointsBalanceService
 from .rewards_engine import RewardsEngine
 from modules.orders.models.order_models import Order
 from modules.customers.models.customer_models import Customer
@@ -19,6 +20,7 @@ class OrderLoyaltyIntegration:
     def __init__(self, db: Session):
         self.db = db
         self.rewards_engine = RewardsEngine(db)
+        self.balances = PointsBalanceService(db)
 
     def process_order_completion(self, order_id: int) -> Dict[str, Any]:
         """Process loyalty rewards and points when an order is completed"""
@@ -225,7 +227,10 @@ class OrderLoyaltyIntegration:
                     reason=f"Order #{order_id} cancelled - points reversed",
                     order_id=order_id,
                     source="system",
+                    # Reverse out of the same expiry bucket as the original award
+                    expires_at=transaction.expires_at,
                 )
+                self.balances.apply(reversal)
                 self.db.add(reversal)
 
                 # Update customer balance
@@ -326,7 +331,12 @@ class OrderLoyaltyIntegration:
                     reason=f"Partial refund for order #{order_id} - ${refund_amount:.2f}",
                     order_id=order_id,
                     source="system",
+                    expires_at=min(
+                        (t.expires_at for t in order_transactions if t.expires_at),
+                        default=None,
+                    ),
                 )
+                self.balances.apply(adjustment)
                 self.db.add(adjustment)
 
                 # Update customer balance
@@ -0,0 +1,403 @@
+# backend/modules/loyalty/services/points_balance_service.py
+
+"""
+Materialized loyalty points balances.
+
+Every points transaction updates the customer's running totals and the
+bucket for its expiry date in the same database transaction, so balance
+lookups read a single row instead of summing the customer's ledger. Points
+stay usable through their expiry date; a nightly job then expires overdue
+buckets in bulk. ``rebuild_balances`` recomputes everything from the ledger.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Date, bindparam, case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.rewards_models import (
+    CustomerPointsBalance,
+    LoyaltyPointsTransaction,
+    PointsExpiryBucket,
+)
+
+logger = logging.getLogger(__name__)
+
+# Customers recomputed per batch when rebuilding balances from the ledger
+REBUILD_BATCH_SIZE = 1000
+
+TOTAL_FIELDS = (
+    "points_balance",
+    "lifetime_earned",
+    "lifetime_spent",
+    "lifetime_expired",
+)
+
+
+@dataclass
+class PointsSummary:
+    """Points figures shown for a customer"""
+
+    points_balance: int
+    lifetime_earned: int
+    lifetime_spent: int
+    expiring_points: int
+
+
+def overdue_balances_lock(today: date):
+    """
+    Lock the balances of customers with buckets dated before ``today``.
+
+    Rows are locked in customer id order, the same order transfers use, so
+    the expiry job cannot deadlock against other writers.
+    """
+    overdue_customers = select(PointsExpiryBucket.customer_id).where(
+        PointsExpiryBucket.expires_on < today
+    )
+    return (
+        select(CustomerPointsBalance.customer_id)
+        .where(CustomerPointsBalance.customer_id.in_(overdue_customers))
+        .order_by(CustomerPointsBalance.customer_id)
+        .with_for_update()
+    )
+
+
+def overdue_bucket_totals(today: date):
+    """Points per customer in buckets dated before ``today``"""
+    return (
+        select(PointsExpiryBucket.customer_id, func.sum(PointsExpiryBucket.points))
+        .where(PointsExpiryBucket.expires_on < today)
+        .group_by(PointsExpiryBucket.customer_id)
+    )
+
+
+class PointsBalanceService:
+    """Maintains per-customer points totals and expiry buckets"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_summary(
+        self,
+        customer_id: int,
+        expiring_days: int = 30,
+        today: Optional[date] = None,
+    ) -> PointsSummary:
+        """Current balance, lifetime totals and points expiring soon"""
+        today = today or datetime.utcnow().date()
+        record = self._get_record(customer_id)
+        buckets = (
+            self.db.query(PointsExpiryBucket.expires_on, PointsExpiryBucket.points)
+            .filter(
+                PointsExpiryBucket.customer_id == customer_id,
+                PointsExpiryBucket.expires_on <= today + timedelta(days=expiring_days),
+            )
+            .all()
+        )
+
+        # Overdue buckets count as expired even before the nightly job runs
+        overdue = sum(points for expires_on, points in buckets if expires_on < today)
+        expiring = sum(
+            points
+            for expires_on, points in buckets
+            if expires_on >= today and points > 0
+        )
+        return PointsSummary(
+            points_balance=record.points_balance - overdue,
+            lifetime_earned=record.lifetime_earned,
+            lifetime_spent=record.lifetime_spent,
+            expiring_points=expiring,
+        )
+
+    def get_balance(self, customer_id: int) -> int:
+        """Points the customer can spend now"""
+        return self.get_summary(customer_id, expiring_days=0).points_balance
+
+    def lock(self, customer_id: int) -> CustomerPointsBalance:
+        """
+        Lock the customer's balance row for the rest of the transaction.
+
+        All writers lock the balance before touching the customer's buckets,
+        so concurrent transactions for one customer are serialized.
+        """
+        return self._get_record(customer_id, lock=True)
+
+    def available_points(
+        self, record: CustomerPointsBalance, today: Optional[date] = None
+    ) -> int:
+        """Spendable points of a balance record, net of overdue buckets"""
+        today = today or datetime.utcnow().date()
+        overdue = (
+            self.db.query(func.sum(PointsExpiryBucket.points))
+            .filter(
+                PointsExpiryBucket.customer_id == record.customer_id,
+                PointsExpiryBucket.expires_on < today,
+            )
+            .scalar()
+        )
+        return record.points_balance - (overdue or 0)
+
+    def apply(
+        self,
+        transaction: LoyaltyPointsTransaction,
+        record: Optional[CustomerPointsBalance] = None,
+    ) -> CustomerPointsBalance:
+        """
+        Fold a new ledger entry into the customer's totals and expiry bucket.
+
+        Call this before adding the transaction to the session, so a balance
+        created from the ledger on first use does not count it twice.
+        """
+        record = record or self.lock(transaction.customer_id)
+        change = transaction.points_change
+
+        record.points_balance += change
+        if change > 0:
+            record.lifetime_earned += change
+        else:
+            record.lifetime_spent -= change
+
+        if transaction.expires_at is not None:
+            expires_on = transaction.expires_at.date()
+            bucket = (
+                self.db.query(PointsExpiryBucket)
+                .filter(
+                    PointsExpiryBucket.customer_id == transaction.customer_id,
+                    PointsExpiryBucket.expires_on == expires_on,
+                )
+                .first()
+            )
+            if bucket is None:
+                bucket = PointsExpiryBucket(
+                    customer_id=transaction.customer_id,
+                    expires_on=expires_on,
+                    points=0,
+                )
+                self.db.add(bucket)
+            bucket.points += change
+
+        return record
+
+    # ========== Expiry ==========
+
+    def expire_points(self, today: Optional[date] = None) -> Dict[str, int]:
+        """
+        Expire every bucket dated before ``today``.
+
+        Balances are reduced with one batched update, the matching ledger
+        entries are flagged in one statement and the buckets are deleted.
+        """
+        today = today or datetime.utcnow().date()
+
+        # Like every other writer, lock the balances before their buckets
+        self.db.execute(overdue_balances_lock(today)).all()
+        overdue = self.db.execute(overdue_bucket_totals(today)).all()
+
+        balances = CustomerPointsBalance.__table__
+        if overdue:
+            self.db.execute(
+                update(balances)
+                .where(balances.c.customer_id == bindparam("b_customer_id"))
+                .values(
+                    points_balance=balances.c.points_balance - bindparam("b_points"),
+                    lifetime_expired=balances.c.lifetime_expired
+                    + bindparam("b_points"),
+                    updated_at=datetime.utcnow(),
+                ),
+                [
+                    {"b_customer_id": customer_id, "b_points": points}
+                    for customer_id, points in overdue
+                ],
+            )
+
+        transactions_expired = (
+            self.db.query(LoyaltyPointsTransaction)
+            .filter(
+                LoyaltyPointsTransaction.expires_at < datetime.combine(today, time.min),
+                LoyaltyPointsTransaction.is_expired == False,
+            )
+            .update({"is_expired": True}, synchronize_session=False)
+        )
+        buckets_removed = (
+            self.db.query(PointsExpiryBucket)
+            .filter(PointsExpiryBucket.expires_on < today)
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+
+        result = {
+            "customers": len(overdue),
+            "points_expired": sum(points for _, points in overdue),
+            "transactions_expired": transactions_expired,
+            "buckets_removed": buckets_removed,
+        }
+        logger.info(f"Expired loyalty points: {result}")
+        return result
+
+    # ========== Reconciliation ==========
+
+    def rebuild_balances(
+        self,
+        customer_ids: Optional[Iterable[int]] = None,
+        batch_size: int = REBUILD_BATCH_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Recompute balances and buckets from the ledger and fix any drift.
+
+        Covers the given customers, or every customer with a ledger entry or
+        a balance record. Each batch is committed on its own.
+        """
+        if customer_ids is None:
+            ledger_ids = self.db.query(LoyaltyPointsTransaction.customer_id).distinct()
+            record_ids = self.db.query(CustomerPointsBalance.customer_id)
+            customer_ids = {row[0] for row in ledger_ids} | {
+                row[0] for row in record_ids
+            }
+        customer_ids = sorted(set(customer_ids))
+
+        checked = corrected = 0
+        for start in range(0, len(customer_ids), batch_size):
+            batch = customer_ids[start : start + batch_size]
+            corrected += self._rebuild_batch(batch)
+            checked += len(batch)
+            self.db.commit()
+
+        logger.info(
+            f"Rebuilt loyalty balances: {checked} checked, {corrected} corrected"
+        )
+        return {"customers_checked": checked, "customers_corrected": corrected}
+
+    def _rebuild_batch(self, customer_ids: List[int]) -> int:
+        totals = self._ledger_totals(customer_ids)
+        expected_buckets = self._ledger_buckets(customer_ids)
+
+        records = {
+            record.customer_id: record
+            for record in self.db.query(CustomerPointsBalance)
+            .filter(CustomerPointsBalance.customer_id.in_(customer_ids))
+            .with_for_update()
+        }
+        stored_buckets: Dict[int, Dict[date, int]] = defaultdict(dict)
+        for bucket in self.db.query(PointsExpiryBucket).filter(
+            PointsExpiryBucket.customer_id.in_(customer_ids)
+        ):
+            stored_buckets[bucket.customer_id][bucket.expires_on] = bucket.points
+
+        corrected = 0
+        for customer_id in customer_ids:
+            expected = totals.get(customer_id, dict.fromkeys(TOTAL_FIELDS, 0))
+            record = records.get(customer_id)
+            drifted = False
+
+            if record is None:
+                self.db.add(CustomerPointsBalance(customer_id=customer_id, **expected))
+                drifted = True
+            elif any(getattr(record, field) != expected[field] for field in expected):
+                logger.warning(
+                    f"Loyalty balance drift for customer {customer_id}: "
+                    f"stored {[getattr(record, field) for field in TOTAL_FIELDS]}, "
+                    f"ledger {[expected[field] for field in TOTAL_FIELDS]}"
+                )
+                for field, value in expected.items():
+                    setattr(record, field, value)
+                drifted = True
+
+            buckets = expected_buckets.get(customer_id, {})
+            if stored_buckets.get(customer_id, {}) != buckets:
+                self.db.query(PointsExpiryBucket).filter(
+                    PointsExpiryBucket.customer_id == customer_id
+                ).delete(synchronize_session=False)
+                self.db.add_all(
+                    PointsExpiryBucket(
+                        customer_id=customer_id, expires_on=expires_on, points=points
+                    )
+                    for expires_on, points in buckets.items()
+                )
+                drifted = True
+
+            corrected += drifted
+        return corrected
+
+    # ========== Helpers ==========
+
+    def _get_record(
+        self, customer_id: int, lock: bool = False
+    ) -> CustomerPointsBalance:
+        query = self.db.query(CustomerPointsBalance).filter(
+            CustomerPointsBalance.customer_id == customer_id
+        )
+        if lock:
+            query = query.with_for_update()
+        record = query.first()
+        if record is None:
+            record = self._create_from_ledger(customer_id)
+            if record is None:
+                # Created concurrently by another transaction
+                record = query.one()
+        return record
+
+    def _create_from_ledger(self, customer_id: int) -> Optional[CustomerPointsBalance]:
+        """Materialize a customer's balance the first time it is needed"""
+        totals = self._ledger_totals([customer_id]).get(
+            customer_id, dict.fromkeys(TOTAL_FIELDS, 0)
+        )
+        buckets = self._ledger_buckets([customer_id]).get(customer_id, {})
+
+        record = CustomerPointsBalance(customer_id=customer_id, **totals)
+        try:
+            with self.db.begin_nested():
+                self.db.add(record)
+                self.db.add_all(
+                    PointsExpiryBucket(
+                        customer_id=customer_id, expires_on=expires_on, points=points
+                    )
+                    for expires_on, points in buckets.items()
+                )
+        except IntegrityError:
+            return None
+        return record
+
+    def _ledger_totals(self, customer_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        transactions = LoyaltyPointsTransaction
+        change = transactions.points_change
+        rows = self.db.execute(
+            select(
+                transactions.customer_id,
+                func.sum(case((transactions.is_expired == False, change), else_=0)),
+                func.sum(case((change > 0, change), else_=0)),
+                func.sum(case((change < 0, -change), else_=0)),
+                func.sum(case((transactions.is_expired == True, change), else_=0)),
+            )
+            .where(transactions.customer_id.in_(customer_ids))
+            .group_by(transactions.customer_id)
+        )
+        return {
+            customer_id: dict(zip(TOTAL_FIELDS, (int(value or 0) for value in values)))
+            for customer_id, *values in rows
+        }
+
+    def _ledger_buckets(self, customer_ids: List[int]) -> Dict[int, Dict[date, int]]:
+        transactions = LoyaltyPointsTransaction
+        expires_on = func.date(transactions.expires_at, type_=Date)
+        rows = self.db.execute(
+            select(
+                transactions.customer_id,
+                expires_on,
+                func.sum(transactions.points_change),
+            )
+            .where(
+                transactions.customer_id.in_(customer_ids),
+                transactions.expires_at != None,
+                transactions.is_expired == False,
+            )
+            .group_by(transactions.customer_id, expires_on)
+        )
+        buckets: Dict[int, Dict[date, int]] = defaultdict(dict)
+        for customer_id, day, points in rows:
+            buckets[customer_id][day] = int(points)
+        return buckets
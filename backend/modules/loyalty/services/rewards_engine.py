@@ -1,7 +1,7 @@
 # backend/modules/loyalty/services/rewards_engine.py
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, func, desc
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import secrets
@@ -19,7 +19,9 @@ from ..models.rewards_models import (
     RewardStatus,
     TriggerType,
 )
-from modules.customers.models.customer_models import Customer, CustomerTier
+from .campaign_runner import CampaignRunner
+from .points_balance_service import PointsBalanceService
+from modules.customers.models.customer_models import Customer
 from modules.orders.models.order_models import Order
 from modules.customers.models.loyalty_config import LoyaltyService
 
@@ -33,6 +35,7 @@ class RewardsEngine:
     def __init__(self, db: Session):
         self.db = db
         self.loyalty_service = LoyaltyService(db)
+        self.balances = PointsBalanceService(db)
 
     def process_order_completion(self, order_id: int) -> Dict[str, Any]:
         """Process rewards and points when an order is completed"""
@@ -307,58 +310,20 @@ class RewardsEngine:
 
         results = {"campaigns_processed": 0, "rewards_distributed": 0, "errors": []}
 
+        runner = CampaignRunner(self.db)
         for campaign in campaigns:
+            # Read before the runner commits, which expires the instance
+            campaign_id, campaign_name = campaign.id, campaign.name
             try:
-                # Find eligible customers
-                eligible_customers = self._find_campaign_eligible_customers(campaign)
-
-                rewards_distributed = 0
-                for customer in eligible_customers:
-                    # Check if customer already received reward from this campaign
-                    existing_rewards = (
-                        self.db.query(CustomerReward)
-                        .filter(
-                            and_(
-                                CustomerReward.customer_id == customer.id,
-                                CustomerReward.template_id == campaign.template_id,
-                                CustomerReward.created_at >= campaign.start_date,
-                            )
-                        )
-                        .count()
-                    )
-
-                    if existing_rewards < campaign.max_rewards_per_customer:
-                        try:
-                            self.issue_reward_to_customer(
-                                customer.id,
-                                campaign.template_id,
-                                custom_data={"campaign_id": campaign.id},
-                            )
-                            rewards_distributed += 1
-
-                            if (
-                                campaign.max_rewards_total
-                                and campaign.rewards_distributed + rewards_distributed
-                                >= campaign.max_rewards_total
-                            ):
-                                break
-
-                        except Exception as e:
-                            logger.warning(
-                                f"Failed to issue campaign reward to customer {customer.id}: {str(e)}"
-                            )
-
-                # Update campaign statistics
-                campaign.rewards_distributed += rewards_distributed
-                results["rewards_distributed"] += rewards_distributed
+                results["rewards_distributed"] += runner.run(campaign_id)
                 results["campaigns_processed"] += 1
 
             except Exception as e:
-                error_msg = f"Error processing campaign {campaign.name}: {str(e)}"
+                self.db.rollback()
+                error_msg = f"Error processing campaign {campaign_name}: {str(e)}"
                 logger.error(error_msg)
                 results["errors"].append(error_msg)
 
-        self.db.commit()
         return results
 
     def get_reward_analytics(
@@ -452,6 +417,7 @@ class RewardsEngine:
             order_id=order_id,
             expires_at=datetime.utcnow() + timedelta(days=expires_in_days),
         )
+        self.balances.apply(transaction)
         self.db.add(transaction)
 
         # Check tier upgrade
@@ -484,6 +450,7 @@ class RewardsEngine:
             reason=reason,
             reward_id=reward_id,
         )
+        self.balances.apply(transaction)
         self.db.add(transaction)
 
     def _process_trigger_rewards(
@@ -752,45 +719,3 @@ class RewardsEngine:
         discount_amount = min(discount_amount, order_total)
 
         return {"valid": True, "discount_amount": discount_amount}
-
-    def _find_campaign_eligible_customers(
-        self, campaign: RewardCampaign
-    ) -> List[Customer]:
-        """Find customers eligible for a campaign"""
-        query = self.db.query(Customer).filter(Customer.deleted_at.is_(None))
-
-        # Apply tier filters
-        if campaign.target_tiers:
-            tier_values = [
-                getattr(CustomerTier, tier.upper())
-                for tier in campaign.target_tiers
-                if hasattr(CustomerTier, tier.upper())
-            ]
-            query = query.filter(Customer.tier.in_(tier_values))
-
-        # Apply other targeting criteria
-        if campaign.target_criteria:
-            criteria = campaign.target_criteria
-
-            if "min_total_spent" in criteria:
-                query = query.filter(
-                    Customer.total_spent >= criteria["min_total_spent"]
-                )
-
-            if "min_total_orders" in criteria:
-                query = query.filter(
-                    Customer.total_orders >= criteria["min_total_orders"]
-                )
-
-            if "inactive_days" in criteria:
-                cutoff_date = datetime.utcnow() - timedelta(
-                    days=criteria["inactive_days"]
-                )
-                query = query.filter(
-                    or_(
-                        Customer.last_order_date.is_(None),
-                        Customer.last_order_date <= cutoff_date,
-                    )
-                )
-
-        return query.limit(1000).all()  # Limit to prevent excessive processing
@@ -381,7 +381,9 @@ class PriorityAdjustmentLog(Base):
 
     # Who made the change
     adjusted_by_id = Column(Integer, ForeignKey("staff_members.id"))
-    adjusted_at = Column(DateTime(timezone=True), server_default=func.now())
+    adjusted_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
 
     # Additional fields from main branch
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
@@ -12,8 +12,8 @@ from ..enums.payment_enums import (
 class PaymentReconciliationBase(BaseModel):
     order_id: int
     external_payment_reference: str = Field(..., min_length=1, max_length=255)
-    amount_expected: Decimal = Field(..., gt=0)
-    amount_received: Decimal = Field(..., gt=0)
+    amount_expected: Decimal = Field(..., ge=0)
+    amount_received: Decimal = Field(..., ge=0)
     reconciliation_status: ReconciliationStatus
 
 
@@ -50,6 +50,9 @@ class ReconciliationRequest(BaseModel):
     order_ids: Optional[List[int]] = None
     external_payment_references: Optional[List[str]] = None
     amount_threshold: Optional[Decimal] = Field(default=Decimal("0.01"), gt=0)
+    from_date: Optional[datetime] = None
+    to_date: Optional[datetime] = None
+    batch_size: int = Field(default=500, gt=0, le=5000)
 
 
 class ReconciliationResponse(BaseModel):
@@ -0,0 +1,149 @@
+"""
+Indexed one-to-one matching of orders to POS payments.
+
+Payments are indexed by the order reference they carry and by (amount bucket,
+time window), so each order is scored only against payments that could reach
+the match threshold. Candidate pairs are then assigned best score first, and a
+payment claimed by one order is never offered to another.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Width of an amount bucket; a match without the order reference needs the
+# exact amount, so only the order's own bucket is searched
+AMOUNT_BUCKET_SIZE = 1.0
+
+# Width of a time window in seconds; a match without the order reference needs
+# the payment within this long of the order, so neighbouring windows are searched
+TIME_WINDOW_SECONDS = 3600
+
+# Payments further than this from an order score no time points
+MAX_TIME_DIFF_SECONDS = 7200
+
+# Minimum score for a payment to be matched to an order
+MATCH_THRESHOLD = 0.5
+
+
+@dataclass(frozen=True)
+class OrderCandidate:
+    """The fields of an order that matching needs"""
+
+    id: int
+    created_at: Optional[datetime]
+    total: float
+
+
+def calculate_match_score(
+    order: Any, payment: Dict[str, Any], order_total: float
+) -> float:
+    """Calculate matching score between order and payment."""
+    score = 0.0
+
+    if payment.get("order_reference") == str(order.id):
+        score += 0.5
+
+    amount_diff = abs(payment.get("amount", 0) - order_total)
+    if amount_diff == 0:
+        score += 0.3
+    elif amount_diff <= 1.0:
+        score += 0.2
+    elif amount_diff <= 5.0:
+        score += 0.1
+
+    payment_time = payment.get("timestamp")
+    if payment_time and getattr(order, "created_at", None):
+        time_diff = abs((payment_time - order.created_at).total_seconds())
+        if time_diff <= 3600:
+            score += 0.2
+        elif time_diff <= 7200:
+            score += 0.1
+
+    return score
+
+
+def amount_bucket(amount: float) -> int:
+    return int(amount // AMOUNT_BUCKET_SIZE)
+
+
+def time_window(timestamp: datetime) -> int:
+    return int(timestamp.timestamp() // TIME_WINDOW_SECONDS)
+
+
+class PaymentIndex:
+    """POS payments indexed for candidate lookup, with claimed payments removed"""
+
+    def __init__(self):
+        self.payments: Dict[str, Dict[str, Any]] = {}
+        self.by_reference: Dict[str, List[str]] = {}
+        self.by_bucket: Dict[Tuple[int, int], List[str]] = {}
+        self.claimed: Set[str] = set()
+
+    def add(self, payments: Iterable[Dict[str, Any]]) -> int:
+        """Index payments not seen before; returns how many were added"""
+        added = 0
+        for payment in payments:
+            reference = payment["reference"]
+            if reference in self.payments:
+                continue
+            self.payments[reference] = payment
+            added += 1
+
+            order_reference = payment.get("order_reference")
+            if order_reference is not None:
+                self.by_reference.setdefault(str(order_reference), []).append(reference)
+
+            timestamp = payment.get("timestamp")
+            if timestamp is not None:
+                key = (amount_bucket(payment.get("amount", 0)), time_window(timestamp))
+                self.by_bucket.setdefault(key, []).append(reference)
+        return added
+
+    def claim(self, reference: str):
+        self.claimed.add(reference)
+
+    def candidates(self, order: OrderCandidate) -> Set[str]:
+        """References of unclaimed payments that could match the order"""
+        references = set(self.by_reference.get(str(order.id), ()))
+
+        # Without the order reference a match needs full amount and time points
+        if order.created_at is not None:
+            bucket = amount_bucket(order.total)
+            window = time_window(order.created_at)
+            for time_key in (window - 1, window, window + 1):
+                references.update(self.by_bucket.get((bucket, time_key), ()))
+
+        return references - self.claimed
+
+
+def assign_payments(
+    orders: Iterable[OrderCandidate],
+    index: PaymentIndex,
+    threshold: float = MATCH_THRESHOLD,
+) -> Dict[int, Tuple[Dict[str, Any], float]]:
+    """Match each order to at most one payment, and each payment to one order
+
+    Pairs are assigned highest score first; ties go to the closer amount and
+    then the lower order id so runs are repeatable. Matched payments are claimed
+    in the index so later batches cannot reuse them.
+    """
+    pairs = []
+    for order in orders:
+        for reference in index.candidates(order):
+            payment = index.payments[reference]
+            score = calculate_match_score(order, payment, order.total)
+            if score >= threshold:
+                amount_diff = abs(payment.get("amount", 0) - order.total)
+                pairs.append((-score, amount_diff, order.id, reference))
+
+    pairs.sort()
+
+    matches = {}
+    for negative_score, _, order_id, reference in pairs:
+        if order_id in matches or reference in index.claimed:
+            continue
+        index.claim(reference)
+        matches[order_id] = (index.payments[reference], -negative_score)
+
+    return matches
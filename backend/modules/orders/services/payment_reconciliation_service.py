@@ -2,11 +2,11 @@ import logging
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from fastapi import HTTPException
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
 from decimal import Decimal
 from ..models.payment_reconciliation_models import PaymentReconciliation
-from ..models.order_models import Order
+from ..models.order_models import Order, OrderItem
 from ..schemas.payment_reconciliation_schemas import (
     PaymentReconciliationCreate,
     PaymentReconciliationUpdate,
@@ -18,9 +18,19 @@ from ..schemas.payment_reconciliation_schemas import (
 )
 from ..enums.payment_enums import ReconciliationStatus, DiscrepancyType
 from ...pos.interfaces.payment_provider import MockPOSProvider
+from .payment_matcher import (
+    MAX_TIME_DIFF_SECONDS,
+    OrderCandidate,
+    PaymentIndex,
+    assign_payments,
+    calculate_match_score,
+)
 
 logger = logging.getLogger(__name__)
 
+# Order statuses that are never reconciled
+UNRECONCILABLE_STATUSES = ("CANCELLED", "REFUNDED")
+
 
 async def create_payment_reconciliation(
     db: Session,
@@ -178,68 +188,149 @@ async def get_payment_reconciliations(
 async def perform_payment_reconciliation(
     db: Session, request: ReconciliationRequest
 ) -> ReconciliationResponse:
-    matched_count = 0
-    discrepancy_count = 0
-    reconciliations = []
+    """Match orders to POS payments one-to-one and record the outcome in bulk.
 
-    orders_query = db.query(Order)
-    if request.order_ids:
-        orders_query = orders_query.filter(Order.id.in_(request.order_ids))
+    Orders are walked in id order in pages of ``request.batch_size``, limited to
+    ``request.order_ids`` and the ``from_date``/``to_date`` window when given.
 
-    orders = orders_query.all()
+    Cancelled and refunded orders are left out of the run instead of failing
+    it, as ``create_payment_reconciliation`` would for a single order. A
+    matched payment differing from the order total by more than
+    ``request.amount_threshold`` is recorded as an amount mismatch.
+    """
+    matched_count = 0
+    discrepancy_count = 0
+    rows = []
+
+    amount_threshold = request.amount_threshold or Decimal("0.01")
+    index = PaymentIndex()
+    padding = timedelta(seconds=MAX_TIME_DIFF_SECONDS)
+    date_range = None
+    if request.from_date or request.to_date:
+        date_range = (
+            request.from_date - padding if request.from_date else None,
+            request.to_date + padding if request.to_date else None,
+        )
 
-    pos_payments = await _get_pos_payments(db, orders)
+    last_order_id = 0
+    while True:
+        batch = _get_order_batch(db, request, last_order_id)
+        if not batch:
+            break
+        last_order_id = batch[-1].id
 
-    for order in orders:
-        order_total = sum(
-            float(item.price) * item.quantity for item in order.order_items
+        payments = await _get_pos_payments(
+            db, [order.id for order in batch], date_range
         )
+        if request.external_payment_references:
+            wanted = set(request.external_payment_references)
+            payments = [p for p in payments if p["reference"] in wanted]
+
+        # Payments already reconciled by an earlier run are not offered again
+        references = [payment["reference"] for payment in payments]
+        for (reference,) in (
+            db.query(PaymentReconciliation.external_payment_reference)
+            .filter(PaymentReconciliation.external_payment_reference.in_(references))
+            .all()
+        ):
+            index.claim(reference)
+        index.add(payments)
+
+        matches = assign_payments(batch, index)
+        now = datetime.utcnow()
+        batch_rows = []
+
+        for order in batch:
+            amount_expected = Decimal(str(order.total)).quantize(Decimal("0.01"))
+            row = PaymentReconciliation(
+                order_id=order.id,
+                amount_expected=amount_expected,
+                created_at=now,
+                updated_at=now,
+            )
 
-        best_match = None
-        best_score = 0.0
-
-        for payment in pos_payments:
-            score = calculate_match_score(order, payment, order_total)
-            if score > best_score and score >= 0.5:
-                best_score = score
-                best_match = payment
+            if order.id in matches:
+                payment, _ = matches[order.id]
+                amount_received = Decimal(str(payment["amount"]))
+                row.external_payment_reference = payment["reference"]
+                row.amount_received = amount_received
+                amount_diff = abs(amount_expected - amount_received)
+                if amount_diff > amount_threshold:
+                    row.reconciliation_status = ReconciliationStatus.DISCREPANCY.value
+                    row.discrepancy_type = DiscrepancyType.AMOUNT_MISMATCH.value
+                    row.discrepancy_details = f"Amount difference: ${amount_diff}"
+                    discrepancy_count += 1
+                else:
+                    row.reconciliation_status = ReconciliationStatus.MATCHED.value
+                    matched_count += 1
+            else:
+                row.external_payment_reference = f"MISSING_{order.id}_{now.timestamp()}"
+                row.amount_received = Decimal("0")
+                row.reconciliation_status = ReconciliationStatus.DISCREPANCY.value
+                row.discrepancy_type = DiscrepancyType.MISSING_PAYMENT.value
+                row.discrepancy_details = (
+                    f"No matching payment found for order {order.id}"
+                )
+                discrepancy_count += 1
 
-        matching_payment = best_match
+            batch_rows.append(row)
 
-        if matching_payment:
-            reconciliation_data = PaymentReconciliationCreate(
-                order_id=order.id,
-                external_payment_reference=matching_payment["reference"],
-                amount_expected=Decimal(str(order_total)),
-                amount_received=Decimal(str(matching_payment["amount"])),
-                reconciliation_status=ReconciliationStatus.MATCHED,
-            )
-            matched_count += 1
-        else:
-            timestamp = datetime.utcnow().timestamp()
-            ref = f"MISSING_{order.id}_{timestamp}"
-            reconciliation_data = PaymentReconciliationCreate(
-                order_id=order.id,
-                external_payment_reference=ref,
-                amount_expected=Decimal(str(order_total)),
-                amount_received=Decimal("0"),
-                reconciliation_status=ReconciliationStatus.DISCREPANCY,
-                discrepancy_type=DiscrepancyType.MISSING_PAYMENT,
-                discrepancy_details=f"No matching payment found for "
-                f"order {order.id}",
-            )
-            discrepancy_count += 1
+        db.add_all(batch_rows)
+        db.flush()
+        rows.extend(batch_rows)
 
-        reconciliation = await create_payment_reconciliation(db, reconciliation_data)
-        reconciliations.append(reconciliation)
+    db.commit()
+    logger.info(
+        f"Reconciled {len(rows)} orders: {matched_count} matched, "
+        f"{discrepancy_count} discrepancies"
+    )
 
     return ReconciliationResponse(
-        total_processed=len(orders),
+        total_processed=len(rows),
         matched_count=matched_count,
         discrepancy_count=discrepancy_count,
-        reconciliations=reconciliations,
+        reconciliations=[PaymentReconciliationOut.model_validate(r) for r in rows],
+    )
+
+
+def _get_order_batch(
+    db: Session, request: ReconciliationRequest, after_order_id: int
+) -> List[OrderCandidate]:
+    """Next page of reconcilable orders after an order id, with their totals."""
+    query = db.query(Order.id, Order.created_at).filter(
+        Order.id > after_order_id,
+        func.upper(Order.status).notin_(UNRECONCILABLE_STATUSES),
+    )
+    if request.order_ids:
+        query = query.filter(Order.id.in_(request.order_ids))
+    if request.from_date:
+        query = query.filter(Order.created_at >= request.from_date)
+    if request.to_date:
+        query = query.filter(Order.created_at <= request.to_date)
+
+    orders = query.order_by(Order.id).limit(request.batch_size).all()
+    if not orders:
+        return []
+
+    totals = dict(
+        db.query(
+            OrderItem.order_id,
+            func.sum(OrderItem.price * OrderItem.quantity),
+        )
+        .filter(OrderItem.order_id.in_([order.id for order in orders]))
+        .group_by(OrderItem.order_id)
+        .all()
     )
 
+    return [
+        OrderCandidate(
+            id=order_id,
+            created_at=created_at,
+            total=float(totals.get(order_id) or 0),
+        )
+        for order_id, created_at in orders
+    ]
+
 
 async def resolve_payment_discrepancy(
     db: Session, reconciliation_id: int, resolution_data: ResolutionRequest
@@ -254,39 +345,14 @@ async def resolve_payment_discrepancy(
     return await update_payment_reconciliation(db, reconciliation_id, update_data)
 
 
-def calculate_match_score(
-    order: Order, payment: Dict[str, Any], order_total: float
-) -> float:
-    """Calculate matching score between order and payment."""
-    score = 0.0
-
-    if payment.get("order_reference") == str(order.id):
-        score += 0.5
-
-    amount_diff = abs(payment.get("amount", 0) - order_total)
-    if amount_diff == 0:
-        score += 0.3
-    elif amount_diff <= 1.0:
-        score += 0.2
-    elif amount_diff <= 5.0:
-        score += 0.1
-
-    payment_time = payment.get("timestamp")
-    if payment_time and hasattr(order, "created_at"):
-        time_diff = abs((payment_time - order.created_at).total_seconds())
-        if time_diff <= 3600:
-            score += 0.2
-        elif time_diff <= 7200:
-            score += 0.1
-
-    return score
-
-
-async def _get_pos_payments(db: Session, orders: List[Order]) -> List[Dict[str, Any]]:
+async def _get_pos_payments(
+    db: Session,
+    order_ids: List[int],
+    date_range: Optional[Tuple[Optional[datetime], Optional[datetime]]] = None,
+) -> List[Dict[str, Any]]:
     """Get payments from POS system using provider interface."""
     provider = MockPOSProvider({})
-    order_ids = [order.id for order in orders]
-    return await provider.get_payments(order_ids=order_ids)
+    return await provider.get_payments(order_ids=order_ids, date_range=date_range)
 
 
 async def get_reconciliation_metrics(db: Session) -> Dict[str, Any]:
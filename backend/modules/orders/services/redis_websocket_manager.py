@@ -4,7 +4,9 @@ import redis.asyncio as redis
 import json
 import logging
 import asyncio
-from typing import Dict, List, Set, Optional, Any
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, List, Set, Optional, Any, Union
 from datetime import datetime, timedelta
 from fastapi import WebSocket
 import uuid
@@ -16,6 +18,32 @@ from .notification_metrics import NotificationMetrics
 
 logger = logging.getLogger(__name__)
 
+# Channel every node listens on; only read so messages from nodes that still
+# publish there are delivered during a rolling deploy
+BROADCAST_CHANNEL = "order_tracking:broadcast"
+
+# Per-order channels, subscribed only while a node holds connections for the
+# order, so nodes never receive updates for orders they are not serving
+ORDER_CHANNEL_PREFIX = "order_tracking:order:"
+
+# Separates the sending server ID from the encoded message on order channels
+ENVELOPE_SEPARATOR = "\n"
+
+# Messages each connection may receive per window
+MESSAGE_RATE_LIMIT = 60
+MESSAGE_RATE_WINDOW_SECONDS = 60
+
+
+def order_channel(order_id: int) -> str:
+    """Pub/sub channel carrying an order's tracking messages"""
+    return f"{ORDER_CHANNEL_PREFIX}{order_id}"
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Encode a message once for every connection it is sent to"""
+    # Same encoding as WebSocket.send_json
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
 
 class RedisWebSocketManager:
     """
@@ -42,7 +70,11 @@ class RedisWebSocketManager:
 
         # Rate limiting
         self.connection_rate_limits: Dict[str, datetime] = {}
-        self.message_rate_limits: Dict[str, List[datetime]] = {}
+        self.message_rate_limits: Dict[str, Deque[float]] = {}
+
+        # Order channels this node is subscribed to
+        self.subscribed_orders: Set[int] = set()
+        self._subscription_lock = asyncio.Lock()
 
         # Heartbeat tracking
         self.last_heartbeat: Dict[WebSocket, datetime] = {}
@@ -64,7 +96,7 @@ class RedisWebSocketManager:
             self.pubsub = await get_redis_pubsub()
 
             # Subscribe to broadcast channel
-            await self.pubsub.subscribe("order_tracking:broadcast")
+            await self.pubsub.subscribe(BROADCAST_CHANNEL)
 
             # Start subscription handler
             self._subscription_task = asyncio.create_task(self._handle_subscriptions())
@@ -88,6 +120,7 @@ class RedisWebSocketManager:
         if self.pubsub:
             await self.pubsub.unsubscribe()
             await self.pubsub.close()
+        self.subscribed_orders.clear()
 
         if self.redis_client:
             await self.redis_client.close()
@@ -138,6 +171,9 @@ class RedisWebSocketManager:
         # Initialize heartbeat
         self.last_heartbeat[websocket] = datetime.utcnow()
 
+        # Start receiving the order's messages from other servers
+        await self._sync_order_subscription(order_id)
+
         # Publish connection event to Redis
         await self._publish_connection_event("connect", order_id, session_id, user_id)
 
@@ -148,7 +184,7 @@ class RedisWebSocketManager:
         self.metrics.record_websocket_connection(self.server_id, "connect")
         self.metrics.set_active_websocket_connections(
             self.server_id,
-            sum(len(conns) for conns in self.local_connections["order"].values()),
+            len(self.connection_metadata),
         )
 
         logger.info(
@@ -176,6 +212,10 @@ class RedisWebSocketManager:
             self.local_connections["session"][session_id].remove(websocket)
             if not self.local_connections["session"][session_id]:
                 del self.local_connections["session"][session_id]
+                self.message_rate_limits.pop(session_id, None)
+
+        # Stop receiving the order's messages once no connection needs them
+        await self._sync_order_subscription(order_id)
 
         # Clean up metadata
         del self.connection_metadata[websocket]
@@ -194,38 +234,36 @@ class RedisWebSocketManager:
         self.metrics.record_websocket_connection(self.server_id, "disconnect")
         self.metrics.set_active_websocket_connections(
             self.server_id,
-            sum(len(conns) for conns in self.local_connections["order"].values()),
+            len(self.connection_metadata),
         )
 
         logger.info(f"WebSocket disconnected: order={order_id}, session={session_id}")
 
     async def send_to_order(self, order_id: int, message: Dict[str, Any]):
         """Send message to all connections for an order (local and remote)"""
+        payload = encode_message(message)
+
         # Send to local connections
-        await self._send_to_local_order(order_id, message)
+        await self._send_to_local_order(order_id, payload)
 
-        # Broadcast to other servers via Redis
-        await self._broadcast_message(
-            {
-                "type": "order_message",
-                "order_id": order_id,
-                "message": message,
-                "server_id": self.server_id,
-                "timestamp": datetime.utcnow().isoformat(),
-            }
-        )
+        # Publish to servers holding connections for the order
+        await self._publish_order_message(order_id, payload)
 
-    async def _send_to_local_order(self, order_id: int, message: Dict[str, Any]):
-        """Send message to local connections for an order"""
+    async def _send_to_local_order(
+        self, order_id: int, message: Union[str, Dict[str, Any]]
+    ):
+        """Send message, or an already encoded one, to local connections"""
         if order_id not in self.local_connections["order"]:
             return
 
+        payload = message if isinstance(message, str) else encode_message(message)
+
         disconnected = []
-        for websocket in self.local_connections["order"][order_id]:
+        for websocket in list(self.local_connections["order"][order_id]):
             try:
                 # Check message rate limit for this connection
                 if await self._check_message_rate_limit(websocket):
-                    await websocket.send_json(message)
+                    await websocket.send_text(payload)
             except Exception as e:
                 logger.error(f"Error sending to websocket: {e}")
                 disconnected.append(websocket)
@@ -280,25 +318,62 @@ class RedisWebSocketManager:
 
     async def _broadcast_message(self, message: Dict[str, Any]):
         """Broadcast message via Redis pub/sub"""
+        if self.redis_client:
+            await self.redis_client.publish(BROADCAST_CHANNEL, json.dumps(message))
+
+    async def _publish_order_message(self, order_id: int, payload: str):
+        """Publish an encoded message on the order's channel"""
         if self.redis_client:
             await self.redis_client.publish(
-                "order_tracking:broadcast", json.dumps(message)
+                order_channel(order_id),
+                f"{self.server_id}{ENVELOPE_SEPARATOR}{payload}",
             )
 
+    async def _sync_order_subscription(self, order_id: int):
+        """Subscribe to an order's channel while it has local connections"""
+        if not self.pubsub:
+            return
+
+        async with self._subscription_lock:
+            wanted = bool(self.local_connections["order"].get(order_id))
+            subscribed = order_id in self.subscribed_orders
+            try:
+                if wanted and not subscribed:
+                    await self.pubsub.subscribe(order_channel(order_id))
+                    self.subscribed_orders.add(order_id)
+                elif subscribed and not wanted:
+                    await self.pubsub.unsubscribe(order_channel(order_id))
+                    self.subscribed_orders.discard(order_id)
+            except Exception as e:
+                logger.error(f"Error updating subscription for order {order_id}: {e}")
+
     async def _handle_subscriptions(self):
         """Handle incoming Redis pub/sub messages"""
         try:
             async for message in self.pubsub.listen():
                 if message["type"] == "message":
-                    await self._process_broadcast_message(message["data"])
+                    await self._process_broadcast_message(
+                        message["data"], message.get("channel")
+                    )
         except asyncio.CancelledError:
             raise
         except Exception as e:
             logger.error(f"Error in subscription handler: {e}")
 
-    async def _process_broadcast_message(self, data: str):
+    async def _process_broadcast_message(
+        self, data: Union[str, bytes], channel: Union[str, bytes, None] = None
+    ):
         """Process incoming broadcast message"""
         try:
+            if isinstance(data, bytes):
+                data = data.decode()
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+
+            if channel and channel.startswith(ORDER_CHANNEL_PREFIX):
+                await self._process_order_message(channel, data)
+                return
+
             message = json.loads(data)
 
             # Skip messages from this server
@@ -313,6 +388,17 @@ class RedisWebSocketManager:
         except Exception as e:
             logger.error(f"Error processing broadcast message: {e}")
 
+    async def _process_order_message(self, channel: str, data: str):
+        """Forward an order channel message without decoding it"""
+        server_id, _, payload = data.partition(ENVELOPE_SEPARATOR)
+
+        # Skip messages from this server
+        if server_id == self.server_id:
+            return
+
+        order_id = int(channel[len(ORDER_CHANNEL_PREFIX) :])
+        await self._send_to_local_order(order_id, payload)
+
     async def _publish_connection_event(
         self, event_type: str, order_id: int, session_id: str, user_id: Optional[int]
     ):
@@ -390,28 +476,28 @@ class RedisWebSocketManager:
 
     async def _check_message_rate_limit(self, websocket: WebSocket) -> bool:
         """Check if connection is within message rate limit"""
-        # Rate limit: 60 messages per minute per connection
+        # Rate limit: MESSAGE_RATE_LIMIT messages per window per connection
         metadata = self.connection_metadata.get(websocket)
         if not metadata:
             return True
 
         session_id = metadata["session_id"]
-        now = datetime.utcnow()
+        now = monotonic()
 
-        if session_id not in self.message_rate_limits:
-            self.message_rate_limits[session_id] = []
+        sent = self.message_rate_limits.get(session_id)
+        if sent is None:
+            sent = self.message_rate_limits[session_id] = deque()
 
-        # Remove old timestamps
-        cutoff = now - timedelta(minutes=1)
-        self.message_rate_limits[session_id] = [
-            ts for ts in self.message_rate_limits[session_id] if ts > cutoff
-        ]
+        # Drop timestamps that left the window, oldest first
+        cutoff = now - MESSAGE_RATE_WINDOW_SECONDS
+        while sent and sent[0] <= cutoff:
+            sent.popleft()
 
         # Check limit
-        if len(self.message_rate_limits[session_id]) >= 60:
+        if len(sent) >= MESSAGE_RATE_LIMIT:
             return False
 
-        self.message_rate_limits[session_id].append(now)
+        sent.append(now)
         return True
 
 
@@ -8,6 +8,7 @@ from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database_utils import get_db_context as get_async_db
+from core.partitioning import purge_before
 from ..models.pricing_rule_models import PricingRule, RuleStatus, PricingRuleMetrics
 from ..metrics.pricing_rule_metrics import pricing_metrics_collector
 
@@ -213,30 +214,19 @@ class PricingRuleMaintenanceWorker:
                 # Keep only last 90 days of metrics
                 cutoff_date = datetime.utcnow() - timedelta(days=90)
 
-                result = await db.execute(
-                    select(func.count(PricingRuleMetrics.id)).where(
-                        PricingRuleMetrics.date < cutoff_date
-                    )
-                )
-
-                old_count = result.scalar()
-
-                if old_count > 0:
-                    logger.info(f"Cleaning up {old_count} old metric records")
+                # Drop whole partitions of old records, delete the rest
+                result = purge_before(db, PricingRuleMetrics, cutoff_date)
 
-                    # Delete old records
-                    await db.execute(
-                        PricingRuleMetrics.__table__.delete().where(
-                            PricingRuleMetrics.date < cutoff_date
-                        )
+                if result.partitions_dropped or result.rows_deleted:
+                    logger.info(
+                        f"Cleaned up old metric records: "
+                        f"{len(result.partitions_dropped)} partitions dropped, "
+                        f"{result.rows_deleted} rows deleted"
                     )
 
-                    await db.commit()
-                    logger.info(f"Cleaned up {old_count} old metric records")
-
             except Exception as e:
                 logger.error(f"Error cleaning up metrics: {str(e)}")
-                await db.rollback()
+                db.rollback()
 
 
 # Create singleton worker instance
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 
 from core.database import SessionLocal
+from core.partitioning import purge_before
 from modules.customers.models import Customer
 from ..models.priority_models import (
     QueuePriorityConfig,
@@ -435,25 +436,14 @@ def cleanup_old_metrics(days_to_keep: int = 30):
     try:
         cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
 
-        # Delete old metrics
-        deleted_count = (
-            db.query(PriorityMetrics)
-            .filter(PriorityMetrics.metric_date < cutoff_date)
-            .delete()
-        )
-
-        # Delete old adjustment logs
-        deleted_logs = (
-            db.query(PriorityAdjustmentLog)
-            .filter(PriorityAdjustmentLog.adjusted_at < cutoff_date)
-            .delete()
-        )
-
-        db.commit()
+        # Drop old metric and adjustment log partitions
+        metrics = purge_before(db, PriorityMetrics, cutoff_date)
+        logs = purge_before(db, PriorityAdjustmentLog, cutoff_date)
 
         logger.info(
-            f"Cleaned up {deleted_count} old priority metrics and "
-            f"{deleted_logs} old adjustment logs"
+            f"Cleaned up old priority metrics ({len(metrics.partitions_dropped)} "
+            f"partitions, {metrics.rows_deleted} rows) and adjustment logs "
+            f"({len(logs.partitions_dropped)} partitions, {logs.rows_deleted} rows)"
         )
 
     finally:
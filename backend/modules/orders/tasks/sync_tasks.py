@@ -18,6 +18,7 @@ import sqlalchemy.exc
 import httpx
 
 from core.database import get_db
+from core.partitioning import delete_in_batches, purge_before
 from modules.orders.services.sync_service import OrderSyncService
 from modules.orders.models.sync_models import SyncConfiguration
 from core.config import settings
@@ -234,24 +235,21 @@ class OrderSyncScheduler:
 
             cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
 
-            # Delete old sync logs
+            # Drop old sync log partitions
             from modules.orders.models.sync_models import SyncLog, SyncBatch
 
-            deleted_logs = (
-                db.query(SyncLog).filter(SyncLog.started_at < cutoff_date).delete()
-            )
+            result = purge_before(db, SyncLog, cutoff_date)
 
             # Delete old batches without logs
-            deleted_batches = (
-                db.query(SyncBatch)
-                .filter(SyncBatch.started_at < cutoff_date, ~SyncBatch.sync_logs.any())
-                .delete()
+            deleted_batches = delete_in_batches(
+                db,
+                SyncBatch,
+                [SyncBatch.started_at < cutoff_date, ~SyncBatch.sync_logs.any()],
             )
 
-            db.commit()
-
             logger.info(
-                f"Cleanup completed: deleted {deleted_logs} logs "
+                f"Cleanup completed: dropped {len(result.partitions_dropped)} log "
+                f"partitions, deleted {result.rows_deleted} logs "
                 f"and {deleted_batches} batches older than {retention_days} days"
             )
 
@@ -15,10 +15,15 @@ from sqlalchemy.orm import Session
 
 from core.database import get_db
 from core.config import settings
+from core.partitioning import delete_in_batches
 from modules.orders.services.external_pos_webhook_service import (
     ExternalPOSWebhookService,
 )
-from modules.orders.models.external_pos_models import ExternalPOSWebhookEvent
+from modules.orders.models.external_pos_models import (
+    ExternalPOSPaymentUpdate,
+    ExternalPOSWebhookEvent,
+    ExternalPOSWebhookLog,
+)
 from modules.orders.enums.external_pos_enums import WebhookProcessingStatus
 
 logger = logging.getLogger(__name__)
@@ -161,10 +166,13 @@ class WebhookRetryScheduler:
                 days=settings.WEBHOOK_RETENTION_DAYS
             )
 
-            # Delete old processed webhooks with batch limit
-            deleted_count = (
-                db.query(ExternalPOSWebhookEvent)
-                .filter(
+            # Delete old processed webhooks and their logs and updates in
+            # batches. Events are not partitioned: retention depends on their
+            # processing status and other tables reference them.
+            deleted_count = delete_in_batches(
+                db,
+                ExternalPOSWebhookEvent,
+                [
                     ExternalPOSWebhookEvent.processing_status.in_(
                         [
                             WebhookProcessingStatus.PROCESSED,
@@ -173,13 +181,14 @@ class WebhookRetryScheduler:
                         ]
                     ),
                     ExternalPOSWebhookEvent.created_at < cutoff_date,
-                )
-                .limit(settings.WEBHOOK_CLEANUP_MAX_DELETE_BATCH)
-                .delete(synchronize_session="fetch")
+                ],
+                dependents=[
+                    ExternalPOSWebhookLog.webhook_event_id,
+                    ExternalPOSPaymentUpdate.webhook_event_id,
+                ],
+                batch_size=settings.WEBHOOK_CLEANUP_MAX_DELETE_BATCH,
             )
 
-            db.commit()
-
             if deleted_count > 0:
                 logger.info(f"Cleaned up {deleted_count} old webhook events")
 
@@ -0,0 +1,174 @@
+# backend/modules/orders/tests/test_payment_matcher.py
+
+"""
+Tests for indexed one-to-one payment matching.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.orders.services.payment_matcher import (
+    MATCH_THRESHOLD,
+    OrderCandidate,
+    PaymentIndex,
+    assign_payments,
+    calculate_match_score,
+)
+
+BASE_TIME = datetime(2024, 5, 1, 18, 0)
+
+
+def make_payment(reference, amount, minutes=0, order_reference=None):
+    return {
+        "reference": reference,
+        "order_reference": order_reference,
+        "amount": amount,
+        "timestamp": BASE_TIME + timedelta(minutes=minutes),
+        "payment_method": "credit_card",
+        "status": "completed",
+    }
+
+
+def make_order(order_id, total, minutes=0):
+    return OrderCandidate(
+        id=order_id, created_at=BASE_TIME + timedelta(minutes=minutes), total=total
+    )
+
+
+def build_index(payments):
+    index = PaymentIndex()
+    index.add(payments)
+    return index
+
+
+class TestPaymentIndex:
+    """Candidate lookup"""
+
+    def test_candidates_by_reference_and_bucket(self):
+        index = build_index(
+            [
+                make_payment("ref", 99.0, minutes=600, order_reference="1"),
+                make_payment("near", 25.0, minutes=30),
+                make_payment("other_amount", 27.0, minutes=30),
+                make_payment("far_time", 25.0, minutes=600),
+            ]
+        )
+
+        assert index.candidates(make_order(1, 25.0)) == {"ref", "near"}
+
+    def test_claimed_payments_are_not_candidates(self):
+        index = build_index([make_payment("a", 25.0)])
+        index.claim("a")
+
+        assert index.candidates(make_order(1, 25.0)) == set()
+        assert index.add([make_payment("a", 25.0)]) == 0
+
+    def test_candidates_cover_every_scoring_payment(self):
+        rng = random.Random(7)
+        payments = [
+            make_payment(f"p{n}", rng.randint(5, 60), rng.randint(0, 600))
+            for n in range(300)
+        ]
+        index = build_index(payments)
+
+        for order_id in range(50):
+            order = make_order(order_id, rng.randint(5, 60), rng.randint(0, 600))
+            scoring = {
+                payment["reference"]
+                for payment in payments
+                if calculate_match_score(order, payment, order.total) >= MATCH_THRESHOLD
+            }
+            assert scoring <= index.candidates(order)
+
+
+class TestAssignPayments:
+    """One-to-one assignment"""
+
+    def test_payment_matches_only_one_order(self):
+        index = build_index([make_payment("only", 25.0)])
+        orders = [make_order(1, 25.0, minutes=5), make_order(2, 25.0, minutes=5)]
+
+        matches = assign_payments(orders, index)
+
+        # Both orders score the same; the tie goes to the lower id
+        assert list(matches) == [1]
+        assert matches[1][0]["reference"] == "only"
+        assert index.claimed == {"only"}
+
+    def test_highest_score_wins_the_payment(self):
+        index = build_index([make_payment("a", 25.0, order_reference="2")])
+        orders = [make_order(1, 25.0), make_order(2, 25.0, minutes=90)]
+
+        matches = assign_payments(orders, index)
+
+        assert list(matches) == [2]
+        assert matches[2][1] == pytest.approx(0.9)
+
+    def test_reference_beats_amount_and_time(self):
+        index = build_index(
+            [
+                make_payment("exact", 25.0),
+                make_payment("tagged", 31.0, minutes=90, order_reference="1"),
+            ]
+        )
+
+        matches = assign_payments([make_order(1, 25.0), make_order(2, 25.0)], index)
+
+        assert matches[1][0]["reference"] == "tagged"
+        assert matches[2][0]["reference"] == "exact"
+
+    def test_later_batches_skip_claimed_payments(self):
+        index = build_index([make_payment("a", 25.0)])
+        assign_payments([make_order(1, 25.0)], index)
+
+        assert assign_payments([make_order(2, 25.0)], index) == {}
+
+    def test_below_threshold_is_unmatched(self):
+        index = build_index([make_payment("a", 25.5)])
+
+        assert assign_payments([make_order(1, 25.0)], index) == {}
+
+
+class TestMatcherBenchmark:
+    """A day of 5k orders against 5k POS payments"""
+
+    ORDERS = 5000
+
+    @pytest.mark.slow
+    def test_indexed_matching(self):
+        rng = random.Random(42)
+        orders = [
+            make_order(n, round(rng.uniform(8, 120), 2), rng.randint(0, 14 * 60))
+            for n in range(self.ORDERS)
+        ]
+        payments = [
+            make_payment(
+                f"PAY_{order.id}",
+                order.total,
+                minutes=(order.created_at - BASE_TIME).total_seconds() / 60 + 20,
+                order_reference=str(order.id) if order.id % 4 else None,
+            )
+            for order in orders
+        ]
+
+        start_time = time.perf_counter()
+        index = build_index(payments)
+        candidates = sum(len(index.candidates(order)) for order in orders)
+        matches = assign_payments(orders, index)
+        elapsed = time.perf_counter() - start_time
+
+        # Untagged payments with a common amount can go to a neighbouring order
+        assert len(matches) >= self.ORDERS * 0.99
+        assert len({payment["reference"] for payment, _ in matches.values()}) == len(
+            matches
+        )
+        # Previously every order was scored against every payment
+        assert candidates < self.ORDERS * self.ORDERS / 20
+
+        print(
+            f"{self.ORDERS} orders: {candidates} scored pairs instead of "
+            f"{self.ORDERS * self.ORDERS}, matched in {elapsed:.2f}s"
+        )
@@ -1,6 +1,7 @@
 import pytest
 from fastapi import HTTPException
 from decimal import Decimal
+from unittest.mock import AsyncMock, patch
 from modules.orders.services.payment_reconciliation_service import (
     create_payment_reconciliation,
     get_payment_reconciliation_by_id,
@@ -22,6 +23,7 @@ from modules.orders.enums.payment_enums import (
     ReconciliationAction,
 )
 from modules.orders.models.order_models import Order, OrderItem
+from modules.orders.models.payment_reconciliation_models import PaymentReconciliation
 
 
 class TestPaymentReconciliationService:
@@ -200,6 +202,102 @@ class TestPaymentReconciliationService:
         assert result.discrepancy_count >= 0
         assert len(result.reconciliations) == 2
 
+    @pytest.mark.asyncio
+    async def test_perform_payment_reconciliation_skips_closed_orders(self, db_session):
+        orders = [
+            Order(staff_id=1, status=status)
+            for status in ("pending", "cancelled", "REFUNDED")
+        ]
+        db_session.add_all(orders)
+        db_session.commit()
+
+        request = ReconciliationRequest(order_ids=[order.id for order in orders])
+        result = await perform_payment_reconciliation(db_session, request)
+
+        assert result.total_processed == 1
+        assert [r.order_id for r in result.reconciliations] == [orders[0].id]
+
+    @pytest.mark.asyncio
+    async def test_perform_payment_reconciliation_uses_amount_threshold(
+        self, db_session
+    ):
+        order = Order(staff_id=1, status="pending")
+        db_session.add(order)
+        db_session.commit()
+        db_session.add(
+            OrderItem(
+                order_id=order.id, menu_item_id=101, quantity=1, price=Decimal("20.00")
+            )
+        )
+        db_session.commit()
+        payment = {
+            "reference": f"PAY_{order.id}",
+            "order_reference": str(order.id),
+            "amount": 20.50,
+            "timestamp": order.created_at,
+        }
+
+        with patch(
+            "modules.orders.services.payment_reconciliation_service._get_pos_payments",
+            AsyncMock(return_value=[payment]),
+        ):
+            tight = await perform_payment_reconciliation(
+                db_session,
+                ReconciliationRequest(
+                    order_ids=[order.id], amount_threshold=Decimal("0.01")
+                ),
+            )
+            db_session.query(PaymentReconciliation).delete()
+            db_session.commit()
+            loose = await perform_payment_reconciliation(
+                db_session,
+                ReconciliationRequest(
+                    order_ids=[order.id], amount_threshold=Decimal("1.00")
+                ),
+            )
+
+        assert tight.reconciliations[0].discrepancy_type == (
+            DiscrepancyType.AMOUNT_MISMATCH
+        )
+        assert loose.matched_count == 1
+
+    @pytest.mark.asyncio
+    async def test_perform_payment_reconciliation_does_not_reuse_payments(
+        self, db_session
+    ):
+        orders = [Order(staff_id=1, status="pending") for _ in range(3)]
+        db_session.add_all(orders)
+        db_session.commit()
+        db_session.add_all(
+            OrderItem(
+                order_id=order.id,
+                menu_item_id=101,
+                quantity=1,
+                price=Decimal("25.99"),
+            )
+            for order in orders
+        )
+        db_session.commit()
+
+        request = ReconciliationRequest(
+            order_ids=[order.id for order in orders], batch_size=2
+        )
+        first = await perform_payment_reconciliation(db_session, request)
+        second = await perform_payment_reconciliation(db_session, request)
+
+        assert first.total_processed == 3
+        assert first.matched_count == 3
+        references = {r.external_payment_reference for r in first.reconciliations}
+        assert len(references) == 3
+
+        # Payments reconciled by the first run are not matched again
+        assert second.matched_count == 0
+        assert second.discrepancy_count == 3
+        assert all(
+            r.discrepancy_type == DiscrepancyType.MISSING_PAYMENT
+            for r in second.reconciliations
+        )
+
     @pytest.mark.asyncio
     async def test_resolve_payment_discrepancy(self, db_session, sample_order):
         reconciliation_data = PaymentReconciliationCreate(
@@ -0,0 +1,216 @@
+# backend/modules/orders/tests/test_redis_websocket_manager.py
+
+"""
+Tests for order-tracking WebSocket fan-out across servers.
+"""
+
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from modules.orders.services.redis_websocket_manager import (
+    BROADCAST_CHANNEL,
+    MESSAGE_RATE_LIMIT,
+    RedisWebSocketManager,
+    order_channel,
+)
+
+
+class FakeWebSocket:
+    """Records what it was sent"""
+
+    def __init__(self, host: str):
+        self.client = SimpleNamespace(host=host)
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(text)
+
+
+class FakeBroker:
+    """In-process pub/sub delivering to subscribed managers"""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.delivered = 0
+
+    def attach(self, manager: RedisWebSocketManager):
+        manager.redis_client = FakeRedisClient(self)
+        manager.pubsub = FakePubSub(self, manager)
+        manager.metrics = Mock()
+
+    async def publish(self, channel: str, data: str):
+        for manager in list(self.subscribers.get(channel, ())):
+            self.delivered += 1
+            await manager._process_broadcast_message(data, channel)
+
+
+class FakeRedisClient:
+    def __init__(self, broker: FakeBroker):
+        self.broker = broker
+
+    async def publish(self, channel, data):
+        await self.broker.publish(channel, data)
+
+    async def hset(self, *args):
+        pass
+
+    async def expire(self, *args):
+        pass
+
+    async def hdel(self, *args):
+        pass
+
+
+class FakePubSub:
+    def __init__(self, broker: FakeBroker, manager: RedisWebSocketManager):
+        self.broker = broker
+        self.manager = manager
+
+    async def subscribe(self, *channels):
+        for channel in channels:
+            self.broker.subscribers.setdefault(channel, set()).add(self.manager)
+
+    async def unsubscribe(self, *channels):
+        for channel in channels:
+            self.broker.subscribers.get(channel, set()).discard(self.manager)
+
+
+def make_nodes(count: int, broker: FakeBroker):
+    nodes = []
+    for _ in range(count):
+        node = RedisWebSocketManager(redis_url="redis://test")
+        broker.attach(node)
+        nodes.append(node)
+    return nodes
+
+
+_hosts = iter(range(10**9))
+
+
+async def connect(node, order_id, session_id=None):
+    websocket = FakeWebSocket(f"10.0.0.{next(_hosts)}")
+    await node.connect(websocket, order_id, session_id or f"s-{order_id}")
+    return websocket
+
+
+class TestOrderChannels:
+    """Messages reach only servers serving the order"""
+
+    @pytest.mark.asyncio
+    async def test_subscribed_only_while_connected(self):
+        broker = FakeBroker()
+        (node,) = make_nodes(1, broker)
+
+        first = await connect(node, 1, "a")
+        second = await connect(node, 1, "b")
+        assert node.subscribed_orders == {1}
+
+        await node.disconnect(first)
+        assert node in broker.subscribers[order_channel(1)]
+        await node.disconnect(second)
+        assert node.subscribed_orders == set()
+        assert node not in broker.subscribers[order_channel(1)]
+
+    @pytest.mark.asyncio
+    async def test_updates_route_to_nodes_holding_the_order(self):
+        broker = FakeBroker()
+        sender, holder, bystander = make_nodes(3, broker)
+        local = await connect(sender, 1)
+        remote = await connect(holder, 1, "remote")
+        await connect(bystander, 2)
+
+        await sender.broadcast_order_update(1, {"status": "ready"})
+
+        assert broker.delivered == 2  # holder, and the sender's own echo
+        assert local.sent == remote.sent
+        message = json.loads(remote.sent[0])
+        assert message["type"] == "order_update"
+        assert message["event"] == {"status": "ready"}
+
+    @pytest.mark.asyncio
+    async def test_legacy_broadcast_messages_still_delivered(self):
+        broker = FakeBroker()
+        (node,) = make_nodes(1, broker)
+        websocket = await connect(node, 5)
+
+        await node._process_broadcast_message(
+            json.dumps(
+                {
+                    "type": "order_message",
+                    "order_id": 5,
+                    "message": {"type": "order_update"},
+                    "server_id": "other",
+                }
+            ).encode(),
+            BROADCAST_CHANNEL.encode(),
+        )
+
+        assert json.loads(websocket.sent[0]) == {"type": "order_update"}
+
+    @pytest.mark.asyncio
+    async def test_message_rate_limit(self):
+        broker = FakeBroker()
+        (node,) = make_nodes(1, broker)
+        websocket = await connect(node, 1)
+
+        for _ in range(MESSAGE_RATE_LIMIT + 5):
+            await node.send_to_order(1, {"type": "order_update"})
+
+        assert len(websocket.sent) == MESSAGE_RATE_LIMIT
+        await node.disconnect(websocket)
+        assert "s-1" not in node.message_rate_limits
+
+
+class TestOrderChannelBenchmark:
+    """50k tracked orders spread over 4 servers"""
+
+    ORDERS = 50000
+    NODES = 4
+
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_per_node_processing(self):
+        broker = FakeBroker()
+        nodes = make_nodes(self.NODES, broker)
+        for node in nodes:
+            # Connections here come from far fewer addresses than in production
+            node._check_connection_rate_limit = AsyncMock(return_value=True)
+        for order_id in range(self.ORDERS):
+            await connect(nodes[order_id % self.NODES], order_id)
+
+        processed = {node.server_id: 0 for node in nodes}
+        busy = {node.server_id: 0.0 for node in nodes}
+        for node in nodes:
+            original = node._process_broadcast_message
+
+            async def timed(data, channel=None, node=node, original=original):
+                start_time = time.perf_counter()
+                await original(data, channel)
+                busy[node.server_id] += time.perf_counter() - start_time
+                processed[node.server_id] += 1
+
+            node._process_broadcast_message = timed
+
+        # Each order's update comes from a server other than the one holding it
+        for order_id in range(self.ORDERS):
+            sender = nodes[(order_id + 1) % self.NODES]
+            await sender.broadcast_order_update(order_id, {"status": "in_kitchen"})
+
+        # Previously every server received and decoded every update
+        for node in nodes:
+            assert processed[node.server_id] == self.ORDERS // self.NODES
+        assert broker.delivered == self.ORDERS
+
+        for index, node in enumerate(nodes):
+            print(
+                f"node {index}: {processed[node.server_id]} of {self.ORDERS} "
+                f"messages, {processed[node.server_id] / busy[node.server_id]:.0f} "
+                f"processed/second"
+            )
@@ -5,8 +5,8 @@ from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, case
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_, or_, func, case, Select
+from sqlalchemy.orm import aliased
 
 from ..models.payment_models import Payment, PaymentStatus, PaymentGateway, Refund, RefundStatus
 from ..models.split_bill_models import SplitBillPayment, SplitBillPaymentStatus
@@ -14,6 +14,9 @@ from ...orders.models.order_models import Order, OrderStatus
 
 logger = logging.getLogger(__name__)
 
+# Payment and order totals further apart than this are reported as mismatched
+AMOUNT_TOLERANCE = Decimal("0.01")
+
 
 class PaymentReconciliationService:
     """
@@ -55,22 +58,11 @@ class PaymentReconciliationService:
         if location_id:
             query = query.join(Order).where(Order.location_id == location_id)
             
-        result = await db.execute(query.options(selectinload(Payment.order)))
+        result = await db.execute(query)
         payments = result.scalars().all()
         
-        # Calculate totals by gateway
-        gateway_totals = {}
-        for gateway in PaymentGateway:
-            gateway_payments = [p for p in payments if p.gateway == gateway]
-            gateway_totals[gateway.value] = {
-                "count": len(gateway_payments),
-                "gross_amount": sum(p.amount for p in gateway_payments),
-                "fees": sum(p.gateway_fee or Decimal(0) for p in gateway_payments),
-                "net_amount": sum(p.net_amount or p.amount for p in gateway_payments),
-                "successful": len([p for p in gateway_payments if p.status == PaymentStatus.COMPLETED]),
-                "failed": len([p for p in gateway_payments if p.status == PaymentStatus.FAILED]),
-                "pending": len([p for p in gateway_payments if p.status == PaymentStatus.PROCESSING]),
-            }
+        # One pass over the day's payments feeds every breakdown
+        totals = self._summarize_payments(payments)
         
         # Calculate refunds
         refund_query = select(Refund).where(
@@ -91,132 +83,87 @@ class PaymentReconciliationService:
             "failed": len([r for r in refunds if r.status == RefundStatus.FAILED]),
         }
         
-        # Calculate overall totals
-        total_gross = sum(p.amount for p in payments)
-        total_fees = sum(p.gateway_fee or Decimal(0) for p in payments)
-        total_net = sum(p.net_amount or p.amount for p in payments)
+        total_net = totals["net_amount"]
         
-        # Calculate discrepancies
-        discrepancies = await self._find_discrepancies(db, payments)
+        # Calculate discrepancies against the same set of payments
+        discrepancies = await self._find_discrepancies(
+            db, payments, query.with_only_columns(Payment.id)
+        )
         
         return {
             "report_date": report_date.isoformat(),
             "generated_at": datetime.utcnow().isoformat(),
             "summary": {
                 "total_transactions": len(payments),
-                "total_gross_amount": float(total_gross),
-                "total_fees": float(total_fees),
+                "total_gross_amount": float(totals["gross_amount"]),
+                "total_fees": float(totals["fees"]),
                 "total_net_amount": float(total_net),
                 "total_refunds": float(refund_totals["total_amount"]),
                 "net_after_refunds": float(total_net - refund_totals["total_amount"]),
             },
-            "by_gateway": gateway_totals,
+            "by_gateway": totals["by_gateway"],
             "refunds": refund_totals,
             "discrepancies": discrepancies,
-            "hourly_breakdown": await self._get_hourly_breakdown(payments),
-            "payment_methods": await self._get_payment_method_breakdown(payments),
+            "hourly_breakdown": totals["hourly"],
+            "payment_methods": totals["payment_methods"],
         }
     
-    async def _find_discrepancies(
-        self, db: AsyncSession, payments: List[Payment]
-    ) -> List[Dict[str, Any]]:
-        """
-        Find payment discrepancies
-        
-        Args:
-            db: Database session
-            payments: List of payments to check
-            
-        Returns:
-            List of discrepancies
-        """
-        discrepancies = []
-        
-        for payment in payments:
-            # Check order total vs payment amount
-            if payment.order:
-                expected_amount = payment.order.total_amount
-                if abs(payment.amount - expected_amount) > Decimal("0.01"):
-                    discrepancies.append({
-                        "type": "amount_mismatch",
-                        "payment_id": payment.id,
-                        "order_id": payment.order_id,
-                        "expected": float(expected_amount),
-                        "actual": float(payment.amount),
-                        "difference": float(payment.amount - expected_amount),
-                    })
-            
-            # Check for duplicate payments
-            duplicate_query = select(Payment).where(
-                and_(
-                    Payment.order_id == payment.order_id,
-                    Payment.id != payment.id,
-                    Payment.status == PaymentStatus.COMPLETED,
-                    Payment.amount == payment.amount,
-                )
-            )
-            duplicate_result = await db.execute(duplicate_query)
-            duplicates = duplicate_result.scalars().all()
-            
-            if duplicates:
-                discrepancies.append({
-                    "type": "potential_duplicate",
-                    "payment_id": payment.id,
-                    "order_id": payment.order_id,
-                    "duplicate_payment_ids": [d.id for d in duplicates],
-                    "amount": float(payment.amount),
-                })
-        
-        return discrepancies
-    
-    async def _get_hourly_breakdown(
-        self, payments: List[Payment]
-    ) -> Dict[int, Dict[str, Any]]:
+    def _summarize_payments(self, payments: List[Payment]) -> Dict[str, Any]:
         """
-        Get hourly breakdown of payments
+        Accumulate overall, gateway, hourly and payment method totals
+        in a single pass
         
         Args:
             payments: List of payments
             
         Returns:
-            Hourly breakdown data
+            Totals keyed by breakdown
         """
+        gateway_totals = {
+            gateway.value: {
+                "count": 0,
+                "gross_amount": Decimal(0),
+                "fees": Decimal(0),
+                "net_amount": Decimal(0),
+                "successful": 0,
+                "failed": 0,
+                "pending": 0,
+            }
+            for gateway in PaymentGateway
+        }
         hourly_data = {}
-        
-        for hour in range(24):
-            hour_payments = [
-                p for p in payments 
-                if p.created_at.hour == hour
-            ]
-            
-            if hour_payments:
-                hourly_data[hour] = {
-                    "count": len(hour_payments),
-                    "total_amount": float(sum(p.amount for p in hour_payments)),
-                    "average_amount": float(
-                        sum(p.amount for p in hour_payments) / len(hour_payments)
-                    ),
-                }
-        
-        return hourly_data
-    
-    async def _get_payment_method_breakdown(
-        self, payments: List[Payment]
-    ) -> Dict[str, Dict[str, Any]]:
-        """
-        Get payment method breakdown
-        
-        Args:
-            payments: List of payments
-            
-        Returns:
-            Payment method breakdown
-        """
         method_data = {}
+        gross_amount = Decimal(0)
+        fees = Decimal(0)
+        net_amount = Decimal(0)
         
         for payment in payments:
-            method = payment.payment_method or "unknown"
+            fee = payment.fee_amount or Decimal(0)
+            net = payment.net_amount or payment.amount
+            gross_amount += payment.amount
+            fees += fee
+            net_amount += net
+            
+            gateway_data = gateway_totals.get(payment.gateway.value)
+            if gateway_data is not None:
+                gateway_data["count"] += 1
+                gateway_data["gross_amount"] += payment.amount
+                gateway_data["fees"] += fee
+                gateway_data["net_amount"] += net
+                if payment.status == PaymentStatus.COMPLETED:
+                    gateway_data["successful"] += 1
+                elif payment.status == PaymentStatus.FAILED:
+                    gateway_data["failed"] += 1
+                elif payment.status == PaymentStatus.PROCESSING:
+                    gateway_data["pending"] += 1
+            
+            hour_data = hourly_data.setdefault(
+                payment.created_at.hour, {"count": 0, "total_amount": Decimal(0)}
+            )
+            hour_data["count"] += 1
+            hour_data["total_amount"] += payment.amount
             
+            method = payment.method.value if payment.method else "unknown"
             if method not in method_data:
                 method_data[method] = {
                     "count": 0,
@@ -234,6 +181,17 @@ class PaymentReconciliationService:
                 method_data[method]["failed"] += 1
         
         # Convert Decimal to float for JSON serialization
+        hourly_breakdown = {
+            hour: {
+                "count": hourly_data[hour]["count"],
+                "total_amount": float(hourly_data[hour]["total_amount"]),
+                "average_amount": float(
+                    hourly_data[hour]["total_amount"] / hourly_data[hour]["count"]
+                ),
+            }
+            for hour in sorted(hourly_data)
+        }
+        
         for method in method_data:
             method_data[method]["total_amount"] = float(
                 method_data[method]["total_amount"]
@@ -242,7 +200,122 @@ class PaymentReconciliationService:
                 method_data[method]["total_amount"] / method_data[method]["count"]
             )
         
-        return method_data
+        return {
+            "gross_amount": gross_amount,
+            "fees": fees,
+            "net_amount": net_amount,
+            "by_gateway": gateway_totals,
+            "hourly": hourly_breakdown,
+            "payment_methods": method_data,
+        }
+    
+    async def _find_discrepancies(
+        self, db: AsyncSession, payments: List[Payment], payment_ids: Select
+    ) -> List[Dict[str, Any]]:
+        """
+        Find payment discrepancies
+        
+        Amount mismatches and duplicates are each found with one query over
+        the selected payments rather than a query per payment.
+        
+        Args:
+            db: Database session
+            payments: List of payments to check
+            payment_ids: Query selecting the ids of those payments
+            
+        Returns:
+            List of discrepancies
+        """
+        if not payments:
+            return []
+        
+        # Payments whose amount differs from their order's total
+        mismatch_query = (
+            select(Payment.id, Order.total_amount)
+            .join(Order, Payment.order_id == Order.id)
+            .where(
+                and_(
+                    Payment.id.in_(payment_ids),
+                    func.abs(Payment.amount - Order.total_amount) > AMOUNT_TOLERANCE,
+                )
+            )
+        )
+        mismatch_result = await db.execute(mismatch_query)
+        expected_amounts = dict(mismatch_result.all())
+        
+        # (order, amount) pairs paid more than once, at least once successfully
+        duplicate_groups = (
+            select(Payment.order_id, Payment.amount)
+            .where(
+                Payment.order_id.in_(
+                    select(Payment.order_id).where(Payment.id.in_(payment_ids))
+                )
+            )
+            .group_by(Payment.order_id, Payment.amount)
+            .having(
+                and_(
+                    func.count(Payment.id) > 1,
+                    func.count(
+                        case((Payment.status == PaymentStatus.COMPLETED, Payment.id))
+                    ) > 0,
+                )
+            )
+            .subquery()
+        )
+        
+        duplicate = aliased(Payment)
+        duplicate_query = (
+            select(Payment.id, duplicate.id)
+            .join(
+                duplicate_groups,
+                and_(
+                    duplicate_groups.c.order_id == Payment.order_id,
+                    duplicate_groups.c.amount == Payment.amount,
+                ),
+            )
+            .join(
+                duplicate,
+                and_(
+                    duplicate.order_id == Payment.order_id,
+                    duplicate.amount == Payment.amount,
+                    duplicate.id != Payment.id,
+                    duplicate.status == PaymentStatus.COMPLETED,
+                ),
+            )
+            .where(Payment.id.in_(payment_ids))
+            .order_by(Payment.id, duplicate.id)
+        )
+        duplicate_result = await db.execute(duplicate_query)
+        duplicate_ids = {}
+        for payment_id, duplicate_id in duplicate_result.all():
+            duplicate_ids.setdefault(payment_id, []).append(duplicate_id)
+        
+        discrepancies = []
+        
+        for payment in payments:
+            # Check order total vs payment amount
+            if payment.id in expected_amounts:
+                expected_amount = expected_amounts[payment.id]
+                discrepancies.append({
+                    "type": "amount_mismatch",
+                    "payment_id": payment.id,
+                    "order_id": payment.order_id,
+                    "expected": float(expected_amount),
+                    "actual": float(payment.amount),
+                    "difference": float(payment.amount - expected_amount),
+                })
+            
+            # Check for duplicate payments
+            if payment.id in duplicate_ids:
+                discrepancies.append({
+                    "type": "potential_duplicate",
+                    "payment_id": payment.id,
+                    "order_id": payment.order_id,
+                    "duplicate_payment_ids": duplicate_ids[payment.id],
+                    "amount": float(payment.amount),
+                })
+        
+        return discrepancies
     
     async def generate_gateway_settlement_report(
         self,
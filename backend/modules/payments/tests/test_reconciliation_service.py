@@ -0,0 +1,128 @@
+# backend/modules/payments/tests/test_reconciliation_service.py
+
+import pytest
+from decimal import Decimal
+from datetime import date, datetime
+from unittest.mock import Mock
+
+from modules.payments.services.reconciliation_service import (
+    PaymentReconciliationService,
+)
+from modules.payments.models.payment_models import (
+    Payment,
+    PaymentGateway,
+    PaymentStatus,
+    PaymentMethod,
+)
+
+
+def make_payment(payment_id, amount, hour=12, order_id=None, **fields):
+    payment = Mock(spec=Payment)
+    payment.id = payment_id
+    payment.order_id = order_id or payment_id
+    payment.gateway = PaymentGateway.STRIPE
+    payment.amount = Decimal(amount)
+    payment.fee_amount = Decimal("0.50")
+    payment.net_amount = None
+    payment.status = PaymentStatus.COMPLETED
+    payment.method = PaymentMethod.CARD
+    payment.created_at = datetime(2024, 5, 1, hour, 15)
+    for name, value in fields.items():
+        setattr(payment, name, value)
+    return payment
+
+
+class RecordingSession:
+    """Returns canned rows for each statement in the order they are executed"""
+
+    def __init__(self, payments, refunds=(), mismatches=(), duplicates=()):
+        self.results = [payments, list(refunds), list(mismatches), list(duplicates)]
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        rows = self.results[len(self.statements) - 1]
+        result = Mock()
+        result.scalars.return_value.all.return_value = rows
+        result.all.return_value = rows
+        return result
+
+
+class TestDailyReconciliationReport:
+    """Daily report built from one scan of the day's payments"""
+
+    @pytest.mark.asyncio
+    async def test_discrepancies_use_a_fixed_number_of_queries(self):
+        payments = [make_payment(n, "20.00") for n in range(1, 501)]
+        db = RecordingSession(
+            payments,
+            mismatches=[(3, Decimal("25.00"))],
+            duplicates=[(7, 8), (7, 9), (8, 7)],
+        )
+
+        service = PaymentReconciliationService()
+        report = await service.generate_daily_reconciliation_report(
+            db, date(2024, 5, 1)
+        )
+
+        # Payments, refunds, amount mismatches and duplicates
+        assert len(db.statements) == 4
+        assert report["discrepancies"] == [
+            {
+                "type": "amount_mismatch",
+                "payment_id": 3,
+                "order_id": 3,
+                "expected": 25.0,
+                "actual": 20.0,
+                "difference": -5.0,
+            },
+            {
+                "type": "potential_duplicate",
+                "payment_id": 7,
+                "order_id": 7,
+                "duplicate_payment_ids": [8, 9],
+                "amount": 20.0,
+            },
+            {
+                "type": "potential_duplicate",
+                "payment_id": 8,
+                "order_id": 8,
+                "duplicate_payment_ids": [7],
+                "amount": 20.0,
+            },
+        ]
+
+    @pytest.mark.asyncio
+    async def test_breakdowns(self):
+        payments = [
+            make_payment(1, "10.00", hour=9),
+            make_payment(2, "30.00", hour=9, method=None),
+            make_payment(
+                3,
+                "40.00",
+                hour=18,
+                gateway=PaymentGateway.SQUARE,
+                status=PaymentStatus.FAILED,
+                net_amount=Decimal("39.00"),
+            ),
+        ]
+        db = RecordingSession(payments)
+
+        service = PaymentReconciliationService()
+        report = await service.generate_daily_reconciliation_report(
+            db, date(2024, 5, 1)
+        )
+
+        assert report["summary"]["total_transactions"] == 3
+        assert report["summary"]["total_gross_amount"] == 80.0
+        assert report["summary"]["total_fees"] == 1.5
+        assert report["summary"]["total_net_amount"] == 79.0
+        assert report["by_gateway"]["stripe"]["count"] == 2
+        assert report["by_gateway"]["square"]["failed"] == 1
+        assert report["hourly_breakdown"] == {
+            9: {"count": 2, "total_amount": 40.0, "average_amount": 20.0},
+            18: {"count": 1, "total_amount": 40.0, "average_amount": 40.0},
+        }
+        assert report["payment_methods"]["unknown"]["count"] == 1
+        assert report["payment_methods"]["card"]["failed"] == 1
+        assert report["discrepancies"] == []
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from ..schemas.pos_schemas import SyncResponse
 
@@ -131,6 +131,47 @@ class BasePOSAdapter(ABC):
         """Delete a modifier from POS system"""
         pass
 
+    async def batch_upsert_menu_entities(
+        self,
+        entity_type: str,
+        entities: List[Tuple[Optional[str], Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Create or update several menu entities of one type in POS system
+
+        ``entities`` holds ``(pos_entity_id, entity_data)`` pairs, where a
+        missing POS ID means the entity must be created. Returns one result
+        per input pair, in the same order, each containing the POS ``id`` or,
+        for an entity that failed, an ``error``. Implementations raise only
+        when no entity was written.
+
+        The default implementation issues one create/update call per entity;
+        adapters whose vendor exposes a batch endpoint should override it.
+        """
+        handlers = {
+            "category": (self.create_menu_category, self.update_menu_category),
+            "item": (self.create_menu_item, self.update_menu_item),
+            "modifier_group": (
+                self.create_modifier_group,
+                self.update_modifier_group,
+            ),
+        }
+        if entity_type not in handlers:
+            raise ValueError(f"Batch upsert not supported for {entity_type}")
+
+        create, update = handlers[entity_type]
+        results = []
+        for pos_entity_id, entity_data in entities:
+            # Entities already written keep their results if a later one fails
+            try:
+                if pos_entity_id:
+                    result = await update(pos_entity_id, entity_data)
+                else:
+                    result = await create(entity_data)
+            except Exception as e:
+                result = {"error": str(e)}
+            results.append(result or {})
+        return results
+
     def transform_category_to_pos(
         self, category_data: Dict[str, Any]
     ) -> Dict[str, Any]:
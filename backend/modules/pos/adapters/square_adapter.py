@@ -1,7 +1,7 @@
 import httpx
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from .base_adapter import BasePOSAdapter
 from ..schemas.pos_schemas import SyncResponse
@@ -721,6 +721,153 @@ class SquareAdapter(BasePOSAdapter):
         # Simplified implementation
         return True
 
+    async def batch_upsert_menu_entities(
+        self,
+        entity_type: str,
+        entities: List[Tuple[Optional[str], Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Create or update menu entities using Square's catalog batch upsert
+
+        Existing objects are fetched with a single batch-retrieve so their
+        versions (and item variations / list modifiers) are preserved, then
+        all objects are written in one batch-upsert request. Square applies
+        the request as a whole, so a failure means nothing was written.
+        """
+        if entity_type not in ("category", "item", "modifier_group"):
+            return await super().batch_upsert_menu_entities(entity_type, entities)
+        if not entities:
+            return []
+
+        existing_ids = [pos_id for pos_id, _ in entities if pos_id]
+
+        async with httpx.AsyncClient() as client:
+            try:
+                existing_objects = {}
+                if existing_ids and entity_type != "category":
+                    existing_response = await client.post(
+                        f"{self.base_url}/catalog/batch-retrieve",
+                        headers=self.headers,
+                        json={"object_ids": existing_ids},
+                        timeout=30.0,
+                    )
+                    existing_response.raise_for_status()
+                    existing_objects = {
+                        obj.get("id"): obj
+                        for obj in existing_response.json().get("objects", [])
+                    }
+
+                objects = [
+                    self._build_catalog_object(
+                        entity_type,
+                        pos_id,
+                        entity_data,
+                        existing_objects.get(pos_id, {}),
+                    )
+                    for pos_id, entity_data in entities
+                ]
+
+                payload = {
+                    "idempotency_key": f"batch_{entity_type}_{datetime.utcnow().timestamp()}",
+                    "batches": [{"objects": objects}],
+                }
+
+                response = await client.post(
+                    f"{self.base_url}/catalog/batch-upsert",
+                    headers=self.headers,
+                    json=payload,
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                data = response.json()
+            except httpx.HTTPError as e:
+                raise Exception(
+                    f"Failed to batch upsert {entity_type} objects in Square: {str(e)}"
+                )
+
+        id_mappings = {
+            mapping.get("client_object_id"): mapping.get("object_id")
+            for mapping in data.get("id_mappings", [])
+        }
+
+        return [
+            {"id": id_mappings.get(obj["id"], obj["id"]), "type": obj["type"]}
+            for obj in objects
+        ]
+
+    def _build_catalog_object(
+        self,
+        entity_type: str,
+        pos_entity_id: Optional[str],
+        entity_data: Dict[str, Any],
+        existing_object: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Build a Square catalog object for a batch upsert"""
+        entity_id = entity_data.get("id", "new")
+
+        if entity_type == "category":
+            square_category = self.transform_category_to_pos(entity_data)
+            return {
+                "type": "CATEGORY",
+                "id": pos_entity_id or f"#category_{entity_id}",
+                "category_data": {"name": square_category["name"]},
+            }
+
+        if entity_type == "item":
+            square_item = self.transform_item_to_pos(entity_data)
+            item_data = {
+                "name": square_item["name"],
+                "description": square_item.get("description", ""),
+                "category_id": square_item.get("category_id"),
+            }
+            if pos_entity_id:
+                item_data["variations"] = existing_object.get("item_data", {}).get(
+                    "variations", []
+                )
+                return {
+                    "type": "ITEM",
+                    "id": pos_entity_id,
+                    "version": existing_object.get("version"),
+                    "item_data": item_data,
+                }
+
+            item_data["variations"] = [
+                {
+                    "type": "ITEM_VARIATION",
+                    "id": f"#variation_{entity_id}",
+                    "item_variation_data": {
+                        "item_id": f"#item_{entity_id}",
+                        "name": "Regular",
+                        "pricing_type": "FIXED_PRICING",
+                        "price_money": {
+                            "amount": int(square_item["price"] * 100),
+                            "currency": "USD",
+                        },
+                    },
+                }
+            ]
+            return {"type": "ITEM", "id": f"#item_{entity_id}", "item_data": item_data}
+
+        square_modifier_group = self.transform_modifier_group_to_pos(entity_data)
+        modifier_list_data = {
+            "name": square_modifier_group["name"],
+            "selection_type": (
+                "SINGLE"
+                if square_modifier_group["selection_type"] == "single"
+                else "MULTIPLE"
+            ),
+            "modifiers": existing_object.get("modifier_list_data", {}).get(
+                "modifiers", []
+            ),
+        }
+        catalog_object = {
+            "type": "MODIFIER_LIST",
+            "id": pos_entity_id or f"#modifier_list_{entity_id}",
+            "modifier_list_data": modifier_list_data,
+        }
+        if pos_entity_id:
+            catalog_object["version"] = existing_object.get("version")
+        return catalog_object
+
     def transform_category_from_pos(
         self, pos_category_data: Dict[str, Any]
     ) -> Dict[str, Any]:
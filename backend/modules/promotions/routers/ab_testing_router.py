@@ -103,6 +103,7 @@ def assign_user_to_variant(
     test_id: str,
     customer_id: Optional[int] = Body(None),
     session_id: Optional[str] = Body(None),
+    record_exposure: bool = Body(False),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
@@ -111,7 +112,9 @@ def assign_user_to_variant(
 
     This endpoint is used by the frontend to determine which promotion
     variant to show to a user. The assignment is deterministic based on
-    the user identifier, ensuring consistent experience.
+    the user identifier, ensuring consistent experience. Set
+    record_exposure when the variant is actually shown, to count an
+    impression for it.
     """
     try:
         if not customer_id and not session_id:
@@ -122,7 +125,10 @@ def assign_user_to_variant(
 
         service = ABTestingService(db)
         assignment = service.assign_user_to_variant(
-            test_id=test_id, customer_id=customer_id, session_id=session_id
+            test_id=test_id,
+            customer_id=customer_id,
+            session_id=session_id,
+            record_exposure=record_exposure,
         )
         return assignment
     except ValueError as e:
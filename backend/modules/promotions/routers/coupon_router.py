@@ -1,17 +1,19 @@
 # backend/modules/promotions/routers/coupon_router.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from core.database import get_db
+from core.database import SessionLocal, get_db
 from core.auth import get_current_user, require_admin
 from modules.customers.models.customer_models import Customer
 
 from ..schemas.promotion_schemas import (
     CouponCreate,
     CouponBulkCreate,
+    CouponBatchResponse,
     Coupon as CouponSchema,
     CouponValidationRequest,
     CouponValidationResponse,
@@ -41,25 +43,20 @@ def create_coupon(
         raise HTTPException(status_code=500, detail="Failed to create coupon")
 
 
-@router.post("/bulk", response_model=List[CouponSchema])
+@router.post("/bulk", response_model=CouponBatchResponse)
 def create_bulk_coupons(
     bulk_data: CouponBulkCreate,
     db: Session = Depends(get_db),
     current_user=Depends(require_admin),
 ):
-    """Create multiple coupons in bulk"""
+    """Create multiple coupons in bulk; download the codes from the batch export"""
     try:
-        if bulk_data.quantity > 10000:
-            raise HTTPException(
-                status_code=400, detail="Maximum 10,000 coupons per batch"
-            )
-
         service = CouponService(db)
-        coupons = service.create_bulk_coupons(
+        batch = service.create_bulk_coupons(
             bulk_data=bulk_data,
             generated_by=current_user.id if hasattr(current_user, "id") else None,
         )
-        return coupons
+        return batch
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -192,6 +189,29 @@ def get_batch_coupons(
         raise HTTPException(status_code=500, detail="Failed to get batch coupons")
 
 
+@router.get("/batch/{batch_id}/export")
+def export_batch_coupons(
+    batch_id: str, db: Session = Depends(get_db), current_user=Depends(require_admin)
+):
+    """Download the coupons of a batch as CSV"""
+    if not CouponService(db).batch_exists(batch_id):
+        raise HTTPException(status_code=404, detail="Coupon batch not found")
+
+    def stream_rows():
+        # The response outlives the request session, so stream from our own
+        export_db = SessionLocal()
+        try:
+            yield from CouponService(export_db).iter_batch_csv(batch_id)
+        finally:
+            export_db.close()
+
+    return StreamingResponse(
+        stream_rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={batch_id}.csv"},
+    )
+
+
 @router.get("/usage-history")
 def get_coupon_usage_history(
     coupon_id: Optional[int] = None,
@@ -159,7 +159,7 @@ class CouponBulkCreate(BaseModel):
     """Schema for bulk coupon creation"""
 
     promotion_id: int
-    quantity: int = Field(..., ge=1, le=10000)
+    quantity: int = Field(..., ge=1, le=500000)
     coupon_type: CouponType = CouponType.MULTI_USE
     max_uses: int = Field(1, ge=1)
     prefix: Optional[str] = Field(None, max_length=10)
@@ -169,6 +169,18 @@ class CouponBulkCreate(BaseModel):
     valid_until: Optional[datetime] = None
 
 
+class CouponBatchResponse(BaseModel):
+    """Schema for the result of bulk coupon creation"""
+
+    batch_id: str
+    promotion_id: int
+    requested: int
+    created: int
+    collisions: int = 0  # Generated codes that were taken and regenerated
+    valid_from: Optional[datetime] = None
+    valid_until: Optional[datetime] = None
+
+
 class Coupon(CouponBase):
     """Full coupon schema for responses"""
 
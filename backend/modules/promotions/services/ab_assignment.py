@@ -0,0 +1,272 @@
+# backend/modules/promotions/services/ab_assignment.py
+
+"""
+Stateless A/B test variant assignment.
+
+A subject is bucketed by a stable hash of (test_id, subject_id) against the
+variants' cumulative traffic weights, so every worker assigns the same
+variant without storing anything. Test definitions are cached per worker,
+and exposures are counted in memory and written to the promotions' impression
+counters in batches from a background thread, on a timer and at shutdown.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from ..models.promotion_models import Promotion
+
+logger = logging.getLogger(__name__)
+
+# Reload cached test definitions at least this often to pick up changes
+# committed by other workers
+TEST_DEFINITION_MAX_AGE_SECONDS = 30
+
+# Exposures buffered before a background flush is started
+EXPOSURE_FLUSH_SIZE = 500
+
+# Buffered exposures are flushed at least this often
+EXPOSURE_FLUSH_INTERVAL_SECONDS = 10
+
+
+@dataclass(frozen=True)
+class ABVariant:
+    """A test variant and the upper bound of its traffic range"""
+
+    variant_id: str
+    variant_type: str
+    promotion_id: int
+    traffic_percentage: float
+    upper_bound: float
+
+
+class ABTestDefinition:
+    """Variants of one A/B test in assignment order, control first"""
+
+    def __init__(self, test_id: str, promotions: List[Promotion]):
+        self.test_id = test_id
+        self.loaded_at = time.monotonic()
+
+        ordered = sorted(
+            promotions,
+            key=lambda p: (
+                p.metadata["ab_test"]["variant_type"] != "control",
+                p.metadata["ab_test"]["variant_id"],
+            ),
+        )
+        self.variants: List[ABVariant] = []
+        cumulative = 0.0
+        for promotion in ordered:
+            ab_test_data = promotion.metadata["ab_test"]
+            cumulative += ab_test_data["traffic_percentage"]
+            self.variants.append(
+                ABVariant(
+                    variant_id=ab_test_data["variant_id"],
+                    variant_type=ab_test_data["variant_type"],
+                    promotion_id=promotion.id,
+                    traffic_percentage=ab_test_data["traffic_percentage"],
+                    upper_bound=cumulative,
+                )
+            )
+        self.upper_bounds = [variant.upper_bound for variant in self.variants]
+
+        self.control = next(
+            (v for v in self.variants if v.variant_type == "control"), None
+        )
+        control_promotion = next(
+            (
+                p
+                for p in promotions
+                if p.metadata["ab_test"]["variant_type"] == "control"
+            ),
+            None,
+        )
+        self.status = (
+            control_promotion.metadata["ab_test"]["test_status"]
+            if control_promotion
+            else None
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return self.control is not None and self.status == "active"
+
+    def assign(self, subject_id: str) -> Tuple[ABVariant, int]:
+        """Variant for a subject and the subject's 0-99 hash bucket"""
+        bucket, position = assignment_position(self.test_id, subject_id)
+        index = bisect_right(self.upper_bounds, position)
+        if index >= len(self.variants):
+            # Weights summing to less than 100 leave the rest on control
+            return self.control, bucket
+        return self.variants[index], bucket
+
+
+def assignment_position(test_id: str, subject_id: str) -> Tuple[int, float]:
+    """
+    Stable position of a subject in [0, 100).
+
+    The integer part is the md5 bucket assignments have always used, so
+    running tests keep their split; the fraction refines it for
+    non-integer traffic weights.
+    """
+    subject_hash = int(hashlib.md5(f"{test_id}:{subject_id}".encode()).hexdigest(), 16)
+    bucket = subject_hash % 100
+    return bucket, bucket + (subject_hash // 100 % 10000) / 10000
+
+
+class ABTestRegistry:
+    """Per-worker cache of A/B test definitions"""
+
+    def __init__(self, max_age_seconds: float = TEST_DEFINITION_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self.definitions: Dict[str, ABTestDefinition] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, test_id: str, loader: Callable[[], List[Promotion]]
+    ) -> Optional[ABTestDefinition]:
+        definition = self.definitions.get(test_id)
+        if (
+            definition is not None
+            and time.monotonic() - definition.loaded_at < self.max_age_seconds
+        ):
+            return definition
+
+        promotions = loader()
+        if not promotions:
+            return None
+        definition = ABTestDefinition(test_id, promotions)
+        with self._lock:
+            self.definitions[test_id] = definition
+        return definition
+
+    def invalidate(self, test_id: Optional[str] = None):
+        """Reload one test, or every test, on next use"""
+        with self._lock:
+            if test_id is None:
+                self.definitions.clear()
+            else:
+                self.definitions.pop(test_id, None)
+
+
+class ExposureRecorder:
+    """Buffers variant exposures and adds them to impression counts in batches"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        flush_size: int = EXPOSURE_FLUSH_SIZE,
+        flush_interval: float = EXPOSURE_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.pending: Counter = Counter()
+        self.pending_count = 0
+        self.last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ab-exposures"
+        )
+        self._timer: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def record(self, promotion_id: int):
+        """Count one exposure; never touches the database on the caller's thread"""
+        with self._lock:
+            self.pending[promotion_id] += 1
+            self.pending_count += 1
+            due = self.pending_count >= self.flush_size and not self._stopped.is_set()
+            if due:
+                self.last_flush = time.monotonic()
+            if self._timer is None and not self._stopped.is_set():
+                self._timer = threading.Thread(
+                    target=self._flush_periodically,
+                    name="ab-exposures-timer",
+                    daemon=True,
+                )
+                self._timer.start()
+        if due:
+            self._executor.submit(self.flush)
+
+    def close(self):
+        """Stop the timer and write what is still buffered; called at shutdown"""
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.join()
+        # Let a flush already started finish first
+        self._executor.shutdown(wait=True)
+        self.flush()
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Write buffered exposures; returns the number of exposures written"""
+        with self._lock:
+            pending, self.pending = self.pending, Counter()
+            self.pending_count = 0
+        if not pending:
+            return 0
+
+        owns_session = db is None
+        try:
+            if owns_session:
+                db = self._new_session()
+            promotions = Promotion.__table__
+            db.execute(
+                update(promotions)
+                .where(promotions.c.id == bindparam("b_promotion_id"))
+                .values(
+                    impressions=promotions.c.impressions + bindparam("b_exposures")
+                ),
+                [
+                    {"b_promotion_id": promotion_id, "b_exposures": exposures}
+                    for promotion_id, exposures in pending.items()
+                ],
+            )
+            db.commit()
+        except Exception as e:
+            if db is not None:
+                db.rollback()
+            # Keep the counts for the next flush
+            with self._lock:
+                self.pending.update(pending)
+                self.pending_count += sum(pending.values())
+            logger.error(f"Failed to flush A/B test exposures: {e}")
+            return 0
+        finally:
+            if owns_session and db is not None:
+                db.close()
+
+        return sum(pending.values())
+
+    def _flush_periodically(self):
+        wait = self.flush_interval
+        while not self._stopped.wait(wait):
+            with self._lock:
+                wait = self.last_flush + self.flush_interval - time.monotonic()
+                due = wait <= 0
+                if due:
+                    self.last_flush = time.monotonic()
+                    wait = self.flush_interval
+            if due:
+                self.flush()
+
+    def _new_session(self) -> Session:
+        if self.session_factory is None:
+            from core.database import SessionLocal
+
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+
+# Global instances
+ab_test_registry = ABTestRegistry()
+exposure_recorder = ExposureRecorder()
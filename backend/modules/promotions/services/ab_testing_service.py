@@ -6,7 +6,7 @@ from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import logging
 import random
-import hashlib
+from types import SimpleNamespace
 
 from ..models.promotion_models import (
     Promotion,
@@ -16,6 +16,7 @@ from ..models.promotion_models import (
 )
 from ..schemas.promotion_schemas import PromotionCreate
 from ..services.promotion_service import PromotionService
+from .ab_assignment import ab_test_registry, exposure_recorder
 from modules.customers.models.customer_models import Customer
 
 logger = logging.getLogger(__name__)
@@ -155,91 +156,52 @@ class ABTestingService:
         test_id: str,
         customer_id: Optional[int] = None,
         session_id: Optional[str] = None,
+        record_exposure: bool = False,
     ) -> Dict[str, Any]:
         """
         Assign a user to a variant in an A/B test
 
+        The assignment is a stable hash of the test and user, so it needs no
+        stored state and is identical on every worker. Test definitions are
+        cached, so only the first assignment on a worker reads the database.
+
         Args:
             test_id: A/B test identifier
             customer_id: Customer ID (if authenticated)
             session_id: Session ID (for anonymous users)
+            record_exposure: Count an impression for the assigned variant
 
         Returns:
             Dictionary with variant assignment information
         """
         try:
-            # Get test promotions
-            test_promotions = (
-                self.db.query(Promotion)
-                .filter(Promotion.metadata["ab_test"]["test_id"].astext == test_id)
-                .all()
-            )
-
-            if not test_promotions:
-                raise ValueError(f"A/B test {test_id} not found")
-
-            # Check if test is active
-            control_promotion = next(
-                (
-                    p
-                    for p in test_promotions
-                    if p.metadata["ab_test"]["variant_type"] == "control"
-                ),
-                None,
-            )
-            if (
-                not control_promotion
-                or control_promotion.metadata["ab_test"]["test_status"] != "active"
-            ):
-                raise ValueError(f"A/B test {test_id} is not active")
-
             # Generate deterministic assignment based on user identifier
             user_identifier = str(customer_id) if customer_id else session_id
             if not user_identifier:
                 raise ValueError("Either customer_id or session_id must be provided")
 
-            # Create hash for consistent assignment
-            hash_input = f"{test_id}:{user_identifier}"
-            user_hash = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-            assignment_value = (user_hash % 100) + 1  # 1-100
-
-            # Determine variant based on traffic split
-            cumulative_percentage = 0
-            assigned_promotion = None
-
-            # Sort promotions to ensure consistent ordering (control first, then variants)
-            sorted_promotions = sorted(
-                test_promotions,
-                key=lambda p: (
-                    p.metadata["ab_test"]["variant_type"] != "control",
-                    p.metadata["ab_test"]["variant_id"],
-                ),
+            definition = ab_test_registry.get(
+                test_id, lambda: self._get_test_promotions(test_id)
             )
+            if definition is None:
+                raise ValueError(f"A/B test {test_id} not found")
+            if not definition.is_active:
+                raise ValueError(f"A/B test {test_id} is not active")
 
-            for promotion in sorted_promotions:
-                ab_test_data = promotion.metadata["ab_test"]
-                traffic_percentage = ab_test_data["traffic_percentage"]
-                cumulative_percentage += traffic_percentage
-
-                if assignment_value <= cumulative_percentage:
-                    assigned_promotion = promotion
-                    break
+            variant, assignment_hash = definition.assign(user_identifier)
 
-            if not assigned_promotion:
-                # Fallback to control if something went wrong
-                assigned_promotion = control_promotion
+            # Impressions are written in batches off the request path
+            if record_exposure:
+                exposure_recorder.record(variant.promotion_id)
 
-            # Record assignment (you might want to store this in a separate table)
             assignment_data = {
                 "test_id": test_id,
                 "customer_id": customer_id,
                 "session_id": session_id,
-                "assigned_variant": assigned_promotion.metadata["ab_test"][
-                    "variant_id"
-                ],
-                "promotion_id": assigned_promotion.id,
+                "assigned_variant": variant.variant_id,
+                "promotion_id": variant.promotion_id,
                 "assigned_at": datetime.utcnow().isoformat(),
-                "assignment_hash": user_hash % 100,
+                "assignment_hash": assignment_hash,
             }
 
             return assignment_data
@@ -248,6 +210,14 @@ class ABTestingService:
             logger.error(f"Error assigning user to variant: {str(e)}")
             raise
 
+    def _get_test_promotions(self, test_id: str) -> List[Promotion]:
+        """Promotions taking part in an A/B test"""
+        return (
+            self.db.query(Promotion)
+            .filter(Promotion.metadata["ab_test"]["test_id"].astext == test_id)
+            .all()
+        )
+
     def start_ab_test(self, test_id: str) -> Dict[str, Any]:
         """Start an A/B test by activating all its promotions"""
 
@@ -270,6 +240,7 @@ class ABTestingService:
                 ] = datetime.utcnow().isoformat()
 
             self.db.commit()
+            ab_test_registry.invalidate(test_id)
 
             logger.info(
                 f"Started A/B test {test_id} with {len(test_promotions)} promotions"
@@ -322,6 +293,7 @@ class ABTestingService:
                         promotion.metadata["ab_test"]["test_status"] = "loser"
 
             self.db.commit()
+            ab_test_registry.invalidate(test_id)
 
             logger.info(
                 f"Stopped A/B test {test_id}, winner: {winning_variant or 'none'}"
@@ -344,11 +316,10 @@ class ABTestingService:
         """Get comprehensive results for an A/B test"""
 
         try:
-            test_promotions = (
-                self.db.query(Promotion)
-                .filter(Promotion.metadata["ab_test"]["test_id"].astext == test_id)
-                .all()
-            )
+            # Count exposures still buffered on this worker
+            exposure_recorder.flush()
+
+            test_promotions = self._get_test_promotions(test_id)
 
             if not test_promotions:
                 raise ValueError(f"A/B test {test_id} not found")
@@ -365,32 +336,40 @@ class ABTestingService:
             test_config = control_promotion.metadata["ab_test"]["test_config"]
             test_name = control_promotion.metadata["ab_test"]["test_name"]
 
+            # Usage statistics for every variant in one grouped query
+            usage_by_promotion = {
+                row.promotion_id: row
+                for row in self.db.query(
+                    PromotionUsage.promotion_id,
+                    func.count(PromotionUsage.id).label("total_usage"),
+                    func.count(func.distinct(PromotionUsage.customer_id)).label(
+                        "unique_customers"
+                    ),
+                    func.sum(PromotionUsage.discount_amount).label("total_discount"),
+                    func.sum(PromotionUsage.final_order_amount).label("total_revenue"),
+                    func.avg(PromotionUsage.final_order_amount).label(
+                        "avg_order_value"
+                    ),
+                )
+                .filter(
+                    PromotionUsage.promotion_id.in_([p.id for p in test_promotions])
+                )
+                .group_by(PromotionUsage.promotion_id)
+            }
+            no_usage = SimpleNamespace(
+                total_usage=0,
+                unique_customers=0,
+                total_discount=0,
+                total_revenue=0,
+                avg_order_value=0,
+            )
+
             # Calculate results for each variant
             variant_results = []
 
             for promotion in test_promotions:
                 ab_test_data = promotion.metadata["ab_test"]
-
-                # Get usage statistics
-                usage_stats = (
-                    self.db.query(
-                        func.count(PromotionUsage.id).label("total_usage"),
-                        func.count(func.distinct(PromotionUsage.customer_id)).label(
-                            "unique_customers"
-                        ),
-                        func.sum(PromotionUsage.discount_amount).label(
-                            "total_discount"
-                        ),
-                        func.sum(PromotionUsage.final_order_amount).label(
-                            "total_revenue"
-                        ),
-                        func.avg(PromotionUsage.final_order_amount).label(
-                            "avg_order_value"
-                        ),
-                    )
-                    .filter(PromotionUsage.promotion_id == promotion.id)
-                    .first()
-                )
+                usage_stats = usage_by_promotion.get(promotion.id, no_usage)
 
                 # Calculate conversion rate (assuming impressions are tracked)
                 impressions = promotion.impressions or 0
@@ -1,9 +1,12 @@
 # backend/modules/promotions/services/coupon_service.py
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
-from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import and_, or_, func, insert, select
+from sqlalchemy.dialects import postgresql
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from datetime import datetime, timedelta
+import csv
+import io
 import string
 import secrets
 import random
@@ -19,6 +22,7 @@ from ..models.promotion_models import (
 from ..schemas.promotion_schemas import (
     CouponCreate,
     CouponBulkCreate,
+    CouponBatchResponse,
     CouponValidationRequest,
     CouponValidationResponse,
 )
@@ -26,6 +30,20 @@ from modules.customers.models.customer_models import Customer
 
 logger = logging.getLogger(__name__)
 
+# Codes generated, checked and inserted per statement in bulk generation
+BULK_COUPON_CHUNK_SIZE = 5000
+
+# Regeneration rounds per chunk before giving up on a crowded code space
+BULK_COUPON_MAX_ROUNDS = 10
+
+# Possible codes required per requested coupon, keeping collisions rare
+BULK_COUPON_CODE_SPACE_FACTOR = 10
+
+# Columns of the batch CSV download
+BATCH_CSV_COLUMNS = ["code", "coupon_type", "max_uses", "valid_from", "valid_until"]
+
+_system_random = secrets.SystemRandom()
+
 
 class CouponService:
     """Service for managing coupons and coupon codes"""
@@ -49,13 +67,7 @@ class CouponService:
             suffix: Optional suffix
             exclude_ambiguous: Exclude ambiguous characters (0, O, 1, I, etc.)
         """
-        # Character sets
-        if exclude_ambiguous:
-            # Exclude visually similar characters
-            chars = string.ascii_uppercase + string.digits
-            chars = chars.translate(str.maketrans("", "", "01IO"))
-        else:
-            chars = string.ascii_uppercase + string.digits
+        chars = _code_alphabet(exclude_ambiguous)
 
         # Generate random part
         random_part = "".join(secrets.choice(chars) for _ in range(length))
@@ -157,8 +169,15 @@ class CouponService:
 
     def create_bulk_coupons(
         self, bulk_data: CouponBulkCreate, generated_by: Optional[int] = None
-    ) -> List[Coupon]:
-        """Create multiple coupons in bulk"""
+    ) -> CouponBatchResponse:
+        """
+        Create a batch of coupons.
+
+        Codes are generated in chunks, each checked against existing codes in
+        one statement and inserted with a single executemany; codes that were
+        already taken are regenerated. Returns batch counts rather than the
+        coupons themselves, which can be downloaded with ``iter_batch_csv``.
+        """
         try:
             # Validate promotion
             promotion = (
@@ -175,6 +194,14 @@ class CouponService:
                     f"Promotion {bulk_data.promotion_id} not found or cancelled"
                 )
 
+            chars = _code_alphabet(exclude_ambiguous=True)
+            code_space = len(chars) ** bulk_data.length
+            if code_space < bulk_data.quantity * BULK_COUPON_CODE_SPACE_FACTOR:
+                raise ValueError(
+                    f"Code length {bulk_data.length} cannot produce "
+                    f"{bulk_data.quantity} unique codes"
+                )
+
             # Generate batch ID
             batch_id = f"BULK_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(4).upper()}"
 
@@ -182,64 +209,137 @@ class CouponService:
             valid_from = bulk_data.valid_from or promotion.start_date
             valid_until = bulk_data.valid_until or promotion.end_date
 
-            coupons = []
-            created_codes = set()
-
-            for i in range(bulk_data.quantity):
-                # Generate unique code
-                max_attempts = 10
-                attempts = 0
-                code = None
+            values = {
+                "promotion_id": bulk_data.promotion_id,
+                "coupon_type": bulk_data.coupon_type,
+                "max_uses": bulk_data.max_uses,
+                "valid_from": valid_from,
+                "valid_until": valid_until,
+                "batch_id": batch_id,
+                "generation_method": "bulk",
+                "generated_by": generated_by,
+            }
 
-                while attempts < max_attempts:
-                    code = self.generate_coupon_code(
-                        length=bulk_data.length,
-                        prefix=bulk_data.prefix,
-                        suffix=bulk_data.suffix,
+            created = 0
+            collisions = 0
+            while created < bulk_data.quantity:
+                wanted = min(BULK_COUPON_CHUNK_SIZE, bulk_data.quantity - created)
+                for _ in range(BULK_COUPON_MAX_ROUNDS):
+                    candidates = _random_codes(
+                        wanted,
+                        chars,
+                        bulk_data.length,
+                        bulk_data.prefix,
+                        bulk_data.suffix,
                     )
-
-                    # Check against database and current batch
-                    existing = self.db.query(Coupon).filter(Coupon.code == code).first()
-                    if not existing and code not in created_codes:
-                        created_codes.add(code)
+                    inserted = self._insert_free_codes(candidates, values)
+                    collisions += len(candidates) - inserted
+                    created += inserted
+                    wanted -= inserted
+                    if not wanted:
                         break
+                else:
+                    raise ValueError(
+                        f"Could not generate unique codes for batch {batch_id}; "
+                        f"use a longer code length"
+                    )
 
-                    attempts += 1
-
-                if not code or attempts >= max_attempts:
-                    raise ValueError(f"Could not generate unique code for coupon {i+1}")
-
-                coupon = Coupon(
-                    promotion_id=bulk_data.promotion_id,
-                    code=code,
-                    coupon_type=bulk_data.coupon_type,
-                    max_uses=bulk_data.max_uses,
-                    valid_from=valid_from,
-                    valid_until=valid_until,
-                    batch_id=batch_id,
-                    generation_method="bulk",
-                    generated_by=generated_by,
-                )
-
-                coupons.append(coupon)
-
-            # Bulk insert
-            self.db.bulk_save_objects(coupons)
             self.db.commit()
 
-            # Refresh objects to get IDs
-            created_coupons = (
-                self.db.query(Coupon).filter(Coupon.batch_id == batch_id).all()
+            logger.info(
+                f"Created {created} coupons in batch {batch_id} "
+                f"({collisions} code collisions regenerated)"
+            )
+            return CouponBatchResponse(
+                batch_id=batch_id,
+                promotion_id=bulk_data.promotion_id,
+                requested=bulk_data.quantity,
+                created=created,
+                collisions=collisions,
+                valid_from=valid_from,
+                valid_until=valid_until,
             )
-
-            logger.info(f"Created {len(created_coupons)} coupons in batch {batch_id}")
-            return created_coupons
 
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error creating bulk coupons: {str(e)}")
             raise
 
+    def _insert_free_codes(self, codes: List[str], values: Dict[str, Any]) -> int:
+        """Insert the codes that are not taken yet; returns how many were"""
+        coupons = Coupon.__table__
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Let the unique index reject taken codes, including ones
+            # inserted concurrently by another batch
+            statement = (
+                postgresql.insert(coupons)
+                .on_conflict_do_nothing(index_elements=[coupons.c.code])
+                .returning(coupons.c.code)
+            )
+            result = self.db.execute(
+                statement, [{**values, "code": code} for code in codes]
+            )
+            return len(result.all())
+
+        taken = set(
+            self.db.execute(
+                select(coupons.c.code).where(coupons.c.code.in_(codes))
+            ).scalars()
+        )
+        free = [code for code in codes if code not in taken]
+        if free:
+            self.db.execute(
+                insert(coupons), [{**values, "code": code} for code in free]
+            )
+        return len(free)
+
+    def iter_batch_csv(self, batch_id: str) -> Iterator[str]:
+        """Stream a batch's coupons as CSV, a chunk of rows at a time"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush() -> str:
+            content = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return content
+
+        writer.writerow(BATCH_CSV_COLUMNS)
+        yield flush()
+
+        rows = self.db.execute(
+            select(
+                Coupon.code,
+                Coupon.coupon_type,
+                Coupon.max_uses,
+                Coupon.valid_from,
+                Coupon.valid_until,
+            )
+            .where(Coupon.batch_id == batch_id)
+            .order_by(Coupon.id)
+            .execution_options(yield_per=BULK_COUPON_CHUNK_SIZE)
+        )
+        for partition in rows.partitions():
+            for code, coupon_type, max_uses, valid_from, valid_until in partition:
+                writer.writerow(
+                    [
+                        code,
+                        coupon_type,
+                        max_uses,
+                        valid_from.isoformat() if valid_from else "",
+                        valid_until.isoformat() if valid_until else "",
+                    ]
+                )
+            yield flush()
+
+    def batch_exists(self, batch_id: str) -> bool:
+        """Check whether any coupon belongs to the batch"""
+        return (
+            self.db.query(Coupon.id).filter(Coupon.batch_id == batch_id).first()
+            is not None
+        )
+
     def validate_coupon(
         self, validation_request: CouponValidationRequest
     ) -> CouponValidationResponse:
@@ -606,3 +706,28 @@ class CouponService:
             self.db.rollback()
             logger.error(f"Error cleaning up expired coupons: {str(e)}")
             return 0
+
+
+def _code_alphabet(exclude_ambiguous: bool) -> str:
+    chars = string.ascii_uppercase + string.digits
+    if exclude_ambiguous:
+        # Exclude visually similar characters
+        chars = chars.translate(str.maketrans("", "", "01IO"))
+    return chars
+
+
+def _random_codes(
+    count: int,
+    chars: str,
+    length: int,
+    prefix: Optional[str] = None,
+    suffix: Optional[str] = None,
+) -> List[str]:
+    """Distinct random codes with an optional prefix and suffix"""
+    prefix = prefix.upper() if prefix else ""
+    suffix = suffix.upper() if suffix else ""
+    codes = set()
+    while len(codes) < count:
+        random_part = "".join(_system_random.choices(chars, k=length))
+        codes.add(f"{prefix}{random_part}{suffix}")
+    return list(codes)
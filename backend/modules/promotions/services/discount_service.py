@@ -1,7 +1,7 @@
 # backend/modules/promotions/services/discount_service.py
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 import logging
@@ -11,13 +11,13 @@ from ..models.promotion_models import (
     Promotion,
     PromotionUsage,
     PromotionType,
-    PromotionStatus,
     DiscountTarget,
 )
 from ..schemas.promotion_schemas import (
     DiscountCalculationRequest,
     DiscountCalculationResponse,
 )
+from .promotion_index import CompiledPromotion, promotion_index_registry
 from modules.customers.models.customer_models import Customer
 
 logger = logging.getLogger(__name__)
@@ -225,131 +225,23 @@ class DiscountService:
         customer_tier: Optional[str],
         coupon_codes: Optional[List[str]] = None,
         promotion_ids: Optional[List[int]] = None,
-    ) -> List[Promotion]:
-        """Find all applicable promotions for the order"""
-
-        query = self.db.query(Promotion).filter(
-            Promotion.status == PromotionStatus.ACTIVE,
-            Promotion.start_date <= datetime.utcnow(),
-            Promotion.end_date >= datetime.utcnow(),
-            Promotion.auto_apply == True,  # Only auto-apply promotions
-        )
-
-        # Filter by specific promotion IDs if provided
-        if promotion_ids:
-            query = query.filter(Promotion.id.in_(promotion_ids))
-
-        # Filter by minimum order amount
-        query = query.filter(
-            or_(
-                Promotion.min_order_amount.is_(None),
-                Promotion.min_order_amount <= order_total,
-            )
-        )
-
-        # Filter by customer tier
-        if customer_tier:
-            query = query.filter(
-                or_(
-                    Promotion.target_tiers.is_(None),
-                    Promotion.target_tiers.contains([customer_tier]),
-                )
-            )
-
-        # Filter by usage limits
-        if customer:
-            # Check customer usage limits
-            query = query.filter(
-                or_(
-                    Promotion.max_uses_per_customer.is_(None),
-                    Promotion.max_uses_per_customer
-                    > func.coalesce(
-                        self.db.query(func.count(PromotionUsage.id))
-                        .filter(
-                            PromotionUsage.promotion_id == Promotion.id,
-                            PromotionUsage.customer_id == customer.id,
-                        )
-                        .scalar_subquery(),
-                        0,
-                    ),
-                )
-            )
+    ) -> List[CompiledPromotion]:
+        """
+        Find all applicable auto-apply promotions for the order.
 
-        # Filter by total usage limits
-        query = query.filter(
-            or_(
-                Promotion.max_uses_total.is_(None),
-                Promotion.max_uses_total > Promotion.current_uses,
-            )
+        Eligibility comes from the in-memory promotion index, so a cart
+        recalculation costs no queries once the index and the customer's
+        usage counts are loaded.
+        """
+        return promotion_index_registry.find_applicable(
+            self.db,
+            order_total=order_total,
+            order_items=order_items,
+            customer_id=customer.id if customer else None,
+            customer_tier=customer_tier,
+            promotion_ids=promotion_ids,
         )
 
-        promotions = query.order_by(Promotion.priority.desc()).all()
-
-        # Additional filtering based on conditions
-        applicable_promotions = []
-        for promotion in promotions:
-            if self._check_promotion_conditions(promotion, customer, order_items):
-                applicable_promotions.append(promotion)
-
-        return applicable_promotions
-
-    def _check_promotion_conditions(
-        self,
-        promotion: Promotion,
-        customer: Optional[Customer],
-        order_items: List[Dict[str, Any]],
-    ) -> bool:
-        """Check if promotion conditions are met"""
-
-        if not promotion.conditions:
-            return True
-
-        conditions = promotion.conditions
-
-        # Check customer segment conditions
-        if "customer_segments" in conditions and customer:
-            required_segments = conditions["customer_segments"]
-            # This would need integration with customer segmentation system
-            # For now, assume condition is met
-            pass
-
-        # Check item quantity conditions
-        if "min_items" in conditions:
-            total_items = sum(item.get("quantity", 1) for item in order_items)
-            if total_items < conditions["min_items"]:
-                return False
-
-        # Check specific item conditions
-        if "required_items" in conditions:
-            required_items = conditions["required_items"]
-            order_item_ids = [item.get("item_id") for item in order_items]
-            if not any(item_id in order_item_ids for item_id in required_items):
-                return False
-
-        # Check category conditions
-        if "required_categories" in conditions:
-            required_categories = conditions["required_categories"]
-            order_categories = [item.get("category_id") for item in order_items]
-            if not any(cat_id in order_categories for cat_id in required_categories):
-                return False
-
-        # Check time-based conditions
-        if "time_restrictions" in conditions:
-            time_restrictions = conditions["time_restrictions"]
-            current_time = datetime.utcnow()
-
-            if "hours" in time_restrictions:
-                allowed_hours = time_restrictions["hours"]
-                if current_time.hour not in allowed_hours:
-                    return False
-
-            if "days_of_week" in time_restrictions:
-                allowed_days = time_restrictions["days_of_week"]
-                if current_time.weekday() not in allowed_days:
-                    return False
-
-        return True
-
     def _sort_promotions_for_application(
         self, promotions: List[Promotion]
     ) -> List[Promotion]:
@@ -0,0 +1,510 @@
+# backend/modules/promotions/services/promotion_index.py
+
+"""
+In-memory eligibility index for auto-apply promotions.
+
+Active promotions are compiled into bitmasks with one bit per promotion in
+priority order, so checking a cart is a handful of integer operations
+instead of a query with a correlated usage subquery per promotion. The index
+is rebuilt when a promotion changes, and usage counters follow committed
+PromotionUsage rows.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from core.tenant_context import TenantContext
+from ..models.promotion_models import Promotion, PromotionStatus, PromotionUsage
+
+logger = logging.getLogger(__name__)
+
+# Rebuild at least this often to pick up changes committed by other workers
+INDEX_MAX_AGE_SECONDS = 60
+
+# Per-customer usage counts are reloaded after this long
+CUSTOMER_USAGE_TTL_SECONDS = 60
+
+# Customers whose usage counts are cached per tenant
+MAX_CACHED_CUSTOMERS = 10000
+
+# Promotion columns that change with every use and do not affect the index
+COUNTER_COLUMNS = frozenset(
+    {
+        "current_uses",
+        "impressions",
+        "clicks",
+        "conversions",
+        "revenue_generated",
+        "updated_at",
+    }
+)
+
+_PENDING_CHANGES = "promotion_index_changes"
+
+
+@dataclass
+class CompiledPromotion:
+    """Snapshot of the promotion fields used for eligibility and discounts"""
+
+    id: int
+    name: str
+    title: Optional[str]
+    promotion_type: str
+    discount_type: str
+    discount_value: float
+    max_discount_amount: Optional[float]
+    min_order_amount: Optional[float]
+    target_type: str
+    target_items: Optional[Dict[str, Any]]
+    target_tiers: Optional[List[str]]
+    conditions: Optional[Dict[str, Any]]
+    stackable: bool
+    auto_apply: bool
+    priority: int
+    start_date: datetime
+    end_date: datetime
+    max_uses_total: Optional[int]
+    max_uses_per_customer: Optional[int]
+    current_uses: int
+
+    @classmethod
+    def from_promotion(cls, promotion) -> "CompiledPromotion":
+        return cls(
+            id=promotion.id,
+            name=promotion.name,
+            title=promotion.title,
+            promotion_type=promotion.promotion_type,
+            discount_type=promotion.discount_type,
+            discount_value=promotion.discount_value,
+            max_discount_amount=promotion.max_discount_amount,
+            min_order_amount=promotion.min_order_amount,
+            target_type=promotion.target_type,
+            target_items=promotion.target_items,
+            target_tiers=promotion.target_tiers,
+            conditions=promotion.conditions,
+            stackable=bool(promotion.stackable),
+            auto_apply=bool(promotion.auto_apply),
+            priority=promotion.priority or 0,
+            start_date=promotion.start_date,
+            end_date=promotion.end_date,
+            max_uses_total=promotion.max_uses_total,
+            max_uses_per_customer=promotion.max_uses_per_customer,
+            current_uses=promotion.current_uses or 0,
+        )
+
+
+class _ThresholdMasks:
+    """Bits of promotions whose threshold is at or below a value"""
+
+    def __init__(self, thresholds: List[Tuple[float, int]]):
+        thresholds.sort()
+        self.values = [value for value, _ in thresholds]
+        self.masks = [0]
+        for _, bit in thresholds:
+            self.masks.append(self.masks[-1] | (1 << bit))
+
+    def at_most(self, value: float) -> int:
+        return self.masks[bisect.bisect_right(self.values, value)]
+
+
+class PromotionIndex:
+    """Compiled eligibility rules for one tenant's auto-apply promotions"""
+
+    def __init__(
+        self,
+        promotions: Iterable,
+        generation: int = 0,
+        built_at: Optional[float] = None,
+    ):
+        self.generation = generation
+        # When the promotions were read; later commits are applied as deltas
+        self.built_at = time.monotonic() if built_at is None else built_at
+        self.promotions = sorted(
+            (CompiledPromotion.from_promotion(p) for p in promotions),
+            key=lambda p: (-p.priority, p.id),
+        )
+        self.bits = {promotion.id: bit for bit, promotion in enumerate(self.promotions)}
+        self._window: Optional[Tuple[datetime, datetime, int]] = None
+        self._lock = threading.Lock()
+        self._compile()
+
+    def _compile(self):
+        min_order, min_items = [], []
+        self.untiered_mask = 0
+        self.tier_masks: Dict[str, int] = {}
+        self.no_item_requirement = 0
+        self.item_masks: Dict[Any, int] = {}
+        self.no_category_requirement = 0
+        self.category_masks: Dict[Any, int] = {}
+        self.hour_masks = [0] * 24
+        self.day_masks = [0] * 7
+        self.exhausted_mask = 0
+        self.per_customer_limits: Dict[int, int] = {}
+        self.zero_per_customer_mask = 0
+
+        for bit, promotion in enumerate(self.promotions):
+            flag = 1 << bit
+            conditions = promotion.conditions or {}
+
+            min_order.append((promotion.min_order_amount or 0, bit))
+            min_items.append((conditions.get("min_items") or 0, bit))
+
+            if promotion.target_tiers is None:
+                self.untiered_mask |= flag
+            else:
+                _add_flag(self.tier_masks, promotion.target_tiers, flag)
+
+            # A listed but empty requirement can never be met
+            required_items = conditions.get("required_items")
+            if required_items is None:
+                self.no_item_requirement |= flag
+            else:
+                _add_flag(self.item_masks, required_items, flag)
+
+            required_categories = conditions.get("required_categories")
+            if required_categories is None:
+                self.no_category_requirement |= flag
+            else:
+                _add_flag(self.category_masks, required_categories, flag)
+
+            restrictions = conditions.get("time_restrictions") or {}
+            hours = set(restrictions.get("hours", range(24)))
+            days = set(restrictions.get("days_of_week", range(7)))
+            for hour in range(24):
+                if hour in hours:
+                    self.hour_masks[hour] |= flag
+            for day in range(7):
+                if day in days:
+                    self.day_masks[day] |= flag
+
+            if self._is_exhausted(promotion):
+                self.exhausted_mask |= flag
+            if promotion.max_uses_per_customer is not None:
+                self.per_customer_limits[bit] = promotion.max_uses_per_customer
+                if promotion.max_uses_per_customer <= 0:
+                    self.zero_per_customer_mask |= flag
+
+        self.min_order = _ThresholdMasks(min_order)
+        self.min_items = _ThresholdMasks(min_items)
+
+    @staticmethod
+    def _is_exhausted(promotion: CompiledPromotion) -> bool:
+        return (
+            promotion.max_uses_total is not None
+            and promotion.current_uses >= promotion.max_uses_total
+        )
+
+    def eligible(
+        self,
+        order_total: float,
+        order_items: List[Dict[str, Any]],
+        customer_tier: Optional[str] = None,
+        customer_usage: Optional[Dict[int, int]] = None,
+        promotion_ids: Optional[List[int]] = None,
+        now: Optional[datetime] = None,
+    ) -> List[CompiledPromotion]:
+        """
+        Promotions a cart qualifies for, highest priority first.
+
+        ``customer_usage`` maps promotion ids to the customer's past uses and
+        enables per-customer limits; leave it None for anonymous carts.
+        """
+        now = now or datetime.utcnow()
+        mask = self._window_mask(now) & ~self.exhausted_mask
+
+        if promotion_ids:
+            mask &= self._id_mask(promotion_ids)
+        mask &= self.min_order.at_most(order_total)
+        if customer_tier:
+            mask &= self.untiered_mask | self.tier_masks.get(customer_tier, 0)
+        if customer_usage is not None:
+            mask &= ~self._customer_blocked_mask(customer_usage)
+        if not mask:
+            return []
+
+        total_items = 0
+        item_mask = self.no_item_requirement
+        category_mask = self.no_category_requirement
+        for item in order_items:
+            total_items += item.get("quantity", 1)
+            item_mask |= self.item_masks.get(item.get("item_id"), 0)
+            category_mask |= self.category_masks.get(item.get("category_id"), 0)
+
+        mask &= self.min_items.at_most(total_items) & item_mask & category_mask
+        mask &= self.hour_masks[now.hour] & self.day_masks[now.weekday()]
+        return self._promotions_in(mask)
+
+    def record_usage(self, promotion_id: int, delta: int, committed_at: float):
+        """Track a committed use against the total usage limit"""
+        bit = self.bits.get(promotion_id)
+        if bit is None or committed_at < self.built_at:
+            # Already counted in the rows the index was built from
+            return
+        with self._lock:
+            promotion = self.promotions[bit]
+            promotion.current_uses = max(0, promotion.current_uses + delta)
+            if self._is_exhausted(promotion):
+                self.exhausted_mask |= 1 << bit
+            else:
+                self.exhausted_mask &= ~(1 << bit)
+
+    def _window_mask(self, now: datetime) -> int:
+        """Promotions running at ``now``; reused until the next start or end"""
+        window = self._window
+        if window and window[0] <= now < window[1]:
+            return window[2]
+
+        mask = 0
+        valid_from, valid_until = datetime.min, datetime.max
+        for bit, promotion in enumerate(self.promotions):
+            ends = promotion.end_date + timedelta(microseconds=1)
+            if promotion.start_date > now:
+                valid_until = min(valid_until, promotion.start_date)
+            elif ends <= now:
+                valid_from = max(valid_from, ends)
+            else:
+                mask |= 1 << bit
+                valid_from = max(valid_from, promotion.start_date)
+                valid_until = min(valid_until, ends)
+
+        self._window = (valid_from, valid_until, mask)
+        return mask
+
+    def _id_mask(self, promotion_ids: List[int]) -> int:
+        mask = 0
+        for promotion_id in promotion_ids:
+            bit = self.bits.get(promotion_id)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def _customer_blocked_mask(self, customer_usage: Dict[int, int]) -> int:
+        blocked = self.zero_per_customer_mask
+        for promotion_id, uses in customer_usage.items():
+            bit = self.bits.get(promotion_id)
+            if bit is not None and uses >= self.per_customer_limits.get(
+                bit, float("inf")
+            ):
+                blocked |= 1 << bit
+        return blocked
+
+    def _promotions_in(self, mask: int) -> List[CompiledPromotion]:
+        promotions = []
+        while mask:
+            lowest = mask & -mask
+            promotions.append(self.promotions[lowest.bit_length() - 1])
+            mask ^= lowest
+        return promotions
+
+
+class CustomerUsageCache:
+    """Per-customer promotion usage counts, loaded with one grouped query"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = CUSTOMER_USAGE_TTL_SECONDS,
+        max_customers: int = MAX_CACHED_CUSTOMERS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_customers = max_customers
+        self.entries: "OrderedDict[int, Tuple[float, Dict[int, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, customer_id: int) -> Dict[int, int]:
+        with self._lock:
+            entry = self.entries.get(customer_id)
+            if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+                self.entries.move_to_end(customer_id)
+                return entry[1]
+
+        loaded_at = time.monotonic()
+        rows = (
+            db.query(PromotionUsage.promotion_id, func.count(PromotionUsage.id))
+            .filter(PromotionUsage.customer_id == customer_id)
+            .group_by(PromotionUsage.promotion_id)
+            .all()
+        )
+        counts = {promotion_id: count for promotion_id, count in rows}
+
+        with self._lock:
+            self.entries[customer_id] = (loaded_at, counts)
+            self.entries.move_to_end(customer_id)
+            while len(self.entries) > self.max_customers:
+                self.entries.popitem(last=False)
+        return counts
+
+    def record_usage(
+        self, customer_id: int, promotion_id: int, delta: int, committed_at: float
+    ):
+        with self._lock:
+            entry = self.entries.get(customer_id)
+            if entry and entry[0] <= committed_at:
+                counts = entry[1]
+                counts[promotion_id] = max(0, counts.get(promotion_id, 0) + delta)
+
+
+class PromotionIndexRegistry:
+    """Per-tenant promotion indexes and customer usage caches"""
+
+    def __init__(self, max_age_seconds: float = INDEX_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self.indexes: Dict[Tuple, PromotionIndex] = {}
+        self.usage_caches: Dict[Tuple, CustomerUsageCache] = {}
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def find_applicable(
+        self,
+        db: Session,
+        order_total: float,
+        order_items: List[Dict[str, Any]],
+        customer_id: Optional[int] = None,
+        customer_tier: Optional[str] = None,
+        promotion_ids: Optional[List[int]] = None,
+    ) -> List[CompiledPromotion]:
+        """Auto-apply promotions the cart qualifies for, highest priority first"""
+        tenant_key = _tenant_key()
+        index = self.get_index(db, tenant_key)
+
+        customer_usage = None
+        if customer_id is not None and index.per_customer_limits:
+            customer_usage = self._usage_cache(tenant_key).get(db, customer_id)
+
+        return index.eligible(
+            order_total,
+            order_items,
+            customer_tier=customer_tier,
+            customer_usage=customer_usage,
+            promotion_ids=promotion_ids,
+        )
+
+    def get_index(self, db: Session, tenant_key: Optional[Tuple] = None):
+        tenant_key = tenant_key or _tenant_key()
+        index = self.indexes.get(tenant_key)
+        if (
+            index is not None
+            and index.generation == self.generation
+            and time.monotonic() - index.built_at < self.max_age_seconds
+        ):
+            return index
+
+        generation, built_at = self.generation, time.monotonic()
+        promotions = (
+            db.query(Promotion)
+            .filter(
+                Promotion.status == PromotionStatus.ACTIVE,
+                Promotion.auto_apply == True,
+                Promotion.end_date >= datetime.utcnow(),
+            )
+            .all()
+        )
+        index = PromotionIndex(promotions, generation, built_at)
+        with self._lock:
+            self.indexes[tenant_key] = index
+        logger.debug(
+            f"Built promotion index for tenant {tenant_key}: "
+            f"{len(index.promotions)} promotions"
+        )
+        return index
+
+    def invalidate(self):
+        """Rebuild every index on next use"""
+        with self._lock:
+            self.generation += 1
+
+    def record_usage(
+        self,
+        promotion_id: int,
+        customer_id: Optional[int],
+        delta: int = 1,
+        committed_at: Optional[float] = None,
+    ):
+        """Apply a committed promotion use to the cached counters"""
+        committed_at = time.monotonic() if committed_at is None else committed_at
+        with self._lock:
+            indexes = list(self.indexes.values())
+            usage_caches = list(self.usage_caches.values())
+        for index in indexes:
+            index.record_usage(promotion_id, delta, committed_at)
+        if customer_id is not None:
+            for usage_cache in usage_caches:
+                usage_cache.record_usage(customer_id, promotion_id, delta, committed_at)
+
+    def _usage_cache(self, tenant_key: Tuple) -> CustomerUsageCache:
+        with self._lock:
+            usage_cache = self.usage_caches.get(tenant_key)
+            if usage_cache is None:
+                usage_cache = self.usage_caches[tenant_key] = CustomerUsageCache()
+            return usage_cache
+
+
+def _add_flag(masks: Dict[Any, int], values: Iterable, flag: int):
+    for value in frozenset(values):
+        masks[value] = masks.get(value, 0) | flag
+
+
+def _tenant_key() -> Tuple:
+    context = TenantContext.get() or {}
+    return (context.get("restaurant_id"), context.get("location_id"))
+
+
+# Keep indexes in step with committed changes
+
+
+def _changed_columns(promotion: Promotion) -> set:
+    return {attr.key for attr in inspect(promotion).attrs if attr.history.has_changes()}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_promotion_changes(session, flush_context):
+    pending = session.info.setdefault(_PENDING_CHANGES, {"rebuild": False, "uses": []})
+
+    for instance in session.new:
+        if isinstance(instance, Promotion):
+            pending["rebuild"] = True
+        elif isinstance(instance, PromotionUsage):
+            pending["uses"].append((instance.promotion_id, instance.customer_id, 1))
+
+    for instance in session.deleted:
+        if isinstance(instance, Promotion):
+            pending["rebuild"] = True
+        elif isinstance(instance, PromotionUsage):
+            pending["uses"].append((instance.promotion_id, instance.customer_id, -1))
+
+    for instance in session.dirty:
+        if isinstance(instance, Promotion) and (
+            _changed_columns(instance) - COUNTER_COLUMNS
+        ):
+            pending["rebuild"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_promotion_changes(session):
+    pending = session.info.pop(_PENDING_CHANGES, None)
+    if not pending:
+        return
+    committed_at = time.monotonic()
+    if pending["rebuild"]:
+        promotion_index_registry.invalidate()
+    for promotion_id, customer_id, delta in pending["uses"]:
+        promotion_index_registry.record_usage(
+            promotion_id, customer_id, delta, committed_at
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_promotion_changes(session):
+    session.info.pop(_PENDING_CHANGES, None)
+
+
+# Global registry instance
+promotion_index_registry = PromotionIndexRegistry()
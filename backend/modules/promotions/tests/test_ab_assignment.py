@@ -0,0 +1,238 @@
+# backend/modules/promotions/tests/test_ab_assignment.py
+
+"""
+Tests for stateless A/B variant assignment and batched exposure counting.
+"""
+
+import hashlib
+import pytest
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.database import Base
+from modules.promotions.models.promotion_models import Promotion
+from modules.promotions.services.ab_assignment import (
+    ABTestDefinition,
+    ABTestRegistry,
+    ExposureRecorder,
+)
+
+
+def make_promotion(promotion_id, variant_id, traffic, status="active"):
+    return SimpleNamespace(
+        id=promotion_id,
+        metadata={
+            "ab_test": {
+                "test_id": "ab_1",
+                "variant_type": "control" if variant_id == "control" else "variant",
+                "variant_id": variant_id,
+                "traffic_percentage": traffic,
+                "test_status": status,
+            }
+        },
+    )
+
+
+def make_definition(*weights, status="active"):
+    variant_ids = ["control"] + [f"variant_{i}" for i in range(1, len(weights))]
+    return ABTestDefinition(
+        "ab_1",
+        [
+            make_promotion(index + 1, variant_id, weight, status)
+            for index, (variant_id, weight) in enumerate(zip(variant_ids, weights))
+        ],
+    )
+
+
+class TestABTestDefinition:
+    def test_assignment_matches_previous_md5_rule(self):
+        definition = make_definition(30, 70)
+
+        for subject in range(500):
+            digest = hashlib.md5(f"ab_1:{subject}".encode()).hexdigest()
+            expected = "control" if int(digest, 16) % 100 + 1 <= 30 else "variant_1"
+            variant, bucket = definition.assign(str(subject))
+            assert variant.variant_id == expected
+            assert bucket == int(digest, 16) % 100
+
+    def test_fractional_weights_follow_traffic_split(self):
+        definition = make_definition(100 / 3, 100 / 3, 100 / 3)
+
+        counts = Counter(
+            definition.assign(str(subject))[0].variant_id for subject in range(30000)
+        )
+
+        assert set(counts) == {"control", "variant_1", "variant_2"}
+        assert all(abs(count - 10000) < 500 for count in counts.values())
+
+    def test_assignment_is_stable(self):
+        first, second = make_definition(50, 50), make_definition(50, 50)
+
+        assert [first.assign(str(s))[0] for s in range(100)] == [
+            second.assign(str(s))[0] for s in range(100)
+        ]
+
+    def test_status_comes_from_control(self):
+        assert make_definition(50, 50).is_active
+        assert not make_definition(50, 50, status="stopped").is_active
+
+
+class TestABTestRegistry:
+    def test_definitions_are_cached_until_invalidated(self):
+        registry = ABTestRegistry()
+        loader = Mock(return_value=[make_promotion(1, "control", 100)])
+
+        first = registry.get("ab_1", loader)
+        assert registry.get("ab_1", loader) is first
+        assert loader.call_count == 1
+
+        registry.invalidate("ab_1")
+        assert registry.get("ab_1", loader) is not first
+        assert loader.call_count == 2
+
+    def test_definitions_expire(self):
+        registry = ABTestRegistry(max_age_seconds=0)
+        loader = Mock(return_value=[make_promotion(1, "control", 100)])
+
+        registry.get("ab_1", loader)
+        registry.get("ab_1", loader)
+
+        assert loader.call_count == 2
+
+    def test_missing_test(self):
+        assert ABTestRegistry().get("missing", Mock(return_value=[])) is None
+
+
+def test_service_assigns_without_database_io():
+    from modules.promotions.services import ab_testing_service as module
+
+    service = module.ABTestingService(Mock())
+    loader = Mock(
+        return_value=[
+            make_promotion(1, "control", 50),
+            make_promotion(2, "variant_1", 50),
+        ]
+    )
+    recorder = Mock()
+
+    with (
+        patch.object(module, "ab_test_registry", ABTestRegistry()),
+        patch.object(module, "exposure_recorder", recorder),
+        patch.object(service, "_get_test_promotions", loader),
+    ):
+        assignments = [
+            service.assign_user_to_variant("ab_1", customer_id=customer_id)
+            for customer_id in range(1, 101)
+        ]
+        service.assign_user_to_variant("ab_1", session_id="s1", record_exposure=True)
+
+    assert loader.call_count == 1
+    assert {a["assigned_variant"] for a in assignments} == {"control", "variant_1"}
+    recorder.record.assert_called_once()
+
+
+class TestExposureRecorder:
+    @pytest.fixture
+    def session_factory(self):
+        # One shared connection so the background flush sees the same database
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(engine, tables=[Promotion.__table__])
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        for promotion_id in (1, 2):
+            db.add(
+                Promotion(
+                    id=promotion_id,
+                    name=f"Variant {promotion_id}",
+                    promotion_type="percentage_discount",
+                    discount_type="percentage",
+                    discount_value=10.0,
+                    start_date=datetime.utcnow(),
+                    end_date=datetime.utcnow() + timedelta(days=7),
+                    impressions=0,
+                )
+            )
+        db.commit()
+        db.close()
+        return factory
+
+    def impressions(self, session_factory):
+        db = session_factory()
+        try:
+            return dict(db.query(Promotion.id, Promotion.impressions))
+        finally:
+            db.close()
+
+    def test_exposures_are_written_in_one_batch(self, session_factory):
+        recorder = ExposureRecorder(session_factory, flush_size=1000)
+
+        for promotion_id in [1] * 7 + [2] * 3:
+            recorder.record(promotion_id)
+        assert self.impressions(session_factory) == {1: 0, 2: 0}
+
+        assert recorder.flush() == 10
+        assert self.impressions(session_factory) == {1: 7, 2: 3}
+        assert recorder.flush() == 0
+
+    def test_full_buffer_flushes_in_background(self, session_factory):
+        recorder = ExposureRecorder(session_factory, flush_size=5)
+
+        for _ in range(5):
+            recorder.record(1)
+        recorder._executor.shutdown(wait=True)
+
+        assert self.impressions(session_factory) == {1: 5, 2: 0}
+
+    def test_buffered_exposures_flush_on_a_timer(self, session_factory):
+        recorder = ExposureRecorder(
+            session_factory, flush_size=1000, flush_interval=0.05
+        )
+        recorder.record(1)
+        recorder.record(2)
+
+        deadline = time.monotonic() + 5
+        while (
+            self.impressions(session_factory) != {1: 1, 2: 1}
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+
+        # Written without another record() or an explicit flush
+        assert self.impressions(session_factory) == {1: 1, 2: 1}
+        recorder.close()
+
+    def test_close_writes_remaining_exposures(self, session_factory):
+        recorder = ExposureRecorder(session_factory, flush_size=1000)
+        for _ in range(3):
+            recorder.record(2)
+
+        recorder.close()
+
+        assert self.impressions(session_factory) == {1: 0, 2: 3}
+        assert not recorder._timer.is_alive()
+        # Exposures after shutdown are kept for an explicit flush
+        recorder.record(1)
+        assert recorder.flush() == 1
+
+    def test_failed_flush_keeps_counts(self, session_factory):
+        broken = Mock()
+        broken.execute.side_effect = RuntimeError("database unavailable")
+        recorder = ExposureRecorder(Mock(return_value=broken), flush_size=1000)
+        recorder.record(1)
+
+        assert recorder.flush() == 0
+        assert recorder.pending == {1: 1}
+
+        recorder.session_factory = session_factory
+        assert recorder.flush() == 1
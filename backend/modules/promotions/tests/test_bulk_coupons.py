@@ -0,0 +1,144 @@
+# backend/modules/promotions/tests/test_bulk_coupons.py
+
+"""
+Tests for chunked bulk coupon generation and the streaming batch export.
+"""
+
+import csv
+import io
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.database import Base
+from core.rbac_models import RBACUser
+from modules.customers.models.customer_models import Customer
+from modules.promotions.models.promotion_models import (
+    Coupon,
+    Promotion,
+    PromotionStatus,
+)
+from modules.promotions.schemas.promotion_schemas import CouponBulkCreate
+from modules.promotions.services import coupon_service as coupon_service_module
+from modules.promotions.services.coupon_service import CouponService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            Promotion.__table__,
+            Coupon.__table__,
+            Customer.__table__,
+            RBACUser.__table__,
+        ],
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def promotion(db):
+    promotion = Promotion(
+        name="Mailer",
+        promotion_type="percentage_discount",
+        discount_type="percentage",
+        discount_value=10.0,
+        status=PromotionStatus.ACTIVE,
+        start_date=datetime.utcnow() - timedelta(days=1),
+        end_date=datetime.utcnow() + timedelta(days=30),
+    )
+    db.add(promotion)
+    db.commit()
+    return promotion
+
+
+def bulk_request(promotion, **overrides):
+    fields = dict(promotion_id=promotion.id, quantity=12000, prefix="mail")
+    fields.update(overrides)
+    return CouponBulkCreate(**fields)
+
+
+class TestBulkCouponGeneration:
+    def test_batch_is_created_in_chunks(self, db, promotion):
+        service = CouponService(db)
+
+        with patch.object(db, "execute", wraps=db.execute) as execute:
+            batch = service.create_bulk_coupons(bulk_request(promotion))
+
+        assert batch.created == batch.requested == 12000
+        assert batch.valid_until == promotion.end_date
+        # One collision check and one executemany insert per chunk of 5,000
+        inserts = [call for call in execute.call_args_list if call.args[0].is_insert]
+        assert len(inserts) == 3
+        assert [len(call.args[1]) for call in inserts] == [5000, 5000, 2000]
+
+        codes = [code for (code,) in db.query(Coupon.code).all()]
+        assert len(codes) == len(set(codes)) == 12000
+        assert all(code.startswith("MAIL") and len(code) == 12 for code in codes)
+        coupon = db.query(Coupon).first()
+        assert coupon.batch_id == batch.batch_id
+        assert coupon.current_uses == 0
+        assert coupon.is_active
+
+    def test_taken_codes_are_regenerated(self, db, promotion):
+        db.add(Coupon(promotion_id=promotion.id, code="MAILTAKEN"))
+        db.commit()
+
+        generated = iter([["MAILTAKEN", "MAILFREE1"], ["MAILFREE2"]])
+        with patch.object(
+            coupon_service_module, "_random_codes", lambda *args: next(generated)
+        ):
+            batch = CouponService(db).create_bulk_coupons(
+                bulk_request(promotion, quantity=2)
+            )
+
+        assert batch.created == 2
+        assert batch.collisions == 1
+        assert {
+            code
+            for (code,) in db.query(Coupon.code).filter(
+                Coupon.batch_id == batch.batch_id
+            )
+        } == {"MAILFREE1", "MAILFREE2"}
+
+    def test_crowded_code_space_fails_cleanly(self, db, promotion):
+        db.add(Coupon(promotion_id=promotion.id, code="TAKEN"))
+        db.commit()
+
+        with patch.object(
+            coupon_service_module, "_random_codes", lambda *args: ["TAKEN"]
+        ):
+            with pytest.raises(ValueError, match="Could not generate unique codes"):
+                CouponService(db).create_bulk_coupons(
+                    bulk_request(promotion, quantity=1)
+                )
+
+        assert db.query(Coupon).count() == 1
+
+    def test_code_space_must_fit_quantity(self, db, promotion):
+        with pytest.raises(ValueError, match="cannot produce"):
+            CouponService(db).create_bulk_coupons(
+                bulk_request(promotion, quantity=200000, length=4)
+            )
+
+
+def test_batch_csv_export(db, promotion):
+    service = CouponService(db)
+    batch = service.create_bulk_coupons(bulk_request(promotion, quantity=7000))
+
+    chunks = list(service.iter_batch_csv(batch.batch_id))
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+
+    # Header, then one chunk per 5,000 rows
+    assert len(chunks) == 3
+    assert rows[0] == ["code", "coupon_type", "max_uses", "valid_from", "valid_until"]
+    assert len(rows) == 7001
+    assert service.batch_exists(batch.batch_id)
+    assert not service.batch_exists("missing")
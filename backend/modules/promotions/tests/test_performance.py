@@ -1,10 +1,12 @@
 # backend/modules/promotions/tests/test_performance.py
 
 import pytest
+import random
 import time
 import asyncio
 import concurrent.futures
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -13,6 +15,7 @@ from modules.promotions.models.promotion_models import *
 from modules.promotions.services.discount_service import DiscountCalculationService
 from modules.promotions.services.coupon_service import CouponService
 from modules.promotions.services.analytics_service import PromotionAnalyticsService
+from modules.promotions.services.promotion_index import PromotionIndex
 
 
 class TestPromotionPerformance:
@@ -458,6 +461,95 @@ class TestPromotionLoadTesting:
         print(f"Total discount calculated: ${total_discount:.2f}")
 
 
+class TestPromotionIndexPerformance:
+    """Eligibility checks against the compiled promotion index"""
+
+    PROMOTION_COUNT = 500
+    CART_COUNT = 10000
+
+    @staticmethod
+    def build_promotions(count, now):
+        promotions = []
+        for i in range(count):
+            conditions = {}
+            if i % 4 == 0:
+                conditions["required_items"] = [i % 50, (i + 7) % 50]
+            if i % 5 == 0:
+                conditions["required_categories"] = [i % 8]
+            if i % 6 == 0:
+                conditions["min_items"] = 1 + i % 4
+            if i % 7 == 0:
+                conditions["time_restrictions"] = {"hours": list(range(8, 22))}
+            promotions.append(
+                SimpleNamespace(
+                    id=i + 1,
+                    name=f"Index Promotion {i}",
+                    title=None,
+                    promotion_type="percentage_discount",
+                    discount_type="percentage",
+                    discount_value=5.0 + i % 20,
+                    max_discount_amount=None,
+                    min_order_amount=float(i % 10 * 10) or None,
+                    target_type="order_total",
+                    target_items=None,
+                    target_tiers=["gold", "platinum"] if i % 3 == 0 else None,
+                    conditions=conditions or None,
+                    stackable=i % 2 == 0,
+                    auto_apply=True,
+                    priority=i % 10,
+                    start_date=now - timedelta(days=1 + i % 5),
+                    end_date=now + timedelta(days=1 + i % 30),
+                    max_uses_total=100 if i % 11 == 0 else None,
+                    max_uses_per_customer=2 if i % 13 == 0 else None,
+                    current_uses=i % 150,
+                )
+            )
+        return promotions
+
+    @pytest.mark.slow
+    def test_cart_evaluation_throughput(self):
+        """500 active promotions x 10,000 cart evaluations"""
+        now = datetime(2026, 10, 14, 12, 0)
+        index = PromotionIndex(self.build_promotions(self.PROMOTION_COUNT, now))
+        rng = random.Random(7)
+        carts = [
+            (
+                round(rng.uniform(5, 150), 2),
+                [
+                    {
+                        "item_id": rng.randrange(50),
+                        "category_id": rng.randrange(8),
+                        "quantity": rng.randint(1, 3),
+                    }
+                    for _ in range(rng.randint(1, 6))
+                ],
+                rng.choice([None, "bronze", "gold"]),
+                {rng.randrange(1, 501): rng.randint(0, 3)},
+            )
+            for _ in range(self.CART_COUNT)
+        ]
+
+        start_time = time.perf_counter()
+        matched = 0
+        for order_total, items, tier, usage in carts:
+            matched += len(
+                index.eligible(
+                    order_total,
+                    items,
+                    customer_tier=tier,
+                    customer_usage=usage,
+                    now=now,
+                )
+            )
+        elapsed = time.perf_counter() - start_time
+
+        assert matched > 0
+        assert elapsed < 2.0
+
+        throughput = self.CART_COUNT / elapsed
+        print(f"Promotion index: {throughput:.0f} carts/second, {matched} matches")
+
+
 # Benchmark utilities
 class PromotionBenchmark:
     """Utility class for benchmarking promotion operations"""
@@ -0,0 +1,252 @@
+# backend/modules/promotions/tests/test_promotion_index.py
+
+"""
+Tests for the compiled promotion eligibility index and its registry.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from modules.promotions.services.promotion_index import (
+    CustomerUsageCache,
+    PromotionIndex,
+    PromotionIndexRegistry,
+)
+
+NOW = datetime(2026, 10, 14, 12, 30)  # A Wednesday
+
+
+def make_promotion(promotion_id, **overrides):
+    fields = dict(
+        id=promotion_id,
+        name=f"Promotion {promotion_id}",
+        title=None,
+        promotion_type="percentage_discount",
+        discount_type="percentage",
+        discount_value=10.0,
+        max_discount_amount=None,
+        min_order_amount=None,
+        target_type="order_total",
+        target_items=None,
+        target_tiers=None,
+        conditions=None,
+        stackable=False,
+        auto_apply=True,
+        priority=0,
+        start_date=NOW - timedelta(days=1),
+        end_date=NOW + timedelta(days=1),
+        max_uses_total=None,
+        max_uses_per_customer=None,
+        current_uses=0,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def eligible_ids(index, order_total=50.0, order_items=None, **kwargs):
+    kwargs.setdefault("now", NOW)
+    promotions = index.eligible(order_total, order_items or [], **kwargs)
+    return [promotion.id for promotion in promotions]
+
+
+class TestPromotionIndex:
+    def test_priority_order(self):
+        index = PromotionIndex(
+            [
+                make_promotion(1, priority=1),
+                make_promotion(2, priority=5),
+                make_promotion(3, priority=1),
+            ]
+        )
+
+        assert eligible_ids(index) == [2, 1, 3]
+
+    def test_order_thresholds(self):
+        index = PromotionIndex(
+            [
+                make_promotion(1, min_order_amount=30),
+                make_promotion(2, min_order_amount=100),
+                make_promotion(3, conditions={"min_items": 3}),
+            ]
+        )
+        items = [{"item_id": 1, "quantity": 2}]
+
+        assert eligible_ids(index, 30.0, items) == [1]
+        assert eligible_ids(index, 100.0, items + [{"item_id": 2}]) == [1, 2, 3]
+
+    def test_customer_tier_targeting(self):
+        index = PromotionIndex(
+            [
+                make_promotion(1),
+                make_promotion(2, target_tiers=["gold", "platinum"]),
+                make_promotion(3, target_tiers=[]),
+            ]
+        )
+
+        assert eligible_ids(index, customer_tier="gold") == [1, 2]
+        assert eligible_ids(index, customer_tier="silver") == [1]
+        # Anonymous carts are not filtered by tier
+        assert eligible_ids(index) == [1, 2, 3]
+
+    def test_required_items_and_categories(self):
+        index = PromotionIndex(
+            [
+                make_promotion(1, conditions={"required_items": [10, 11]}),
+                make_promotion(2, conditions={"required_categories": [7]}),
+                make_promotion(3, conditions={"required_items": []}),
+            ]
+        )
+
+        assert eligible_ids(index, order_items=[{"item_id": 11}]) == [1]
+        assert eligible_ids(index, order_items=[{"item_id": 5, "category_id": 7}]) == [
+            2
+        ]
+        assert eligible_ids(index, order_items=[{"item_id": 5}]) == []
+
+    def test_time_restrictions(self):
+        index = PromotionIndex(
+            [
+                make_promotion(
+                    1,
+                    end_date=NOW + timedelta(days=7),
+                    conditions={"time_restrictions": {"hours": [11, 12, 13]}},
+                ),
+                make_promotion(
+                    2,
+                    end_date=NOW + timedelta(days=7),
+                    conditions={"time_restrictions": {"days_of_week": [5, 6]}},
+                ),
+            ]
+        )
+
+        assert eligible_ids(index) == [1]
+        assert eligible_ids(index, now=NOW.replace(hour=18)) == []
+        assert eligible_ids(index, now=NOW + timedelta(days=3)) == [1, 2]
+
+    def test_active_window_is_recomputed_at_boundaries(self):
+        index = PromotionIndex(
+            [
+                make_promotion(1, end_date=NOW + timedelta(hours=1)),
+                make_promotion(2, start_date=NOW + timedelta(minutes=30)),
+            ]
+        )
+
+        assert eligible_ids(index) == [1]
+        assert eligible_ids(index, now=NOW + timedelta(minutes=45)) == [1, 2]
+        assert eligible_ids(index, now=NOW + timedelta(hours=2)) == [2]
+        assert eligible_ids(index) == [1]
+
+    def test_usage_limits(self):
+        index = PromotionIndex(
+            [
+                make_promotion(1, max_uses_total=2, current_uses=2),
+                make_promotion(2, max_uses_per_customer=1),
+                make_promotion(3, max_uses_per_customer=0),
+            ],
+            built_at=100.0,
+        )
+
+        assert eligible_ids(index, customer_usage={}) == [2]
+        assert eligible_ids(index, customer_usage={2: 1}) == []
+        assert eligible_ids(index) == [2, 3]
+
+        # Uses committed before the index was built are already counted
+        index.record_usage(1, -1, committed_at=99.0)
+        assert eligible_ids(index) == [2, 3]
+        index.record_usage(1, -1, committed_at=101.0)
+        assert eligible_ids(index) == [1, 2, 3]
+        index.record_usage(1, 1, committed_at=102.0)
+        assert eligible_ids(index) == [2, 3]
+
+    def test_requested_promotion_ids(self):
+        index = PromotionIndex([make_promotion(1), make_promotion(2)])
+
+        assert eligible_ids(index, promotion_ids=[2, 99]) == [2]
+
+
+class TestPromotionIndexRegistry:
+    def make_db(self, promotions, usage_rows=()):
+        db = Mock()
+        db.query.return_value.filter.return_value.all.return_value = promotions
+        grouped = db.query.return_value.filter.return_value.group_by.return_value
+        grouped.all.return_value = list(usage_rows)
+        return db
+
+    def test_index_is_reused_until_invalidated(self):
+        registry = PromotionIndexRegistry()
+        db = self.make_db([make_promotion(1)])
+
+        first = registry.get_index(db, ("r", 1))
+        assert registry.get_index(db, ("r", 1)) is first
+        assert registry.get_index(db, ("r", 2)) is not first
+
+        registry.invalidate()
+        assert registry.get_index(db, ("r", 1)) is not first
+
+    def test_index_expires_after_max_age(self):
+        registry = PromotionIndexRegistry(max_age_seconds=0)
+        db = self.make_db([make_promotion(1)])
+
+        first = registry.get_index(db, ("r", 1))
+        assert registry.get_index(db, ("r", 1)) is not first
+
+    def test_customer_usage_is_loaded_once(self):
+        registry = PromotionIndexRegistry()
+        now = datetime.utcnow()
+        promotion = make_promotion(
+            1,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+            max_uses_per_customer=2,
+        )
+        db = self.make_db([promotion], [(1, 1)])
+
+        with patch(
+            "modules.promotions.services.promotion_index._tenant_key",
+            return_value=("r", 1),
+        ):
+            assert [p.id for p in registry.find_applicable(db, 50.0, [], 7)] == [1]
+            registry.record_usage(1, customer_id=7)
+            assert registry.find_applicable(db, 50.0, [], 7) == []
+
+        grouped = db.query.return_value.filter.return_value.group_by.return_value
+        assert grouped.all.call_count == 1
+
+    def test_customer_usage_cache_is_bounded(self):
+        cache = CustomerUsageCache(max_customers=2)
+        db = self.make_db([])
+
+        for customer_id in (1, 2, 3):
+            cache.get(db, customer_id)
+
+        assert list(cache.entries) == [2, 3]
+
+
+def test_discount_service_uses_index():
+    from modules.promotions.services.discount_service import (
+        DiscountService,
+    )
+
+    service = DiscountService(Mock())
+    expected = [Mock()]
+    with patch(
+        "modules.promotions.services.discount_service.promotion_index_registry"
+    ) as registry:
+        registry.find_applicable.return_value = expected
+        promotions = service._find_applicable_promotions(
+            customer=SimpleNamespace(id=7),
+            order_total=25.0,
+            order_items=[],
+            customer_tier="gold",
+        )
+
+    assert promotions is expected
+    registry.find_applicable.assert_called_once_with(
+        service.db,
+        order_total=25.0,
+        order_items=[],
+        customer_id=7,
+        customer_tier="gold",
+        promotion_ids=None,
+    )
@@ -19,6 +19,8 @@ from ..schemas import (
     ReservationResponse,
     ReservationListResponse,
     ReservationAvailability,
+    AvailabilityCalendar,
+    CalendarDay,
     ReservationCancellation,
     ReservationConfirmation,
     TimeSlot,
@@ -232,6 +234,32 @@ async def check_availability(
     )
 
 
+@router.get("/availability/calendar", response_model=AvailabilityCalendar)
+async def get_availability_calendar(
+    start_date: date = Query(..., description="First date of the calendar"),
+    days: int = Query(14, ge=1, le=62, description="Number of days"),
+    party_size: int = Query(..., ge=1, le=20, description="Number of guests"),
+    db: Session = Depends(get_db),
+):
+    """
+    Availability summary per day for the booking widget's calendar.
+
+    Days are answered from cached day timelines, so a month view costs a
+    handful of queries rather than one per slot.
+    """
+    availability_service = AvailabilityService(db)
+
+    calendar = availability_service.get_availability_calendar(
+        start_date, days, party_size
+    )
+
+    return AvailabilityCalendar(
+        start_date=start_date,
+        party_size=party_size,
+        days=[CalendarDay(**day) for day in calendar],
+    )
+
+
 @router.get("/{reservation_id}", response_model=ReservationResponse)
 async def get_reservation(
     reservation_id: int,
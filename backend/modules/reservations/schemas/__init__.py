@@ -4,6 +4,8 @@ from .reservation_schemas import (
     ReservationResponse,
     ReservationListResponse,
     ReservationAvailability,
+    AvailabilityCalendar,
+    CalendarDay,
     ReservationCancellation,
     ReservationConfirmation,
     WaitlistCreate,
@@ -23,6 +25,8 @@ __all__ = [
     "ReservationResponse",
     "ReservationListResponse",
     "ReservationAvailability",
+    "AvailabilityCalendar",
+    "CalendarDay",
     "ReservationCancellation",
     "ReservationConfirmation",
     "WaitlistCreate",
@@ -175,6 +175,24 @@ class ReservationAvailability(BaseModel):
     special_date_info: Optional[Dict] = None
 
 
+class CalendarDay(BaseModel):
+    """Availability summary for one day of the booking calendar"""
+
+    date: date
+    is_open: bool
+    available_slots: int
+    first_available_time: Optional[time] = None
+    last_available_time: Optional[time] = None
+
+
+class AvailabilityCalendar(BaseModel):
+    """Schema for multi-day availability"""
+
+    start_date: date
+    party_size: int
+    days: List[CalendarDay]
+
+
 class ReservationCancellation(BaseModel):
     """Schema for cancelling a reservation"""
 
@@ -0,0 +1,363 @@
+# backend/modules/reservations/services/availability_timeline.py
+
+"""
+Day-level availability timeline for reservation slot search.
+
+A timeline is built from one read of a day's reservations, waitlist entries,
+table inventory and settings. Occupancy for any window is answered from the
+reservations' sorted start and end points, and a whole day of slots is
+produced with a single sweep over those endpoints, so slot search runs no
+per-slot queries. Timelines are plain data and are cached per worker until a
+reservation or waitlist change for their date invalidates them.
+"""
+
+import threading
+import time as clock
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models.reservation_models import (
+    ReservationSettings,
+    ReservationStatus,
+    SpecialDate,
+)
+from .table_combinations import (
+    DEFAULT_MAX_PARTY_SIZE,
+    TableCombination,
+    TableSpec,
+    combination_index,
+)
+
+# Reservation statuses that hold capacity
+ACTIVE_RESERVATION_STATUSES = [
+    ReservationStatus.PENDING,
+    ReservationStatus.CONFIRMED,
+    ReservationStatus.SEATED,
+]
+
+# Cached timelines are rebuilt at least this often to pick up changes made by
+# other workers, tables and settings
+TIMELINE_MAX_AGE_SECONDS = 60
+
+# Most timelines cached per worker; the least recently used are dropped first
+TIMELINE_CACHE_MAX_ENTRIES = 512
+
+# Used when a reservation has no duration recorded
+DEFAULT_DURATION_MINUTES = 90
+
+MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass(frozen=True)
+class BookedInterval:
+    """A reservation's occupancy in minutes after midnight of its date"""
+
+    reservation_id: int
+    start: int
+    end: int
+    party_size: int
+    table_ids: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class WaitlistWindow:
+    """A waiting entry's requested window in minutes after midnight"""
+
+    start: int
+    end: int
+    party_size: int
+
+
+def to_minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes: int) -> time:
+    minutes %= MINUTES_PER_DAY
+    return time(minutes // 60, minutes % 60)
+
+
+def effective_capacity(
+    settings: Optional[ReservationSettings], special_date: Optional[SpecialDate]
+) -> int:
+    """Total capacity considering special date modifiers"""
+    base_capacity = settings.total_capacity if settings else 0
+    if special_date and special_date.capacity_modifier:
+        base_capacity = int(base_capacity * special_date.capacity_modifier)
+    return base_capacity
+
+
+class AvailabilityTimeline:
+    """Occupancy of one restaurant day"""
+
+    def __init__(
+        self,
+        target_date: date,
+        settings: Optional[ReservationSettings],
+        special_date: Optional[SpecialDate],
+        tables: Iterable[TableSpec],
+        reservations: Iterable[BookedInterval],
+        waitlist: Iterable[WaitlistWindow] = (),
+    ):
+        self.target_date = target_date
+        self.loaded_at = clock.monotonic()
+
+        self.is_closed = bool(special_date and special_date.is_closed)
+        self.special_date_name = special_date.name if special_date else None
+        self.min_party_size = special_date.min_party_size if special_date else None
+        self.max_party_size = special_date.max_party_size if special_date else None
+
+        self.total_capacity = effective_capacity(settings, special_date)
+        buffer_percentage = (settings.buffer_percentage or 0) if settings else 0
+        self.available_capacity = self.total_capacity * (1 - buffer_percentage)
+        self.slot_minutes = settings.slot_duration_minutes if settings else None
+        self.hours = self._operating_hours(target_date, settings, special_date)
+
+        self.tables = tuple(tables)
+        self.combinations = combination_index(
+            self.tables,
+            (settings.max_party_size if settings else None) or DEFAULT_MAX_PARTY_SIZE,
+        )
+        self.waitlist = list(waitlist)
+
+        self.intervals = {
+            interval.reservation_id: interval for interval in reservations
+        }
+        by_start = sorted(self.intervals.values(), key=lambda i: i.start)
+        by_end = sorted(self.intervals.values(), key=lambda i: i.end)
+        self.by_start = by_start
+        self.by_end = by_end
+        self.starts = [interval.start for interval in by_start]
+        self.ends = [interval.end for interval in by_end]
+        # Guests of the first n reservations in start / end order
+        self.start_guests = [0, *accumulate(i.party_size for i in by_start)]
+        self.end_guests = [0, *accumulate(i.party_size for i in by_end)]
+
+    @staticmethod
+    def _operating_hours(
+        target_date: date,
+        settings: Optional[ReservationSettings],
+        special_date: Optional[SpecialDate],
+    ) -> Optional[Tuple[int, int]]:
+        """Opening and closing minute; closing after midnight runs past 1440"""
+        day_hours = None
+        if settings and settings.operating_hours:
+            day_hours = settings.operating_hours.get(target_date.strftime("%A").lower())
+        if special_date and special_date.special_hours:
+            day_hours = special_date.special_hours
+        if not day_hours:
+            return None
+
+        open_minute = to_minutes(datetime.strptime(day_hours["open"], "%H:%M").time())
+        close_minute = to_minutes(datetime.strptime(day_hours["close"], "%H:%M").time())
+        if close_minute <= open_minute:
+            close_minute += MINUTES_PER_DAY
+        return open_minute, close_minute
+
+    def overlapping_guests(
+        self, start: int, end: int, exclude_reservation_id: Optional[int] = None
+    ) -> int:
+        """Guests of reservations overlapping [start, end)"""
+        # Everything starting before the window closes, less what ended
+        # before it opened
+        guests = (
+            self.start_guests[bisect_left(self.starts, end)]
+            - self.end_guests[bisect_right(self.ends, start)]
+        )
+        excluded = self.intervals.get(exclude_reservation_id)
+        if excluded and excluded.start < end and excluded.end > start:
+            guests -= excluded.party_size
+        return guests
+
+    def reserved_table_ids(
+        self, start: int, end: int, exclude_reservation_id: Optional[int] = None
+    ) -> Set[int]:
+        """Tables held by reservations overlapping [start, end)"""
+        reserved = set()
+        for interval in self.by_start[: bisect_left(self.starts, end)]:
+            if interval.end > start and (
+                interval.reservation_id != exclude_reservation_id
+            ):
+                reserved.update(interval.table_ids)
+        return reserved
+
+    def available_table_ids(self, party_size: int, reserved: Set[int]) -> List[int]:
+        """Free tables that seat the party alone or joined with neighbours"""
+        available = self.combinations.available_table_ids(
+            party_size, self.combinations.mask(reserved)
+        )
+        return [table.id for table in self.tables if table.id in available]
+
+    def best_combination(
+        self, party_size: int, reserved: Set[int]
+    ) -> Optional[TableCombination]:
+        """Least wasteful free seating for the party"""
+        return self.combinations.best(party_size, self.combinations.mask(reserved))
+
+    def party_size_rejection(self, party_size: int) -> Optional[str]:
+        """Why the day cannot take the party at all, if it cannot"""
+        if self.is_closed:
+            return f"Restaurant is closed on {self.special_date_name or 'this date'}"
+        if self.min_party_size and party_size < self.min_party_size:
+            return (
+                f"Minimum party size on {self.special_date_name} is "
+                f"{self.min_party_size}"
+            )
+        if self.max_party_size and party_size > self.max_party_size:
+            return (
+                f"Maximum party size on {self.special_date_name} is "
+                f"{self.max_party_size}"
+            )
+        return None
+
+    def check(
+        self,
+        start: int,
+        party_size: int,
+        duration_minutes: int,
+        exclude_reservation_id: Optional[int] = None,
+    ) -> Tuple[bool, Optional[str]]:
+        """Whether a reservation can be accommodated, with the reason if not"""
+        rejection = self.party_size_rejection(party_size)
+        if rejection:
+            return False, rejection
+
+        end = start + duration_minutes
+        guests = self.overlapping_guests(start, end, exclude_reservation_id)
+        if guests + party_size > self.available_capacity:
+            return False, "No tables available for this time slot"
+
+        reserved = self.reserved_table_ids(start, end, exclude_reservation_id)
+        if self.best_combination(party_size, reserved) is None:
+            return False, "No suitable tables for your party size"
+
+        return True, None
+
+    def waitlist_count(self, minute: int, party_size: int) -> int:
+        return sum(
+            1
+            for entry in self.waitlist
+            if entry.start <= minute <= entry.end and entry.party_size <= party_size
+        )
+
+    def slot_starts(self, duration_minutes: int) -> List[int]:
+        """Slot start minutes that leave room for the duration before closing"""
+        if self.is_closed or not self.hours or not self.slot_minutes:
+            return []
+        open_minute, close_minute = self.hours
+        return list(
+            range(open_minute, close_minute - duration_minutes + 1, self.slot_minutes)
+        )
+
+    def slots(self, party_size: int, duration_minutes: int) -> List[Dict]:
+        """Every slot of the day for a party, in one sweep over the endpoints"""
+        starts = self.slot_starts(duration_minutes)
+        if not starts:
+            return []
+        party_allowed = self.party_size_rejection(party_size) is None
+
+        slots = []
+        guests = 0
+        reserved_counts: Counter = Counter()
+        next_start = next_end = 0
+        for start in starts:
+            end = start + duration_minutes
+            # Reservations that began before this window closes...
+            while next_start < len(self.by_start) and self.starts[next_start] < end:
+                interval = self.by_start[next_start]
+                guests += interval.party_size
+                reserved_counts.update(interval.table_ids)
+                next_start += 1
+            # ...less those that ended before it opened
+            while next_end < len(self.by_end) and self.ends[next_end] <= start:
+                interval = self.by_end[next_end]
+                guests -= interval.party_size
+                reserved_counts.subtract(interval.table_ids)
+                next_end += 1
+
+            available = party_allowed and guests + party_size <= self.available_capacity
+            if available:
+                reserved = {
+                    table_id for table_id, count in reserved_counts.items() if count > 0
+                }
+                available = self.best_combination(party_size, reserved) is not None
+
+            slots.append(
+                {
+                    "time": to_time(start),
+                    "available": available,
+                    "capacity_remaining": max(0, self.total_capacity - guests),
+                    "waitlist_count": self.waitlist_count(start, party_size),
+                }
+            )
+
+        return slots
+
+
+class AvailabilityTimelineCache:
+    """Per-worker LRU cache of timelines keyed by (restaurant, date)"""
+
+    def __init__(
+        self,
+        max_age_seconds: float = TIMELINE_MAX_AGE_SECONDS,
+        max_entries: int = TIMELINE_CACHE_MAX_ENTRIES,
+    ):
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self.timelines: "OrderedDict[Tuple[int, date], AvailabilityTimeline]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(
+        self, restaurant_id: int, target_date: date
+    ) -> Optional[AvailabilityTimeline]:
+        key = (restaurant_id, target_date)
+        with self._lock:
+            timeline = self.timelines.get(key)
+            if timeline is None:
+                return None
+            if self._is_stale(timeline, clock.monotonic()):
+                del self.timelines[key]
+                return None
+            self.timelines.move_to_end(key)
+            return timeline
+
+    def put(self, restaurant_id: int, timeline: AvailabilityTimeline):
+        key = (restaurant_id, timeline.target_date)
+        with self._lock:
+            self.timelines[key] = timeline
+            self.timelines.move_to_end(key)
+            self._evict()
+
+    def _is_stale(self, timeline: AvailabilityTimeline, now: float) -> bool:
+        return now - timeline.loaded_at >= self.max_age_seconds
+
+    def _evict(self):
+        """Drop stale timelines, then the least recently used over the limit"""
+        now = clock.monotonic()
+        for key in [
+            key
+            for key, timeline in self.timelines.items()
+            if self._is_stale(timeline, now)
+        ]:
+            del self.timelines[key]
+        while len(self.timelines) > self.max_entries:
+            self.timelines.popitem(last=False)
+
+    def invalidate(self, *dates: date):
+        """Drop the timelines of the given dates, or of every date"""
+        with self._lock:
+            if not dates:
+                self.timelines.clear()
+                return
+            for key in [key for key in self.timelines if key[1] in dates]:
+                del self.timelines[key]
+
+
+# Global cache instance
+availability_timeline_cache = AvailabilityTimelineCache()
@@ -27,6 +27,7 @@ from ..schemas.reservation_schemas import (
     StaffReservationUpdate,
 )
 from .availability_service import AvailabilityService
+from .availability_timeline import availability_timeline_cache
 from .notification_service import ReservationNotificationService
 from ..events import (
     emit_reservation_event,
@@ -145,6 +146,7 @@ class ReservationService:
         self.db.add(reservation)
         self.db.commit()
         self.db.refresh(reservation)
+        availability_timeline_cache.invalidate(reservation.reservation_date)
 
         # Create audit log
         self._create_audit_log(
@@ -330,6 +332,8 @@ class ReservationService:
                 [t.table_number for t in assigned_tables]
             )
 
+        original_date = reservation.reservation_date
+
         # Track field changes for audit
         field_changes = {}
         for field, value in update_data.dict(exclude_unset=True).items():
@@ -344,6 +348,9 @@ class ReservationService:
 
         self.db.commit()
         self.db.refresh(reservation)
+        availability_timeline_cache.invalidate(
+            original_date, reservation.reservation_date
+        )
 
         # Create audit log
         if field_changes:
@@ -398,6 +405,7 @@ class ReservationService:
 
         self.db.commit()
         self.db.refresh(reservation)
+        availability_timeline_cache.invalidate(reservation.reservation_date)
 
         # Create audit log
         self._create_audit_log(
@@ -652,6 +660,7 @@ class ReservationService:
 
         self.db.commit()
         self.db.refresh(reservation)
+        availability_timeline_cache.invalidate(reservation.reservation_date)
 
         # Create audit log
         action = (
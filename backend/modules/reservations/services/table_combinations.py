@@ -0,0 +1,210 @@
+# backend/modules/reservations/services/table_combinations.py
+
+"""
+Table assignment engine for parties of any size.
+
+Combinable tables form an adjacency graph from their ``combine_with`` lists.
+Every connected group of up to MAX_COMBINATION_TABLES tables that can seat a
+permitted party is enumerated once per floor layout, so finding seats for a
+party is a scan of that party's precomputed candidates, best first, for the
+first one whose tables are all free.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from ..models.reservation_models import TableConfiguration
+
+# Most tables joined together for one party
+MAX_COMBINATION_TABLES = 4
+
+# Largest party searched for when settings do not say otherwise
+DEFAULT_MAX_PARTY_SIZE = 20
+
+# Floor layouts whose combinations are kept
+LAYOUT_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Snapshot of a reservable table"""
+
+    id: int
+    table_number: str
+    min_capacity: int
+    max_capacity: int
+    is_combinable: bool
+    combine_with: Tuple[str, ...]
+    priority: int = 0
+    preferred_capacity: Optional[int] = None
+
+    @classmethod
+    def from_table(cls, table: TableConfiguration) -> "TableSpec":
+        return cls(
+            id=table.id,
+            table_number=table.table_number,
+            min_capacity=table.min_capacity,
+            max_capacity=table.max_capacity,
+            is_combinable=bool(table.is_combinable),
+            combine_with=tuple(table.combine_with or []),
+            priority=table.priority or 0,
+            preferred_capacity=table.preferred_capacity,
+        )
+
+
+@dataclass(frozen=True)
+class TableCombination:
+    """One table, or a connected group of tables, and the parties it seats"""
+
+    table_ids: Tuple[int, ...]
+    mask: int
+    min_capacity: int
+    max_capacity: int
+    priority: int
+    preferred_capacity: Optional[int] = None
+
+    def seats(self, party_size: int) -> bool:
+        return self.min_capacity <= party_size <= self.max_capacity
+
+    def rank(self, party_size: int) -> Tuple:
+        """Sort key: single tables, then least waste, fewest tables, priority"""
+        return (
+            len(self.table_ids) > 1,
+            self.max_capacity - party_size,
+            len(self.table_ids),
+            self.preferred_capacity != party_size,
+            -self.priority,
+            self.table_ids,
+        )
+
+
+class TableCombinationIndex:
+    """Every seating option of one floor layout"""
+
+    def __init__(
+        self,
+        tables: Iterable[TableSpec],
+        max_party_size: int = DEFAULT_MAX_PARTY_SIZE,
+        max_tables: int = MAX_COMBINATION_TABLES,
+    ):
+        self.tables = list(tables)
+        self.max_party_size = max_party_size
+        self.max_tables = max_tables
+        self.bits = {table.id: 1 << index for index, table in enumerate(self.tables)}
+        self.adjacency = self._adjacency()
+        self.combinations = self._enumerate()
+        self._candidates: Dict[int, List[TableCombination]] = {}
+
+    def _adjacency(self) -> List[Set[int]]:
+        """Neighbouring table positions; joining is symmetric"""
+        positions = {table.table_number: i for i, table in enumerate(self.tables)}
+        adjacency = [set() for _ in self.tables]
+        for i, table in enumerate(self.tables):
+            if not table.is_combinable:
+                continue
+            for other_number in table.combine_with:
+                j = positions.get(other_number)
+                if j is not None and j != i:
+                    adjacency[i].add(j)
+                    adjacency[j].add(i)
+        return adjacency
+
+    def _enumerate(self) -> List[TableCombination]:
+        """Single tables plus every useful connected group, each found once"""
+        combinations = [
+            TableCombination(
+                table_ids=(table.id,),
+                mask=self.bits[table.id],
+                min_capacity=table.min_capacity,
+                max_capacity=table.max_capacity,
+                priority=table.priority,
+                preferred_capacity=table.preferred_capacity,
+            )
+            for table in self.tables
+        ]
+
+        seen: Set[FrozenSet[int]] = set()
+        for root in range(len(self.tables)):
+            # Groups are grown from their lowest position only
+            frontier = [frozenset([root])]
+            for _ in range(self.max_tables - 1):
+                grown = []
+                for group in frontier:
+                    neighbours = set().union(*(self.adjacency[i] for i in group))
+                    for j in neighbours:
+                        if j <= root or j in group:
+                            continue
+                        candidate = group | {j}
+                        if candidate in seen:
+                            continue
+                        seen.add(candidate)
+                        combination = self._combine(candidate)
+                        # Adding tables only raises the smallest party a group
+                        # needs, so groups beyond the largest party stop here
+                        if combination.min_capacity > self.max_party_size:
+                            continue
+                        combinations.append(combination)
+                        grown.append(candidate)
+                frontier = grown
+                if not frontier:
+                    break
+
+        return combinations
+
+    def _combine(self, positions: FrozenSet[int]) -> TableCombination:
+        members = [self.tables[i] for i in sorted(positions)]
+        capacity = sum(table.max_capacity for table in members)
+        mask = 0
+        for table in members:
+            mask |= self.bits[table.id]
+        return TableCombination(
+            table_ids=tuple(table.id for table in members),
+            mask=mask,
+            # Smaller parties would fit without one of the tables
+            min_capacity=capacity - min(table.max_capacity for table in members) + 1,
+            max_capacity=capacity,
+            priority=sum(table.priority for table in members),
+        )
+
+    def mask(self, table_ids: Iterable[int]) -> int:
+        mask = 0
+        for table_id in table_ids:
+            mask |= self.bits.get(table_id, 0)
+        return mask
+
+    def candidates(self, party_size: int) -> List[TableCombination]:
+        """Options seating the party, best first"""
+        candidates = self._candidates.get(party_size)
+        if candidates is None:
+            candidates = sorted(
+                (c for c in self.combinations if c.seats(party_size)),
+                key=lambda c: c.rank(party_size),
+            )
+            self._candidates[party_size] = candidates
+        return candidates
+
+    def best(
+        self, party_size: int, reserved_mask: int = 0
+    ) -> Optional[TableCombination]:
+        """Best option whose tables are all free"""
+        for combination in self.candidates(party_size):
+            if not combination.mask & reserved_mask:
+                return combination
+        return None
+
+    def available_table_ids(self, party_size: int, reserved_mask: int = 0) -> Set[int]:
+        """Tables that take part in at least one free option for the party"""
+        table_ids = set()
+        for combination in self.candidates(party_size):
+            if not combination.mask & reserved_mask:
+                table_ids.update(combination.table_ids)
+        return table_ids
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def combination_index(
+    tables: Tuple[TableSpec, ...], max_party_size: int = DEFAULT_MAX_PARTY_SIZE
+) -> TableCombinationIndex:
+    """Shared index for a floor layout"""
+    return TableCombinationIndex(tables, max_party_size)
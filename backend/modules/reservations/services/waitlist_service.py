@@ -18,6 +18,7 @@ from ..models.reservation_models import (
     ReservationStatus,
 )
 from ..schemas.reservation_schemas import WaitlistCreate
+from .availability_timeline import availability_timeline_cache
 from .notification_service import ReservationNotificationService
 from .reservation_service import ReservationService
 
@@ -82,6 +83,7 @@ class WaitlistService:
         self.db.add(waitlist_entry)
         self.db.commit()
         self.db.refresh(waitlist_entry)
+        availability_timeline_cache.invalidate(waitlist_entry.requested_date)
 
         # Send confirmation notification
         await self.notification_service.send_waitlist_confirmation(waitlist_entry)
@@ -175,6 +177,7 @@ class WaitlistService:
         )
 
         self.db.commit()
+        availability_timeline_cache.invalidate(waitlist_entry.requested_date)
 
         # Send notification
         await self.notification_service.send_waitlist_availability_notification(
@@ -269,6 +272,7 @@ class WaitlistService:
 
         self.db.commit()
         self.db.refresh(waitlist_entry)
+        availability_timeline_cache.invalidate(waitlist_entry.requested_date)
 
         # Recalculate positions for remaining entries
         self._recalculate_positions(
@@ -368,6 +372,10 @@ class WaitlistService:
             logger.info(f"Waitlist entry {entry.id} expired")
 
         self.db.commit()
+        if expired:
+            availability_timeline_cache.invalidate(
+                *{entry.requested_date for entry in expired}
+            )
 
     def estimate_wait_time(
         self, date: date, time: time, party_size: int
@@ -0,0 +1,249 @@
+# backend/modules/reservations/tests/test_availability_timeline.py
+
+"""
+Tests for the day-level availability timeline used by slot search.
+"""
+
+import pytest
+from datetime import date, time
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from ..services import AvailabilityService
+from ..services.availability_timeline import (
+    AvailabilityTimeline,
+    AvailabilityTimelineCache,
+    BookedInterval,
+    WaitlistWindow,
+)
+from ..services.table_combinations import TableSpec
+
+# A Monday
+DAY = date(2026, 10, 19)
+
+TABLES = [
+    TableSpec(1, "1", 2, 4, True, ()),
+    TableSpec(2, "2", 2, 4, True, ()),
+    TableSpec(3, "3", 4, 6, True, ()),
+    TableSpec(5, "5", 6, 8, True, ("6",)),
+    TableSpec(6, "6", 6, 8, True, ("5",)),
+]
+
+
+def make_settings(**fields):
+    fields.setdefault("total_capacity", 50)
+    fields.setdefault("buffer_percentage", 0.1)
+    fields.setdefault("slot_duration_minutes", 30)
+    fields.setdefault("max_party_size", 20)
+    fields.setdefault(
+        "operating_hours", {"monday": {"open": "11:00", "close": "22:00"}}
+    )
+    return SimpleNamespace(restaurant_id=1, **fields)
+
+
+def make_special_date(**fields):
+    for field in ("special_hours", "min_party_size", "max_party_size"):
+        fields.setdefault(field, None)
+    fields.setdefault("is_closed", False)
+    fields.setdefault("capacity_modifier", 1.0)
+    return SimpleNamespace(date=DAY, **fields)
+
+
+def booked(reservation_id, hour, minute, party_size, table_ids=(), duration=90):
+    start = hour * 60 + minute
+    return BookedInterval(
+        reservation_id, start, start + duration, party_size, tuple(table_ids)
+    )
+
+
+def make_timeline(reservations=(), special_date=None, waitlist=(), **settings):
+    return AvailabilityTimeline(
+        DAY, make_settings(**settings), special_date, TABLES, reservations, waitlist
+    )
+
+
+def naive_overlap(reservations, start, end):
+    return sum(r.party_size for r in reservations if r.start < end and r.end > start)
+
+
+class TestAvailabilityTimeline:
+    """Timeline answers without touching the database"""
+
+    def test_overlapping_guests_match_interval_overlap(self):
+        reservations = [
+            booked(1, 18, 0, 4),
+            booked(2, 19, 0, 6),
+            booked(3, 20, 0, 2),
+            booked(4, 19, 30, 3, duration=30),
+        ]
+        timeline = make_timeline(reservations)
+
+        for start in range(17 * 60, 22 * 60, 15):
+            assert timeline.overlapping_guests(start, start + 90) == naive_overlap(
+                reservations, start, start + 90
+            )
+
+        assert timeline.overlapping_guests(19 * 60, 20 * 60 + 30) == 15
+        assert timeline.overlapping_guests(19 * 60, 20 * 60 + 30, 2) == 9
+
+    def test_slots_sweep_matches_point_queries(self):
+        reservations = [
+            booked(1, 11, 0, 4, [1]),
+            booked(2, 12, 15, 6, [3]),
+            booked(3, 12, 30, 4, [2]),
+            booked(4, 18, 0, 14, [5, 6], duration=120),
+            booked(5, 19, 0, 20, []),
+        ]
+        timeline = make_timeline(reservations)
+
+        for party_size in (2, 4, 12):
+            slots = timeline.slots(party_size, 90)
+            assert slots[0]["time"] == time(11, 0)
+            assert slots[-1]["time"] == time(20, 30)
+            for slot in slots:
+                start = slot["time"].hour * 60 + slot["time"].minute
+                available, _ = timeline.check(start, party_size, 90)
+                assert slot["available"] == available
+                assert slot["capacity_remaining"] == max(
+                    0, 50 - naive_overlap(reservations, start, start + 90)
+                )
+
+    def test_capacity_and_tables_limit_slots(self):
+        timeline = make_timeline([booked(1, 19, 0, 42)])
+
+        available, reason = timeline.check(19 * 60, 4, 90)
+        assert available is False
+        assert "No tables available" in reason
+
+        # Tables 5 and 6 are held together
+        timeline = make_timeline([booked(1, 19, 0, 14, [5, 6])])
+        available, reason = timeline.check(19 * 60, 12, 90)
+        assert available is False
+        assert "No suitable tables" in reason
+        assert timeline.check(21 * 60, 12, 60) == (True, None)
+
+    def test_special_dates(self):
+        closed = make_special_date(name="Christmas", is_closed=True)
+        assert make_timeline(special_date=closed).slots(2, 90) == []
+        available, reason = make_timeline(special_date=closed).check(19 * 60, 2, 90)
+        assert not available and "closed" in reason
+
+        late = make_special_date(
+            name="New Year's Eve",
+            special_hours={"open": "17:00", "close": "02:00"},
+            max_party_size=4,
+            capacity_modifier=0.5,
+        )
+        timeline = make_timeline(special_date=late)
+        slots = timeline.slots(2, 90)
+        assert slots[0]["time"] == time(17, 0)
+        assert slots[-1]["time"] == time(0, 30)
+        assert slots[0]["capacity_remaining"] == 25
+        assert not any(slot["available"] for slot in timeline.slots(6, 90))
+
+    def test_waitlist_counts(self):
+        timeline = make_timeline(
+            waitlist=[
+                WaitlistWindow(18 * 60, 20 * 60, 2),
+                WaitlistWindow(19 * 60, 21 * 60, 6),
+            ]
+        )
+
+        assert timeline.waitlist_count(19 * 60, 4) == 1
+        assert timeline.waitlist_count(19 * 60, 6) == 2
+        assert timeline.waitlist_count(21 * 60 + 30, 6) == 0
+
+
+class TestAvailabilityTimelineCache:
+    def test_invalidate_by_date(self):
+        cache = AvailabilityTimelineCache()
+        timeline = make_timeline()
+        cache.put(1, timeline)
+
+        assert cache.get(1, DAY) is timeline
+        cache.invalidate(date(2026, 10, 20))
+        assert cache.get(1, DAY) is timeline
+        cache.invalidate(DAY)
+        assert cache.get(1, DAY) is None
+
+    def test_entries_expire(self):
+        cache = AvailabilityTimelineCache(max_age_seconds=0)
+        cache.put(1, make_timeline())
+
+        assert cache.get(1, DAY) is None
+
+    def test_stale_entries_are_dropped(self):
+        cache = AvailabilityTimelineCache()
+        cache.put(1, make_timeline())
+        cache.put(2, make_timeline())
+        cache.timelines[(1, DAY)].loaded_at -= cache.max_age_seconds
+
+        assert cache.get(1, DAY) is None
+        assert list(cache.timelines) == [(2, DAY)]
+
+        cache.timelines[(2, DAY)].loaded_at -= cache.max_age_seconds
+        cache.put(3, make_timeline())
+        assert list(cache.timelines) == [(3, DAY)]
+
+    def test_least_recently_used_are_evicted(self):
+        cache = AvailabilityTimelineCache(max_entries=2)
+        first = make_timeline()
+        cache.put(1, first)
+        cache.put(2, make_timeline())
+
+        assert cache.get(1, DAY) is first
+        cache.put(3, make_timeline())
+
+        assert cache.get(2, DAY) is None
+        assert list(cache.timelines) == [(1, DAY), (3, DAY)]
+
+
+class TestAvailabilityServiceTimeline:
+    """Slot search through the service loads each day once"""
+
+    @pytest.fixture
+    def service(self):
+        service = AvailabilityService(Mock())
+        with patch(
+            "modules.reservations.services.availability_service."
+            "availability_timeline_cache",
+            AvailabilityTimelineCache(),
+        ):
+            yield service
+
+    @staticmethod
+    def load(dates):
+        return {
+            target_date: AvailabilityTimeline(
+                target_date, make_settings(), None, TABLES, []
+            )
+            for target_date in dates
+        }
+
+    def test_slots_are_served_from_cached_timeline(self, service):
+        with patch.object(service, "_load_timelines", side_effect=self.load) as load:
+            first = service.get_time_slots(DAY, party_size=2)
+            second = service.get_time_slots(DAY, party_size=6)
+
+        assert load.call_count == 1
+        assert len(first) == len(second) == 20
+        assert all(slot["available"] for slot in first)
+
+    def test_calendar_loads_missing_days_together(self, service):
+        with patch.object(service, "_load_timelines", side_effect=self.load) as load:
+            service.get_time_slots(DAY, party_size=2)
+            calendar = service.get_availability_calendar(DAY, 7, party_size=2)
+
+        assert load.call_args_list[1].args[0] == [
+            date(2026, 10, 20 + offset) for offset in range(6)
+        ]
+        assert [day["is_open"] for day in calendar] == [True] + [False] * 6
+        assert calendar[0]["available_slots"] == 20
+        assert calendar[0]["first_available_time"] == time(11, 0)
+
+    def test_booking_checks_bypass_cache(self, service):
+        with patch.object(service, "_load_timelines", side_effect=self.load) as load:
+            service.get_time_slots(DAY, party_size=2)
+            service._get_overlapping_capacity(DAY, time(19, 0), 90)
+
+        assert load.call_count == 2
@@ -0,0 +1,158 @@
+# backend/modules/reservations/tests/test_table_combinations.py
+
+"""
+Tests for the table combination engine.
+"""
+
+import pytest
+import random
+import time
+
+from ..services.table_combinations import TableCombinationIndex, TableSpec
+
+
+def table(table_id, min_capacity, max_capacity, neighbours=(), **fields):
+    return TableSpec(
+        table_id,
+        str(table_id),
+        min_capacity,
+        max_capacity,
+        True,
+        tuple(str(n) for n in neighbours),
+        **fields,
+    )
+
+
+def row(first_id, count, min_capacity=2, max_capacity=4):
+    """Tables side by side, each combinable with the next"""
+    ids = range(first_id, first_id + count)
+    return [
+        table(
+            table_id,
+            min_capacity,
+            max_capacity,
+            [n for n in (table_id - 1, table_id + 1) if n in ids],
+        )
+        for table_id in ids
+    ]
+
+
+def build_floor(table_count, seed=3):
+    """Rows of four tables, with neighbours in the next row joinable too"""
+    rng = random.Random(seed)
+    tables = []
+    for table_id in range(1, table_count + 1):
+        neighbours = []
+        if table_id % 4 != 1:
+            neighbours.append(table_id - 1)
+        if table_id % 4 != 0 and table_id < table_count:
+            neighbours.append(table_id + 1)
+        if table_id + 4 <= table_count:
+            neighbours.append(table_id + 4)
+        max_capacity = rng.choice([2, 4, 4, 6])
+        tables.append(table(table_id, 1, max_capacity, neighbours))
+    return tables
+
+
+class TestTableCombinationIndex:
+    """Seating options and their ranking"""
+
+    def test_single_table_preferred_when_it_fits(self):
+        index = TableCombinationIndex(
+            [
+                table(1, 2, 4, [2], priority=1),
+                table(2, 2, 4, [1], priority=1, preferred_capacity=2),
+                table(3, 4, 6),
+            ]
+        )
+
+        assert index.best(2).table_ids == (2,)
+        assert index.best(5).table_ids == (3,)
+        assert index.best(7).table_ids == (1, 2)
+
+    def test_large_party_gets_least_waste(self):
+        # Tables 1, 2 and 3 seat 16 exactly; swapping in table 4 wastes seats
+        index = TableCombinationIndex(
+            [
+                table(1, 4, 6, [2]),
+                table(2, 4, 6, [1, 3, 4]),
+                table(3, 2, 4, [2]),
+                table(4, 4, 8, [2]),
+            ]
+        )
+
+        combination = index.best(16)
+        assert combination.table_ids == (1, 2, 3)
+        assert combination.max_capacity == 16
+
+    def test_only_connected_groups_are_joined(self):
+        index = TableCombinationIndex(row(1, 3) + row(10, 2))
+
+        assert index.best(12).table_ids == (1, 2, 3)
+        # 2, 3 and 10 hold twelve seats but 10 is not next to them
+        reserved = index.mask([1])
+        assert index.best(12, reserved) is None
+        assert index.best(8, reserved).table_ids == (2, 3)
+
+    def test_groups_without_a_needed_table_are_skipped(self):
+        index = TableCombinationIndex(row(1, 3))
+
+        # Two of the three tables already seat six
+        assert all(len(c.table_ids) < 3 for c in index.candidates(6))
+        assert index.available_table_ids(6, index.mask([2])) == set()
+        assert index.available_table_ids(4, index.mask([2])) == {1, 3}
+
+    def test_search_is_bounded(self):
+        index = TableCombinationIndex(row(1, 10), max_party_size=10, max_tables=3)
+
+        assert max(len(c.table_ids) for c in index.combinations) == 3
+        assert all(c.min_capacity <= 10 for c in index.combinations)
+        assert index.best(13) is None
+
+    def test_candidates_are_memoized_per_party(self):
+        index = TableCombinationIndex(row(1, 4))
+
+        assert index.candidates(7) is index.candidates(7)
+
+
+class TestTableCombinationBenchmark:
+    """Lookups on 80-table floors"""
+
+    LOOKUPS = 20000
+
+    @pytest.mark.slow
+    def test_lookup_throughput_on_80_table_floor(self):
+        tables = build_floor(80)
+
+        start_time = time.perf_counter()
+        index = TableCombinationIndex(tables)
+        build_time = time.perf_counter() - start_time
+
+        rng = random.Random(11)
+        table_ids = [t.id for t in tables]
+        lookups = [
+            (
+                rng.randint(1, 20),
+                index.mask(rng.sample(table_ids, rng.randint(0, 60))),
+            )
+            for _ in range(self.LOOKUPS)
+        ]
+        for party_size in range(1, 21):
+            index.candidates(party_size)
+
+        start_time = time.perf_counter()
+        seated = sum(
+            1
+            for party_size, reserved in lookups
+            if index.best(party_size, reserved) is not None
+        )
+        lookup_time = time.perf_counter() - start_time
+
+        assert seated > 0
+        assert build_time < 2.0
+        assert lookup_time < 2.0
+
+        print(
+            f"80 tables: {len(index.combinations)} combinations in "
+            f"{build_time:.3f}s, {self.LOOKUPS / lookup_time:.0f} lookups/second"
+        )
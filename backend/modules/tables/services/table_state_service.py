@@ -25,6 +25,7 @@ from ..schemas.table_schemas import (
     BulkTableStatusUpdate,
     TableReservationCreate,
 )
+from ..websocket.realtime_table_manager import realtime_table_manager
 from core.exceptions import (
     ConflictError as BusinessLogicError,
     NotFoundError as ResourceNotFoundError,
@@ -238,6 +239,16 @@ class TableStateService:
         await db.commit()
         await db.refresh(session)
 
+        changes = {
+            session.table_id: {
+                "status": TableStatus.OCCUPIED.value,
+                "current_session": realtime_table_manager.serialize_session(session),
+            }
+        }
+        for table_id in combined_tables:
+            changes[table_id] = {"status": TableStatus.OCCUPIED.value}
+        await self._publish_table_changes(restaurant_id, changes)
+
         return session
 
     async def _validate_combined_tables(
@@ -319,6 +330,17 @@ class TableStateService:
         await db.commit()
         await db.refresh(session)
 
+        await self._publish_table_changes(
+            restaurant_id,
+            {
+                table_id: {
+                    "status": TableStatus.AVAILABLE.value,
+                    "current_session": None,
+                }
+                for table_id in table_ids
+            },
+        )
+
         return session
 
     async def update_table_status(
@@ -343,6 +365,10 @@ class TableStateService:
         await db.commit()
         await db.refresh(table)
 
+        await self._publish_table_changes(
+            restaurant_id, {table.id: {"status": table.status.value}}
+        )
+
         return table
 
     async def bulk_update_table_status(
@@ -376,10 +402,32 @@ class TableStateService:
 
             updated_tables.append(table)
 
+        # Read before commit expires the loaded tables
+        updated_table_ids = [table.id for table in updated_tables]
+
         await db.commit()
 
+        await self._publish_table_changes(
+            restaurant_id,
+            {
+                table_id: {"status": bulk_update.status.value}
+                for table_id in updated_table_ids
+            },
+        )
+
         return updated_tables
 
+    async def _publish_table_changes(
+        self, restaurant_id: int, changes: Dict[int, Dict[str, Any]]
+    ):
+        """Push committed table changes to connected floor tablets"""
+        if not changes:
+            return
+        try:
+            await realtime_table_manager.publish_table_changes(restaurant_id, changes)
+        except Exception as e:
+            logger.error(f"Error publishing table changes: {e}")
+
     async def _update_table_status(
         self,
         db: AsyncSession,
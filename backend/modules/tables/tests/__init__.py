@@ -0,0 +1 @@
+# Tables Tests Module
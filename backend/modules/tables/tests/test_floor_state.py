@@ -0,0 +1,138 @@
+# backend/modules/tables/tests/test_floor_state.py
+
+"""
+Tests for versioned floor state and derived floor metrics.
+"""
+
+from datetime import datetime, timedelta
+
+from ..websocket.floor_state import FloorMetrics, FloorState
+
+NOW = datetime(2026, 10, 19, 19, 0)
+
+
+def entry(table_id, floor_id=1, status="available", session=None, **fields):
+    return {
+        "id": table_id,
+        "table_number": str(table_id),
+        "floor_id": floor_id,
+        "status": status,
+        "capacity": {"min": 2, "max": 4, "preferred": None},
+        "current_session": session,
+        **fields,
+    }
+
+
+def session(session_id, minutes_ago, guest_count=2):
+    return {
+        "session_id": session_id,
+        "guest_count": guest_count,
+        "start_time": (NOW - timedelta(minutes=minutes_ago)).isoformat(),
+        "server_id": None,
+        "order_id": None,
+    }
+
+
+class TestFloorState:
+    """Only changed fields are sent, one version per batch"""
+
+    def test_update_sends_changed_fields_only(self):
+        state = FloorState(1)
+        assert state.load([entry(1), entry(2), entry(3, floor_id=2)]) == 1
+        assert set(state.tables) == {1, 2}
+
+        version, patches = state.update(
+            {
+                1: {"status": "occupied", "current_session": session(10, 0)},
+                2: {"status": "available"},
+                3: {"status": "occupied"},
+            }
+        )
+
+        assert version == 2
+        assert patches == [
+            {
+                "table_id": 1,
+                "changes": {"status": "occupied", "current_session": session(10, 0)},
+            }
+        ]
+        assert state.update({2: {"status": "available"}}) == (2, [])
+
+    def test_sync_reports_changes_additions_and_removals(self):
+        state = FloorState(0)
+        state.load([entry(1), entry(2, floor_id=2)])
+
+        version, patches = state.sync(
+            [entry(1, status="cleaning"), entry(4, floor_id=3)]
+        )
+
+        assert version == 2
+        assert patches[0] == {"table_id": 1, "changes": {"status": "cleaning"}}
+        assert patches[1]["table_id"] == 4
+        assert patches[1]["changes"]["floor_id"] == 3
+        assert patches[2] == {"table_id": 2, "removed": True}
+        assert state.sync([entry(1, status="cleaning"), entry(4, floor_id=3)]) == (
+            2,
+            [],
+        )
+
+    def test_active_sessions(self):
+        state = FloorState(0)
+        state.load([entry(1, session=session(10, 20)), entry(2)])
+
+        assert list(state.active_sessions()) == [1]
+
+
+class TestFloorMetrics:
+    """Derived values are only re-sent when they move"""
+
+    def test_turn_times_sent_when_crossing_a_step(self):
+        metrics = FloorMetrics()
+        sessions = {1: session(10, 12), 2: session(11, 1)}
+
+        assert metrics.changed_turn_times(sessions, NOW) == {1: 12.0, 2: 1.0}
+        assert metrics.changed_turn_times(sessions, NOW + timedelta(minutes=1)) == {}
+        assert metrics.changed_turn_times(sessions, NOW + timedelta(minutes=3)) == {
+            1: 15.0,
+        }
+
+    def test_alerts_raised_once_per_long_turn(self):
+        metrics = FloorMetrics(average_turn_time=40)
+        sessions = {1: session(10, 70), 2: session(11, 30)}
+
+        assert list(metrics.new_alerts(sessions, NOW)) == [1]
+        assert metrics.new_alerts(sessions, NOW + timedelta(minutes=31)) == {2: 61.0}
+        assert metrics.new_alerts(sessions, NOW + timedelta(minutes=32)) == {}
+
+        # A new session at a table that had an alert can raise it again
+        assert metrics.new_alerts({2: session(11, 30)}, NOW) == {}
+        assert list(
+            metrics.new_alerts({1: session(12, 61), 2: session(11, 30)}, NOW)
+        ) == [1]
+
+    def test_only_changed_heat_map_cells(self):
+        metrics = FloorMetrics()
+
+        def heat_map(*cells):
+            return {
+                "data": [
+                    {
+                        "table_id": table_id,
+                        "session_count": count,
+                        "avg_duration_minutes": 60.0,
+                        "heat_intensity": count / 10,
+                    }
+                    for table_id, count in cells
+                ],
+                "period_days": 7,
+                "max_occupancy_score": 600.0,
+            }
+
+        assert (
+            len(metrics.changed_heat_map_cells(heat_map((1, 10), (2, 5)))["data"]) == 2
+        )
+        assert metrics.changed_heat_map_cells(heat_map((1, 10), (2, 5))) is None
+
+        changes = metrics.changed_heat_map_cells(heat_map((1, 10), (3, 4)))
+        assert [cell["table_id"] for cell in changes["data"]] == [3]
+        assert changes["removed_table_ids"] == [2]
@@ -0,0 +1,192 @@
+"""
+Versioned floor state for real-time table streaming.
+
+Each connected floor (or the whole restaurant, floor 0) keeps the last table
+entries sent to its tablets. Changes are diffed against those entries so only
+the fields that changed are sent, each batch under the next version number.
+Derived values (turn times, heat map cells, alerts) remember what was last
+sent so the periodic loop only pushes the ones that moved.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Turn times are re-sent when they cross a multiple of this many minutes
+TURN_TIME_STEP_MINUTES = 5
+
+# Heat map cells and the average turn time are recomputed this often
+HEAT_MAP_REFRESH_SECONDS = 300
+
+# Tables over this multiple of the average turn time raise an alert
+LONG_TURN_TIME_FACTOR = 1.5
+
+
+def turn_time_minutes(start_time: str, now: Optional[datetime] = None) -> float:
+    """Minutes since a session's ISO start time"""
+    now = now or datetime.utcnow()
+    return (now - datetime.fromisoformat(start_time)).total_seconds() / 60
+
+
+def diff_entry(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level fields of a table entry that differ"""
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+class FloorState:
+    """Table entries last sent to the tablets of one floor"""
+
+    def __init__(self, floor_key: int, version: int = 0):
+        self.floor_key = floor_key
+        self.version = version
+        self.tables: Dict[int, Dict[str, Any]] = {}
+        self.loaded = False
+
+    def includes(self, entry: Dict[str, Any]) -> bool:
+        return self.floor_key == 0 or entry.get("floor_id") == self.floor_key
+
+    def load(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Start from a full read; tablets resync to the new version"""
+        self.tables = {
+            entry["id"]: dict(entry) for entry in entries if self.includes(entry)
+        }
+        self.loaded = True
+        self.version += 1
+        return self.version
+
+    def sync(
+        self, entries: Iterable[Dict[str, Any]]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Reconcile with a full read of the restaurant's tables"""
+        current = {entry["id"]: entry for entry in entries if self.includes(entry)}
+        patches = []
+
+        for table_id, entry in current.items():
+            old = self.tables.get(table_id)
+            changes = entry if old is None else diff_entry(old, entry)
+            if changes:
+                self.tables[table_id] = dict(entry)
+                patches.append({"table_id": table_id, "changes": dict(changes)})
+
+        for table_id in [t for t in self.tables if t not in current]:
+            del self.tables[table_id]
+            patches.append({"table_id": table_id, "removed": True})
+
+        return self._commit(patches)
+
+    def update(
+        self, changes: Dict[int, Dict[str, Any]]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Apply known field changes to tables on this floor"""
+        patches = []
+        for table_id, fields in changes.items():
+            entry = self.tables.get(table_id)
+            if entry is None:
+                continue
+            changed = diff_entry(entry, fields)
+            if changed:
+                entry.update(changed)
+                patches.append({"table_id": table_id, "changes": changed})
+
+        return self._commit(patches)
+
+    def active_sessions(self) -> Dict[int, Dict[str, Any]]:
+        return {
+            table_id: entry["current_session"]
+            for table_id, entry in self.tables.items()
+            if entry.get("current_session")
+        }
+
+    def _commit(self, patches: List[Dict[str, Any]]) -> Tuple[int, List[Dict]]:
+        if patches:
+            self.version += 1
+        return self.version, patches
+
+
+@dataclass
+class FloorMetrics:
+    """Derived values last sent for a restaurant"""
+
+    turn_time_steps: Dict[int, int] = field(default_factory=dict)
+    alerted_tables: Set[int] = field(default_factory=set)
+    heat_map_cells: Dict[int, Tuple] = field(default_factory=dict)
+    heat_map_max: float = 0
+    # Monotonic time of the last heat map refresh; None until the first one
+    heat_map_refreshed_at: Optional[float] = None
+    average_turn_time: Optional[float] = None
+
+    def changed_turn_times(
+        self, sessions: Dict[int, Dict[str, Any]], now: Optional[datetime] = None
+    ) -> Dict[int, float]:
+        """Turn times that crossed a step since they were last sent"""
+        now = now or datetime.utcnow()
+        turn_times = {
+            table_id: turn_time_minutes(session["start_time"], now)
+            for table_id, session in sessions.items()
+        }
+        steps = {
+            table_id: int(minutes // TURN_TIME_STEP_MINUTES)
+            for table_id, minutes in turn_times.items()
+        }
+
+        changed = {
+            table_id: round(turn_times[table_id], 1)
+            for table_id, step in steps.items()
+            if self.turn_time_steps.get(table_id) != step
+        }
+        self.turn_time_steps = steps
+        return changed
+
+    def new_alerts(
+        self, sessions: Dict[int, Dict[str, Any]], now: Optional[datetime] = None
+    ) -> Dict[int, float]:
+        """Tables that went over the long turn time threshold since last check"""
+        if not self.average_turn_time:
+            return {}
+
+        now = now or datetime.utcnow()
+        threshold = self.average_turn_time * LONG_TURN_TIME_FACTOR
+        over = {}
+        for table_id, session in sessions.items():
+            minutes = turn_time_minutes(session["start_time"], now)
+            if minutes > threshold:
+                over[table_id] = minutes
+
+        new = {t: m for t, m in over.items() if t not in self.alerted_tables}
+        self.alerted_tables = set(over)
+        return new
+
+    def changed_heat_map_cells(
+        self, heat_map: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Heat map cells that changed since last sent, or None if none did"""
+        cells = {cell["table_id"]: cell for cell in heat_map["data"]}
+        values = {
+            table_id: (
+                cell["session_count"],
+                cell["avg_duration_minutes"],
+                round(cell.get("heat_intensity", 0), 3),
+            )
+            for table_id, cell in cells.items()
+        }
+
+        changed = [
+            cells[table_id]
+            for table_id, value in values.items()
+            if self.heat_map_cells.get(table_id) != value
+        ]
+        removed = [t for t in self.heat_map_cells if t not in values]
+        max_changed = heat_map["max_occupancy_score"] != self.heat_map_max
+
+        self.heat_map_cells = values
+        self.heat_map_max = heat_map["max_occupancy_score"]
+
+        if not (changed or removed or max_changed):
+            return None
+        return {
+            "data": changed,
+            "removed_table_ids": removed,
+            "period_days": heat_map["period_days"],
+            "max_occupancy_score": heat_map["max_occupancy_score"],
+            "partial": True,
+        }
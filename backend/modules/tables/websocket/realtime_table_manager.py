@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 import asyncio
 import json
 import logging
+import time
 from enum import Enum
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
@@ -18,14 +19,25 @@ from sqlalchemy.orm import selectinload
 
 from ..models.table_models import Table, TableSession, TableStatus, TableReservation
 from ..services.table_analytics_service import TableAnalyticsService
+from .floor_state import (
+    HEAT_MAP_REFRESH_SECONDS,
+    FloorMetrics,
+    FloorState,
+    turn_time_minutes,
+)
 from core.database_utils import get_db_context
 
 logger = logging.getLogger(__name__)
 
+# How often open floors are reconciled with the database and derived values
+# are checked for changes
+FLOOR_SYNC_INTERVAL_SECONDS = 30
+
 
 class UpdateType(str, Enum):
     """Types of real-time updates"""
     TABLE_STATUS = "table_status"
+    TABLE_PATCH = "table_patch"
     OCCUPANCY_UPDATE = "occupancy_update"
     RESERVATION_UPDATE = "reservation_update"
     TURN_TIME_UPDATE = "turn_time_update"
@@ -42,9 +54,10 @@ class RealtimeTableManager:
         self.connections: Dict[int, Dict[int, Set[WebSocket]]] = {}
         self.connection_metadata: Dict[WebSocket, Dict] = {}
         
-        # Cache for frequently accessed data
-        self.table_status_cache: Dict[int, Dict[int, Dict]] = {}
-        self.turn_time_cache: Dict[int, Dict] = {}
+        # Versioned table entries per restaurant and floor (0 for all floors)
+        self.floor_states: Dict[int, Dict[int, FloorState]] = {}
+        # Derived values last sent per restaurant
+        self.floor_metrics: Dict[int, FloorMetrics] = {}
         
         # Background tasks
         self.update_tasks: Dict[int, asyncio.Task] = {}
@@ -64,7 +77,6 @@ class RealtimeTableManager:
         # Initialize restaurant connection dict if needed
         if restaurant_id not in self.connections:
             self.connections[restaurant_id] = {}
-            self.table_status_cache[restaurant_id] = {}
             
         # Store connection by floor (0 for all floors)
         floor_key = floor_id or 0
@@ -113,8 +125,12 @@ class RealtimeTableManager:
             # Clean up empty structures
             if not self.connections[restaurant_id][floor_id]:
                 del self.connections[restaurant_id][floor_id]
+                if floor_id:
+                    self.floor_states.get(restaurant_id, {}).pop(floor_id, None)
             if not self.connections[restaurant_id]:
                 del self.connections[restaurant_id]
+                self.floor_states.pop(restaurant_id, None)
+                self.floor_metrics.pop(restaurant_id, None)
                 # Cancel background task
                 if restaurant_id in self.update_tasks:
                     self.update_tasks[restaurant_id].cancel()
@@ -132,10 +148,9 @@ class RealtimeTableManager:
         """Send initial table state to new connection"""
         try:
             async with get_db_context() as db:
-                # Get table statuses
-                table_status = await self._get_table_status(
-                    db, restaurant_id, floor_id
-                )
+                # Get table statuses, read once per open floor
+                state = await self._get_floor_state(db, restaurant_id, floor_id)
+                table_status = self._with_turn_times(state.tables.values())
                 
                 # Get current analytics
                 analytics = await self.analytics_service.get_current_analytics(
@@ -149,6 +164,7 @@ class RealtimeTableManager:
                 
                 await websocket.send_json({
                     "type": "initial_state",
+                    "version": state.version,
                     "data": {
                         "tables": table_status,
                         "analytics": analytics,
@@ -164,6 +180,59 @@ class RealtimeTableManager:
                 "message": "Failed to load initial state"
             })
             
+    async def _get_floor_state(
+        self,
+        db: AsyncSession,
+        restaurant_id: int,
+        floor_id: Optional[int]
+    ) -> FloorState:
+        """Get a floor's state, loading it and the restaurant-wide one if new"""
+        states = self.floor_states.setdefault(restaurant_id, {})
+        floor_key = floor_id or 0
+        
+        missing = [key for key in {0, floor_key} if key not in states]
+        if missing:
+            entries = await self._get_table_entries(db, restaurant_id, None)
+            for key in missing:
+                state = FloorState(key)
+                state.load(entries)
+                states[key] = state
+                
+        return states[floor_key]
+        
+    async def publish_table_changes(
+        self,
+        restaurant_id: int,
+        changes: Dict[int, Dict[str, Any]]
+    ):
+        """Send changed table fields to floors watching them, as patches"""
+        for floor_key, state in list(self.floor_states.get(restaurant_id, {}).items()):
+            version, patches = state.update(changes)
+            if patches:
+                await self._send_patches(restaurant_id, floor_key, version, patches)
+                
+    async def _send_patches(
+        self,
+        restaurant_id: int,
+        floor_key: int,
+        version: int,
+        patches: List[Dict[str, Any]]
+    ):
+        """Send a batch of table patches to one floor's connections"""
+        connections = self.connections.get(restaurant_id, {}).get(floor_key)
+        if not connections:
+            return
+            
+        await self._send_to_connections(
+            connections,
+            {
+                "type": UpdateType.TABLE_PATCH.value,
+                "version": version,
+                "patches": patches,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        )
+        
     async def broadcast_table_update(
         self,
         restaurant_id: int,
@@ -205,9 +274,12 @@ class RealtimeTableManager:
         """Send message to multiple connections"""
         disconnected = set()
         
-        for websocket in connections:
+        # Encoded once, as WebSocket.send_json would
+        payload = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        
+        for websocket in list(connections):
             try:
-                await websocket.send_json(message)
+                await websocket.send_text(payload)
             except Exception as e:
                 logger.error(f"Error sending to websocket: {e}")
                 disconnected.add(websocket)
@@ -222,24 +294,48 @@ class RealtimeTableManager:
         
         try:
             while restaurant_id in self.connections:
+                metrics = self.floor_metrics.setdefault(restaurant_id, FloorMetrics())
+                
                 async with get_db_context() as db:
-                    # Update turn times
-                    await self._update_turn_times(db, restaurant_id)
-                    
-                    # Update heat map
-                    await self._update_heat_map(db, restaurant_id)
+                    # Pick up changes made elsewhere as patches
+                    await self._sync_floor_states(db, restaurant_id)
                     
-                    # Check for alerts
-                    await self._check_alerts(db, restaurant_id)
+                    # Heat map history moves slowly; refresh it less often
+                    if (
+                        metrics.heat_map_refreshed_at is None
+                        or time.monotonic() - metrics.heat_map_refreshed_at
+                        >= HEAT_MAP_REFRESH_SECONDS
+                    ):
+                        await self._update_heat_map(db, restaurant_id)
+                        
+                # Turn times and alerts come from the sessions already held
+                await self._update_turn_times(restaurant_id)
+                await self._check_alerts(restaurant_id)
                     
                 # Wait before next update
-                await asyncio.sleep(30)  # Update every 30 seconds
+                await asyncio.sleep(FLOOR_SYNC_INTERVAL_SECONDS)
                 
         except asyncio.CancelledError:
             logger.info(f"Background updates cancelled for restaurant {restaurant_id}")
         except Exception as e:
             logger.error(f"Error in background updates: {e}")
             
+    async def _sync_floor_states(
+        self,
+        db: AsyncSession,
+        restaurant_id: int
+    ):
+        """Reconcile open floors with one read of the restaurant's tables"""
+        states = self.floor_states.get(restaurant_id)
+        if not states:
+            return
+            
+        entries = await self._get_table_entries(db, restaurant_id, None)
+        for floor_key, state in list(states.items()):
+            version, patches = state.sync(entries)
+            if patches:
+                await self._send_patches(restaurant_id, floor_key, version, patches)
+                
     async def _get_table_status(
         self,
         db: AsyncSession,
@@ -247,6 +343,16 @@ class RealtimeTableManager:
         floor_id: Optional[int]
     ) -> List[Dict]:
         """Get current status of all tables"""
+        entries = await self._get_table_entries(db, restaurant_id, floor_id)
+        return self._with_turn_times(entries)
+        
+    async def _get_table_entries(
+        self,
+        db: AsyncSession,
+        restaurant_id: int,
+        floor_id: Optional[int]
+    ) -> List[Dict]:
+        """Get table entries without derived turn times"""
         query = (
             select(Table)
             .options(selectinload(Table.current_session))
@@ -259,93 +365,106 @@ class RealtimeTableManager:
         result = await db.execute(query)
         tables = result.scalars().all()
         
+        return [
+            self.serialize_table(table, table.current_session)
+            for table in tables
+        ]
+        
+    @staticmethod
+    def serialize_session(session: TableSession) -> Dict[str, Any]:
+        """Entry for a table's open session"""
+        return {
+            "session_id": session.id,
+            "guest_count": session.guest_count,
+            "start_time": session.start_time.isoformat(),
+            "server_id": session.server_id,
+            "order_id": session.order_id
+        }
+        
+    @classmethod
+    def serialize_table(
+        cls,
+        table: Table,
+        session: Optional[TableSession]
+    ) -> Dict[str, Any]:
+        """Entry for a table as kept in floor state"""
+        return {
+            "id": table.id,
+            "table_number": table.table_number,
+            "floor_id": table.floor_id,
+            "status": table.status.value,
+            "capacity": {
+                "min": table.min_capacity,
+                "max": table.max_capacity,
+                "preferred": table.preferred_capacity
+            },
+            "position": {
+                "x": table.position_x,
+                "y": table.position_y,
+                "width": table.width,
+                "height": table.height,
+                "rotation": table.rotation
+            },
+            "current_session": cls.serialize_session(session) if session else None,
+            "features": {
+                "has_power": table.has_power_outlet,
+                "wheelchair_accessible": table.is_wheelchair_accessible,
+                "by_window": table.is_by_window,
+                "is_private": table.is_private
+            }
+        }
+        
+    @staticmethod
+    def _with_turn_times(entries) -> List[Dict]:
+        """Table entries with the current turn time of occupied tables"""
+        now = datetime.utcnow()
         table_data = []
-        for table in tables:
-            session = table.current_session
-            
-            # Calculate turn time if occupied
-            turn_time = None
+        for entry in entries:
+            session = entry.get("current_session")
             if session:
-                turn_time = (datetime.utcnow() - session.start_time).total_seconds() / 60
-                
-            table_data.append({
-                "id": table.id,
-                "table_number": table.table_number,
-                "floor_id": table.floor_id,
-                "status": table.status.value,
-                "capacity": {
-                    "min": table.min_capacity,
-                    "max": table.max_capacity,
-                    "preferred": table.preferred_capacity
-                },
-                "position": {
-                    "x": table.position_x,
-                    "y": table.position_y,
-                    "width": table.width,
-                    "height": table.height,
-                    "rotation": table.rotation
-                },
-                "current_session": {
-                    "session_id": session.id,
-                    "guest_count": session.guest_count,
-                    "start_time": session.start_time.isoformat(),
-                    "turn_time_minutes": round(turn_time, 1) if turn_time else None,
-                    "server_id": session.server_id,
-                    "order_id": session.order_id
-                } if session else None,
-                "features": {
-                    "has_power": table.has_power_outlet,
-                    "wheelchair_accessible": table.is_wheelchair_accessible,
-                    "by_window": table.is_by_window,
-                    "is_private": table.is_private
+                turn_time = turn_time_minutes(session["start_time"], now)
+                entry = {
+                    **entry,
+                    "current_session": {
+                        **session,
+                        "turn_time_minutes": round(turn_time, 1) if turn_time else None
+                    }
                 }
-            })
+            table_data.append(entry)
             
         return table_data
         
-    async def _update_turn_times(
-        self,
-        db: AsyncSession,
-        restaurant_id: int
-    ):
-        """Update and broadcast turn time analytics"""
-        # Get active sessions with turn times
-        query = (
-            select(
-                TableSession.table_id,
-                func.extract('epoch', func.current_timestamp() - TableSession.start_time) / 60
-            )
-            .join(Table)
-            .where(
-                and_(
-                    Table.restaurant_id == restaurant_id,
-                    TableSession.end_time.is_(None)
-                )
-            )
-        )
-        
-        result = await db.execute(query)
-        turn_times = {
-            table_id: round(minutes, 1) 
-            for table_id, minutes in result.all()
-        }
-        
+    async def _update_turn_times(self, restaurant_id: int):
+        """Broadcast turn times that crossed a step since last sent"""
+        state = self.floor_states.get(restaurant_id, {}).get(0)
+        metrics = self.floor_metrics.get(restaurant_id)
+        if not state or not metrics:
+            return
+            
+        sessions = state.active_sessions()
+        changed = metrics.changed_turn_times(sessions)
+        if not changed:
+            return
+            
         # Calculate average turn time
-        avg_turn_time = (
-            sum(turn_times.values()) / len(turn_times) 
-            if turn_times else 0
-        )
+        now = datetime.utcnow()
+        turn_times = [
+            turn_time_minutes(session["start_time"], now)
+            for session in sessions.values()
+        ]
+        avg_turn_time = sum(turn_times) / len(turn_times) if turn_times else 0
         
         # Broadcast update
-        for floor_connections in self.connections.get(restaurant_id, {}).values():
+        for floor_connections in list(self.connections.get(restaurant_id, {}).values()):
             await self._send_to_connections(
                 floor_connections,
                 {
                     "type": UpdateType.TURN_TIME_UPDATE.value,
                     "data": {
-                        "turn_times": turn_times,
+                        "turn_times": changed,
                         "average_turn_time": round(avg_turn_time, 1),
-                        "active_tables": len(turn_times)
+                        "active_tables": len(turn_times),
+                        "partial": True
                     },
                     "timestamp": datetime.utcnow().isoformat()
                 }
@@ -427,74 +546,64 @@ class RealtimeTableManager:
         db: AsyncSession,
         restaurant_id: int
     ):
-        """Update and broadcast heat map data"""
+        """Refresh the heat map and broadcast the cells that changed"""
+        metrics = self.floor_metrics.setdefault(restaurant_id, FloorMetrics())
+        first_refresh = metrics.heat_map_refreshed_at is None
+        
         heat_map = await self._get_heat_map_data(db, restaurant_id, None)
+        metrics.average_turn_time = await self.analytics_service.get_average_turn_time(
+            db, restaurant_id
+        )
+        metrics.heat_map_refreshed_at = time.monotonic()
+        
+        changes = metrics.changed_heat_map_cells(heat_map)
         
+        # Tablets received the full heat map when they connected
+        if first_refresh or not changes:
+            return
+            
         # Broadcast to all connections
-        for floor_connections in self.connections.get(restaurant_id, {}).values():
+        for floor_connections in list(self.connections.get(restaurant_id, {}).values()):
             await self._send_to_connections(
                 floor_connections,
                 {
                     "type": UpdateType.HEAT_MAP_UPDATE.value,
-                    "data": heat_map,
+                    "data": changes,
                     "timestamp": datetime.utcnow().isoformat()
                 }
             )
             
-    async def _check_alerts(
-        self,
-        db: AsyncSession,
-        restaurant_id: int
-    ):
-        """Check for and broadcast alerts"""
+    async def _check_alerts(self, restaurant_id: int):
+        """Broadcast alerts for tables newly over the long turn time threshold"""
+        state = self.floor_states.get(restaurant_id, {}).get(0)
+        metrics = self.floor_metrics.get(restaurant_id)
+        if not state or not metrics:
+            return
+            
+        sessions = state.active_sessions()
+        avg_turn_time = metrics.average_turn_time
         alerts = []
         
-        # Check for tables exceeding average turn time
-        avg_turn_time = await self.analytics_service.get_average_turn_time(
-            db, restaurant_id
-        )
-        
-        if avg_turn_time:
-            query = (
-                select(Table, TableSession)
-                .join(TableSession)
-                .where(
-                    and_(
-                        Table.restaurant_id == restaurant_id,
-                        TableSession.end_time.is_(None),
-                        func.extract(
-                            'epoch', 
-                            func.current_timestamp() - TableSession.start_time
-                        ) / 60 > avg_turn_time * 1.5  # 50% over average
-                    )
-                )
-            )
-            
-            result = await db.execute(query)
-            
-            for table, session in result.all():
-                turn_time = (
-                    datetime.utcnow() - session.start_time
-                ).total_seconds() / 60
-                
-                alerts.append({
-                    "type": "long_turn_time",
-                    "severity": "warning",
-                    "table_id": table.id,
-                    "table_number": table.table_number,
-                    "message": f"Table {table.table_number} has been occupied "
-                              f"for {round(turn_time)} minutes "
-                              f"(avg: {round(avg_turn_time)} min)",
-                    "data": {
-                        "turn_time_minutes": round(turn_time, 1),
-                        "average_turn_time": round(avg_turn_time, 1),
-                        "guest_count": session.guest_count
-                    }
-                })
+        for table_id, turn_time in metrics.new_alerts(sessions).items():
+            table = state.tables[table_id]
+            alerts.append({
+                "type": "long_turn_time",
+                "severity": "warning",
+                "table_id": table_id,
+                "table_number": table["table_number"],
+                "message": f"Table {table['table_number']} has been occupied "
+                          f"for {round(turn_time)} minutes "
+                          f"(avg: {round(avg_turn_time)} min)",
+                "data": {
+                    "turn_time_minutes": round(turn_time, 1),
+                    "average_turn_time": round(avg_turn_time, 1),
+                    "guest_count": sessions[table_id]["guest_count"]
+                }
+            })
                 
         # Broadcast alerts if any
         if alerts:
-            for floor_connections in self.connections.get(restaurant_id, {}).values():
+            for floor_connections in list(self.connections.get(restaurant_id, {}).values()):
                 await self._send_to_connections(
                     floor_connections,
                     {
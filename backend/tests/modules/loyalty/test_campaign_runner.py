@@ -0,0 +1,192 @@
+# backend/tests/modules/loyalty/test_campaign_runner.py
+
+"""
+Tests for the set-based automated campaign runner.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.database import Base
+from modules.customers.models.customer_models import Customer, CustomerTier
+from modules.loyalty.models.rewards_models import (
+    CustomerReward,
+    RewardCampaign,
+    RewardTemplate,
+    RewardType,
+    TriggerType,
+)
+from modules.loyalty.services.campaign_runner import CampaignRunner
+
+# Register the tables the reward foreign keys point at
+import core.rbac_models  # noqa: F401
+import modules.orders.models.order_models  # noqa: F401
+import modules.staff.models.staff_models  # noqa: F401
+
+TABLES = [
+    "rbac_users",
+    "roles",
+    "staff_members",
+    "categories",
+    "customer_addresses",
+    "customers",
+    "orders",
+    "reward_templates",
+    "customer_rewards_v2",
+    "reward_campaigns",
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            Base.metadata.tables[name]
+            for name in TABLES
+            if name in Base.metadata.tables
+        ],
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def customers(db):
+    """30 customers; every third one gold, customer 3 deleted"""
+    db.execute(
+        Customer.__table__.insert(),
+        [
+            dict(
+                id=index,
+                first_name="Ada",
+                last_name=str(index),
+                email=f"ada{index}@example.com",
+                tier=CustomerTier.GOLD if index % 3 == 0 else CustomerTier.BRONZE,
+                deleted_at=datetime.utcnow() if index == 3 else None,
+            )
+            for index in range(1, 31)
+        ],
+    )
+    db.commit()
+
+
+def make_campaign(db, **fields):
+    template = RewardTemplate(
+        name="Welcome back",
+        reward_type=RewardType.FIXED_DISCOUNT,
+        trigger_type=TriggerType.MANUAL,
+        title="$5 off",
+        value=5.0,
+        valid_days=14,
+    )
+    db.add(template)
+    db.flush()
+    fields.setdefault("max_rewards_per_customer", 1)
+    campaign = RewardCampaign(
+        name="Autumn",
+        template_id=template.id,
+        start_date=datetime.utcnow() - timedelta(days=1),
+        end_date=datetime.utcnow() + timedelta(days=30),
+        is_automated=True,
+        rewards_distributed=0,
+        **fields,
+    )
+    db.add(campaign)
+    db.commit()
+    return campaign.id, template.id
+
+
+def rewarded(db):
+    return sorted(
+        customer_id for (customer_id,) in db.query(CustomerReward.customer_id)
+    )
+
+
+class TestCampaignRunner:
+    def test_eligible_customers_are_rewarded_in_chunks(self, db, customers):
+        campaign_id, template_id = make_campaign(db, target_tiers=["gold"])
+        runner = CampaignRunner(db, chunk_size=4)
+
+        with patch.object(db, "execute", wraps=db.execute) as execute:
+            assert runner.run(campaign_id) == 9
+
+        # One bulk insert per chunk of four customers
+        inserts = [call for call in execute.call_args_list if call.args[0].is_insert]
+        assert [len(call.args[1]) for call in inserts] == [4, 4, 1]
+
+        assert rewarded(db) == [6, 9, 12, 15, 18, 21, 24, 27, 30]
+        codes = [code for (code,) in db.query(CustomerReward.code)]
+        assert len(set(codes)) == 9 and all(len(code) == 8 for code in codes)
+        reward = db.query(CustomerReward).first()
+        assert reward.trigger_data == {"campaign_id": campaign_id}
+        assert reward.valid_until > datetime.utcnow() + timedelta(days=13)
+
+        campaign = db.get(RewardCampaign, campaign_id)
+        assert campaign.rewards_distributed == 9
+        assert campaign.run_cursor is None
+        assert campaign.last_run_at is not None
+        assert db.get(RewardTemplate, template_id).total_issued == 9
+
+        # Everyone already holds the campaign reward
+        assert runner.run(campaign_id) == 0
+
+    def test_total_limit_is_respected(self, db, customers):
+        campaign_id, _ = make_campaign(db, max_rewards_total=5)
+
+        assert CampaignRunner(db, chunk_size=3).run(campaign_id) == 5
+        assert CampaignRunner(db, chunk_size=3).run(campaign_id) == 0
+
+        assert rewarded(db) == [1, 2, 4, 5, 6]
+        assert db.get(RewardCampaign, campaign_id).rewards_distributed == 5
+
+    def test_per_customer_limit_counts_campaign_rewards(self, db, customers):
+        campaign_id, template_id = make_campaign(db, max_rewards_per_customer=2)
+        # Issued before the campaign started; does not count toward its limit
+        db.add(
+            CustomerReward(
+                customer_id=1,
+                template_id=template_id,
+                reward_type=RewardType.FIXED_DISCOUNT,
+                title="$5 off",
+                code="OLDREWARD",
+                valid_until=datetime.utcnow(),
+                created_at=datetime.utcnow() - timedelta(days=10),
+            )
+        )
+        db.commit()
+        runner = CampaignRunner(db)
+
+        assert runner.run(campaign_id) == 29
+        assert runner.run(campaign_id) == 29
+        assert runner.run(campaign_id) == 0
+
+    def test_interrupted_run_resumes_from_checkpoint(self, db, customers):
+        campaign_id, _ = make_campaign(db)
+        runner = CampaignRunner(db, chunk_size=10)
+        generate_codes = runner._generate_codes
+        calls = []
+
+        def fail_second_chunk(count):
+            calls.append(count)
+            if len(calls) == 2:
+                raise RuntimeError("worker lost")
+            return generate_codes(count)
+
+        with patch.object(runner, "_generate_codes", side_effect=fail_second_chunk):
+            with pytest.raises(RuntimeError):
+                runner.run(campaign_id)
+        db.rollback()
+
+        assert len(rewarded(db)) == 10
+        assert db.get(RewardCampaign, campaign_id).run_cursor == 11
+
+        # The resumed run continues after the checkpoint without duplicates
+        assert runner.run(campaign_id) == 19
+        assert rewarded(db) == [i for i in range(1, 31) if i != 3]
@@ -11,6 +11,7 @@ from unittest.mock import Mock, patch, MagicMock, call
 from decimal import Decimal
 
 from modules.loyalty.services.loyalty_service import LoyaltyService
+from modules.loyalty.services.points_balance_service import PointsSummary
 from modules.loyalty.models.rewards_models import (
     RewardTemplate, CustomerReward, RewardCampaign,
     RewardRedemption, LoyaltyPointsTransaction,
@@ -42,7 +43,21 @@ def db_session():
 @pytest.fixture
 def loyalty_service(db_session):
     """Create LoyaltyService instance"""
-    return LoyaltyService(db_session)
+    service = LoyaltyService(db_session)
+    service.balances = Mock()
+    return service
+
+
+def mock_balance(service, balance, lifetime_earned=0):
+    """Stub the materialized points balance"""
+    service.balances.available_points.return_value = balance
+    service.balances.get_balance.return_value = balance
+    service.balances.get_summary.return_value = PointsSummary(
+        points_balance=balance,
+        lifetime_earned=lifetime_earned,
+        lifetime_spent=0,
+        expiring_points=0,
+    )
 
 
 @pytest.fixture
@@ -105,7 +120,7 @@ class TestPointsManagement:
         db_session.query.return_value.filter.return_value.first.return_value = sample_customer
         
         # Mock current balance
-        db_session.query.return_value.filter.return_value.scalar.return_value = 500
+        mock_balance(loyalty_service, 500)
         
         # Add points
         result = loyalty_service.add_points(transaction_data)
@@ -113,6 +128,7 @@ class TestPointsManagement:
         # Verify
         db_session.add.assert_called_once()
         db_session.commit.assert_called_once()
+        loyalty_service.balances.apply.assert_called_once()
         assert result.points_change == 100
         assert result.points_balance_before == 500
         assert result.points_balance_after == 600
@@ -130,7 +146,7 @@ class TestPointsManagement:
         db_session.query.return_value.filter.return_value.first.return_value = sample_customer
         
         # Mock insufficient balance
-        db_session.query.return_value.filter.return_value.scalar.return_value = 100
+        mock_balance(loyalty_service, 100)
         
         # Should raise error
         with pytest.raises(APIValidationError) as exc_info:
@@ -149,7 +165,7 @@ class TestPointsManagement:
         
         # Mock customer and balance
         db_session.query.return_value.filter.return_value.first.return_value = sample_customer
-        db_session.query.return_value.filter.return_value.scalar.return_value = 100
+        mock_balance(loyalty_service, 100)
         
         # Adjust points
         result = loyalty_service.adjust_points(adjustment, staff_id=1)
@@ -180,12 +196,10 @@ class TestPointsManagement:
         ]
         
         # Mock balances
-        db_session.query.return_value.filter.return_value.scalar.side_effect = [
+        loyalty_service.balances.available_points.side_effect = [
             200,  # From customer balance (sufficient)
             200,  # Balance check for debit
-            100,  # New balance after debit
-            50,   # To customer initial balance
-            150   # To customer new balance
+            50,   # To customer balance
         ]
         
         # Transfer points
@@ -194,7 +208,11 @@ class TestPointsManagement:
         # Verify transactions
         assert debit.points_change == -100
         assert credit.points_change == 100
+        assert credit.points_balance_after == 150
         assert db_session.add.call_count == 2
+        # Both balances are locked up front, in id order, and commit together
+        assert [c.args[0] for c in loyalty_service.balances.lock.call_args_list] == [1, 2]
+        db_session.commit.assert_called_once()
     
     def test_transfer_points_insufficient_balance(self, loyalty_service, db_session):
         """Test points transfer with insufficient balance"""
@@ -215,7 +233,7 @@ class TestPointsManagement:
         ]
         
         # Mock insufficient balance
-        db_session.query.return_value.filter.return_value.scalar.return_value = 50
+        mock_balance(loyalty_service, 50)
         
         # Should raise error
         with pytest.raises(APIValidationError) as exc_info:
@@ -576,11 +594,7 @@ class TestOrderIntegration:
         db_session.query.return_value.filter.return_value.first.return_value = Mock(id=1)
         
         # Mock points balance checks
-        db_session.query.return_value.filter.return_value.scalar.side_effect = [
-            0,    # Initial balance
-            100,  # After earning points
-            100   # For tier calculation
-        ]
+        mock_balance(loyalty_service, 0, lifetime_earned=100)
         
         # Mock triggered rewards check
         db_session.query.return_value.filter.return_value.all.return_value = []
@@ -616,11 +630,7 @@ class TestOrderIntegration:
             None  # No existing reward
         ]
         
-        db_session.query.return_value.filter.return_value.scalar.side_effect = [
-            0,    # Initial balance
-            200,  # After earning points
-            200   # For tier calculation
-        ]
+        mock_balance(loyalty_service, 0, lifetime_earned=200)
         
         db_session.query.return_value.filter.return_value.all.return_value = [triggered_template]
         db_session.query.return_value.filter.return_value.count.return_value = 0
@@ -639,7 +649,7 @@ class TestHelperMethods:
     def test_get_customer_points_balance(self, loyalty_service, db_session):
         """Test getting customer points balance"""
         # Mock balance query
-        db_session.query.return_value.filter.return_value.scalar.return_value = 500
+        mock_balance(loyalty_service, 500)
         
         balance = loyalty_service._get_customer_points_balance(1)
         
@@ -647,11 +657,8 @@ class TestHelperMethods:
     
     def test_get_customer_tier_calculation(self, loyalty_service, db_session):
         """Test customer tier calculation"""
-        # Mock lifetime points
-        db_session.query.return_value.filter.return_value.scalar.side_effect = [
-            2500,  # Lifetime earned (Silver tier)
-            2500   # For tier calculation
-        ]
+        # Mock lifetime points (Silver tier)
+        mock_balance(loyalty_service, 500, lifetime_earned=2500)
         
         tier_info = loyalty_service._calculate_customer_tier(1, 500)
         
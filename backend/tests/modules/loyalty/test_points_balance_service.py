@@ -0,0 +1,247 @@
+# backend/tests/modules/loyalty/test_points_balance_service.py
+
+"""
+Tests for materialized loyalty points balances and expiry buckets.
+"""
+
+import pytest
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from core.database import Base
+from modules.customers.models.customer_models import Customer
+from modules.loyalty.models.rewards_models import (
+    CustomerPointsBalance,
+    LoyaltyPointsTransaction,
+    PointsExpiryBucket,
+)
+from modules.loyalty.services.points_balance_service import (
+    PointsBalanceService,
+    overdue_balances_lock,
+    overdue_bucket_totals,
+)
+
+# Register the tables the ledger's foreign keys point at
+import core.rbac_models  # noqa: F401
+import modules.orders.models.order_models  # noqa: F401
+import modules.staff.models.staff_models  # noqa: F401
+
+TODAY = date(2026, 10, 18)
+
+# Tables referenced by the ledger's foreign keys
+TABLES = [
+    "rbac_users",
+    "roles",
+    "staff_members",
+    "categories",
+    "customer_addresses",
+    "customers",
+    "orders",
+    "reward_templates",
+    "customer_rewards_v2",
+    "loyalty_points_transactions",
+    "customer_points_balances",
+    "loyalty_points_expiry_buckets",
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            Base.metadata.tables[name]
+            for name in TABLES
+            if name in Base.metadata.tables
+        ],
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def customers(db):
+    db.execute(
+        Customer.__table__.insert(),
+        [
+            dict(
+                id=index,
+                first_name="Ada",
+                last_name=str(index),
+                email=f"ada{index}@example.com",
+            )
+            for index in (1, 2, 3)
+        ],
+    )
+    db.commit()
+    return [1, 2, 3]
+
+
+def ledger_entry(customer_id, points, expires_on=None, **fields):
+    fields.setdefault("transaction_type", "earned" if points > 0 else "redeemed")
+    return LoyaltyPointsTransaction(
+        customer_id=customer_id,
+        points_change=points,
+        points_balance_before=0,
+        points_balance_after=0,
+        reason="test",
+        expires_at=(
+            datetime.combine(expires_on, datetime.min.time()) + timedelta(hours=12)
+            if expires_on
+            else None
+        ),
+        **fields,
+    )
+
+
+def record(db, service, customer_id, points, expires_on=None):
+    transaction = ledger_entry(customer_id, points, expires_on)
+    service.apply(transaction)
+    db.add(transaction)
+    db.commit()
+    return transaction
+
+
+def buckets(db, customer_id):
+    return {
+        bucket.expires_on: bucket.points
+        for bucket in db.query(PointsExpiryBucket).filter(
+            PointsExpiryBucket.customer_id == customer_id
+        )
+    }
+
+
+class TestBalances:
+    def test_transactions_update_totals_and_buckets(self, db, customers):
+        service = PointsBalanceService(db)
+        customer_id = customers[0]
+
+        record(db, service, customer_id, 100, TODAY + timedelta(days=10))
+        record(db, service, customer_id, 50, TODAY + timedelta(days=10))
+        record(db, service, customer_id, 70, TODAY + timedelta(days=90))
+        record(db, service, customer_id, -30)
+
+        summary = service.get_summary(customer_id, today=TODAY)
+        assert summary.points_balance == 190
+        assert summary.lifetime_earned == 220
+        assert summary.lifetime_spent == 30
+        assert summary.expiring_points == 150
+        assert buckets(db, customer_id) == {
+            TODAY + timedelta(days=10): 150,
+            TODAY + timedelta(days=90): 70,
+        }
+
+    def test_balance_is_created_from_existing_ledger(self, db, customers):
+        customer_id = customers[0]
+        db.add_all(
+            [
+                ledger_entry(customer_id, 200, TODAY + timedelta(days=5)),
+                ledger_entry(customer_id, -50),
+                ledger_entry(
+                    customer_id, 40, TODAY - timedelta(days=5), is_expired=True
+                ),
+            ]
+        )
+        db.commit()
+
+        service = PointsBalanceService(db)
+        summary = service.get_summary(customer_id, today=TODAY)
+
+        assert summary.points_balance == 150
+        assert summary.lifetime_earned == 240
+        assert summary.lifetime_spent == 50
+        assert summary.expiring_points == 200
+        balance = db.get(CustomerPointsBalance, customer_id)
+        assert balance.lifetime_expired == 40
+
+        # Later transactions build on the materialized row
+        record(db, service, customer_id, 10)
+        assert service.get_summary(customer_id, today=TODAY).points_balance == 160
+        assert db.query(CustomerPointsBalance).count() == 1
+
+    def test_points_are_usable_through_expiry_date(self, db, customers):
+        service = PointsBalanceService(db)
+        customer_id = customers[0]
+        record(db, service, customer_id, 100, TODAY)
+        record(db, service, customer_id, 20)
+
+        assert service.get_summary(customer_id, today=TODAY).points_balance == 120
+        # Overdue points stop counting before the nightly job runs
+        tomorrow = TODAY + timedelta(days=1)
+        assert service.get_summary(customer_id, today=tomorrow).points_balance == 20
+        balance = service.lock(customer_id)
+        assert service.available_points(balance, today=tomorrow) == 20
+
+
+class TestExpiry:
+    def test_overdue_buckets_expire_in_bulk(self, db, customers):
+        service = PointsBalanceService(db)
+        first, second, third = customers
+        record(db, service, first, 100, TODAY - timedelta(days=1))
+        record(db, service, first, 30, TODAY + timedelta(days=30))
+        record(db, service, second, 60, TODAY - timedelta(days=3))
+        record(db, service, second, 40, TODAY - timedelta(days=2))
+        record(db, service, third, 25, TODAY)
+
+        result = service.expire_points(today=TODAY)
+
+        assert result == {
+            "customers": 2,
+            "points_expired": 200,
+            "transactions_expired": 3,
+            "buckets_removed": 3,
+        }
+        db.expire_all()
+        balances = {
+            balance.customer_id: (balance.points_balance, balance.lifetime_expired)
+            for balance in db.query(CustomerPointsBalance)
+        }
+        assert balances == {first: (30, 100), second: (0, 100), third: (25, 0)}
+        assert buckets(db, first) == {TODAY + timedelta(days=30): 30}
+        assert buckets(db, third) == {TODAY: 25}
+
+        # Nothing left to expire, and the ledger agrees with the balances
+        assert service.expire_points(today=TODAY)["customers"] == 0
+        assert service.rebuild_balances()["customers_corrected"] == 0
+
+    def test_expiry_locks_balances_not_grouped_buckets(self):
+        # PostgreSQL rejects FOR UPDATE together with GROUP BY
+        lock = str(overdue_balances_lock(TODAY).compile(dialect=postgresql.dialect()))
+        totals = str(overdue_bucket_totals(TODAY).compile(dialect=postgresql.dialect()))
+
+        assert lock.startswith("SELECT customer_points_balances.customer_id")
+        assert "GROUP BY" not in lock
+        assert lock.endswith("ORDER BY customer_points_balances.customer_id FOR UPDATE")
+        assert "GROUP BY" in totals
+        assert "FOR UPDATE" not in totals
+
+
+class TestRebuild:
+    def test_drift_is_corrected_from_ledger(self, db, customers):
+        service = PointsBalanceService(db)
+        first, second, third = customers
+        record(db, service, first, 100, TODAY + timedelta(days=10))
+        record(db, service, second, 80)
+        # Written without updating the balance
+        db.add(ledger_entry(first, 25, TODAY + timedelta(days=20)))
+        db.query(PointsExpiryBucket).filter(
+            PointsExpiryBucket.customer_id == first
+        ).update({"points": 90})
+        db.commit()
+
+        result = service.rebuild_balances(batch_size=2)
+
+        assert result == {"customers_checked": 2, "customers_corrected": 1}
+        db.expire_all()
+        assert service.get_summary(first, today=TODAY).points_balance == 125
+        assert buckets(db, first) == {
+            TODAY + timedelta(days=10): 100,
+            TODAY + timedelta(days=20): 25,
+        }
+        assert service.get_summary(second, today=TODAY).points_balance == 80
+        assert db.get(CustomerPointsBalance, third) is None
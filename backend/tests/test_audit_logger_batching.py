@@ -0,0 +1,362 @@
+"""
+Tests for batched audit log writes.
+
+Ensures start and completion entries for a request become one row,
+batches go to the database as single inserts, and entries spill to the
+overflow file instead of being dropped.
+"""
+
+import pytest
+import asyncio
+import json
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy.dialects import postgresql
+
+from core import audit_logger as audit_module
+from core.audit_logger import AuditLogger
+
+
+class FakeSession:
+    """Records the statements executed in each session."""
+
+    def __init__(self, statements, fail=False, started_rows=()):
+        self.statements = statements
+        self.fail = fail
+        self.started_rows = list(started_rows)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, statement):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: self.started_rows)
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    with patch.object(audit_module, "AUDIT_LOG_DIR", tmp_path):
+        yield tmp_path
+
+
+@pytest.fixture
+def overflow_file(log_dir):
+    path = log_dir / "audit_overflow.jsonl"
+    with patch.object(audit_module, "AUDIT_OVERFLOW_FILE", path):
+        yield path
+
+
+@pytest.fixture
+def file_handlers(log_dir):
+    """Route the audit file logger to handlers created under tmp_path."""
+    file_logger = logging.getLogger("audit_file")
+    existing_handlers = file_logger.handlers[:]
+    for handler in existing_handlers:
+        file_logger.removeHandler(handler)
+    yield file_logger
+
+    for handler in file_logger.handlers[:]:
+        file_logger.removeHandler(handler)
+        handler.close()
+    for handler in existing_handlers:
+        file_logger.addHandler(handler)
+
+
+@pytest.fixture
+def audit(overflow_file, file_handlers):
+    logger = AuditLogger()
+    logger.statements = []
+    logger._db_session = lambda: FakeSession(logger.statements)
+    return logger
+
+
+def inserted_rows(statement):
+    params = statement.compile(dialect=postgresql.dialect()).params
+    count = len([key for key in params if key.startswith("request_id_m")])
+    return [
+        {
+            column: params[f"{column}_m{index}"]
+            for column in audit_module.AUDIT_ROW_COLUMNS
+        }
+        for index in range(count)
+    ]
+
+
+async def log_request(audit, request_id, status_code=200):
+    await audit.log_operation_start(
+        operation_type="payment",
+        user_id=1,
+        request_id=request_id,
+        request_data={"amount": 10},
+    )
+    await audit.log_operation_complete(
+        operation_type="payment",
+        request_id=request_id,
+        status_code=status_code,
+        duration_ms=12,
+    )
+
+
+class TestGroupCommit:
+    """Test merged, batched writes."""
+
+    @pytest.mark.asyncio
+    async def test_requests_written_as_one_insert(self, audit):
+        """Start and completion pairs become single rows in one insert."""
+        writer = asyncio.create_task(audit._background_writer())
+        for n in range(50):
+            await log_request(audit, f"req-{n}")
+        await audit.log_operation_failure(
+            operation_type="payment",
+            request_id="req-7",
+            error="declined",
+            duration_ms=30,
+        )
+
+        await audit._write_queue.put(None)
+        await writer
+
+        assert len(audit.statements) == 1
+        rows = inserted_rows(audit.statements[0])
+        assert len(rows) == 50
+        by_request = {row["request_id"]: row for row in rows}
+        assert by_request["req-0"]["status"] == "completed"
+        assert by_request["req-0"]["request_data"] == {"amount": 10}
+        assert by_request["req-0"]["status_code"] == 200
+        assert by_request["req-7"]["status"] == "failed"
+        assert by_request["req-7"]["error_message"] == "declined"
+        assert audit.get_metrics()["last_batch_size"] == 50
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped(self, audit):
+        """Batches hold at most AUDIT_BATCH_SIZE entries."""
+        with patch.object(audit_module, "AUDIT_BATCH_SIZE", 10):
+            for n in range(25):
+                await log_request(audit, f"req-{n}")
+            batch, stop = await audit._next_batch()
+
+        assert len(batch) == 10
+        assert stop is False
+        assert audit.get_metrics()["queue_depth"] == 40
+
+    def test_unfinished_starts_are_held(self, audit):
+        """Starts wait for their completion, up to the hold time."""
+        start = (
+            "start",
+            {
+                "timestamp": "2024-05-01T12:00:00",
+                "request_id": "a",
+                "status": "started",
+            },
+        )
+
+        assert audit._merge_batch([start]) == []
+        assert "a" in audit._held_starts
+
+        with patch.object(audit_module, "AUDIT_START_HOLD_SECONDS", 0):
+            rows = audit._merge_batch([])
+        assert [row["status"] for row in rows] == ["started"]
+        assert audit._held_starts == {}
+
+    def test_late_completion_updates_started_row(self, audit):
+        """Rows already written as started take the completion fields."""
+        row = audit._audit_row(
+            {
+                "timestamp": "2024-05-01T12:00:00",
+                "request_id": "a",
+                "status": "completed",
+                "status_code": 201,
+            }
+        )
+        sql = str(audit._upsert_statement([row]).compile(dialect=postgresql.dialect()))
+
+        assert "ON CONFLICT (request_id, timestamp) DO UPDATE" in sql
+        assert "coalesce(excluded.status_code, audit_logs.status_code)" in sql
+
+    def test_late_completion_keeps_start_timestamp(self, audit):
+        """The completion of a start written alone targets the same row."""
+        start = {
+            "timestamp": "2024-05-01T12:00:00",
+            "request_id": "a",
+            "status": "started",
+        }
+        audit._merge_batch([("start", start)], flush_all=True)
+
+        rows = audit._merge_batch(
+            [
+                (
+                    "complete",
+                    {
+                        "timestamp": "2024-05-01T12:00:05",
+                        "request_id": "a",
+                        "status": "completed",
+                    },
+                )
+            ]
+        )
+
+        assert rows[0]["timestamp"] == "2024-05-01T12:00:00"
+        assert audit._written_starts == {}
+
+    @pytest.mark.asyncio
+    async def test_completion_of_start_written_elsewhere(self, audit):
+        """A start not known in memory is looked up by request_id."""
+        completion = {
+            "timestamp": "2024-05-01T12:00:05",
+            "request_id": "a",
+            "status": "completed",
+            "status_code": 200,
+        }
+        rows = audit._merge_batch([("complete", completion)])
+        started_at = datetime(2024, 5, 1, 12, 0)
+        audit._db_session = lambda: FakeSession(
+            audit.statements, started_rows=[("a", started_at)]
+        )
+
+        assert await audit._flush(rows)
+
+        lookup, upsert = audit.statements
+        sql = str(lookup.compile(dialect=postgresql.dialect()))
+        assert "audit_logs.status = %(status_1)s" in sql
+        assert "GROUP BY audit_logs.request_id" in sql
+        assert inserted_rows(upsert)[0]["timestamp"] == started_at
+        assert audit._unmatched_completions == set()
+
+    @pytest.mark.asyncio
+    async def test_completion_without_started_row(self, audit):
+        """Without a started row the completion is inserted as its own row."""
+        completion = {
+            "timestamp": "2024-05-01T12:00:05",
+            "request_id": "a",
+            "status": "completed",
+        }
+
+        assert await audit._flush(audit._merge_batch([("complete", completion)]))
+
+        upsert = audit.statements[-1]
+        assert inserted_rows(upsert)[0]["timestamp"] == datetime(2024, 5, 1, 12, 0, 5)
+
+
+class TestBackpressure:
+    """Test queue bounds and the overflow file."""
+
+    @pytest.mark.asyncio
+    async def test_full_queue_spills_to_file(self, audit, overflow_file):
+        """Entries that do not fit in time go to the overflow file."""
+        audit._write_queue = asyncio.Queue(maxsize=2)
+        with patch.object(audit_module, "AUDIT_BACKPRESSURE_SECONDS", 0.01):
+            for n in range(3):
+                await log_request(audit, f"req-{n}")
+
+        lines = overflow_file.read_text().splitlines()
+        assert [json.loads(line)["operation"] for line in lines] == [
+            "start",
+            "complete",
+        ] * 2
+        assert audit.get_metrics()["overflow_pending"] is True
+
+    @pytest.mark.asyncio
+    async def test_failed_writes_are_replayed(self, audit, overflow_file):
+        """Rows from a failed insert are written once the database is back."""
+        rows = audit._merge_batch(
+            [
+                (
+                    "complete",
+                    {
+                        "timestamp": "2024-05-01T12:00:00",
+                        "request_id": "a",
+                        "status": "completed",
+                    },
+                )
+            ]
+        )
+        audit._db_session = lambda: FakeSession(audit.statements, fail=True)
+        assert await audit._flush(rows) is False
+        assert overflow_file.exists()
+
+        audit._db_session = lambda: FakeSession(audit.statements)
+        await audit._replay_overflow()
+
+        assert not overflow_file.exists()
+        # The replay looks up the start row again before inserting
+        assert inserted_rows(audit.statements[-1])[0]["request_id"] == "a"
+        assert audit.get_metrics()["overflow_pending"] is False
+
+    @pytest.mark.asyncio
+    async def test_replayed_rows_with_one_key_are_merged(self, audit, overflow_file):
+        """A spilled start row and its completion row become one insert row."""
+        started = {
+            "timestamp": "2024-05-01T12:00:00",
+            "request_id": "a",
+            "status": "started",
+            "request_data": {"amount": 10},
+        }
+        completed = {
+            "timestamp": "2024-05-01T12:00:00",
+            "request_id": "a",
+            "status": "completed",
+            "status_code": 200,
+            "duration_ms": 12,
+        }
+        await audit._write_overflow(
+            [("row", audit._audit_row(started)), ("row", audit._audit_row(completed))],
+            reason="write_failed",
+        )
+
+        await audit._replay_overflow()
+
+        rows = inserted_rows(audit.statements[-1])
+        assert len(rows) == 1
+        assert rows[0]["status"] == "completed"
+        assert rows[0]["status_code"] == 200
+        assert rows[0]["request_data"] == {"amount": 10}
+
+    @pytest.mark.asyncio
+    async def test_replay_leaves_live_starts_held(self, audit, overflow_file):
+        """Only replayed starts are forced out; live ones keep waiting."""
+        await audit.log_operation_start(
+            operation_type="payment", user_id=1, request_id="live"
+        )
+        audit._merge_batch([await audit._write_queue.get()])
+        await audit._write_overflow(
+            [
+                (
+                    "start",
+                    {
+                        "timestamp": "2024-05-01T12:00:00",
+                        "request_id": "spilled",
+                        "status": "started",
+                    },
+                )
+            ],
+            reason="queue_full",
+        )
+
+        await audit._replay_overflow()
+
+        rows = inserted_rows(audit.statements[-1])
+        assert [row["request_id"] for row in rows] == ["spilled"]
+        assert "live" in audit._held_starts
+        assert audit._written_starts["spilled"] == "2024-05-01T12:00:00"
+
+    @pytest.mark.asyncio
+    async def test_file_only_mode_does_not_queue(
+        self, overflow_file, file_handlers, log_dir
+    ):
+        """Without a database, entries only go to the audit file."""
+        audit = AuditLogger()
+        await log_request(audit, "req-1")
+
+        assert audit._write_queue.qsize() == 0
+        assert not overflow_file.exists()
+        assert '"request_id": "req-1"' in (log_dir / "audit.log").read_text()
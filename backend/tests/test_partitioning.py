@@ -0,0 +1,198 @@
+"""
+Tests for time-partitioned log tables.
+
+Covers partition ranges, partition drops for retention, and the batched
+delete fallback used on databases without partitioning.
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from core import partitioning
+from core.partitioning import (
+    PartitionSpec,
+    create_partitions,
+    delete_in_batches,
+    drop_partitions_before,
+    list_partitions,
+    purge_before,
+)
+
+Base = declarative_base()
+
+
+class EventLog(Base):
+    __tablename__ = "event_logs"
+
+    id = Column(Integer, primary_key=True)
+    logged_at = Column(DateTime, nullable=False)
+
+
+class EventNote(Base):
+    __tablename__ = "event_notes"
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey("event_logs.id"), nullable=False)
+
+
+EVENT_LOGS = PartitionSpec("event_logs", "logged_at", "day")
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with patch.dict(partitioning.PARTITIONED_TABLES, {"event_logs": EVENT_LOGS}):
+        yield session
+    session.close()
+
+
+class PostgresSession:
+    """Answers catalog queries and records the DDL it is given."""
+
+    def __init__(self, partitions=()):
+        self.partitions = list(partitions)
+        self.statements = []
+
+    def get_bind(self):
+        return Mock(dialect=Mock())
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        result = Mock()
+        if "pg_inherits" in sql:
+            result.all.return_value = self.partitions
+        else:
+            self.statements.append(sql)
+        return result
+
+    def commit(self):
+        pass
+
+
+class TestPartitionSpec:
+    """Test partition ranges and names."""
+
+    def test_monthly_partitions(self):
+        spec = PartitionSpec("audit_logs", "timestamp", "month")
+        start = spec.partition_start(datetime(2024, 12, 31, 23, 59))
+
+        assert start == datetime(2024, 12, 1)
+        assert spec.next_start(start) == datetime(2025, 1, 1)
+        assert spec.partition_name(start) == "audit_logs_p202412"
+
+    def test_daily_partitions(self):
+        start = EVENT_LOGS.partition_start(datetime(2024, 2, 28, 18, 30))
+
+        assert EVENT_LOGS.next_start(start) == datetime(2024, 2, 29)
+        assert EVENT_LOGS.partition_name(start) == "event_logs_p20240228"
+
+    def test_create_partitions_skips_existing(self):
+        db = PostgresSession(
+            [
+                (
+                    "event_logs_p20240501",
+                    "FOR VALUES FROM ('2024-05-01') TO ('2024-05-02')",
+                )
+            ]
+        )
+
+        created = create_partitions(
+            db, EVENT_LOGS, datetime(2024, 5, 3), since=datetime(2024, 5, 1, 9)
+        )
+
+        assert created == ["event_logs_p20240502"]
+        assert db.statements == [
+            'CREATE TABLE IF NOT EXISTS "event_logs_p20240502" '
+            'PARTITION OF "event_logs" '
+            "FOR VALUES FROM ('2024-05-02 00:00:00') TO ('2024-05-03 00:00:00')"
+        ]
+
+
+class TestPartitionRetention:
+    """Test retention by dropping partitions."""
+
+    def test_partitions_are_ordered_by_upper_bound(self):
+        db = PostgresSession(
+            [
+                (
+                    "event_logs_p20240502",
+                    "FOR VALUES FROM ('2024-05-02 00:00:00+00') "
+                    "TO ('2024-05-03 00:00:00+00')",
+                ),
+                (
+                    "event_logs_history",
+                    "FOR VALUES FROM (MINVALUE) TO ('2024-05-01 00:00:00')",
+                ),
+                ("event_logs_default", "DEFAULT"),
+            ]
+        )
+
+        assert list_partitions(db, "event_logs") == [
+            ("event_logs_history", datetime(2024, 5, 1)),
+            ("event_logs_p20240502", datetime(2024, 5, 3)),
+        ]
+
+    def test_only_partitions_before_cutoff_are_dropped(self):
+        db = PostgresSession(
+            [
+                (
+                    "event_logs_p20240501",
+                    "FOR VALUES FROM ('2024-05-01') TO ('2024-05-02')",
+                ),
+                (
+                    "event_logs_p20240502",
+                    "FOR VALUES FROM ('2024-05-02') TO ('2024-05-03')",
+                ),
+            ]
+        )
+
+        dropped = drop_partitions_before(db, "event_logs", datetime(2024, 5, 2, 12))
+
+        assert dropped == ["event_logs_p20240501"]
+        assert db.statements == [
+            'ALTER TABLE "event_logs" DETACH PARTITION "event_logs_p20240501"',
+            'DROP TABLE "event_logs_p20240501"',
+        ]
+
+
+class TestBatchedDeletes:
+    """Test the batched delete path."""
+
+    def test_purge_without_partitioning_deletes_in_batches(self, db):
+        db.add_all(
+            EventLog(id=n, logged_at=datetime(2024, 5, 1 + n % 10))
+            for n in range(1, 31)
+        )
+        db.commit()
+
+        with patch.object(partitioning, "RETENTION_DELETE_BATCH_SIZE", 4):
+            result = purge_before(db, EventLog, datetime(2024, 5, 6))
+
+        assert result.partitions_dropped == []
+        # Days 1 to 5 of each ten-day cycle, rows 10, 20 and 30 fall on day 1
+        assert result.rows_deleted == 15
+        assert db.query(EventLog).count() == 15
+        assert all(row.logged_at >= datetime(2024, 5, 6) for row in db.query(EventLog))
+
+    def test_dependents_are_deleted_first(self, db):
+        db.add_all(
+            [EventLog(id=1, logged_at=datetime(2024, 5, 1)), EventNote(event_id=1)]
+        )
+        db.commit()
+
+        deleted = delete_in_batches(
+            db,
+            EventLog,
+            [EventLog.logged_at < datetime(2024, 6, 1)],
+            dependents=[EventNote.event_id],
+            batch_size=10,
+        )
+
+        assert deleted == 1
+        assert db.query(EventNote).count() == 0
@@ -0,0 +1,283 @@
+"""
+Tests for the session expiry index.
+
+Ensures cleanup, per-user revocation and session counts work from sorted
+sets instead of scanning keys, and that multi-key updates are pipelined.
+"""
+
+import itertools
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import redis
+
+from core import session_manager as session_module
+from core.session_manager import SessionManager, SESSION_EXPIRY_KEY
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the session manager uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def _call(self, name, *args, **kwargs):
+        self.round_trips += 1
+        return getattr(self, f"_{name}")(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if not hasattr(type(self), f"_{name}"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def _typed(self, key, kind, default):
+        value = self.data.get(key)
+        if value is None:
+            return default
+        if not isinstance(value, kind):
+            raise redis.ResponseError(
+                "WRONGTYPE Operation against a key holding the wrong kind of value"
+            )
+        return value
+
+    def _ping(self):
+        return True
+
+    def _scan(self, *args, **kwargs):
+        raise AssertionError("sessions must not be found by scanning")
+
+    def _type(self, key):
+        value = self.data.get(key)
+        if value is None:
+            return "none"
+        return {dict: "hash", set: "set", str: "string"}.get(type(value), "zset")
+
+    def _hset(self, key, field=None, value=None, mapping=None):
+        self._typed(key, dict, None)
+        mapping = dict(mapping or {field: value})
+        self.data.setdefault(key, {}).update(
+            {name: str(item) for name, item in mapping.items()}
+        )
+        return len(mapping)
+
+    def _hgetall(self, key):
+        return dict(self._typed(key, dict, {}))
+
+    def _hget(self, key, field):
+        return self._typed(key, dict, {}).get(field)
+
+    def _hmget(self, key, *fields):
+        values = self._typed(key, dict, {})
+        return [values.get(field) for field in fields]
+
+    def _expire(self, key, ttl):
+        return key in self.data
+
+    def _delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def _set(self, key, value):
+        self.data[key] = value
+        return True
+
+    def _exists(self, key):
+        return int(key in self.data)
+
+    def _smembers(self, key):
+        return set(self._typed(key, set, set()))
+
+    def _sadd(self, key, *members):
+        self._typed(key, set, None)
+        self.data.setdefault(key, set()).update(members)
+        return len(members)
+
+    def _zadd(self, key, mapping):
+        self._typed(key, ZSet, None)
+        self.data.setdefault(key, ZSet()).update(mapping)
+        return len(mapping)
+
+    def _zrem(self, key, *members):
+        zset = self._typed(key, ZSet, ZSet())
+        removed = sum(zset.pop(member, None) is not None for member in members)
+        if key in self.data and not zset:
+            del self.data[key]
+        return removed
+
+    def _zrange(self, key, start, end):
+        members = self._typed(key, ZSet, ZSet()).ordered()
+        return members[start:] if end == -1 else members[start : end + 1]
+
+    def _zrangebyscore(self, key, low, high, start=0, num=None):
+        zset = self._typed(key, ZSet, ZSet())
+        members = [
+            member
+            for member in zset.ordered()
+            if float(low) <= zset[member] <= float(high)
+        ]
+        return members[start : None if num is None else start + num]
+
+    def _zcount(self, key, low, high):
+        zset = self._typed(key, ZSet, ZSet())
+        return sum(float(low) <= score <= float(high) for score in zset.values())
+
+
+class ZSet(dict):
+    def ordered(self):
+        return sorted(self, key=lambda member: (self[member], member))
+
+
+class FakePipeline:
+    """Queues commands and runs them in one round trip."""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self.queued = []
+
+    def __len__(self):
+        return len(self.queued)
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.queued.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        self.redis.round_trips += 1
+        results = []
+        error = None
+        for name, args, kwargs in self.queued:
+            try:
+                results.append(getattr(self.redis, f"_{name}")(*args, **kwargs))
+            except redis.ResponseError as e:
+                error = error or e
+                results.append(e)
+        self.queued = []
+        if error:
+            raise error
+        return results
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def manager(fake_redis):
+    # Session IDs embed a millisecond timestamp; keep them unique
+    clock = itertools.count(1_700_000_000)
+    with patch.object(session_module.Redis, "from_url", return_value=fake_redis):
+        manager = SessionManager()
+    with patch.object(session_module.time, "time", lambda: next(clock)):
+        yield manager
+
+
+def store_session(manager, user_id, expires_in_minutes):
+    return manager.create_session(
+        user_id=user_id,
+        username=f"user{user_id}",
+        refresh_token=f"refresh-{user_id}-{expires_in_minutes}",
+        expires_at=datetime.utcnow() + timedelta(minutes=expires_in_minutes),
+    )
+
+
+class TestExpiryIndex:
+    """Test sessions indexed by expiry."""
+
+    def test_create_session_is_one_round_trip(self, manager, fake_redis):
+        """Session data and both index entries are written together."""
+        fake_redis.round_trips = 0
+        session_id = manager.create_session(
+            user_id=1,
+            username="user1",
+            refresh_token="refresh",
+            expires_at=datetime.utcnow() + timedelta(hours=1),
+        )
+
+        assert fake_redis.round_trips == 1
+        assert session_id in fake_redis.data[SESSION_EXPIRY_KEY]
+        assert session_id in fake_redis.data["user_sessions:1"]
+
+    def test_cleanup_uses_expiry_index(self, manager, fake_redis):
+        """Only due sessions are removed, in pipelined batches."""
+        expired = [store_session(manager, user_id, -5) for user_id in range(5)]
+        active = store_session(manager, 9, 60)
+        fake_redis.round_trips = 0
+
+        with patch.object(session_module, "SESSION_CLEANUP_BATCH_SIZE", 2):
+            assert manager.cleanup_expired_sessions() == 5
+
+        # A range read and a removal pipeline per batch, then the empty range
+        assert fake_redis.round_trips == 7
+        assert list(fake_redis.data[SESSION_EXPIRY_KEY]) == [active]
+        for session_id in expired:
+            assert f"session:{session_id}" not in fake_redis.data
+        assert "user_sessions:0" not in fake_redis.data
+
+    def test_cleanup_counts_only_stored_sessions(self, manager, fake_redis):
+        """Sessions whose data Redis already expired still leave the index."""
+        session_id = store_session(manager, 1, -5)
+        del fake_redis.data[f"session:{session_id}"]
+
+        assert manager.cleanup_expired_sessions() == 0
+        assert SESSION_EXPIRY_KEY not in fake_redis.data
+        assert "user_sessions:1" not in fake_redis.data
+
+    def test_revoke_all_user_sessions(self, manager, fake_redis):
+        """A user's sessions are revoked without per-session round trips."""
+        sessions = [store_session(manager, 1, 30) for _ in range(10)]
+        store_session(manager, 1, -5)
+        other = store_session(manager, 2, 30)
+        fake_redis.round_trips = 0
+
+        assert manager.revoke_all_user_sessions(1) == 10
+
+        assert fake_redis.round_trips == 4
+        assert list(fake_redis.data[SESSION_EXPIRY_KEY]) == [other]
+        assert "user_sessions:1" not in fake_redis.data
+        assert manager.is_token_blacklisted("refresh-1-30")
+        assert all(f"session:{sid}" not in fake_redis.data for sid in sessions)
+
+    def test_user_session_count_skips_expired(self, manager):
+        """Counts come from the user's sorted set."""
+        store_session(manager, 1, 30)
+        store_session(manager, 1, 60)
+        store_session(manager, 1, -5)
+
+        assert manager.get_user_session_count(1) == 2
+
+    def test_expired_session_is_removed_on_read(self, manager, fake_redis):
+        """Reading an expired session removes it and its index entries."""
+        session_id = store_session(manager, 1, -5)
+
+        assert manager.get_session(session_id) is None
+        assert fake_redis.data == {"blacklist:refresh-1--5": "1"}
+
+
+class TestLegacyUserSets:
+    """Test upgrading user session keys stored as plain sets."""
+
+    def test_legacy_set_is_upgraded(self, manager, fake_redis):
+        session_id = store_session(manager, 1, 30)
+        fake_redis.data["user_sessions:1"] = {session_id}
+
+        assert manager.get_user_session_count(1) == 1
+        assert fake_redis.type("user_sessions:1") == "zset"
+
+        new_session = store_session(manager, 1, 60)
+        assert set(fake_redis.data["user_sessions:1"]) == {session_id, new_session}
+
+    def test_revoke_session_with_legacy_set(self, manager, fake_redis):
+        session_id = store_session(manager, 1, 30)
+        fake_redis.data["user_sessions:1"] = {session_id}
+
+        assert manager.revoke_session(session_id) is True
+        assert "user_sessions:1" not in fake_redis.data
+        assert SESSION_EXPIRY_KEY not in fake_redis.data
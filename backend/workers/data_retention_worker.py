@@ -19,6 +19,7 @@ from arq.connections import RedisSettings
 from core.session_manager import SessionManager
 from core.database import get_db, SessionLocal
 from core.config_validation import config
+from core.partitioning import ensure_partitions
 
 # Optional dependencies.  Import lazily so the worker still starts when a
 # given module is disabled / not installed.
@@ -34,6 +35,13 @@ try:
 except Exception:  # pragma: no cover
     AnalyticsTaskService = None  # type: ignore
 
+try:
+    from modules.loyalty.services.points_balance_service import (
+        PointsBalanceService,
+    )
+except Exception:  # pragma: no cover
+    PointsBalanceService = None  # type: ignore
+
 
 logger = logging.getLogger(__name__)
 
@@ -118,6 +126,57 @@ class DataRetentionWorker:  # pylint: disable=too-few-public-methods
         )
         return result
 
+    # ------------------------------------------------------------------
+    # Loyalty points expiry
+    # ------------------------------------------------------------------
+    @staticmethod
+    async def expire_loyalty_points(ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Expire loyalty points whose expiry date has passed."""
+
+        if PointsBalanceService is None:
+            logger.warning("PointsBalanceService not available – skipping")
+            return {"task": "expire_loyalty_points", "skipped": True}
+
+        start = datetime.utcnow()
+
+        db = SessionLocal()
+        try:
+            result = PointsBalanceService(db).expire_points()
+        finally:
+            db.close()
+
+        result.update(
+            {
+                "task": "expire_loyalty_points",
+                "duration_ms": int((datetime.utcnow() - start).total_seconds() * 1000),
+            }
+        )
+        return result
+
+    # ------------------------------------------------------------------
+    # Log table partitions
+    # ------------------------------------------------------------------
+    @staticmethod
+    async def maintain_partitions(ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Create upcoming partitions of the time-partitioned log tables."""
+
+        start = datetime.utcnow()
+
+        db = SessionLocal()
+        try:
+            created = ensure_partitions(db)
+        finally:
+            db.close()
+
+        for table, partitions in created.items():
+            if partitions:
+                logger.info("Created %s partitions for %s", len(partitions), table)
+        return {
+            "task": "maintain_partitions",
+            "created": created,
+            "duration_ms": int((datetime.utcnow() - start).total_seconds() * 1000),
+        }
+
 
 # -------------------------------------------------------------------------
 # Arq worker configuration
@@ -167,12 +226,18 @@ WorkerSettings = {
         DataRetentionWorker.cleanup_expired_sessions,
         DataRetentionWorker.cleanup_biometric_data,
         DataRetentionWorker.cleanup_analytics,
+        DataRetentionWorker.expire_loyalty_points,
+        DataRetentionWorker.maintain_partitions,
     ],
     "cron_jobs": [
         # Daily maintenance window at 03:15 UTC
         cron(DataRetentionWorker.cleanup_expired_sessions, hour=3, minute=15),
         cron(DataRetentionWorker.cleanup_biometric_data, hour=3, minute=20),
         cron(DataRetentionWorker.cleanup_analytics, hour=3, minute=25),
+        # Points expire just after midnight UTC, once their expiry date has passed
+        cron(DataRetentionWorker.expire_loyalty_points, hour=0, minute=5),
+        # Partitions are created weeks ahead, so a missed day is harmless
+        cron(DataRetentionWorker.maintain_partitions, hour=3, minute=30),
     ],
     "on_startup": startup,
     "on_shutdown": shutdown,
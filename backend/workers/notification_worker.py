@@ -7,6 +7,7 @@ from arq import cron
 from arq.connections import RedisSettings
 
 from core.database import get_db, SessionLocal
+from core.partitioning import purge_before
 from core.config_validation import config
 from modules.orders.services.notification_retry_service import (
     NotificationRetryService, NotificationHealthChecker
@@ -136,6 +137,7 @@ class NotificationWorker:
         start_time = datetime.utcnow()
         deleted_retries = 0
         deleted_stats = 0
+        dropped_partitions = 0
         
         # Create a database session with proper cleanup
         # Using SessionLocal directly ensures we have full control over the session lifecycle
@@ -146,17 +148,18 @@ class NotificationWorker:
             # Clean up old retries (older than 7 days)
             await retry_service.cleanup_old_retries(days_to_keep=7)
             
-            # Clean up old stats (older than 30 days)
+            # Clean up old stats (older than 30 days) by dropping their partitions
             from modules.orders.models.notification_config_models import NotificationChannelStats
             cutoff_date = datetime.utcnow() - timedelta(days=30)
             
-            deleted_stats = db.query(NotificationChannelStats).filter(
-                NotificationChannelStats.stat_date < cutoff_date
-            ).delete()
+            result = purge_before(db, NotificationChannelStats, cutoff_date)
+            dropped_partitions = len(result.partitions_dropped)
+            deleted_stats = result.rows_deleted
             
-            db.commit()
-            
-            logger.info(f"Cleanup complete: {deleted_retries} retries, {deleted_stats} stats removed")
+            logger.info(
+                f"Cleanup complete: {deleted_retries} retries, {dropped_partitions} stats "
+                f"partitions dropped, {deleted_stats} stats removed"
+            )
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
         finally:
@@ -166,6 +169,7 @@ class NotificationWorker:
         return {
             "task": "cleanup_old_notifications",
             "deleted_retries": deleted_retries,
+            "dropped_stats_partitions": dropped_partitions,
             "deleted_stats": deleted_stats,
             "duration_ms": int((datetime.utcnow() - start_time).total_seconds() * 1000)
         }
@@ -12,6 +12,7 @@ from backend.core.menu_sync_models import (
     SyncDirection, SyncStatus, ConflictResolution
 )
 from backend.core.menu_sync_schemas import StartSyncRequest
+from backend.modules.pos.adapters.base_adapter import BasePOSAdapter
 from backend.modules.pos.models.pos_integration import POSIntegration
 
 
@@ -233,7 +234,8 @@ class TestMenuSyncService:
         mapping.entity_type = "category"
         mapping.aura_entity_id = 1
         mapping.pos_entity_id = "pos_123"
-        mapping.sync_hash = "test_hash"
+        mapping.aura_hash = "test_hash"
+        mapping.pos_hash = "test_hash"
         
         ctx = {"sync_job": sync_job}
         
@@ -263,7 +265,8 @@ class TestMenuSyncService:
         mapping.entity_type = "item"
         mapping.aura_entity_id = 1
         mapping.pos_entity_id = "pos_123"
-        mapping.sync_hash = "old_hash"
+        mapping.aura_hash = "old_hash"
+        mapping.pos_hash = "old_hash"
         mapping.conflict_resolution = ConflictResolution.MANUAL
         
         ctx = {"sync_job": sync_job}
@@ -468,6 +471,278 @@ class TestMenuSyncService:
         mock_db.add.assert_called_once_with(sync_log)
         mock_db.flush.assert_called_once()
 
+    def _delta_push_job(self):
+        sync_job = Mock(spec=MenuSyncJob)
+        sync_job.id = 1
+        sync_job.pos_integration_id = 1
+        sync_job.job_config = {"force_sync": False, "delta_sync": True}
+        sync_job.total_entities = 0
+        sync_job.processed_entities = 0
+        sync_job.successful_entities = 0
+        sync_job.failed_entities = 0
+        return sync_job
+
+    def _item_mapping(self, mapping_id, aura_id, pos_id, aura_hash=None, pos_hash=None):
+        mapping = Mock(spec=POSMenuMapping)
+        mapping.id = mapping_id
+        mapping.entity_type = "item"
+        mapping.aura_entity_id = aura_id
+        mapping.pos_entity_id = pos_id
+        mapping.aura_hash = aura_hash
+        mapping.pos_hash = pos_hash
+        return mapping
+
+    @pytest.mark.asyncio
+    async def test_delta_push_skips_unchanged_entities(self, sync_service, mock_db):
+        """Test delta push only batch upserts entities whose hash changed"""
+        sync_job = self._delta_push_job()
+        unchanged_data = {"id": 10, "name": "Burger", "price": 9.99}
+        changed_data = {"id": 11, "name": "Fries", "price": 3.49}
+
+        unchanged = self._item_mapping(
+            1, 10, "pos_10", sync_service._calculate_entity_hash(unchanged_data)
+        )
+        changed = self._item_mapping(2, 11, "pos_11", "stale_hash")
+        mock_db.query.return_value.filter.return_value.all.return_value = [
+            unchanged,
+            changed,
+        ]
+
+        pos_adapter = Mock()
+        pos_adapter.batch_upsert_menu_entities = AsyncMock(
+            return_value=[{"id": "pos_11"}]
+        )
+
+        with sync_service._sync_context(sync_job) as ctx, \
+             patch.object(sync_service, '_get_aura_entities_data', new_callable=AsyncMock) as mock_bulk, \
+             patch.object(sync_service, '_log_sync_operation', new_callable=AsyncMock):
+            mock_bulk.return_value = {10: unchanged_data, 11: changed_data}
+
+            await sync_service._push_entity_type(sync_job, pos_adapter, "item", ctx)
+
+        mock_bulk.assert_called_once_with("item", [10, 11])
+        pos_adapter.batch_upsert_menu_entities.assert_called_once_with(
+            "item", [("pos_11", changed_data)]
+        )
+        assert changed.aura_hash == sync_service._calculate_entity_hash(changed_data)
+        assert sync_job.processed_entities == 2
+        assert sync_job.successful_entities == 1
+        assert sync_job.sync_metrics["scanned"] == 2
+        assert sync_job.sync_metrics["changed"] == 1
+        assert sync_job.sync_metrics["transferred"] == 1
+        assert sync_job.sync_metrics["skipped"] == 1
+        assert "wall_time_ms" in sync_job.sync_metrics
+
+    @pytest.mark.asyncio
+    async def test_force_sync_pushes_unchanged_entities(self, sync_service, mock_db):
+        """Test force sync bypasses hash comparison"""
+        sync_job = self._delta_push_job()
+        sync_job.job_config = {"force_sync": True}
+        data = {"id": 10, "name": "Burger", "price": 9.99}
+        mapping = self._item_mapping(
+            1, 10, "pos_10", sync_service._calculate_entity_hash(data)
+        )
+        mock_db.query.return_value.filter.return_value.all.return_value = [mapping]
+
+        pos_adapter = Mock()
+        pos_adapter.batch_upsert_menu_entities = AsyncMock(
+            return_value=[{"id": "pos_10"}]
+        )
+
+        with sync_service._sync_context(sync_job) as ctx, \
+             patch.object(sync_service, '_get_aura_entities_data', new_callable=AsyncMock) as mock_bulk, \
+             patch.object(sync_service, '_log_sync_operation', new_callable=AsyncMock):
+            mock_bulk.return_value = {10: data}
+
+            await sync_service._push_entity_type(sync_job, pos_adapter, "item", ctx)
+
+        pos_adapter.batch_upsert_menu_entities.assert_called_once()
+        assert sync_job.sync_metrics["transferred"] == 1
+
+    @pytest.mark.asyncio
+    async def test_delta_push_falls_back_when_batch_fails(self, sync_service, mock_db):
+        """Test failed batch upsert is retried entity by entity"""
+        sync_job = self._delta_push_job()
+        data = {"id": 11, "name": "Fries", "price": 3.49}
+        mapping = self._item_mapping(2, 11, "pos_11", "stale_hash")
+        mock_db.query.return_value.filter.return_value.all.return_value = [mapping]
+
+        pos_adapter = Mock()
+        pos_adapter.batch_upsert_menu_entities = AsyncMock(
+            side_effect=Exception("batch endpoint unavailable")
+        )
+
+        with sync_service._sync_context(sync_job) as ctx, \
+             patch.object(sync_service, '_get_aura_entities_data', new_callable=AsyncMock) as mock_bulk, \
+             patch.object(sync_service, '_push_entity_to_pos', new_callable=AsyncMock) as mock_push:
+            mock_bulk.return_value = {11: data}
+
+            await sync_service._push_entity_type(sync_job, pos_adapter, "item", ctx)
+
+        mock_push.assert_called_once_with(
+            sync_job, pos_adapter, mapping, data, ctx, refresh_pos_hash=False
+        )
+        assert sync_job.successful_entities == 1
+
+    @pytest.mark.asyncio
+    async def test_delta_pull_skips_unchanged_pos_entities(self, sync_service, mock_db):
+        """Test delta pull skips POS entities matching the stored hash"""
+        sync_job = self._delta_push_job()
+        pos_data = {"id": "pos_10", "name": "Burger", "price": 9.99}
+        mapping = self._item_mapping(
+            1, 10, "pos_10", pos_hash=sync_service._calculate_entity_hash(pos_data)
+        )
+
+        with sync_service._sync_context(sync_job) as ctx, \
+             patch.object(sync_service, '_pull_entity_to_aura', new_callable=AsyncMock) as mock_pull:
+            await sync_service._process_pos_entity(
+                sync_job, "item", pos_data, Mock(), ctx, {"pos_10": mapping}
+            )
+
+        mock_pull.assert_not_called()
+        mock_db.query.assert_not_called()
+        assert sync_job.sync_metrics["skipped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_delta_push_ignores_pulled_hash(self, sync_service, mock_db):
+        """Test a POS hash recorded by pull does not hide AuraConnect changes"""
+        sync_job = self._delta_push_job()
+        data = {"id": 10, "name": "Burger", "price": 9.99}
+        mapping = self._item_mapping(
+            1, 10, "pos_10", pos_hash=sync_service._calculate_entity_hash(data)
+        )
+        mock_db.query.return_value.filter.return_value.all.return_value = [mapping]
+
+        pos_adapter = Mock()
+        pos_adapter.batch_upsert_menu_entities = AsyncMock(
+            return_value=[{"id": "pos_10"}]
+        )
+
+        with sync_service._sync_context(sync_job) as ctx, \
+             patch.object(sync_service, '_get_aura_entities_data', new_callable=AsyncMock) as mock_bulk, \
+             patch.object(sync_service, '_log_sync_operation', new_callable=AsyncMock):
+            mock_bulk.return_value = {10: data}
+
+            await sync_service._push_entity_type(sync_job, pos_adapter, "item", ctx)
+
+        pos_adapter.batch_upsert_menu_entities.assert_called_once()
+        assert mapping.aura_hash == sync_service._calculate_entity_hash(data)
+
+    @pytest.mark.asyncio
+    async def test_delta_push_fails_entities_without_results(self, sync_service, mock_db):
+        """Test entities missing from a short batch result are marked failed"""
+        sync_job = self._delta_push_job()
+        first = {"id": 10, "name": "Burger", "price": 9.99}
+        second = {"id": 11, "name": "Fries", "price": 3.49}
+        mappings = [
+            self._item_mapping(1, 10, "pos_10", "stale_hash"),
+            self._item_mapping(2, 11, "pos_11", "stale_hash"),
+        ]
+        mock_db.query.return_value.filter.return_value.all.return_value = mappings
+
+        pos_adapter = Mock()
+        pos_adapter.batch_upsert_menu_entities = AsyncMock(
+            return_value=[{"id": "pos_10"}]
+        )
+
+        with sync_service._sync_context(sync_job) as ctx, \
+             patch.object(sync_service, '_get_aura_entities_data', new_callable=AsyncMock) as mock_bulk, \
+             patch.object(sync_service, '_log_sync_operation', new_callable=AsyncMock), \
+             patch.object(sync_service, '_log_sync_error', new_callable=AsyncMock) as mock_error:
+            mock_bulk.return_value = {10: first, 11: second}
+
+            await sync_service._push_entity_type(sync_job, pos_adapter, "item", ctx)
+
+        assert sync_job.successful_entities == 1
+        assert sync_job.failed_entities == 1
+        assert sync_job.processed_entities == 2
+        assert mappings[1].aura_hash == "stale_hash"
+        mock_error.assert_called_once()
+        assert mock_error.call_args.args[1] is mappings[1]
+
+
+    @pytest.mark.asyncio
+    async def test_batch_failing_partway_keeps_created_entities(
+        self, sync_service, mock_db
+    ):
+        """Test entities created before a batch failure are not created again"""
+        sync_job = self._delta_push_job()
+        created = self._item_mapping(1, 10, "new", "stale_hash")
+        failed = self._item_mapping(2, 11, "new", "stale_hash")
+        mock_db.query.return_value.filter.return_value.all.return_value = [
+            created,
+            failed,
+        ]
+
+        # One create/update call per entity, as vendors without a batch endpoint do
+        pos_adapter = Mock()
+        pos_adapter.create_menu_item = AsyncMock(
+            side_effect=[{"id": "pos_10"}, Exception("rate limited")]
+        )
+        pos_adapter.get_menu_items = AsyncMock(return_value=[])
+        pos_adapter.batch_upsert_menu_entities = (
+            BasePOSAdapter.batch_upsert_menu_entities.__get__(pos_adapter)
+        )
+
+        with sync_service._sync_context(sync_job) as ctx, \
+             patch.object(sync_service, '_get_aura_entities_data', new_callable=AsyncMock) as mock_bulk, \
+             patch.object(sync_service, '_log_sync_operation', new_callable=AsyncMock), \
+             patch.object(sync_service, '_log_sync_error', new_callable=AsyncMock) as mock_error, \
+             patch.object(sync_service, '_push_entity_to_pos', new_callable=AsyncMock) as mock_push:
+            mock_bulk.return_value = {
+                10: {"id": 10, "name": "Burger", "price": 9.99},
+                11: {"id": 11, "name": "Fries", "price": 3.49},
+            }
+
+            await sync_service._push_entity_type(sync_job, pos_adapter, "item", ctx)
+
+        assert pos_adapter.create_menu_item.await_count == 2
+        mock_push.assert_not_called()
+        assert created.pos_entity_id == "pos_10"
+        assert failed.pos_entity_id == "new"
+        assert failed.aura_hash == "stale_hash"
+        assert sync_job.successful_entities == 1
+        assert sync_job.failed_entities == 1
+        assert mock_error.call_args.args[1:3] == (failed, "rate limited")
+
+    @pytest.mark.asyncio
+    async def test_bidirectional_after_push_is_a_no_op(self, sync_service, mock_db):
+        """Test a pushed entity is not synced back by later bidirectional runs"""
+        sync_job = self._delta_push_job()
+        aura_data = {"id": 10, "name": "Burger", "price": 9.99}
+        # POS returns the entity in its own shape
+        pos_data = {"id": "pos_10", "name": "Burger", "price_money": 999}
+        mapping = self._item_mapping(1, 10, "pos_10")
+        mock_db.query.return_value.filter.return_value.all.return_value = [mapping]
+
+        pos_adapter = Mock()
+        pos_adapter.batch_upsert_menu_entities = AsyncMock(
+            return_value=[{"id": "pos_10"}]
+        )
+        pos_adapter.get_menu_items = AsyncMock(return_value=[pos_data])
+
+        with sync_service._sync_context(sync_job) as ctx, \
+             patch.object(sync_service, '_get_aura_entities_data', new_callable=AsyncMock) as mock_bulk, \
+             patch.object(sync_service, '_get_aura_entity_data', new_callable=AsyncMock) as mock_aura, \
+             patch.object(sync_service, '_get_pos_entity_data', new_callable=AsyncMock) as mock_pos, \
+             patch.object(sync_service, '_push_entity_to_pos', new_callable=AsyncMock) as mock_push, \
+             patch.object(sync_service, '_pull_entity_to_aura', new_callable=AsyncMock) as mock_pull, \
+             patch.object(sync_service, '_log_sync_operation', new_callable=AsyncMock) as mock_log:
+            mock_bulk.return_value = {10: aura_data}
+            mock_aura.return_value = aura_data
+            mock_pos.return_value = pos_data
+
+            await sync_service._push_entity_type(sync_job, pos_adapter, "item", ctx)
+            for _ in range(2):
+                await sync_service._sync_entity_bidirectional(
+                    sync_job, pos_adapter, mapping, ctx
+                )
+
+        mock_push.assert_not_called()
+        mock_pull.assert_not_called()
+        operations = [call.args[2] for call in mock_log.call_args_list]
+        assert operations == ["push", "no_change", "no_change"]
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file